@@ -0,0 +1,189 @@
+"""
+Módulo de analítica de ventas para ComercioTech
+Calcula los reportes con pipelines de agregación que se ejecutan en el servidor:
+solo viajan por la red los resultados, no los pedidos. Cada reporte acepta un
+rango de fechas opcional [desde, hasta) sobre 'fecha_pedido' y, con incluir_archivo,
+suma también los pedidos archivados en 'pedidos_archivo' (archivado.py).
+Usa $dateTrunc y $lookup con pipeline, que requieren MongoDB 5.0 o superior
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+from datetime import datetime # Importa la clase datetime para leer las fechas de la línea de comandos.
+from conexion_db import pedidos # Importa la colección de pedidos desde el módulo 'conexion_db'.
+from consultas import TAMANO_LOTE, filtro_rango # Importa el tamaño de lote de los cursores y el filtro de rangos de fechas.
+
+PERIODOS = {"dia": "day", "semana": "week", "mes": "month"} # Unidad de $dateTrunc para cada periodo.
+
+def _filtro_fechas(desde=None, hasta=None, incluir_archivo=False): # Define la función que arma la etapa de filtro por fecha.
+    """
+    Devuelve las etapas iniciales del pipeline: un $match por 'fecha_pedido'
+    con 'desde' incluido y 'hasta' excluido, o ninguna si no hay rango.
+    Con incluir_archivo agrega los pedidos archivados del mismo rango ($unionWith).
+    """
+    filtro = filtro_rango("fecha_pedido", desde, hasta) # Rango semiabierto sobre la fecha del pedido.
+    etapas = [{"$match": filtro}] if filtro else [] # Filtra primero para usar el índice por fecha.
+    if incluir_archivo: # Si se piden también los pedidos archivados.
+        etapas = etapas + [{"$unionWith": {"coll": "pedidos_archivo", "pipeline": etapas}}] # Los filtra con el mismo rango (y el índice por fecha del archivo).
+    return etapas # Devuelve las etapas.
+
+def _agregar(pipeline): # Define la función que ejecuta un pipeline.
+    """
+    Ejecuta un pipeline sobre 'pedidos' permitiendo usar disco en las etapas que
+    superan el límite de memoria del servidor (rangos grandes).
+
+    Retorna:
+    CommandCursor: Resultados, que llegan por lotes a medida que se recorren
+    """
+    return pedidos.aggregate(pipeline, allowDiskUse=True, batchSize=TAMANO_LOTE) # Ejecuta el pipeline en el servidor.
+
+def ingresos_por_periodo(periodo="dia", desde=None, hasta=None, incluir_archivo=False): # Define el reporte de ingresos por periodo.
+    """
+    Suma los ingresos y cuenta los pedidos por día, semana (desde el lunes) o mes.
+
+    Parámetros:
+    periodo (str): 'dia', 'semana' o 'mes'
+    desde (datetime): Inicio del rango (opcional, incluido)
+    hasta (datetime): Fin del rango (opcional, excluido)
+    incluir_archivo (bool): Si es True, incluye los pedidos archivados
+
+    Retorna:
+    iterable: Diccionarios {periodo, pedidos, ingresos} ordenados por periodo
+    """
+    return _agregar(_filtro_fechas(desde, hasta, incluir_archivo) + [ # Filtra por fecha y agrupa por periodo.
+        {"$group": { # Agrupa los pedidos.
+            "_id": {"$dateTrunc": {"date": "$fecha_pedido", "unit": PERIODOS[periodo], "startOfWeek": "monday"}}, # Por el inicio del periodo de cada fecha.
+            "pedidos": {"$sum": 1}, # Cuenta los pedidos.
+            "ingresos": {"$sum": "$total_compra"} # Suma el total de cada pedido.
+        }},
+        {"$sort": {"_id": 1}}, # Ordena por periodo.
+        {"$project": {"_id": 0, "periodo": "$_id", "pedidos": 1, "ingresos": 1}} # Renombra el campo del periodo.
+    ])
+
+def productos_mas_vendidos(n=10, desde=None, hasta=None, incluir_archivo=False): # Define el reporte de productos más vendidos.
+    """
+    Obtiene los N productos con más ingresos (suma de 'total_comprado' de sus líneas).
+    Si un producto cambió de nombre, se informa el de su pedido más reciente.
+
+    Parámetros:
+    n (int): Cantidad de productos a devolver
+    desde (datetime): Inicio del rango (opcional, incluido)
+    hasta (datetime): Fin del rango (opcional, excluido)
+    incluir_archivo (bool): Si es True, incluye los pedidos archivados
+
+    Retorna:
+    iterable: Diccionarios {codigo_producto, nombre, unidades, ingresos} de mayor a menor
+    """
+    return _agregar(_filtro_fechas(desde, hasta, incluir_archivo) + [ # Filtra por fecha y agrupa por producto.
+        {"$sort": {"fecha_pedido": 1, "_id": 1}}, # Ordena los pedidos por fecha (usa el índice por fecha), así $last toma el nombre más reciente.
+        {"$unwind": "$productos"}, # Una entrada por línea de pedido.
+        {"$group": { # Agrupa las líneas.
+            "_id": "$productos.codigo_producto", # Por código de producto.
+            "nombre": {"$last": "$productos.nombre"}, # Nombre del producto en su pedido más reciente.
+            "unidades": {"$sum": "$productos.cantidad"}, # Suma las unidades vendidas.
+            "ingresos": {"$sum": "$productos.total_comprado"} # Suma el total de las líneas.
+        }},
+        {"$sort": {"ingresos": -1, "_id": 1}}, # Ordena de mayor a menor ingreso (y por código para desempatar).
+        {"$limit": n}, # Se queda con los N primeros (el servidor solo guarda N en memoria al ordenar).
+        {"$project": {"_id": 0, "codigo_producto": "$_id", "nombre": 1, "unidades": 1, "ingresos": 1}} # Renombra el código del producto.
+    ])
+
+def ingresos_por_ciudad(desde=None, hasta=None, incluir_archivo=False): # Define el reporte de ingresos por ciudad.
+    """
+    Suma los ingresos por ciudad del cliente. Primero se agrupa por cliente, así el
+    cruce con 'clientes' se hace una vez por cliente y no una vez por pedido.
+
+    Parámetros:
+    desde (datetime): Inicio del rango (opcional, incluido)
+    hasta (datetime): Fin del rango (opcional, excluido)
+    incluir_archivo (bool): Si es True, incluye los pedidos archivados
+
+    Retorna:
+    iterable: Diccionarios {ciudad, clientes, pedidos, ingresos} de mayor a menor ingreso
+    """
+    return _agregar(_filtro_fechas(desde, hasta, incluir_archivo) + [ # Filtra por fecha, agrupa por cliente y luego por ciudad.
+        {"$group": {"_id": "$codigo_cliente", "pedidos": {"$sum": 1}, "ingresos": {"$sum": "$total_compra"}}}, # Totales por cliente.
+        {"$lookup": { # Cruza con el cliente (usa el índice de 'codigo').
+            "from": "clientes", "localField": "_id", "foreignField": "codigo", # Por 'codigo'.
+            "pipeline": [{"$project": {"_id": 0, "ciudad": "$direccion.ciudad"}}], # Solo trae la ciudad.
+            "as": "cliente" # Resultado del cruce.
+        }},
+        {"$group": { # Agrupa los clientes.
+            "_id": {"$ifNull": [{"$first": "$cliente.ciudad"}, "[Sin ciudad]"]}, # Por ciudad del cliente.
+            "clientes": {"$sum": 1}, # Cuenta los clientes.
+            "pedidos": {"$sum": "$pedidos"}, # Suma los pedidos.
+            "ingresos": {"$sum": "$ingresos"} # Suma los ingresos.
+        }},
+        {"$sort": {"ingresos": -1, "_id": 1}}, # Ordena de mayor a menor ingreso.
+        {"$project": {"_id": 0, "ciudad": "$_id", "clientes": 1, "pedidos": 1, "ingresos": 1}} # Renombra la ciudad.
+    ])
+
+def tamano_medio_canasta(desde=None, hasta=None, incluir_archivo=False): # Define el reporte del tamaño medio de la canasta.
+    """
+    Calcula el promedio de líneas, unidades e importe por pedido.
+
+    Parámetros:
+    desde (datetime): Inicio del rango (opcional, incluido)
+    hasta (datetime): Fin del rango (opcional, excluido)
+    incluir_archivo (bool): Si es True, incluye los pedidos archivados
+
+    Retorna:
+    dict: {pedidos, lineas_promedio, unidades_promedio, importe_promedio} (pedidos en 0 si no hay datos)
+    """
+    resultado = next(_agregar(_filtro_fechas(desde, hasta, incluir_archivo) + [ # Filtra por fecha y agrupa todos los pedidos.
+        {"$group": { # Un solo grupo con todos los pedidos.
+            "_id": None, # Sin clave de agrupación.
+            "pedidos": {"$sum": 1}, # Cuenta los pedidos.
+            "lineas_promedio": {"$avg": {"$size": {"$ifNull": ["$productos", []]}}}, # Promedio de líneas por pedido.
+            "unidades_promedio": {"$avg": {"$sum": "$productos.cantidad"}}, # Promedio de unidades por pedido.
+            "importe_promedio": {"$avg": "$total_compra"} # Promedio del total por pedido.
+        }},
+        {"$project": {"_id": 0}} # Quita la clave vacía.
+    ]), None) # Toma el único resultado (o None si no hay pedidos).
+    return resultado or {"pedidos": 0, "lineas_promedio": 0, "unidades_promedio": 0, "importe_promedio": 0} # Devuelve el resultado o ceros.
+
+def mostrar_ingresos_por_periodo(periodo="dia", desde=None, hasta=None, incluir_archivo=False): # Define la función para imprimir los ingresos por periodo.
+    """Imprime los ingresos por periodo a medida que llegan."""
+    print(f"\n📅 Ingresos por {periodo}:") # Imprime un encabezado.
+    for fila in ingresos_por_periodo(periodo, desde, hasta, incluir_archivo): # Itera sobre cada periodo.
+        print(f"- {fila['periodo'].strftime('%Y-%m-%d')}: ${fila['ingresos']:.2f} ({fila['pedidos']} pedidos)") # Imprime el periodo, los ingresos y los pedidos.
+
+def mostrar_productos_mas_vendidos(n=10, desde=None, hasta=None, incluir_archivo=False): # Define la función para imprimir los productos más vendidos.
+    """Imprime los N productos con más ingresos."""
+    print(f"\n📦 Top {n} productos:") # Imprime un encabezado.
+    for posicion, fila in enumerate(productos_mas_vendidos(n, desde, hasta, incluir_archivo), start=1): # Itera sobre cada producto con su posición.
+        print(f"{posicion}. {fila['codigo_producto']} - {fila['nombre'] or '[Sin nombre]'}: ${fila['ingresos']:.2f} ({fila['unidades']} unidades)") # Imprime el producto y sus ventas.
+
+def mostrar_ingresos_por_ciudad(desde=None, hasta=None, incluir_archivo=False): # Define la función para imprimir los ingresos por ciudad.
+    """Imprime los ingresos por ciudad del cliente."""
+    print("\n🏙️ Ingresos por ciudad:") # Imprime un encabezado.
+    for fila in ingresos_por_ciudad(desde, hasta, incluir_archivo): # Itera sobre cada ciudad.
+        print(f"- {fila['ciudad']}: ${fila['ingresos']:.2f} ({fila['pedidos']} pedidos, {fila['clientes']} clientes)") # Imprime la ciudad y sus totales.
+
+def mostrar_tamano_medio_canasta(desde=None, hasta=None, incluir_archivo=False): # Define la función para imprimir el tamaño medio de la canasta.
+    """Imprime el promedio de líneas, unidades e importe por pedido."""
+    canasta = tamano_medio_canasta(desde, hasta, incluir_archivo) # Calcula los promedios.
+    print("\n🛒 Canasta promedio:") # Imprime un encabezado.
+    print(f"  Pedidos: {canasta['pedidos']}") # Imprime la cantidad de pedidos.
+    print(f"  Líneas por pedido: {canasta['lineas_promedio']:.2f}") # Imprime el promedio de líneas.
+    print(f"  Unidades por pedido: {canasta['unidades_promedio']:.2f}") # Imprime el promedio de unidades.
+    print(f"  Importe por pedido: ${canasta['importe_promedio']:.2f}") # Imprime el promedio del importe.
+
+# Ejecución directa: muestra un reporte
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    parser = argparse.ArgumentParser(description="Reportes de ventas de ComercioTech") # Crea el lector de argumentos.
+    parser.add_argument("reporte", choices=["ingresos", "productos", "ciudades", "canasta"]) # Reporte a mostrar.
+    parser.add_argument("--periodo", choices=list(PERIODOS), default="dia", help="Periodo del reporte de ingresos") # Periodo de agrupación.
+    parser.add_argument("--top", type=int, default=10, help="Cantidad de productos del reporte de productos") # Cantidad de productos.
+    parser.add_argument("--desde", type=datetime.fromisoformat, help="Fecha inicial incluida (AAAA-MM-DD)") # Inicio del rango.
+    parser.add_argument("--hasta", type=datetime.fromisoformat, help="Fecha final excluida (AAAA-MM-DD)") # Fin del rango.
+    parser.add_argument("--archivo", action="store_true", help="Incluye los pedidos archivados") # Incluir el archivo.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    if argumentos.reporte == "ingresos": # Si se pidió el reporte de ingresos.
+        mostrar_ingresos_por_periodo(argumentos.periodo, argumentos.desde, argumentos.hasta, argumentos.archivo) # Muestra los ingresos por periodo.
+    elif argumentos.reporte == "productos": # Si se pidió el reporte de productos.
+        mostrar_productos_mas_vendidos(argumentos.top, argumentos.desde, argumentos.hasta, argumentos.archivo) # Muestra los productos más vendidos.
+    elif argumentos.reporte == "ciudades": # Si se pidió el reporte por ciudad.
+        mostrar_ingresos_por_ciudad(argumentos.desde, argumentos.hasta, argumentos.archivo) # Muestra los ingresos por ciudad.
+    else: # Si se pidió el reporte de canasta.
+        mostrar_tamano_medio_canasta(argumentos.desde, argumentos.hasta, argumentos.archivo) # Muestra la canasta promedio.
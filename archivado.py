@@ -0,0 +1,148 @@
+"""
+Módulo de archivado de pedidos para ComercioTech
+Mueve los pedidos con 'fecha_pedido' anterior a una edad (por defecto, un año) desde
+'pedidos' a 'pedidos_archivo', por lotes. Así 'pedidos' y sus índices quedan con los
+pedidos recientes, que son los que usa casi todo el tráfico, y caben en memoria.
+Cada lote primero se copia al archivo (reemplazando por _id, así repetirlo no duplica
+nada) y recién después se borra de 'pedidos': si el proceso se corta a mitad de un
+lote, ningún pedido se pierde y basta con volver a ejecutarlo. Si el servidor admite
+transacciones, cada lote se mueve además en una sola transacción.
+Un pedido cuyo código ya usa otro pedido archivado no se mueve: queda en 'pedidos',
+se informa como conflicto y el archivado sigue con los demás.
+Las consultas leen solo 'pedidos' salvo que se pida incluir el archivo, y los
+resúmenes (resumenes.py) siguen contando los pedidos archivados
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+import time # Importa el módulo time para medir la duración del archivado.
+from datetime import datetime, timedelta # Importa datetime y timedelta para calcular la fecha de corte.
+from pymongo import ReplaceOne # Importa ReplaceOne para copiar los pedidos de forma idempotente.
+from pymongo.errors import BulkWriteError # Importa BulkWriteError para seguir con el lote si algún pedido no se puede copiar.
+from conexion_db import pedidos, pedidos_archivo, ejecutar_en_transaccion # Importa las colecciones de pedidos y las transacciones.
+from consultas import preparar_recorrido, token_pagina # Importa la paginación por clave para recorrer los pedidos por fecha.
+
+EDAD_DIAS = 365 # Edad (en días) a partir de la cual un pedido se archiva.
+TAMANO_LOTE = 1000 # Pedidos que se mueven en cada lote.
+
+def fecha_corte(dias=EDAD_DIAS, ahora=None): # Define la función que calcula la fecha de corte.
+    """
+    Devuelve la medianoche de hace 'dias' días: se archivan los pedidos anteriores a esa fecha.
+    Usar la medianoche hace que dos ejecuciones del mismo día muevan los mismos pedidos.
+    """
+    ahora = ahora or datetime.now() # Fecha de referencia (por defecto, ahora).
+    return datetime(ahora.year, ahora.month, ahora.day) - timedelta(days=dias) # Medianoche de hace 'dias' días.
+
+def _copiar(lote, sesion): # Define la función que copia un lote de pedidos al archivo.
+    """
+    Copia los pedidos al archivo reemplazando por _id (repetir la copia no duplica).
+    Sin transacción, un pedido que falla (por ejemplo, por un código que otro proceso acaba
+    de archivar) no detiene a los demás; dentro de una transacción, el error aborta el lote.
+
+    Retorna:
+    list: _id de los pedidos copiados
+    """
+    if not lote: # Si no hay pedidos que copiar.
+        return [] # bulk_write no admite una lista vacía.
+    try: # Intenta copiar el lote completo.
+        pedidos_archivo.bulk_write( # Copia el lote en una sola llamada.
+            [ReplaceOne({"_id": pedido["_id"]}, pedido, upsert=True) for pedido in lote], # Reemplaza por _id.
+            ordered=False, # Lote desordenado: el servidor puede aplicarlas en paralelo.
+            session=sesion # Usa la sesión de la transacción si existe.
+        )
+    except BulkWriteError as error: # Si algunos pedidos no se pudieron copiar.
+        if sesion is not None: # Dentro de una transacción no se puede seguir.
+            raise # Vuelve a lanzar el error (la transacción se aborta).
+        fallidos = {fallo["index"] for fallo in error.details.get("writeErrors", [])} # Posiciones de los que fallaron.
+        return [pedido["_id"] for posicion, pedido in enumerate(lote) if posicion not in fallidos] # Solo los copiados.
+    return [pedido["_id"] for pedido in lote] # Todos se copiaron.
+
+def _mover_lote(corte, tamano_lote, token=None): # Define la función que mueve un lote de pedidos al archivo.
+    """
+    Copia al archivo los pedidos más antiguos anteriores al corte (hasta 'tamano_lote',
+    después de la posición 'token') y luego los borra de 'pedidos'. El índice
+    fecha_pedido/_id sirve la búsqueda. Los pedidos cuyo código ya usa otro pedido
+    archivado no se mueven (conflictos) y el recorrido sigue después de ellos, así que
+    no bloquean los lotes siguientes.
+    Sin transacciones, un pedido que se elimina mientras se mueve no debe revivir en el
+    archivo: tras copiar, se quitan del archivo los que ya no están en 'pedidos', y el
+    borrado usa los _id copiados y el mismo corte (eliminar_pedido borra además la copia
+    archivada del pedido que elimina).
+
+    Retorna:
+    dict: Pedidos movidos, pedidos en conflicto y token para continuar (None si no quedan)
+    """
+    def mover(sesion): # Define la función que mueve el lote dentro de la transacción.
+        filtro, _, orden = preparar_recorrido({"fecha_pedido": {"$lt": corte}}, None, "fecha_pedido", token) # Pedidos anteriores al corte, después del token.
+        lote = list(pedidos.find(filtro, sort=orden, limit=tamano_lote, session=sesion)) # Lee los pedidos más antiguos.
+        if not lote: # Si no quedan pedidos por archivar.
+            return {"leidos": 0, "movidos": 0, "conflictos": 0, "token": None} # No hay nada que mover.
+        usados = {archivado.get("codigo_pedido") for archivado in pedidos_archivo.find( # Códigos que ya usa otro pedido archivado.
+            {"codigo_pedido": {"$in": [pedido.get("codigo_pedido") for pedido in lote]}, "_id": {"$nin": [pedido["_id"] for pedido in lote]}}, # Mismo código, otro pedido.
+            {"_id": 0, "codigo_pedido": 1}, session=sesion # Solo el código (lo sirve el índice único).
+        )}
+        pendientes = [pedido for pedido in lote if pedido.get("codigo_pedido") not in usados] # Pedidos sin conflicto.
+        copiados = _copiar(pendientes, sesion) # Copia los que no tienen conflicto.
+        fallidos = len(pendientes) - len(copiados) # Los que chocaron con un código archivado mientras tanto.
+        if sesion is None and copiados: # Sin transacción, otro proceso pudo eliminar alguno después de leerlo.
+            presentes = {pedido["_id"] for pedido in pedidos.find({"_id": {"$in": copiados}}, {"_id": 1})} # Los que siguen en 'pedidos'.
+            eliminados = [_id for _id in copiados if _id not in presentes] # Los que se eliminaron mientras tanto.
+            if eliminados: # Si alguno se eliminó.
+                pedidos_archivo.delete_many({"_id": {"$in": eliminados}}) # Quita sus copias (no deben revivir en el archivo).
+            copiados = [_id for _id in copiados if _id in presentes] # Solo se borran los que siguen.
+        borrados = pedidos.delete_many({"_id": {"$in": copiados}, "fecha_pedido": {"$lt": corte}}, session=sesion).deleted_count if copiados else 0 # Borra de 'pedidos' solo lo que se copió.
+        if sesion is None and borrados < len(copiados): # Sin transacción, alguno cambió de fecha o se eliminó mientras tanto.
+            quedan = [pedido["_id"] for pedido in pedidos.find({"_id": {"$in": copiados}}, {"_id": 1})] # Los que siguen en 'pedidos'.
+            if quedan: # Si alguno sigue (ya no es anterior al corte).
+                pedidos_archivo.delete_many({"_id": {"$in": quedan}}) # Quita sus copias (el pedido sigue activo).
+        return { # Devuelve el resultado del lote.
+            "leidos": len(lote), # Pedidos leídos en el lote.
+            "movidos": borrados, # Pedidos que pasaron al archivo.
+            "conflictos": sum(1 for pedido in lote if pedido.get("codigo_pedido") in usados) + fallidos, # Pedidos con un código ya archivado.
+            "token": token_pagina(lote[-1], "fecha_pedido") if len(lote) == tamano_lote else None # Continúa después del último leído.
+        }
+
+    return ejecutar_en_transaccion(mover) # Mueve el lote (en una transacción si el servidor lo admite).
+
+def archivar(dias=EDAD_DIAS, tamano_lote=TAMANO_LOTE, maximo=None): # Define la función principal del archivado.
+    """
+    Mueve a 'pedidos_archivo' los pedidos con fecha anterior a fecha_corte(dias), por lotes.
+    Los pedidos sin fecha no se archivan, y los que tienen un código ya usado por otro
+    pedido archivado quedan en 'pedidos' (se cuentan como conflictos).
+
+    Parámetros:
+    dias (int): Edad mínima (en días) de los pedidos a archivar
+    tamano_lote (int): Pedidos por lote (una transacción por lote)
+    maximo (int): Cantidad máxima de pedidos a mover en esta ejecución (opcional, por defecto todos)
+
+    Retorna:
+    dict: Fecha de corte, pedidos movidos, conflictos, lotes y segundos
+    """
+    corte = fecha_corte(dias) # Fecha de corte del archivado.
+    inicio = time.perf_counter() # Marca el inicio del archivado.
+    movidos = conflictos = lotes = 0 # Contadores del archivado.
+    token = None # Posición del recorrido (None: desde el pedido más antiguo).
+    while maximo is None or movidos < maximo: # Mientras no se alcance el máximo.
+        resultado = _mover_lote(corte, tamano_lote if maximo is None else min(tamano_lote, maximo - movidos), token) # Mueve el siguiente lote.
+        movidos += resultado["movidos"] # Cuenta los pedidos movidos.
+        conflictos += resultado["conflictos"] # Cuenta los conflictos.
+        lotes += 1 if resultado["leidos"] else 0 # Cuenta el lote si leyó pedidos.
+        token = resultado["token"] # Sigue después del último pedido leído.
+        if token is None: # Si no quedan pedidos por archivar.
+            break # Termina.
+    return {"corte": corte, "movidos": movidos, "conflictos": conflictos, "lotes": lotes, "segundos": time.perf_counter() - inicio} # Devuelve el resultado.
+
+# Ejecución directa: python archivado.py [--dias 365] [--lote 1000] [--maximo N]
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    parser = argparse.ArgumentParser(description="Mueve los pedidos antiguos de 'pedidos' a 'pedidos_archivo'") # Crea el lector de argumentos.
+    parser.add_argument("--dias", type=int, default=EDAD_DIAS, help="Edad mínima (en días) de los pedidos a archivar") # Edad de corte.
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Pedidos por lote") # Tamaño del lote.
+    parser.add_argument("--maximo", type=int, help="Cantidad máxima de pedidos a mover en esta ejecución") # Límite de la ejecución.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    from indices import asegurar_indices # Importa la función que crea los índices.
+    asegurar_indices() # Crea los índices del archivo si es la primera vez.
+    resultado = archivar(argumentos.dias, argumentos.lote, argumentos.maximo) # Ejecuta el archivado.
+    print(f"✅ Archivado terminado en {resultado['segundos']:.1f} s") # Imprime la duración.
+    print(f"  Pedidos anteriores al {resultado['corte'].strftime('%d/%m/%Y')} movidos: {resultado['movidos']} ({resultado['lotes']} lotes)") # Imprime los pedidos movidos.
+    if resultado["conflictos"]: # Si algún pedido no se pudo mover.
+        print(f"⚠️ {resultado['conflictos']} pedidos no se movieron: su código ya existe en el archivo.") # Avisa de los conflictos.
@@ -0,0 +1,178 @@
+"""
+Módulo de benchmark de operaciones para ComercioTech
+Mide cada función pública de operaciones.py sobre datos de generador_datos.py:
+latencia (p50, p95, p99), operaciones por segundo y viajes al servidor por llamada
+(contados con el monitoreo de comandos de pymongo). Escribe los resultados en un
+archivo JSON para comparar versiones.
+Con --simulado usa mongomock (un MongoDB en memoria, dependencia opcional) en lugar
+de un mongod; en ese modo no hay viajes al servidor que contar.
+Como vacía las colecciones antes de generar los datos, trabaja siempre en su propia
+base de datos (BASE_BENCHMARK) y no en la de MONGO_DB; otra base se usa solo si se
+indica con --base
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+import contextlib # Importa contextlib para silenciar la salida por consola de las operaciones.
+import io # Importa io para descartar la salida por consola.
+import json # Importa json para escribir los resultados.
+import os # Importa os para elegir la base de datos del benchmark.
+import platform # Importa platform para registrar la versión de Python.
+import random # Importa random para elegir los argumentos de cada llamada.
+import time # Importa time para medir la duración de cada llamada.
+from datetime import datetime # Importa la clase datetime para registrar la fecha de la medición.
+import pymongo # Importa pymongo para registrar su versión.
+from pymongo import monitoring # Importa el monitoreo de comandos de pymongo.
+import conexion_db # Importa el módulo de conexión (para usar el cliente simulado si se pide).
+import generador_datos # Importa el generador de datos de prueba.
+import operaciones # Importa las operaciones a medir.
+from indices import asegurar_indices # Importa la función que crea los índices.
+
+class ContadorComandos(monitoring.CommandListener): # Define el oyente que cuenta los comandos enviados al servidor.
+    """Cuenta los comandos que el cliente envía al servidor (un comando = un viaje de ida y vuelta)."""
+
+    def __init__(self): # Define el constructor.
+        self.comandos = 0 # Comandos enviados.
+
+    def started(self, evento): # Se llama cuando se envía un comando.
+        self.comandos += 1 # Cuenta el comando.
+
+    def succeeded(self, evento): # Se llama cuando un comando termina bien.
+        pass # No hace falta hacer nada.
+
+    def failed(self, evento): # Se llama cuando un comando falla.
+        pass # No hace falta hacer nada.
+
+BASE_BENCHMARK = "comerciotech_benchmark" # Base de datos propia del benchmark (se vacía en cada ejecución).
+
+contador = ContadorComandos() # Oyente compartido.
+monitoring.register(contador) # Se registra antes de crear el cliente (el cliente se crea en el primer uso).
+
+def percentil(valores_ordenados, porcentaje): # Define la función que calcula un percentil.
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    posicion = max(0, min(len(valores_ordenados) - 1, round(porcentaje / 100 * len(valores_ordenados)) - 1)) # Posición del percentil.
+    return valores_ordenados[posicion] # Devuelve el valor.
+
+def medir(nombre, llamada, repeticiones, simulado=False): # Define la función que mide una operación.
+    """
+    Ejecuta una operación varias veces, sin mostrar su salida por consola.
+
+    Parámetros:
+    nombre (str): Nombre de la operación
+    llamada (callable): Función que recibe el número de repetición y hace una llamada
+    repeticiones (int): Cantidad de llamadas
+    simulado (bool): Si es True, no se cuentan los viajes (mongomock no emite eventos)
+
+    Retorna:
+    dict: Métricas de la operación (milisegundos, operaciones por segundo y viajes por llamada)
+    """
+    duraciones = [] # Duración de cada llamada en segundos.
+    comandos_antes = contador.comandos # Comandos enviados antes de medir.
+    with contextlib.redirect_stdout(io.StringIO()): # Descarta lo que imprimen las operaciones.
+        for repeticion in range(repeticiones): # Itera sobre cada llamada.
+            inicio = time.perf_counter() # Instante de inicio.
+            llamada(repeticion) # Ejecuta la operación.
+            duraciones.append(time.perf_counter() - inicio) # Guarda la duración.
+    duraciones.sort() # Ordena para calcular percentiles.
+    total = sum(duraciones) # Tiempo total.
+    return { # Devuelve las métricas.
+        "operacion": nombre, # Nombre de la operación.
+        "llamadas": repeticiones, # Cantidad de llamadas.
+        "p50_ms": percentil(duraciones, 50) * 1000, # Mediana.
+        "p95_ms": percentil(duraciones, 95) * 1000, # Percentil 95.
+        "p99_ms": percentil(duraciones, 99) * 1000, # Percentil 99.
+        "ops_por_segundo": repeticiones / total if total else 0.0, # Llamadas por segundo.
+        "viajes_por_llamada": None if simulado else (contador.comandos - comandos_antes) / repeticiones # Comandos por llamada.
+    }
+
+def casos(aleatorio, volumen): # Define la función que arma las operaciones a medir.
+    """
+    Arma la lista de operaciones a medir, en un orden en que cada una tiene datos:
+    primero las lecturas, luego las inserciones y al final las eliminaciones de lo insertado.
+
+    Parámetros:
+    aleatorio (random.Random): Generador con semilla para elegir los argumentos
+    volumen (dict): Cantidades generadas (clientes, productos, pedidos)
+
+    Retorna:
+    list: Tuplas (nombre, función que recibe el número de repetición)
+    """
+    cliente = lambda: generador_datos.codigo_cliente(aleatorio.randint(1, volumen["clientes"])) # Código de un cliente generado al azar.
+    producto = lambda: generador_datos.codigo_producto(aleatorio.randint(1, volumen["productos"])) # Código de un producto generado al azar.
+    ciudad = lambda: aleatorio.choice(generador_datos.CIUDADES) # Ciudad al azar.
+    nombre = lambda: aleatorio.choice(generador_datos.NOMBRES) # Nombre al azar.
+    return [
+        ("consultar_clientes_por_ciudad", lambda i: operaciones.consultar_clientes_por_ciudad(ciudad(), tamano_pagina=20)), # Primera página de una ciudad.
+        ("consultar_clientes_por_fecha", lambda i: operaciones.consultar_clientes_por_fecha(generador_datos.FECHA_BASE.replace(day=aleatorio.randint(1, 28)), tamano_pagina=20)), # Primera página de un día.
+        ("consultar_clientes_por_nombre", lambda i: operaciones.consultar_clientes_por_nombre(nombre(), tamano_pagina=20)), # Primera página de un nombre.
+        ("consultar_productos_por_nombre", lambda i: operaciones.consultar_productos_por_nombre(aleatorio.choice(generador_datos.PRODUCTOS_BASE), tamano_pagina=20, prefijo=True)), # Primera página de un prefijo.
+        ("consultar_producto_por_codigo", lambda i: operaciones.consultar_producto_por_codigo(producto())), # Un producto (pasa por la caché).
+        ("consultar_pedidos_por_cliente", lambda i: operaciones.consultar_pedidos_por_cliente(cliente(), tamano_pagina=20)), # Primera página de pedidos de un cliente.
+        ("actualizar_precio_producto", lambda i: operaciones.actualizar_precio_producto(producto(), round(aleatorio.uniform(0.5, 200), 2))), # Cambio de precio.
+        ("insertar_cliente", lambda i: operaciones.insertar_cliente(f"BEN-CLI-{i}", nombre(), "Benchmark", f"ben{i}@correo.com", "600000000", {"calle": "Calle 1", "numero": "1", "ciudad": ciudad()})), # Cliente nuevo.
+        ("insertar_producto", lambda i: operaciones.insertar_producto(f"BEN-PROD-{i}", f"Producto benchmark {i}", 10.0, 1000000)), # Producto nuevo (con stock de sobra).
+        ("insertar_pedido", lambda i: operaciones.insertar_pedido(f"BEN-PED-{i}", f"BEN-CLI-{i}", f"BEN-PROD-{i}", 1)), # Pedido de una línea.
+        ("insertar_pedido_multiple", lambda i: operaciones.insertar_pedido_multiple(f"BEN-PEDM-{i}", f"BEN-CLI-{i}", [(f"BEN-PROD-{i}", 1), (producto(), 1), (producto(), 1)])), # Pedido de tres líneas.
+        ("eliminar_pedido", lambda i: operaciones.eliminar_pedido(f"BEN-PED-{i}")), # Elimina el pedido de una línea.
+        ("eliminar_cliente", lambda i: operaciones.eliminar_cliente(f"BEN-CLI-{i}")), # Elimina el cliente y su pedido de tres líneas.
+        ("eliminar_producto", lambda i: operaciones.eliminar_producto(f"BEN-PROD-{i}")), # Elimina el producto.
+    ]
+
+def ejecutar(repeticiones=200, clientes=1000, productos=200, pedidos=5000, semilla=generador_datos.SEMILLA, simulado=False, salida=None, base=BASE_BENCHMARK): # Define la función principal del benchmark.
+    """
+    Genera los datos (vaciando antes las colecciones de 'base'), mide cada operación y guarda los resultados.
+
+    Parámetros:
+    repeticiones (int): Llamadas por operación
+    clientes, productos, pedidos (int): Volumen de datos generados
+    semilla (int): Semilla de los datos y de los argumentos de cada llamada
+    simulado (bool): Si es True, usa mongomock en lugar de un mongod
+    salida (str): Ruta del archivo JSON de resultados (opcional)
+    base (str): Base de datos donde se generan los datos y se mide (por defecto BASE_BENCHMARK, nunca la de MONGO_DB)
+
+    Retorna:
+    dict: Resultados (datos de la ejecución y métricas por operación)
+    """
+    os.environ["MONGO_DB"] = base # Todas las colecciones se resolverán en la base del benchmark.
+    conexion_db._colecciones.clear() # Olvida las referencias a colecciones de otra base (si ya se usaron).
+    if simulado: # Si se pide el servidor simulado.
+        import mongomock # Importa mongomock solo en este modo (dependencia opcional).
+        conexion_db.MongoClient = mongomock.MongoClient # El cliente compartido se creará con mongomock.
+        conexion_db._soporta_transacciones = False # mongomock no responde el comando 'hello' ni admite transacciones.
+    volumen = generador_datos.poblar(clientes, productos, pedidos, semilla, limpiar=True) # Genera los datos de prueba.
+    asegurar_indices() # Crea los índices (como en el uso normal).
+    aleatorio = random.Random(semilla) # Generador con semilla para los argumentos.
+    resultados = { # Datos de la ejecución.
+        "fecha": datetime.now().isoformat(timespec="seconds"), # Fecha de la medición.
+        "python": platform.python_version(), # Versión de Python.
+        "pymongo": pymongo.version, # Versión de pymongo.
+        "simulado": simulado, # Si se usó mongomock.
+        "base": base, # Base de datos usada.
+        "semilla": semilla, # Semilla usada.
+        "volumen": volumen, # Documentos generados por colección.
+        "repeticiones": repeticiones, # Llamadas por operación.
+        "operaciones": [medir(nombre, llamada, repeticiones, simulado) for nombre, llamada in casos(aleatorio, volumen)] # Métricas por operación.
+    }
+    if salida: # Si se indicó un archivo de salida.
+        with open(salida, "w", encoding="utf-8") as archivo: # Abre el archivo de resultados.
+            json.dump(resultados, archivo, indent=2) # Escribe los resultados.
+    return resultados # Devuelve los resultados.
+
+# Ejecución directa: python benchmark.py [--repeticiones N] [--simulado] [--salida resultados.json] [--base comerciotech_benchmark]
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    parser = argparse.ArgumentParser(description=f"Benchmark de operaciones de ComercioTech (vacía y regenera los datos de la base {BASE_BENCHMARK})") # Crea el lector de argumentos.
+    parser.add_argument("--repeticiones", type=int, default=200, help="Llamadas por operación") # Llamadas por operación.
+    parser.add_argument("--clientes", type=int, default=1000, help="Clientes generados") # Cantidad de clientes.
+    parser.add_argument("--productos", type=int, default=200, help="Productos generados") # Cantidad de productos.
+    parser.add_argument("--pedidos", type=int, default=5000, help="Pedidos generados") # Cantidad de pedidos.
+    parser.add_argument("--semilla", type=int, default=generador_datos.SEMILLA, help="Semilla") # Semilla.
+    parser.add_argument("--simulado", action="store_true", help="Usa mongomock en lugar de un mongod") # Servidor simulado.
+    parser.add_argument("--salida", default="benchmark.json", help="Archivo JSON de resultados") # Archivo de salida.
+    parser.add_argument("--base", default=BASE_BENCHMARK, help="Base de datos a vaciar y usar (por defecto la propia del benchmark)") # Base de datos del benchmark.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    resultados = ejecutar(argumentos.repeticiones, argumentos.clientes, argumentos.productos, argumentos.pedidos, argumentos.semilla, argumentos.simulado, argumentos.salida, argumentos.base) # Ejecuta el benchmark.
+    print(f"{'Operación':32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'viajes':>7}") # Imprime el encabezado de la tabla.
+    for fila in resultados["operaciones"]: # Itera sobre cada operación medida.
+        viajes = "-" if fila["viajes_por_llamada"] is None else f"{fila['viajes_por_llamada']:.1f}" # Formatea los viajes.
+        print(f"{fila['operacion']:32} {fila['p50_ms']:9.2f} {fila['p95_ms']:9.2f} {fila['p99_ms']:9.2f} {fila['ops_por_segundo']:9.0f} {viajes:>7}") # Imprime las métricas.
+    print(f"✅ Resultados guardados en {argumentos.salida}") # Indica dónde se guardaron los resultados.
@@ -0,0 +1,100 @@
+"""
+Módulo de caché de productos para ComercioTech
+Guarda en memoria los productos leídos, por código de producto, con un tamaño
+máximo (se expulsa el menos usado) y un tiempo de vida por entrada.
+Las operaciones que modifican productos invalidan sus entradas.
+El stock guardado es solo informativo: las reservas siempre se hacen en el servidor
+"""
+
+import threading # Importa threading para proteger la caché entre hilos y escuchar cambios en segundo plano.
+import time # Importa time para medir el tiempo de vida de las entradas.
+from collections import OrderedDict # Importa OrderedDict para mantener el orden de uso (LRU).
+from pymongo.errors import PyMongoError # Importa la excepción base de pymongo.
+
+CAPACIDAD = 1000 # Cantidad máxima de productos en la caché.
+TTL_SEGUNDOS = 30.0 # Tiempo de vida de cada entrada (limita lo desactualizada que puede estar entre procesos).
+
+class CacheLRU: # Define la caché con expulsión del menos usado y tiempo de vida.
+    """
+    Caché en memoria con capacidad máxima (LRU) y tiempo de vida por entrada (TTL).
+    Lleva contadores de aciertos, fallos y expulsiones.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD, ttl=TTL_SEGUNDOS): # Define el constructor.
+        self.capacidad = capacidad # Guarda la capacidad máxima.
+        self.ttl = ttl # Guarda el tiempo de vida en segundos.
+        self._entradas = OrderedDict() # Entradas (clave -> (vencimiento, valor)), de la menos a la más usada.
+        self._candado = threading.Lock() # Candado para usar la caché desde varios hilos.
+        self.aciertos = 0 # Lecturas servidas desde la caché.
+        self.fallos = 0 # Lecturas que no estaban (o estaban vencidas).
+        self.expulsiones = 0 # Entradas expulsadas por falta de espacio.
+
+    def obtener(self, clave): # Define la función que lee una entrada.
+        """Devuelve el valor guardado para la clave, o None si no está o venció."""
+        with self._candado: # Protege la caché.
+            entrada = self._entradas.get(clave) # Busca la entrada.
+            if entrada is None or entrada[0] < time.monotonic(): # Si no está o ya venció.
+                self._entradas.pop(clave, None) # Descarta la entrada vencida (si existía).
+                self.fallos += 1 # Cuenta el fallo.
+                return None # Indica que no está en caché.
+            self._entradas.move_to_end(clave) # Marca la entrada como la más usada.
+            self.aciertos += 1 # Cuenta el acierto.
+            return entrada[1] # Devuelve el valor guardado.
+
+    def guardar(self, clave, valor): # Define la función que guarda una entrada.
+        """Guarda un valor; si la caché está llena, expulsa la entrada menos usada."""
+        with self._candado: # Protege la caché.
+            self._entradas[clave] = (time.monotonic() + self.ttl, valor) # Guarda el valor con su vencimiento.
+            self._entradas.move_to_end(clave) # Marca la entrada como la más usada.
+            while len(self._entradas) > self.capacidad: # Mientras se supere la capacidad.
+                self._entradas.popitem(last=False) # Expulsa la entrada menos usada.
+                self.expulsiones += 1 # Cuenta la expulsión.
+
+    def invalidar(self, *claves): # Define la función que descarta entradas.
+        """Descarta las entradas de las claves indicadas."""
+        with self._candado: # Protege la caché.
+            for clave in claves: # Itera sobre cada clave.
+                self._entradas.pop(clave, None) # Descarta la entrada si existe.
+
+    def limpiar(self): # Define la función que vacía la caché.
+        """Descarta todas las entradas."""
+        with self._candado: # Protege la caché.
+            self._entradas.clear() # Vacía la caché.
+
+    def estadisticas(self): # Define la función que informa los contadores.
+        """
+        Retorna:
+        dict: Tamaño actual, aciertos, fallos y expulsiones
+        """
+        with self._candado: # Protege la caché.
+            return {"tamano": len(self._entradas), "aciertos": self.aciertos, "fallos": self.fallos, "expulsiones": self.expulsiones} # Devuelve los contadores.
+
+cache = CacheLRU() # Caché de productos compartida por el proceso.
+
+def escuchar_cambios(coleccion): # Define la función que mantiene la caché al día con otros procesos.
+    """
+    Inicia un hilo que escucha el change stream de 'productos' e invalida las entradas
+    modificadas por otros procesos. Requiere un replica set; en un servidor independiente
+    el hilo termina y la caché sigue funcionando solo con el tiempo de vida.
+
+    Parámetros:
+    coleccion (Collection): Colección 'productos'
+
+    Retorna:
+    threading.Thread: Hilo que escucha los cambios
+    """
+    def escuchar(): # Define la función que corre en el hilo.
+        try: # Intenta abrir el change stream.
+            with coleccion.watch(full_document="updateLookup") as cambios: # Abre el change stream (con el documento completo en las actualizaciones).
+                for cambio in cambios: # Itera sobre cada cambio a medida que llega.
+                    documento = cambio.get("fullDocument") # Documento después del cambio (no existe en las eliminaciones).
+                    if documento and documento.get("codigo_producto"): # Si se conoce el código del producto.
+                        cache.invalidar(documento["codigo_producto"]) # Invalida solo ese producto.
+                    else: # Si es una eliminación (solo trae el _id).
+                        cache.limpiar() # Vacía la caché (las eliminaciones son poco frecuentes).
+        except PyMongoError as error: # Si el servidor no admite change streams o se pierde la conexión.
+            print(f"⚠️ Caché de productos sin change stream: {error}") # Informa que solo se usará el tiempo de vida.
+
+    hilo = threading.Thread(target=escuchar, name="cache-productos", daemon=True) # Crea un hilo que no impide cerrar el programa.
+    hilo.start() # Inicia el hilo.
+    return hilo # Devuelve el hilo.
@@ -0,0 +1,207 @@
+"""
+Módulo para la carga masiva de datos en ComercioTech
+Lee archivos CSV o JSONL fila a fila (sin cargarlos completos en memoria),
+construye los documentos con la misma estructura que operaciones.py
+y los inserta en lotes con insert_many
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+import csv # Importa el módulo csv para leer archivos CSV.
+import json # Importa el módulo json para leer archivos JSONL.
+import sys # Importa el módulo sys para leer desde la entrada estándar.
+import time # Importa el módulo time para medir la duración de la carga.
+from datetime import datetime # Importa la clase datetime para convertir fechas.
+from itertools import groupby # Importa groupby para agrupar las líneas consecutivas de un mismo pedido.
+from pymongo.errors import BulkWriteError # Importa la excepción que lanza insert_many cuando fallan algunos documentos.
+from conexion_db import clientes, productos, pedidos # Importa las colecciones desde el módulo 'conexion_db'.
+from operaciones import construir_cliente, construir_producto, construir_linea, construir_pedido # Importa las funciones que arman los documentos.
+from resumenes import actualizar_resumenes, completar_resumenes # Importa la actualización de los resúmenes de ventas y el cálculo de los resúmenes de clientes.
+
+TAMANO_LOTE = 1000 # Cantidad de documentos por defecto en cada insert_many.
+CODIGO_DUPLICADO = 11000 # Código de error de MongoDB para claves duplicadas.
+
+def leer_filas(ruta, formato=None): # Define el generador que lee las filas de un archivo.
+    """
+    Lee un archivo CSV o JSONL y entrega las filas de a una (generador).
+
+    Parámetros:
+    ruta (str): Ruta del archivo, o '-' para leer desde la entrada estándar
+    formato (str): 'csv' o 'jsonl' (por defecto se deduce de la extensión)
+
+    Retorna:
+    generator: Diccionarios con los campos de cada fila
+    """
+    formato = formato or ("jsonl" if ruta.endswith((".jsonl", ".json")) else "csv") # Deduce el formato a partir de la extensión si no se indicó.
+    archivo = sys.stdin if ruta == "-" else open(ruta, newline="", encoding="utf-8") # Abre el archivo (o usa la entrada estándar).
+    try: # Asegura que el archivo se cierre al terminar.
+        if formato == "csv": # Si el archivo es CSV.
+            yield from csv.DictReader(archivo) # Entrega cada fila como diccionario usando la cabecera.
+        else: # Si el archivo es JSONL.
+            for linea in archivo: # Itera sobre cada línea del archivo.
+                if linea.strip(): # Ignora las líneas vacías.
+                    yield json.loads(linea) # Entrega la línea convertida a diccionario.
+    finally: # Se ejecuta siempre al terminar o al abandonar el generador.
+        if archivo is not sys.stdin: # Si se abrió un archivo.
+            archivo.close() # Cierra el archivo.
+
+def _leer_fecha(valor): # Define la función para convertir una fecha de texto.
+    """Convierte una fecha ISO (texto) a datetime; devuelve None si viene vacía."""
+    if not valor: # Si la fecha no viene.
+        return None # Devuelve None (el constructor usará la fecha actual).
+    return valor if isinstance(valor, datetime) else datetime.fromisoformat(valor) # Convierte el texto ISO a datetime.
+
+def _leer_numero(valor, tipo=float): # Define la función para convertir un número de texto.
+    """Convierte un número que puede venir como texto con coma decimal."""
+    return tipo(str(valor).replace(",", ".")) # Reemplaza la coma por punto y convierte al tipo pedido.
+
+def cliente_desde_fila(fila): # Define la función que arma un cliente a partir de una fila.
+    """
+    Construye el documento de un cliente a partir de una fila.
+    La dirección puede venir como diccionario 'direccion' (JSONL) o en columnas calle/numero/ciudad/pais (CSV).
+    """
+    direccion = fila.get("direccion") or { # Usa la dirección anidada o la arma desde las columnas.
+        campo: fila[campo] for campo in ("calle", "numero", "ciudad", "pais") if fila.get(campo) # Solo incluye las columnas que traen valor.
+    }
+    cliente = construir_cliente( # Construye el documento con la estructura unificada.
+        fila["codigo"], fila["nombre"], fila["apellidos"], # Código, nombre y apellidos (obligatorios).
+        fila.get("email"), fila.get("telefono"), direccion, # Datos de contacto y dirección.
+        _leer_fecha(fila.get("fecha_registro")) # Fecha de registro (opcional).
+    )
+    del cliente["resumen_pedidos"] # Sin resumen: sus pedidos pueden haberse cargado antes (se calcula al insertar el lote).
+    return cliente # Devuelve el documento.
+
+def producto_desde_fila(fila): # Define la función que arma un producto a partir de una fila.
+    """Construye el documento de un producto a partir de una fila."""
+    return construir_producto( # Construye el documento del producto.
+        fila.get("codigo_producto") or fila["codigo"], # Acepta 'codigo_producto' o 'codigo'.
+        fila["nombre"], # Nombre del producto.
+        _leer_numero(fila["precio"]), # Precio como número decimal.
+        _leer_numero(fila.get("stock") or 0, int), # Stock como entero (por defecto 0).
+        fila.get("estado") or "activo" # Estado (por defecto "activo").
+    )
+
+def _linea_desde_fila(fila): # Define la función que arma una línea de pedido a partir de una fila.
+    """Construye una línea de pedido; el nombre y el precio unitario son obligatorios en datos históricos."""
+    return construir_linea( # Construye la línea con su total.
+        fila["codigo_producto"], fila["nombre"], # Código y nombre del producto.
+        _leer_numero(fila["cantidad"], int), _leer_numero(fila["precio_unitario"]) # Cantidad y precio unitario.
+    )
+
+def pedidos_desde_filas(filas): # Define el generador que arma pedidos a partir de filas.
+    """
+    Agrupa las filas en pedidos y entrega (cantidad_de_filas, pedido o None si es inválido).
+    Una fila JSONL con el arreglo 'productos' es un pedido completo; si no, cada fila es una
+    línea y las filas consecutivas con el mismo 'codigo_pedido' forman un pedido.
+    """
+    for codigo_pedido, grupo in groupby(filas, key=lambda fila: fila.get("codigo_pedido")): # Agrupa las filas consecutivas por código de pedido.
+        grupo = list(grupo) # Materializa solo las filas de este pedido.
+        try: # Intenta construir el pedido.
+            if len(grupo) == 1 and isinstance(grupo[0].get("productos"), list): # Si es un pedido completo en una sola fila.
+                cabecera, lineas = grupo[0], [_linea_desde_fila(linea) for linea in grupo[0]["productos"]] # Toma las líneas del arreglo.
+            else: # Si cada fila es una línea del pedido.
+                cabecera, lineas = grupo[0], [_linea_desde_fila(fila) for fila in grupo] # Construye una línea por fila.
+            if not codigo_pedido or not lineas: # Si falta el código o no hay líneas.
+                raise ValueError("pedido sin código o sin productos") # Marca el pedido como inválido.
+            pedido = construir_pedido( # Construye el documento del pedido.
+                codigo_pedido, cabecera["codigo_cliente"], lineas, # Código, cliente y líneas.
+                _leer_fecha(cabecera.get("fecha_pedido")), cabecera.get("metodo_pago") or "desconocido" # Fecha y método de pago.
+            )
+        except (KeyError, ValueError, TypeError): # Si falta un campo o un valor no se puede convertir.
+            pedido = None # Marca el pedido como inválido.
+        yield len(grupo), pedido # Entrega la cantidad de filas consumidas y el pedido.
+
+def _documentos(tipo, filas): # Define el generador que convierte filas en documentos del tipo pedido.
+    """Entrega (cantidad_de_filas, documento o None si la fila es inválida) para el tipo indicado."""
+    if tipo == "pedidos": # Los pedidos pueden ocupar varias filas.
+        yield from pedidos_desde_filas(filas) # Delega en el agrupador de pedidos.
+        return # Termina el generador.
+    construir = cliente_desde_fila if tipo == "clientes" else producto_desde_fila # Elige la función constructora.
+    for fila in filas: # Itera sobre cada fila.
+        try: # Intenta construir el documento.
+            yield 1, construir(fila) # Entrega el documento construido.
+        except (KeyError, ValueError, TypeError): # Si falta un campo o un valor no se puede convertir.
+            yield 1, None # Marca la fila como inválida.
+
+def _insertar_lote(coleccion, lote, estadisticas): # Define la función que inserta un lote y actualiza las estadísticas.
+    """
+    Inserta un lote desordenado; cuenta insertados, duplicados y rechazados.
+
+    Retorna:
+    list: Documentos del lote que sí se insertaron
+    """
+    try: # Intenta insertar el lote completo.
+        resultado = coleccion.insert_many(lote, ordered=False) # Inserta todos los documentos del lote en una sola llamada.
+        estadisticas["insertados"] += len(resultado.inserted_ids) # Suma los documentos insertados.
+        return lote # Todos se insertaron.
+    except BulkWriteError as error: # Si algunos documentos fallaron (los demás sí se insertan).
+        estadisticas["insertados"] += error.details.get("nInserted", 0) # Suma los documentos que sí se insertaron.
+        for fallo in error.details.get("writeErrors", []): # Itera sobre cada documento que falló.
+            if fallo.get("code") == CODIGO_DUPLICADO: # Si falló por clave duplicada.
+                estadisticas["duplicados"] += 1 # Cuenta el duplicado.
+            else: # Si falló por otro motivo.
+                estadisticas["rechazados"] += 1 # Cuenta el rechazo.
+        fallidos = {fallo["index"] for fallo in error.details.get("writeErrors", [])} # Posiciones de los documentos que fallaron.
+        return [documento for posicion, documento in enumerate(lote) if posicion not in fallidos] # Devuelve los que sí se insertaron.
+
+def _cargar_lote(tipo, coleccion, lote, estadisticas): # Define la función que inserta un lote y mantiene los resúmenes.
+    """
+    Inserta un lote. Si son pedidos, los suma a los resúmenes diarios y de los clientes que
+    ya tienen resumen; si son clientes, calcula su resumen con los pedidos ya cargados.
+    Así el resultado no depende de si se cargan primero los clientes o los pedidos.
+    """
+    insertados = _insertar_lote(coleccion, lote, estadisticas) # Inserta el lote.
+    if tipo == "pedidos": # Si se cargan pedidos.
+        actualizar_resumenes(insertados) # Suma los pedidos insertados a los resúmenes (un lote por colección de resumen).
+    elif tipo == "clientes" and insertados: # Si se cargan clientes.
+        completar_resumenes([cliente["codigo"] for cliente in insertados], len(insertados)) # Calcula sus resúmenes en una sola agregación.
+
+def cargar(tipo, ruta, tamano_lote=TAMANO_LOTE, formato=None): # Define la función principal de carga masiva.
+    """
+    Carga un archivo completo en la colección indicada, en lotes de tamaño fijo.
+    La memoria usada depende del tamaño del lote, no del tamaño del archivo.
+    Los pedidos se cargan como histórico: no modifican el stock de los productos,
+    pero sí se suman a los resúmenes de ventas y de clientes (resumenes.py).
+
+    Parámetros:
+    tipo (str): 'clientes', 'productos' o 'pedidos'
+    ruta (str): Ruta del archivo CSV/JSONL, o '-' para la entrada estándar
+    tamano_lote (int): Cantidad de documentos por insert_many
+    formato (str): 'csv' o 'jsonl' (por defecto se deduce de la extensión)
+
+    Retorna:
+    dict: Estadísticas de la carga (filas, insertados, rechazados, duplicados, segundos, filas_por_segundo)
+    """
+    coleccion = {"clientes": clientes, "productos": productos, "pedidos": pedidos}[tipo] # Elige la colección de destino.
+    estadisticas = {"filas": 0, "insertados": 0, "rechazados": 0, "duplicados": 0} # Contadores de la carga.
+    inicio = time.perf_counter() # Guarda el instante de inicio.
+    lote = [] # Lista con los documentos del lote actual.
+    for cantidad_filas, documento in _documentos(tipo, leer_filas(ruta, formato)): # Itera sobre los documentos construidos.
+        estadisticas["filas"] += cantidad_filas # Suma las filas leídas.
+        if documento is None: # Si la fila es inválida.
+            estadisticas["rechazados"] += cantidad_filas # Cuenta las filas rechazadas.
+            continue # Pasa a la siguiente fila.
+        lote.append(documento) # Agrega el documento al lote.
+        if len(lote) >= tamano_lote: # Si el lote está completo.
+            _cargar_lote(tipo, coleccion, lote, estadisticas) # Inserta el lote.
+            lote = [] # Empieza un lote nuevo (el anterior se libera de memoria).
+    if lote: # Si quedó un lote incompleto.
+        _cargar_lote(tipo, coleccion, lote, estadisticas) # Inserta el último lote.
+    estadisticas["segundos"] = time.perf_counter() - inicio # Calcula la duración total.
+    estadisticas["filas_por_segundo"] = estadisticas["filas"] / estadisticas["segundos"] if estadisticas["segundos"] else 0.0 # Calcula la velocidad de carga.
+    return estadisticas # Devuelve las estadísticas.
+
+# Ejecución directa: python carga_masiva.py <clientes|productos|pedidos> <archivo> [--lote N] [--formato csv|jsonl]
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    parser = argparse.ArgumentParser(description="Carga masiva de datos en ComercioTech") # Crea el lector de argumentos.
+    parser.add_argument("tipo", choices=["clientes", "productos", "pedidos"]) # Colección de destino.
+    parser.add_argument("archivo", help="Archivo CSV o JSONL ('-' para la entrada estándar)") # Archivo de entrada.
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Documentos por insert_many") # Tamaño del lote.
+    parser.add_argument("--formato", choices=["csv", "jsonl"], help="Formato del archivo (por defecto según la extensión)") # Formato del archivo.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    resumen = cargar(argumentos.tipo, argumentos.archivo, argumentos.lote, argumentos.formato) # Ejecuta la carga.
+    print(f"✅ Carga de {argumentos.tipo} terminada en {resumen['segundos']:.1f} s ({resumen['filas_por_segundo']:.0f} filas/s)") # Imprime la duración y la velocidad.
+    print(f"  Filas leídas: {resumen['filas']}") # Imprime las filas leídas.
+    print(f"  Insertados: {resumen['insertados']}") # Imprime los documentos insertados.
+    print(f"  Rechazados: {resumen['rechazados']}") # Imprime las filas rechazadas.
+    print(f"  Duplicados: {resumen['duplicados']}") # Imprime los documentos duplicados.
@@ -2,18 +2,196 @@
 Módulo para gestionar la conexión a MongoDB
 Contiene la configuración de conexión segura
 y referencias a las colecciones de la base de datos
+
+El cliente de MongoDB se crea una sola vez, la primera vez que se usa (importar
+este módulo no abre conexiones). La configuración se lee de variables de entorno:
+- MONGO_URI: cadena de conexión (por defecto mongodb://localhost:27017/)
+- MONGO_DB: nombre de la base de datos (por defecto comerciotech)
+- MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE: tamaño del pool de conexiones
+- MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS: tiempos de espera
+- MONGO_COMPRESSORS: compresores separados por comas (por ejemplo zstd,snappy)
+- MONGO_READ_PREFERENCE: preferencia de lectura (por ejemplo secondaryPreferred)
+Para código asíncrono (asyncio), obtener_cliente_async entrega un AsyncMongoClient
+con la misma configuración (requiere pymongo 4.13 o superior, ver requirements.txt)
 """
 
+import os # Importa el módulo os para leer variables de entorno y detectar procesos hijos.
+import threading # Importa threading para crear el cliente una sola vez aunque haya varios hilos.
 from pymongo import MongoClient # Importa la clase MongoClient del módulo pymongo para conectarse a MongoDB.
+from pymongo import version as pymongo_version # Importa la versión de pymongo para explicar si falta el cliente asíncrono.
+
+# Opciones del cliente que se pueden configurar por variable de entorno: (variable, opción de MongoClient, conversión)
+OPCIONES_ENTORNO = [ # Lista de opciones configurables.
+    ("MONGO_MAX_POOL_SIZE", "maxPoolSize", int), # Máximo de conexiones en el pool.
+    ("MONGO_MIN_POOL_SIZE", "minPoolSize", int), # Mínimo de conexiones abiertas en el pool.
+    ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS", int), # Espera máxima para encontrar un servidor.
+    ("MONGO_CONNECT_TIMEOUT_MS", "connectTimeoutMS", int), # Espera máxima para abrir una conexión.
+    ("MONGO_SOCKET_TIMEOUT_MS", "socketTimeoutMS", int), # Espera máxima de una operación en el socket.
+    ("MONGO_COMPRESSORS", "compressors", str), # Compresión de la red entre cliente y servidor.
+    ("MONGO_READ_PREFERENCE", "readPreference", str), # Preferencia de lectura (primario o secundarios).
+]
+
+_cliente = None # Cliente compartido (se crea en el primer uso).
+_cliente_async = None # Cliente asíncrono compartido (se crea en el primer uso, dentro del bucle de eventos).
+_colecciones = {} # Referencias a colecciones ya creadas, por nombre.
+_colecciones_async = {} # Referencias a colecciones del cliente asíncrono, por nombre.
+_candado = threading.Lock() # Candado para que dos hilos no creen dos clientes a la vez.
+
+def _opciones_entorno(): # Define la función que lee las opciones del cliente desde el entorno.
+    """
+    Retorna:
+    tuple: (cadena de conexión, diccionario de opciones definidas en el entorno)
+    """
+    opciones = { # Diccionario con las opciones definidas en el entorno.
+        opcion: convertir(os.environ[variable]) # Convierte el valor de la variable al tipo de la opción.
+        for variable, opcion, convertir in OPCIONES_ENTORNO if os.environ.get(variable) # Solo las variables definidas.
+    }
+    return os.environ.get("MONGO_URI", "mongodb://localhost:27017/"), opciones # Devuelve la cadena de conexión y las opciones.
+
+def obtener_cliente(): # Define la función que entrega el cliente compartido.
+    """
+    Devuelve el cliente de MongoDB compartido por todo el proceso, creándolo en el primer uso.
+
+    Retorna:
+    MongoClient: Cliente con su pool de conexiones
+    """
+    global _cliente # Indica que se usará la variable global del módulo.
+    if _cliente is None: # Si el cliente aún no existe.
+        with _candado: # Evita que otro hilo lo cree al mismo tiempo.
+            if _cliente is None: # Comprueba de nuevo dentro del candado.
+                uri, opciones = _opciones_entorno() # Lee la configuración del entorno.
+                # Conexión sin autenticación por defecto (solo para entornos seguros/desarrollo)
+                _cliente = MongoClient(uri, **opciones) # Crea el cliente con la cadena de conexión y las opciones.
+    return _cliente # Devuelve el cliente compartido.
+
+def obtener_db(): # Define la función que entrega la base de datos.
+    """Devuelve la base de datos configurada (por defecto 'comerciotech')."""
+    return obtener_cliente()[os.environ.get("MONGO_DB", "comerciotech")] # Accede a la base de datos dentro del cliente.
+
+def obtener_coleccion(nombre): # Define la función que entrega una colección.
+    """Devuelve la colección indicada de la base de datos configurada."""
+    coleccion = _colecciones.get(nombre) # Busca la referencia ya creada.
+    if coleccion is None: # Si aún no existe.
+        coleccion = _colecciones[nombre] = obtener_db()[nombre] # Crea la referencia y la guarda.
+    return coleccion # Devuelve la colección.
+
+def obtener_cliente_async(): # Define la función que entrega el cliente asíncrono compartido.
+    """
+    Devuelve el cliente asíncrono de MongoDB (AsyncMongoClient), con la misma configuración
+    que el cliente síncrono. Se crea en el primer uso y pertenece al bucle de eventos
+    en el que se usó por primera vez (un bucle por proceso, como en asyncio.run).
+
+    Retorna:
+    AsyncMongoClient: Cliente asíncrono con su pool de conexiones
+    """
+    global _cliente_async # Indica que se usará la variable global del módulo.
+    if _cliente_async is None: # Si el cliente aún no existe (un solo hilo usa el bucle: no hace falta candado).
+        try: # Importa el cliente asíncrono solo si se usa.
+            from pymongo import AsyncMongoClient # Existe desde pymongo 4.13 (ver requirements.txt).
+        except ImportError as error: # Si la versión instalada de pymongo es anterior.
+            raise ImportError(f"operaciones_async y consultas_async requieren pymongo 4.13 o superior (instalada: {pymongo_version})") from error # Explica qué falta.
+        uri, opciones = _opciones_entorno() # Lee la configuración del entorno.
+        _cliente_async = AsyncMongoClient(uri, **opciones) # Crea el cliente asíncrono con la cadena de conexión y las opciones.
+    return _cliente_async # Devuelve el cliente compartido.
+
+def obtener_coleccion_async(nombre): # Define la función que entrega una colección del cliente asíncrono.
+    """Devuelve la colección indicada, para usarla con await."""
+    coleccion = _colecciones_async.get(nombre) # Busca la referencia ya creada.
+    if coleccion is None: # Si aún no existe.
+        coleccion = _colecciones_async[nombre] = obtener_cliente_async()[os.environ.get("MONGO_DB", "comerciotech")][nombre] # Crea la referencia y la guarda.
+    return coleccion # Devuelve la colección.
+
+def _reiniciar_en_proceso_hijo(): # Define la función que se ejecuta en el proceso hijo después de un fork.
+    """
+    Descarta el cliente heredado del proceso padre. Un pool de conexiones no se puede
+    compartir entre procesos, así que el hijo crea el suyo en su primer uso.
+    """
+    global _cliente, _cliente_async, _candado # Indica que se usarán las variables globales del módulo.
+    _cliente = None # Olvida el cliente del padre (sin cerrarlo: sigue siendo del padre).
+    _cliente_async = None # Olvida también el cliente asíncrono del padre.
+    _colecciones.clear() # Olvida las referencias a colecciones del cliente del padre.
+    _colecciones_async.clear() # Olvida las referencias a colecciones del cliente asíncrono del padre.
+    _candado = threading.Lock() # Crea un candado nuevo (el heredado podría haber quedado tomado).
+
+if hasattr(os, "register_at_fork"): # Si el sistema operativo admite fork (no existe en Windows).
+    os.register_at_fork(after_in_child=_reiniciar_en_proceso_hijo) # Reinicia la conexión en cada proceso hijo.
 
-# Conexión sin autenticación (solo para entornos seguros/desarrollo)
-cliente = MongoClient("mongodb://localhost:27017/") # Crea una instancia de MongoClient para conectarse a una base de datos MongoDB local en el puerto 27017.
+class _Perezoso: # Define la referencia que se resuelve recién al usarse.
+    """
+    Referencia a la base de datos o a una colección que se resuelve en cada uso.
+    Permite mantener 'from conexion_db import clientes' sin conectar al importar.
+    """
+    __slots__ = ("_obtener",) # Solo guarda la función que resuelve la referencia.
 
-db = cliente["comerciotech"] # Accede a la base de datos "comerciotech" dentro de la instancia del cliente.
+    def __init__(self, obtener): # Define el constructor.
+        self._obtener = obtener # Guarda la función que entrega el objeto real.
+
+    def __getattr__(self, nombre): # Se llama al acceder a cualquier atributo (find, insert_one, ...).
+        return getattr(self._obtener(), nombre) # Delega el atributo en el objeto real.
+
+    def __getitem__(self, nombre): # Se llama al usar corchetes (db["clientes"]).
+        return self._obtener()[nombre] # Delega en el objeto real.
+
+db = _Perezoso(obtener_db) # Referencia a la base de datos "comerciotech".
 
 # Obtener referencias a las colecciones
-clientes = db["clientes"]    # Colección de clientes # Obtiene una referencia a la colección "clientes" en la base de datos.
-productos = db["productos"]  # Colección de productos # Obtiene una referencia a la colección "productos" en la base de datos.
-pedidos = db["pedidos"]      # Colección de pedidos # Obtiene una referencia a la colección "pedidos" en la base de datos.
+clientes = _Perezoso(lambda: obtener_coleccion("clientes"))    # Colección de clientes # Referencia a la colección "clientes" en la base de datos.
+productos = _Perezoso(lambda: obtener_coleccion("productos"))  # Colección de productos # Referencia a la colección "productos" en la base de datos.
+pedidos = _Perezoso(lambda: obtener_coleccion("pedidos"))      # Colección de pedidos # Referencia a la colección "pedidos" en la base de datos.
+pedidos_archivo = _Perezoso(lambda: obtener_coleccion("pedidos_archivo")) # Referencia a la colección de pedidos antiguos archivados (archivado.py).
+
+_soporta_transacciones = None # Guarda en memoria si el servidor admite transacciones (se consulta una sola vez).
+
+def soporta_transacciones(): # Define la función para saber si el servidor admite transacciones.
+    """
+    Indica si el servidor admite transacciones multi-documento.
+    Solo los replica sets y los clústeres (mongos) las admiten; un mongod independiente no.
+
+    Retorna:
+    bool: True si se pueden usar transacciones
+    """
+    global _soporta_transacciones # Indica que se usará la variable global del módulo.
+    if _soporta_transacciones is None: # Si aún no se ha consultado al servidor.
+        hola = obtener_cliente().admin.command("hello") # Pide al servidor su descripción (tipo de despliegue).
+        _soporta_transacciones = "setName" in hola or hola.get("msg") == "isdbgrid" # Es replica set si tiene 'setName', o mongos si responde 'isdbgrid'.
+    return _soporta_transacciones # Devuelve el resultado guardado.
+
+def ejecutar_en_transaccion(funcion): # Define la función para ejecutar operaciones dentro de una transacción.
+    """
+    Ejecuta una función dentro de una transacción. Si la función lanza una excepción,
+    la transacción se aborta y ningún cambio queda aplicado.
+    Si el servidor no admite transacciones, ejecuta la función sin sesión.
+
+    Parámetros:
+    funcion (callable): Función que recibe la sesión (o None) y realiza las operaciones
+
+    Retorna:
+    El valor que devuelva la función
+    """
+    if not soporta_transacciones(): # Si el servidor no admite transacciones.
+        return funcion(None) # Ejecuta la función sin sesión.
+    with obtener_cliente().start_session() as sesion: # Abre una sesión con el servidor.
+        return sesion.with_transaction(funcion) # Ejecuta la función en una transacción (reintenta ante errores transitorios).
+
+async def soporta_transacciones_async(): # Define la versión asíncrona de soporta_transacciones.
+    """Igual que soporta_transacciones, consultando al servidor con el cliente asíncrono."""
+    global _soporta_transacciones # Indica que se usará la variable global del módulo (compartida con la versión síncrona).
+    if _soporta_transacciones is None: # Si aún no se ha consultado al servidor.
+        hola = await obtener_cliente_async().admin.command("hello") # Pide al servidor su descripción (tipo de despliegue).
+        _soporta_transacciones = "setName" in hola or hola.get("msg") == "isdbgrid" # Es replica set si tiene 'setName', o mongos si responde 'isdbgrid'.
+    return _soporta_transacciones # Devuelve el resultado guardado.
+
+async def ejecutar_en_transaccion_async(funcion): # Define la versión asíncrona de ejecutar_en_transaccion.
+    """
+    Igual que ejecutar_en_transaccion, para funciones asíncronas.
+
+    Parámetros:
+    funcion (callable): Función async que recibe la sesión (o None) y realiza las operaciones
 
-print("Conexión establecida con éxito a MongoDB!!!") # Imprime un mensaje confirmando que la conexión a MongoDB se ha establecido correctamente.
+    Retorna:
+    El valor que devuelva la función
+    """
+    if not await soporta_transacciones_async(): # Si el servidor no admite transacciones.
+        return await funcion(None) # Ejecuta la función sin sesión.
+    async with obtener_cliente_async().start_session() as sesion: # Abre una sesión con el servidor.
+        return await sesion.with_transaction(funcion) # Ejecuta la función en una transacción (reintenta ante errores transitorios).
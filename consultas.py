@@ -0,0 +1,392 @@
+"""
+Módulo de consultas de datos para ComercioTech
+Contiene las consultas de lectura sin salida por consola:
+devuelven registros de modelos.py para que puedan usarse desde otros servicios.
+Las funciones consultar_* de operaciones.py solo muestran estos resultados
+"""
+
+from conexion_db import clientes, productos, pedidos, pedidos_archivo # Importa las colecciones desde el módulo 'conexion_db'.
+from modelos import Cliente, Producto, Pedido # Importa los registros de datos.
+from cache_productos import cache as cache_productos # Importa la caché de productos.
+from datetime import datetime, timedelta # Importa datetime y timedelta para armar rangos de fechas.
+from itertools import islice # Importa islice para tomar bloques de un cursor sin cargarlo completo.
+import heapq # Importa heapq para mezclar en orden los resultados de varias colecciones.
+from bson import json_util # Importa json_util para convertir los tokens de página (con ObjectId y fechas) a texto.
+import re # Importa el módulo re para trabajar con expresiones regulares.
+import unicodedata # Importa unicodedata para quitar los acentos de los textos de búsqueda.
+
+TAMANO_LOTE = 100 # Documentos que trae un cursor en cada viaje al servidor.
+
+# Proyecciones: campos que necesita cada operación (el resto del documento no viaja por la red)
+CAMPOS_NOMBRE_CLIENTE = {"datos.nombre": 1, "datos.apellidos": 1} # Nombre y apellidos.
+CAMPOS_DETALLE_CLIENTE = dict(CAMPOS_NOMBRE_CLIENTE, **{ # Datos para el detalle de un cliente.
+    "codigo": 1, "datos.email": 1, "datos.telefono": 1, "direccion": 1, # Código, contacto y dirección.
+    "resumen_pedidos": 1 # Resumen de sus pedidos (cantidad, total, último y recientes).
+})
+CAMPOS_RESUMEN_CLIENTE = dict(CAMPOS_NOMBRE_CLIENTE, resumen_pedidos=1) # Nombre y resumen de sus pedidos.
+CAMPOS_PRODUCTO = {"_id": 0, "codigo_producto": 1, "nombre": 1, "precio": 1, "stock": 1, "estado": 1} # Campos que se muestran de un producto.
+CAMPOS_PEDIDO = { # Campos que se muestran de un pedido.
+    "codigo_pedido": 1, "fecha_pedido": 1, "total_compra": 1, # Cabecera del pedido.
+    "productos.nombre": 1, "productos.cantidad": 1, "productos.precio_unitario": 1 # Líneas del pedido.
+}
+CAMPOS_REGISTRO_CLIENTE = dict(CAMPOS_NOMBRE_CLIENTE, codigo=1, fecha_registro=1) # Código, nombre y fecha de registro.
+CAMPOS_PEDIDO_RANGO = dict(CAMPOS_PEDIDO, **{"codigo_cliente": 1, "productos.codigo_producto": 1}) # Pedido con su cliente y los códigos de sus productos.
+CAMPOS_CODIGOS_PEDIDO = {"_id": 0, "codigo_cliente": 1, "codigo_pedido": 1} # Códigos de pedido por cliente (consulta cubierta por índice).
+
+def _condicion_desde_token(campo_orden, token): # Define la función que traduce un token de página a un filtro.
+    """
+    Construye la condición de paginación por clave (keyset) a partir de un token.
+    La página siguiente empieza justo después del último documento de la anterior,
+    así que no se usa skip y el costo de cada página es el mismo.
+    """
+    valor, ultimo_id = json_util.loads(token) # Recupera el valor de orden y el _id del último documento entregado.
+    if campo_orden == "_id": # Si se ordena solo por _id.
+        return {"_id": {"$gt": ultimo_id}} # Continúa después del último _id.
+    return {"$or": [ # Si se ordena por otro campo, desempata por _id.
+        {campo_orden: {"$gt": valor}}, # Documentos con un valor mayor.
+        {campo_orden: valor, "_id": {"$gt": ultimo_id}} # O con el mismo valor y un _id mayor.
+    ]}
+
+def preparar_recorrido(filtro, proyeccion, campo_orden="_id", token=None): # Define la función que arma filtro, proyección y orden de un recorrido.
+    """
+    Prepara una consulta paginada por clave: agrega la condición del token al filtro,
+    incluye el campo de orden en la proyección y arma el orden estable (campo y _id).
+    La comparten las consultas síncronas y las asíncronas (consultas_async.py).
+
+    Retorna:
+    tuple: (filtro, proyeccion, orden)
+    """
+    if token: # Si se pide una página posterior a la primera.
+        filtro = {"$and": [filtro, _condicion_desde_token(campo_orden, token)]} # Agrega la condición de continuación.
+    if proyeccion is not None: # Si se indicó una proyección.
+        proyeccion = dict(proyeccion, **{campo_orden: 1}) # Incluye siempre el campo de orden (necesario para el token).
+    orden = [("_id", 1)] if campo_orden == "_id" else [(campo_orden, 1), ("_id", 1)] # Orden estable: campo de orden y luego _id.
+    return filtro, proyeccion, orden # Devuelve las piezas de la consulta.
+
+def token_pagina(ultimo, campo_orden="_id"): # Define la función que arma el token de la página siguiente.
+    """Devuelve el token que continúa después del documento 'ultimo'."""
+    return json_util.dumps([ultimo.get(campo_orden), ultimo["_id"]]) # Guarda el valor de orden y el _id como texto.
+
+def _recorrer(coleccion, filtro, proyeccion=None, campo_orden="_id", tamano_pagina=None, token=None, tamano_lote=TAMANO_LOTE): # Define la función común para recorrer resultados.
+    """
+    Recorre los resultados de una consulta sin cargarlos todos en memoria.
+
+    Parámetros:
+    coleccion (Collection): Colección a consultar
+    filtro (dict): Filtro de la consulta
+    proyeccion (dict): Campos a devolver (opcional)
+    campo_orden (str): '_id' o un campo de primer nivel como 'fecha_registro'
+    tamano_pagina (int): Si se indica, devuelve solo una página de ese tamaño
+    token (str): Token devuelto por la página anterior (opcional)
+    tamano_lote (int): Documentos que trae el cursor en cada viaje al servidor
+
+    Retorna:
+    tuple: (iterable de documentos, token de la página siguiente o None si no hay más)
+    """
+    filtro, proyeccion, orden = preparar_recorrido(filtro, proyeccion, campo_orden, token) # Arma la consulta paginada.
+    if tamano_pagina is None: # Si no se pide paginar.
+        return coleccion.find(filtro, proyeccion, sort=orden, batch_size=tamano_lote), None # Devuelve el cursor, que trae los documentos por lotes.
+    pagina = list(coleccion.find(filtro, proyeccion, sort=orden, limit=tamano_pagina + 1)) # Trae una página (más uno para saber si hay otra).
+    if len(pagina) <= tamano_pagina: # Si no hay más documentos después de esta página.
+        return pagina, None # Devuelve la página sin token.
+    return pagina[:tamano_pagina], token_pagina(pagina[tamano_pagina - 1], campo_orden) # Devuelve la página y el token para continuar.
+
+def clave_recorrido(campo_orden="_id"): # Define la función que arma la clave de orden de un recorrido.
+    """
+    Devuelve la función que ordena documentos igual que el servidor en un recorrido
+    (campo de orden y luego _id; los valores nulos o faltantes van primero).
+    La comparten las consultas síncronas y las asíncronas.
+    """
+    if campo_orden == "_id": # Si se ordena solo por _id.
+        return lambda documento: documento["_id"] # Ordena por _id.
+    return lambda documento: (documento.get(campo_orden) is not None, documento.get(campo_orden), documento["_id"]) # Nulos primero, luego valor y _id.
+
+def _recorrer_varias(colecciones, filtro, proyeccion=None, campo_orden="_id", tamano_pagina=None, token=None): # Define la función que recorre varias colecciones como si fueran una.
+    """
+    Igual que _recorrer, pero con el mismo filtro sobre varias colecciones (por ejemplo
+    'pedidos' y 'pedidos_archivo'), mezclando sus resultados en orden. Cada colección
+    entrega sus documentos ya ordenados por su índice, así la mezcla no guarda más que
+    un documento por colección (o una página por colección al paginar).
+
+    Retorna:
+    tuple: (iterable de documentos, token de la página siguiente o None si no hay más)
+    """
+    if len(colecciones) == 1: # Si es una sola colección.
+        return _recorrer(colecciones[0], filtro, proyeccion, campo_orden, tamano_pagina, token) # La recorre directamente.
+    partes = [_recorrer(coleccion, filtro, proyeccion, campo_orden, tamano_pagina, token) for coleccion in colecciones] # Recorre cada colección.
+    resultados = heapq.merge(*(documentos for documentos, _ in partes), key=clave_recorrido(campo_orden)) # Mezcla los resultados en orden.
+    if tamano_pagina is None: # Si no se pide paginar.
+        return resultados, None # Devuelve la mezcla, que se recorre a medida que llegan los documentos.
+    pagina = list(islice(resultados, tamano_pagina + 1)) # Toma una página (más uno para saber si hay otra).
+    if len(pagina) <= tamano_pagina and not any(siguiente for _, siguiente in partes): # Si ninguna colección tiene más documentos.
+        return pagina, None # Devuelve la página sin token.
+    pagina = pagina[:tamano_pagina] # Se queda con la página.
+    return pagina, token_pagina(pagina[-1], campo_orden) # Devuelve la página y el token para continuar (vale para todas las colecciones).
+
+def colecciones_pedidos(incluir_archivo=False): # Define la función que elige las colecciones de pedidos a consultar.
+    """Devuelve 'pedidos' y, si se pide, también 'pedidos_archivo' (pedidos antiguos, ver archivado.py)."""
+    return (pedidos, pedidos_archivo) if incluir_archivo else (pedidos,) # Colecciones a consultar.
+
+def en_bloques(iterable, tamano): # Define el generador que agrupa un iterable en listas.
+    """Entrega listas de hasta 'tamano' elementos tomados del iterable."""
+    iterador = iter(iterable) # Obtiene un iterador (para un cursor, no lo reinicia).
+    while bloque := list(islice(iterador, tamano)): # Toma el siguiente bloque mientras queden elementos.
+        yield bloque # Entrega el bloque.
+
+def filtro_cliente(codigo_cliente): # Define el filtro de un cliente por código.
+    """Filtro de un cliente por su código (lo sirve el índice único de 'codigo')."""
+    return {"codigo": codigo_cliente} # Busca por el campo 'codigo'.
+
+def filtro_rango(campo, desde=None, hasta=None): # Define el filtro por un rango de fechas.
+    """
+    Filtro de un rango semiabierto [desde, hasta) sobre un campo de fecha: 'desde' incluido
+    y 'hasta' excluido, así dos rangos seguidos no se solapan ni dejan huecos
+    (ni siquiera con fracciones de segundo). Cualquiera de los dos extremos puede faltar.
+    """
+    rango = {} # Condiciones sobre el campo.
+    if desde: # Si se indicó el inicio del rango.
+        rango["$gte"] = desde # Desde esa fecha (incluida).
+    if hasta: # Si se indicó el fin del rango.
+        rango["$lt"] = hasta # Hasta esa fecha (excluida).
+    return {campo: rango} if rango else {} # Devuelve el filtro (vacío si no hay rango).
+
+def filtro_clientes_por_fecha(fecha): # Define el filtro de clientes registrados en un día.
+    """Filtro de clientes con fecha de registro dentro del día indicado."""
+    inicio_dia = datetime(fecha.year, fecha.month, fecha.day) # Inicio del día (00:00:00).
+    return filtro_rango("fecha_registro", inicio_dia, inicio_dia + timedelta(days=1)) # Desde el inicio del día hasta el inicio del siguiente (excluido).
+
+def filtro_pedidos_por_rango(desde=None, hasta=None, codigo_cliente=None, codigo_producto=None): # Define el filtro de pedidos por rango de fechas.
+    """
+    Filtro de pedidos con 'fecha_pedido' en [desde, hasta), opcionalmente de un cliente
+    o que incluyan un producto. Cada combinación la sirve un índice compuesto
+    (igualdad, fecha, _id), que también entrega los pedidos ya ordenados.
+    """
+    filtro = filtro_rango("fecha_pedido", desde, hasta) # Rango de fechas.
+    if codigo_cliente: # Si se filtra por cliente.
+        filtro["codigo_cliente"] = codigo_cliente # Pedidos del cliente.
+    if codigo_producto: # Si se filtra por producto.
+        filtro["productos.codigo_producto"] = codigo_producto # Pedidos con alguna línea del producto.
+    return filtro # Devuelve el filtro.
+
+def clave_busqueda(texto): # Define la función que normaliza un texto para buscarlo.
+    """
+    Normaliza un texto para guardarlo como clave de búsqueda y para buscarlo:
+    en minúsculas, sin acentos y con un solo espacio entre palabras
+    ("  Martínez  Ruiz" -> "martinez ruiz").
+    """
+    descompuesto = unicodedata.normalize("NFKD", texto or "") # Separa cada letra de su acento ("í" -> "i" + acento).
+    sin_acentos = "".join(caracter for caracter in descompuesto if not unicodedata.combining(caracter)) # Quita los acentos.
+    return " ".join(sin_acentos.casefold().split()) # Pasa a minúsculas y normaliza los espacios.
+
+def filtro_nombre(nombre, prefijo=False): # Define el filtro por clave de búsqueda del nombre.
+    """
+    Filtro por el campo 'nombre_busqueda' (clientes y productos).
+    Como la clave ya está normalizada, tanto la búsqueda exacta como la de prefijo
+    (una expresión regular anclada y sensible a mayúsculas) recorren solo un rango del índice.
+    """
+    clave = clave_busqueda(nombre) # Normaliza el texto buscado igual que la clave guardada.
+    if prefijo: # Si se busca por el comienzo del nombre.
+        return {"nombre_busqueda": re.compile(f"^{re.escape(clave)}")} # Nombres que empiezan con el texto.
+    return {"nombre_busqueda": clave} # Nombres iguales al texto.
+
+def buscar_clientes_por_ciudad(ciudad, tamano_pagina=None, token=None): # Define la consulta de clientes por ciudad.
+    """
+    Busca clientes por ciudad (solo se cargan nombre y apellidos).
+
+    Parámetros:
+    ciudad (str): Ciudad a buscar
+    tamano_pagina (int): Cantidad de clientes por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+
+    Retorna:
+    tuple: (registros Cliente, token de la página siguiente o None)
+    """
+    resultados, siguiente = _recorrer(clientes, {"direccion.ciudad": ciudad}, CAMPOS_NOMBRE_CLIENTE, tamano_pagina=tamano_pagina, token=token) # Busca clientes donde el campo 'ciudad' dentro de 'direccion' coincida con la ciudad dada.
+    return (Cliente.desde_documento(documento) for documento in resultados), siguiente # Convierte cada documento en registro a medida que llega.
+
+def buscar_clientes_por_fecha(fecha, tamano_pagina=None, token=None): # Define la consulta de clientes por fecha de registro.
+    """
+    Busca clientes registrados en una fecha específica, ordenados por fecha de registro.
+
+    Parámetros:
+    fecha (datetime): Fecha a consultar (solo día, sin hora)
+    tamano_pagina (int): Cantidad de clientes por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+
+    Retorna:
+    tuple: (registros Cliente, token de la página siguiente o None)
+    """
+    resultados, siguiente = _recorrer(clientes, filtro_clientes_por_fecha(fecha), CAMPOS_NOMBRE_CLIENTE, campo_orden="fecha_registro", tamano_pagina=tamano_pagina, token=token) # Busca clientes ordenados por fecha de registro.
+    return (Cliente.desde_documento(documento) for documento in resultados), siguiente # Convierte cada documento en registro a medida que llega.
+
+def buscar_clientes_por_rango(desde=None, hasta=None, tamano_pagina=None, token=None): # Define la consulta de clientes por rango de fechas de registro.
+    """
+    Busca clientes registrados en [desde, hasta), ordenados por fecha de registro.
+
+    Parámetros:
+    desde (datetime): Inicio del rango, incluido (opcional)
+    hasta (datetime): Fin del rango, excluido (opcional)
+    tamano_pagina (int): Cantidad de clientes por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+
+    Retorna:
+    tuple: (registros Cliente, token de la página siguiente o None)
+    """
+    resultados, siguiente = _recorrer(clientes, filtro_rango("fecha_registro", desde, hasta), CAMPOS_REGISTRO_CLIENTE, campo_orden="fecha_registro", tamano_pagina=tamano_pagina, token=token) # Busca clientes (el índice fecha_registro/_id sirve el rango y el orden).
+    return (Cliente.desde_documento(documento) for documento in resultados), siguiente # Convierte cada documento en registro a medida que llega.
+
+def buscar_producto(codigo): # Define la consulta de un producto por código.
+    """
+    Busca un producto por su código, primero en la caché de productos.
+    El stock devuelto puede tener hasta TTL_SEGUNDOS de antigüedad si lo cambió otro proceso.
+
+    Parámetros:
+    codigo (str): Código del producto
+
+    Retorna:
+    Producto: Registro del producto, o None si no existe
+    """
+    return buscar_productos([codigo]).get(codigo) # Reutiliza la búsqueda de varios productos.
+
+def buscar_productos(codigos): # Define la consulta de varios productos por código.
+    """
+    Busca varios productos por código. Los que están en la caché no se consultan;
+    el resto se trae en una sola consulta y se guarda en la caché.
+
+    Parámetros:
+    codigos (list): Códigos de los productos
+
+    Retorna:
+    dict: Registro Producto por código (los que no existen no aparecen)
+    """
+    encontrados = {} # Diccionario de productos encontrados por código.
+    faltantes = [] # Códigos que no están en la caché.
+    for codigo in dict.fromkeys(codigos): # Itera sobre cada código (sin repetidos).
+        producto = cache_productos.obtener(codigo) # Busca el producto en la caché.
+        if producto is None: # Si no está en la caché.
+            faltantes.append(codigo) # Lo agrega a la consulta.
+        else: # Si está en la caché.
+            encontrados[codigo] = producto # Lo usa directamente.
+    if faltantes: # Si hay productos que consultar.
+        for documento in productos.find({"codigo_producto": {"$in": faltantes}}, CAMPOS_PRODUCTO): # Busca todos los faltantes en una sola consulta.
+            producto = encontrados[documento["codigo_producto"]] = Producto.desde_documento(documento) # Convierte el documento en registro.
+            cache_productos.guardar(producto.codigo_producto, producto) # Guarda el producto en la caché.
+    return encontrados # Devuelve los productos encontrados.
+
+def buscar_productos_por_nombre(nombre, tamano_pagina=None, token=None, prefijo=False): # Define la consulta de productos por nombre.
+    """
+    Busca productos por nombre (sin distinguir mayúsculas/minúsculas ni acentos).
+
+    Parámetros:
+    nombre (str): Nombre a buscar
+    tamano_pagina (int): Cantidad de productos por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+    prefijo (bool): Si es True, busca los nombres que empiezan con el texto
+
+    Retorna:
+    tuple: (registros Producto, token de la página siguiente o None)
+    """
+    resultados, siguiente = _recorrer(productos, filtro_nombre(nombre, prefijo), dict(CAMPOS_PRODUCTO, _id=1), campo_orden="nombre_busqueda", tamano_pagina=tamano_pagina, token=token) # Busca productos por nombre (incluye _id para el token).
+    return (Producto.desde_documento(documento) for documento in resultados), siguiente # Convierte cada documento en registro a medida que llega.
+
+def buscar_cliente(codigo_cliente, campos=CAMPOS_DETALLE_CLIENTE): # Define la consulta de un cliente por código.
+    """
+    Busca un cliente por su código.
+
+    Parámetros:
+    codigo_cliente (str): Código del cliente
+    campos (dict): Proyección con los campos a cargar (por defecto, el detalle completo)
+
+    Retorna:
+    Cliente: Registro del cliente, o None si no existe
+    """
+    documento = clientes.find_one(filtro_cliente(codigo_cliente), campos) # Busca el cliente (solo trae los campos pedidos).
+    return Cliente.desde_documento(documento) if documento else None # Convierte el documento en registro.
+
+def buscar_pedidos_por_cliente(codigo_cliente, tamano_pagina=None, token=None, incluir_archivo=False): # Define la consulta de pedidos de un cliente.
+    """
+    Busca los pedidos de un cliente ordenados por fecha.
+
+    Parámetros:
+    codigo_cliente (str): Código del cliente
+    tamano_pagina (int): Cantidad de pedidos por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+    incluir_archivo (bool): Si es True, incluye los pedidos archivados (por defecto, solo 'pedidos')
+
+    Retorna:
+    tuple: (registros Pedido, token de la página siguiente o None)
+    """
+    resultados, siguiente = _recorrer_varias(colecciones_pedidos(incluir_archivo), {"codigo_cliente": codigo_cliente}, CAMPOS_PEDIDO, campo_orden="fecha_pedido", tamano_pagina=tamano_pagina, token=token) # Busca los pedidos del cliente ordenados por fecha.
+    return (Pedido.desde_documento(documento) for documento in resultados), siguiente # Convierte cada documento en registro a medida que llega.
+
+def buscar_pedidos_por_rango(desde=None, hasta=None, codigo_cliente=None, codigo_producto=None, tamano_pagina=None, token=None, incluir_archivo=False): # Define la consulta de pedidos por rango de fechas.
+    """
+    Busca pedidos con fecha en [desde, hasta), opcionalmente de un cliente o con un producto,
+    ordenados por fecha.
+
+    Parámetros:
+    desde (datetime): Inicio del rango, incluido (opcional)
+    hasta (datetime): Fin del rango, excluido (opcional)
+    codigo_cliente (str): Código del cliente (opcional)
+    codigo_producto (str): Código de un producto que debe estar en el pedido (opcional)
+    tamano_pagina (int): Cantidad de pedidos por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+    incluir_archivo (bool): Si es True, incluye los pedidos archivados (por defecto, solo 'pedidos')
+
+    Retorna:
+    tuple: (registros Pedido, token de la página siguiente o None)
+    """
+    filtro = filtro_pedidos_por_rango(desde, hasta, codigo_cliente, codigo_producto) # Arma el filtro.
+    resultados, siguiente = _recorrer_varias(colecciones_pedidos(incluir_archivo), filtro, CAMPOS_PEDIDO_RANGO, campo_orden="fecha_pedido", tamano_pagina=tamano_pagina, token=token) # Busca los pedidos ordenados por fecha.
+    return (Pedido.desde_documento(documento) for documento in resultados), siguiente # Convierte cada documento en registro a medida que llega.
+
+def codigos_pedidos_por_cliente(codigos_clientes): # Define la consulta de códigos de pedido de varios clientes.
+    """
+    Obtiene los códigos de pedido de varios clientes en una sola consulta.
+
+    Parámetros:
+    codigos_clientes (list): Códigos de los clientes
+
+    Retorna:
+    dict: Lista de códigos de pedido por código de cliente
+    """
+    pedidos_por_cliente = {} # Diccionario para agrupar los códigos de pedido por código de cliente.
+    for pedido in pedidos.find( # Busca los pedidos de todos los clientes de una vez.
+        {"codigo_cliente": {"$in": codigos_clientes}}, # Filtra por cualquiera de los códigos de cliente.
+        CAMPOS_CODIGOS_PEDIDO # Proyección: solo los códigos (el índice cliente/pedido cubre la consulta).
+    ):
+        pedidos_por_cliente.setdefault(pedido["codigo_cliente"], []).append(pedido.get('codigo_pedido', '[Sin código]')) # Agrega el código del pedido a la lista de su cliente.
+    return pedidos_por_cliente # Devuelve los códigos agrupados.
+
+def codigos_recientes(cliente, pedidos_por_cliente): # Define la función que obtiene los códigos de pedido de un cliente.
+    """Códigos de los pedidos recientes del resumen del cliente, o los buscados en 'pedidos' si no tiene resumen."""
+    if cliente.resumen_pedidos is None: # Si el cliente no tiene resumen.
+        return pedidos_por_cliente.get(cliente.codigo, []) # Usa los códigos buscados en 'pedidos'.
+    return [pedido.get("codigo_pedido", "[Sin código]") for pedido in cliente.resumen_pedidos.get("recientes") or []] # Códigos del resumen.
+
+def buscar_clientes_por_nombre(nombre, tamano_pagina=None, token=None, prefijo=False): # Define la consulta de clientes por nombre.
+    """
+    Busca clientes por nombre (sin distinguir mayúsculas/minúsculas ni acentos) junto con los códigos de sus pedidos.
+    Los códigos salen del resumen guardado en cada cliente (sus pedidos más recientes); solo para
+    los clientes sin resumen se buscan en 'pedidos', con una sola consulta por cada bloque.
+
+    Parámetros:
+    nombre (str): Nombre a buscar
+    tamano_pagina (int): Cantidad de clientes por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+    prefijo (bool): Si es True, busca los nombres que empiezan con el texto
+
+    Retorna:
+    tuple: (pares (Cliente, lista de códigos de pedido), token de la página siguiente o None)
+    """
+    resultados, siguiente = _recorrer(clientes, filtro_nombre(nombre, prefijo), CAMPOS_DETALLE_CLIENTE, campo_orden="nombre_busqueda", tamano_pagina=tamano_pagina, token=token) # Busca clientes por nombre (el índice nombre_busqueda/_id sirve el filtro y el orden).
+
+    def con_pedidos(): # Define el generador que agrega los códigos de pedido a cada cliente.
+        for bloque in en_bloques(resultados, tamano_pagina or TAMANO_LOTE): # Procesa los clientes por bloques (una página, o lotes del cursor).
+            registros = [Cliente.desde_documento(documento) for documento in bloque] # Convierte los documentos del bloque en registros.
+            sin_resumen = [registro.codigo for registro in registros if registro.resumen_pedidos is None] # Clientes sin resumen de pedidos.
+            pedidos_por_cliente = codigos_pedidos_por_cliente(sin_resumen) if sin_resumen else {} # Busca sus pedidos en una sola consulta.
+            for registro in registros: # Itera sobre cada cliente del bloque.
+                yield registro, codigos_recientes(registro, pedidos_por_cliente) # Entrega el cliente con sus códigos de pedido.
+
+    return con_pedidos(), siguiente # Devuelve el generador y el token de la página siguiente.
@@ -0,0 +1,245 @@
+"""
+Módulo de consultas asíncronas para ComercioTech
+Versión asyncio de consultas.py: mismas consultas, proyecciones, paginación
+y registros de modelos.py, usando el cliente asíncrono de conexion_db.
+Los resultados se recorren con 'async for'
+"""
+
+import asyncio # Importa asyncio para consultar varias colecciones a la vez.
+import heapq # Importa heapq para mezclar en orden los resultados de varias colecciones.
+from conexion_db import obtener_coleccion_async # Importa la función que entrega colecciones del cliente asíncrono.
+from consultas import TAMANO_LOTE, CAMPOS_NOMBRE_CLIENTE, CAMPOS_DETALLE_CLIENTE, CAMPOS_REGISTRO_CLIENTE, CAMPOS_PRODUCTO, CAMPOS_PEDIDO, CAMPOS_PEDIDO_RANGO, CAMPOS_CODIGOS_PEDIDO # Importa el tamaño de lote y las proyecciones.
+from consultas import preparar_recorrido, token_pagina, filtro_cliente, filtro_clientes_por_fecha, filtro_rango, filtro_pedidos_por_rango, filtro_nombre, codigos_recientes, clave_recorrido # Importa la paginación y los filtros compartidos.
+from modelos import Cliente, Producto, Pedido # Importa los registros de datos.
+from cache_productos import cache as cache_productos # Importa la caché de productos (compartida con la versión síncrona).
+
+async def _entregar(documentos, cursor=None): # Define el generador asíncrono que entrega los documentos.
+    """Entrega los documentos ya recibidos y, si hay cursor, los que siguen llegando por lotes."""
+    for documento in documentos: # Itera sobre los documentos ya recibidos.
+        yield documento # Entrega el documento.
+    if cursor is not None: # Si quedan lotes en el servidor.
+        async for documento in cursor: # Pide los lotes siguientes a medida que se consumen.
+            yield documento # Entrega el documento.
+
+class _Resultados: # Define el iterable asíncrono con los resultados de una consulta.
+    """
+    Resultados que pueden seguir llegando de uno o más cursores abiertos. aclose() cierra esos
+    cursores aunque no se hayan empezado a recorrer (cerrar un generador asíncrono que
+    nunca arrancó no ejecuta su código, así que no alcanzaría para liberarlos).
+    """
+    def __init__(self, documentos, cerrar): # Define el constructor.
+        self._documentos = documentos # Iterable asíncrono con los documentos.
+        self._cerrar = cerrar # Funciones asíncronas que liberan los cursores.
+
+    def __aiter__(self): # Define la iteración con 'async for'.
+        return self._documentos.__aiter__() # Recorre los documentos.
+
+    async def aclose(self): # Define el cierre de los cursores.
+        for cerrar in self._cerrar: # Itera sobre cada cursor o resultado abierto.
+            await cerrar() # Lo cierra.
+
+def _registros(resultados, modelo): # Define la función que convierte documentos en registros a medida que llegan.
+    """Convierte cada documento en un registro del modelo, conservando aclose() para cerrar los cursores."""
+    return _Resultados((modelo.desde_documento(documento) async for documento in resultados), [resultados.aclose]) # Registros que se crean al recorrerlos.
+
+async def _recorrer(coleccion, filtro, proyeccion=None, campo_orden="_id", tamano_pagina=None, token=None, tamano_lote=TAMANO_LOTE): # Define la función común para recorrer resultados.
+    """
+    Igual que _recorrer de consultas.py. Trae el primer lote (o la página) antes de
+    volver, así varias consultas lanzadas con asyncio.gather esperan al servidor a la vez.
+
+    Retorna:
+    tuple: (iterable asíncrono de documentos con aclose(), token de la página siguiente o None si no hay más)
+    """
+    filtro, proyeccion, orden = preparar_recorrido(filtro, proyeccion, campo_orden, token) # Arma la consulta paginada.
+    if tamano_pagina is None: # Si no se pide paginar.
+        cursor = coleccion.find(filtro, proyeccion, sort=orden, batch_size=tamano_lote) # Crea el cursor, que trae los documentos por lotes.
+        return _Resultados(_entregar(await cursor.to_list(tamano_lote), cursor), [cursor.close]), None # Trae el primer lote y deja el resto en el cursor.
+    pagina = await coleccion.find(filtro, proyeccion, sort=orden, limit=tamano_pagina + 1).to_list(None) # Trae una página (más uno para saber si hay otra).
+    if len(pagina) <= tamano_pagina: # Si no hay más documentos después de esta página.
+        return _entregar(pagina), None # Devuelve la página sin token.
+    return _entregar(pagina[:tamano_pagina]), token_pagina(pagina[tamano_pagina - 1], campo_orden) # Devuelve la página y el token para continuar.
+
+async def _mezclar(iterables, clave): # Define el generador asíncrono que mezcla resultados ordenados.
+    """Mezcla en orden varios iterables asíncronos ya ordenados (como heapq.merge)."""
+    iteradores = [iterable.__aiter__() for iterable in iterables] # Obtiene un iterador por iterable.
+    cabezas = [] # Montículo con el primer documento pendiente de cada iterador.
+    for indice, iterador in enumerate(iteradores): # Itera sobre cada iterador.
+        documento = await anext(iterador, None) # Pide su primer documento.
+        if documento is not None: # Si tiene documentos.
+            heapq.heappush(cabezas, (clave(documento), indice, documento)) # Lo agrega al montículo.
+    while cabezas: # Mientras queden documentos pendientes.
+        _, indice, documento = heapq.heappop(cabezas) # Toma el menor.
+        yield documento # Lo entrega.
+        siguiente = await anext(iteradores[indice], None) # Pide el siguiente de ese iterador.
+        if siguiente is not None: # Si tiene más documentos.
+            heapq.heappush(cabezas, (clave(siguiente), indice, siguiente)) # Lo agrega al montículo.
+
+async def _recorrer_varias(nombres, filtro, proyeccion=None, campo_orden="_id", tamano_pagina=None, token=None): # Define la función que recorre varias colecciones como si fueran una.
+    """
+    Igual que _recorrer_varias de consultas.py: consulta todas las colecciones a la vez
+    y mezcla sus resultados en orden.
+
+    Retorna:
+    tuple: (iterable asíncrono de documentos, token de la página siguiente o None si no hay más)
+    """
+    if len(nombres) == 1: # Si es una sola colección.
+        return await _recorrer(obtener_coleccion_async(nombres[0]), filtro, proyeccion, campo_orden, tamano_pagina, token) # La recorre directamente.
+    partes = await asyncio.gather(*(_recorrer(obtener_coleccion_async(nombre), filtro, proyeccion, campo_orden, tamano_pagina, token) for nombre in nombres)) # Recorre cada colección.
+    resultados = _mezclar([documentos for documentos, _ in partes], clave_recorrido(campo_orden)) # Mezcla los resultados en orden.
+    if tamano_pagina is None: # Si no se pide paginar.
+        return _Resultados(resultados, [documentos.aclose for documentos, _ in partes]), None # Devuelve la mezcla (aclose cierra los cursores de todas las colecciones).
+    pagina = [documento async for documento in resultados] # Junta las páginas (a lo sumo una por colección).
+    if len(pagina) <= tamano_pagina and not any(siguiente for _, siguiente in partes): # Si ninguna colección tiene más documentos.
+        return _entregar(pagina), None # Devuelve la página sin token.
+    pagina = pagina[:tamano_pagina] # Se queda con la página.
+    return _entregar(pagina), token_pagina(pagina[-1], campo_orden) # Devuelve la página y el token para continuar.
+
+def colecciones_pedidos(incluir_archivo=False): # Define la función que elige las colecciones de pedidos a consultar.
+    """Nombres de las colecciones de pedidos a consultar: 'pedidos' y, si se pide, 'pedidos_archivo'."""
+    return ("pedidos", "pedidos_archivo") if incluir_archivo else ("pedidos",) # Colecciones a consultar.
+
+async def en_bloques(iterable, tamano): # Define el generador asíncrono que agrupa un iterable en listas.
+    """Entrega listas de hasta 'tamano' elementos tomados del iterable asíncrono."""
+    bloque = [] # Bloque en construcción.
+    async for elemento in iterable: # Itera sobre cada elemento a medida que llega.
+        bloque.append(elemento) # Agrega el elemento al bloque.
+        if len(bloque) == tamano: # Si el bloque está completo.
+            yield bloque # Entrega el bloque.
+            bloque = [] # Empieza un bloque nuevo.
+    if bloque: # Si quedó un bloque incompleto.
+        yield bloque # Entrega el último bloque.
+
+async def buscar_clientes_por_ciudad(ciudad, tamano_pagina=None, token=None): # Define la consulta de clientes por ciudad.
+    """
+    Busca clientes por ciudad (solo se cargan nombre y apellidos).
+
+    Retorna:
+    tuple: (registros Cliente (async for), token de la página siguiente o None)
+    """
+    resultados, siguiente = await _recorrer(obtener_coleccion_async("clientes"), {"direccion.ciudad": ciudad}, CAMPOS_NOMBRE_CLIENTE, tamano_pagina=tamano_pagina, token=token) # Busca los clientes de la ciudad.
+    return _registros(resultados, Cliente), siguiente # Convierte cada documento en registro a medida que llega.
+
+async def buscar_clientes_por_fecha(fecha, tamano_pagina=None, token=None): # Define la consulta de clientes por fecha de registro.
+    """
+    Busca clientes registrados en una fecha específica, ordenados por fecha de registro.
+
+    Retorna:
+    tuple: (registros Cliente (async for), token de la página siguiente o None)
+    """
+    resultados, siguiente = await _recorrer(obtener_coleccion_async("clientes"), filtro_clientes_por_fecha(fecha), CAMPOS_NOMBRE_CLIENTE, campo_orden="fecha_registro", tamano_pagina=tamano_pagina, token=token) # Busca clientes ordenados por fecha de registro.
+    return _registros(resultados, Cliente), siguiente # Convierte cada documento en registro a medida que llega.
+
+async def buscar_clientes_por_rango(desde=None, hasta=None, tamano_pagina=None, token=None): # Define la consulta de clientes por rango de fechas de registro.
+    """
+    Busca clientes registrados en [desde, hasta), ordenados por fecha de registro.
+
+    Retorna:
+    tuple: (registros Cliente (async for), token de la página siguiente o None)
+    """
+    resultados, siguiente = await _recorrer(obtener_coleccion_async("clientes"), filtro_rango("fecha_registro", desde, hasta), CAMPOS_REGISTRO_CLIENTE, campo_orden="fecha_registro", tamano_pagina=tamano_pagina, token=token) # Busca clientes ordenados por fecha de registro.
+    return _registros(resultados, Cliente), siguiente # Convierte cada documento en registro a medida que llega.
+
+async def buscar_producto(codigo): # Define la consulta de un producto por código.
+    """
+    Busca un producto por su código, primero en la caché de productos.
+
+    Retorna:
+    Producto: Registro del producto, o None si no existe
+    """
+    return (await buscar_productos([codigo])).get(codigo) # Reutiliza la búsqueda de varios productos.
+
+async def buscar_productos(codigos): # Define la consulta de varios productos por código.
+    """
+    Busca varios productos por código: los que están en la caché no se consultan
+    y el resto se trae en una sola consulta.
+
+    Retorna:
+    dict: Registro Producto por código (los que no existen no aparecen)
+    """
+    encontrados = {} # Diccionario de productos encontrados por código.
+    faltantes = [] # Códigos que no están en la caché.
+    for codigo in dict.fromkeys(codigos): # Itera sobre cada código (sin repetidos).
+        producto = cache_productos.obtener(codigo) # Busca el producto en la caché.
+        if producto is None: # Si no está en la caché.
+            faltantes.append(codigo) # Lo agrega a la consulta.
+        else: # Si está en la caché.
+            encontrados[codigo] = producto # Lo usa directamente.
+    if faltantes: # Si hay productos que consultar.
+        async for documento in obtener_coleccion_async("productos").find({"codigo_producto": {"$in": faltantes}}, CAMPOS_PRODUCTO): # Busca todos los faltantes en una sola consulta.
+            producto = encontrados[documento["codigo_producto"]] = Producto.desde_documento(documento) # Convierte el documento en registro.
+            cache_productos.guardar(producto.codigo_producto, producto) # Guarda el producto en la caché.
+    return encontrados # Devuelve los productos encontrados.
+
+async def buscar_productos_por_nombre(nombre, tamano_pagina=None, token=None, prefijo=False): # Define la consulta de productos por nombre.
+    """
+    Busca productos por nombre (sin distinguir mayúsculas/minúsculas ni acentos).
+
+    Retorna:
+    tuple: (registros Producto (async for), token de la página siguiente o None)
+    """
+    resultados, siguiente = await _recorrer(obtener_coleccion_async("productos"), filtro_nombre(nombre, prefijo), dict(CAMPOS_PRODUCTO, _id=1), campo_orden="nombre_busqueda", tamano_pagina=tamano_pagina, token=token) # Busca productos por nombre (incluye _id para el token).
+    return _registros(resultados, Producto), siguiente # Convierte cada documento en registro a medida que llega.
+
+async def buscar_cliente(codigo_cliente, campos=CAMPOS_DETALLE_CLIENTE): # Define la consulta de un cliente por código.
+    """
+    Busca un cliente por su código.
+
+    Retorna:
+    Cliente: Registro del cliente, o None si no existe
+    """
+    documento = await obtener_coleccion_async("clientes").find_one(filtro_cliente(codigo_cliente), campos) # Busca el cliente (solo trae los campos pedidos).
+    return Cliente.desde_documento(documento) if documento else None # Convierte el documento en registro.
+
+async def buscar_pedidos_por_cliente(codigo_cliente, tamano_pagina=None, token=None, incluir_archivo=False): # Define la consulta de pedidos de un cliente.
+    """
+    Busca los pedidos de un cliente ordenados por fecha (con incluir_archivo, también los archivados).
+
+    Retorna:
+    tuple: (registros Pedido (async for), token de la página siguiente o None)
+    """
+    resultados, siguiente = await _recorrer_varias(colecciones_pedidos(incluir_archivo), {"codigo_cliente": codigo_cliente}, CAMPOS_PEDIDO, campo_orden="fecha_pedido", tamano_pagina=tamano_pagina, token=token) # Busca los pedidos del cliente ordenados por fecha.
+    return _registros(resultados, Pedido), siguiente # Convierte cada documento en registro a medida que llega.
+
+async def buscar_pedidos_por_rango(desde=None, hasta=None, codigo_cliente=None, codigo_producto=None, tamano_pagina=None, token=None, incluir_archivo=False): # Define la consulta de pedidos por rango de fechas.
+    """
+    Busca pedidos con fecha en [desde, hasta), opcionalmente de un cliente o con un producto,
+    ordenados por fecha (con incluir_archivo, también los archivados).
+
+    Retorna:
+    tuple: (registros Pedido (async for), token de la página siguiente o None)
+    """
+    filtro = filtro_pedidos_por_rango(desde, hasta, codigo_cliente, codigo_producto) # Arma el filtro.
+    resultados, siguiente = await _recorrer_varias(colecciones_pedidos(incluir_archivo), filtro, CAMPOS_PEDIDO_RANGO, campo_orden="fecha_pedido", tamano_pagina=tamano_pagina, token=token) # Busca los pedidos ordenados por fecha.
+    return _registros(resultados, Pedido), siguiente # Convierte cada documento en registro a medida que llega.
+
+async def codigos_pedidos_por_cliente(codigos_clientes): # Define la consulta de códigos de pedido de varios clientes.
+    """
+    Obtiene los códigos de pedido de varios clientes en una sola consulta.
+
+    Retorna:
+    dict: Lista de códigos de pedido por código de cliente
+    """
+    pedidos_por_cliente = {} # Diccionario para agrupar los códigos de pedido por código de cliente.
+    async for pedido in obtener_coleccion_async("pedidos").find({"codigo_cliente": {"$in": codigos_clientes}}, CAMPOS_CODIGOS_PEDIDO): # Busca los pedidos de todos los clientes de una vez.
+        pedidos_por_cliente.setdefault(pedido["codigo_cliente"], []).append(pedido.get('codigo_pedido', '[Sin código]')) # Agrega el código del pedido a la lista de su cliente.
+    return pedidos_por_cliente # Devuelve los códigos agrupados.
+
+async def buscar_clientes_por_nombre(nombre, tamano_pagina=None, token=None, prefijo=False): # Define la consulta de clientes por nombre.
+    """
+    Busca clientes por nombre (sin distinguir mayúsculas/minúsculas ni acentos) junto con los códigos de sus pedidos.
+    Los códigos salen del resumen de cada cliente; solo los clientes sin resumen se buscan en 'pedidos'.
+
+    Retorna:
+    tuple: (pares (Cliente, lista de códigos de pedido) (async for), token de la página siguiente o None)
+    """
+    resultados, siguiente = await _recorrer(obtener_coleccion_async("clientes"), filtro_nombre(nombre, prefijo), CAMPOS_DETALLE_CLIENTE, campo_orden="nombre_busqueda", tamano_pagina=tamano_pagina, token=token) # Busca clientes por nombre.
+
+    async def con_pedidos(): # Define el generador que agrega los códigos de pedido a cada cliente.
+        async for bloque in en_bloques(resultados, tamano_pagina or TAMANO_LOTE): # Procesa los clientes por bloques (una página, o lotes del cursor).
+            registros = [Cliente.desde_documento(documento) for documento in bloque] # Convierte los documentos del bloque en registros.
+            sin_resumen = [registro.codigo for registro in registros if registro.resumen_pedidos is None] # Clientes sin resumen de pedidos.
+            pedidos_por_cliente = await codigos_pedidos_por_cliente(sin_resumen) if sin_resumen else {} # Busca sus pedidos en una sola consulta.
+            for registro in registros: # Itera sobre cada cliente del bloque.
+                yield registro, codigos_recientes(registro, pedidos_por_cliente) # Entrega el cliente con sus códigos de pedido.
+
+    return _Resultados(con_pedidos(), [resultados.aclose]), siguiente # Devuelve los pares (aclose cierra el cursor de clientes) y el token de la página siguiente.
@@ -1,20 +1,68 @@
 """
 Módulo para consultas interactivas desde la línea de comandos
 Permite al usuario ejecutar las consultas requeridas por ComercioTech
+Con --lote lee las operaciones de un archivo (o de la entrada estándar con "-"), una por
+línea en texto o en JSON, y escribe un resultado JSON por línea, sin menú ni pausas
+Con la variable de entorno METRICAS_ARCHIVO (.json o .prom) se activa instrumentacion.py
+y al salir se guardan las métricas de cada consulta; METRICAS_MUESTREO indica la fracción
+de consultas que se revisan con explain() (por defecto 0.01)
 """
 
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+import contextlib # Importa contextlib para capturar los mensajes de las operaciones en el modo por lotes.
+import io # Importa io para guardar los mensajes capturados.
+import json # Importa json para leer y escribir las operaciones del modo por lotes.
 import os # Importa el módulo os para interactuar con el sistema operativo (ej. limpiar la pantalla).
+import shlex # Importa shlex para separar los argumentos de una línea de texto (respetando comillas).
+import sys # Importa sys para leer la entrada estándar y escribir en la salida estándar.
 import time # Importa el módulo time para funciones relacionadas con el tiempo (ej. pausas).
+from dataclasses import asdict # Importa asdict para convertir los registros en diccionarios.
+from functools import partial # Importa partial para fijar la opción de búsqueda por prefijo.
 from operaciones import * # Importa todas las funciones del módulo 'operaciones.py'.
+from consultas import buscar_clientes_por_nombre, buscar_clientes_por_ciudad, buscar_clientes_por_rango, buscar_producto, buscar_pedidos_por_cliente, buscar_pedidos_por_rango # Importa las consultas que devuelven registros (para el modo por lotes).
+from precios import aplicar_porcentaje # Importa la regla porcentual de precios (para el modo por lotes).
+from indices import asegurar_indices # Importa la función que crea los índices de las colecciones.
+from conexion_db import obtener_cliente # Importa la función que entrega el cliente compartido.
+import instrumentacion # Importa la instrumentación opcional de consultas.
 from datetime import datetime # Importa la clase datetime del módulo datetime para trabajar con fechas y horas.
 
+TAMANO_PAGINA = 20 # Cantidad de resultados que se muestran por página.
+
+def mostrar_por_paginas(consulta, argumento): # Define la función para mostrar una consulta página por página.
+    """
+    Ejecuta una consulta de operaciones.py página por página.
+    Solo se trae del servidor la página que se muestra.
+
+    Parámetros:
+    consulta (function): Función de consulta que acepta tamano_pagina y token
+    argumento: Valor a buscar (nombre, ciudad o código de cliente)
+    """
+    token = None # Token de la página siguiente (None para la primera).
+    while True: # Muestra páginas hasta que no haya más o el usuario salga.
+        token = consulta(argumento, tamano_pagina=TAMANO_PAGINA, token=token) # Muestra una página y obtiene el token de la siguiente.
+        if token is None: # Si no hay más resultados.
+            break # Termina la paginación.
+        if input("\nPresione Enter para ver más resultados (o escriba 'salir' para volver): ").lower() == 'salir': # Pregunta si se quiere ver la página siguiente.
+            break # Termina la paginación.
+
+def leer_fecha(texto): # Define la función que interpreta una fecha ingresada.
+    """Convierte 'AAAA-MM-DD' (o 'AAAA-MM-DD HH:MM[:SS]') en datetime; un texto vacío es None (sin límite)."""
+    return datetime.fromisoformat(texto.strip()) if texto and texto.strip() else None # Interpreta la fecha (lanza ValueError si no es válida).
+
+def limpiar_pantalla(): # Define la función que limpia la pantalla.
+    """Limpia la pantalla de la consola ('cls' en Windows, secuencia ANSI en el resto, sin abrir otro proceso)."""
+    if os.name == "nt": # Si es Windows.
+        os.system('cls') # Ejecuta el comando 'cls' para limpiar la pantalla.
+    else: # En Linux y macOS.
+        print("\033[2J\033[H", end="", flush=True) # Borra la pantalla y lleva el cursor al inicio.
+
 def pantalla_carga(): # Define la función pantalla_carga.
-    os.system('cls') # Ejecuta el comando 'cls' en el sistema operativo para limpiar la pantalla de la consola (Windows).
+    limpiar_pantalla() # Limpia la pantalla de la consola.
     print("="*50) # Imprime una línea de 50 caracteres '='.
     print("      Cargando sistema de gestión ComercioTech...") # Imprime un mensaje de carga.
     print("="*50) # Imprime otra línea de 50 caracteres '='.
     time.sleep(1.5) # Pausa la ejecución durante 1.5 segundos.
-    os.system('cls') # Limpia la pantalla de nuevo después de la pausa.
+    limpiar_pantalla() # Limpia la pantalla de nuevo después de la pausa.
 
 def menu_principal(): # Define la función menu_principal.
     """Muestra el menú principal de la aplicación"""
@@ -32,45 +80,53 @@ def menu_principal(): # Define la función menu_principal.
     print("9. Eliminar producto") # Muestra la opción 9 del menú.
     print("10. Eliminar pedido") # Muestra la opción 10 del menú.
     print("11. Eliminar cliente")  # Nueva opción # Muestra la opción 11 del menú (nueva).
-    print("12. Salir") # Muestra la opción 12 del menú (salir).
+    print("12. Consultar pedidos por rango de fechas") # Muestra la opción 12 del menú.
+    print("13. Consultar clientes por rango de fechas de registro") # Muestra la opción 13 del menú.
+    print("14. Actualizar precios por porcentaje") # Muestra la opción 14 del menú.
+    print("15. Salir") # Muestra la opción 15 del menú (salir).
     print("="*50) # Imprime otra línea de 50 caracteres '='.
     return input("Seleccione una opción: ") # Solicita al usuario que seleccione una opción y devuelve su entrada.
 
 def ejecutar_consultas(): # Define la función ejecutar_consultas.
     """Bucle principal para ejecutar consultas interactivas"""
     pantalla_carga() # Llama a la función pantalla_carga para mostrar la pantalla de inicio.
+    asegurar_indices() # Crea los índices que faltan antes de empezar a consultar (no hace nada si ya existen).
     while True: # Inicia un bucle infinito para el menú principal.
-        os.system('cls') # Limpia la pantalla de la consola.
+        limpiar_pantalla() # Limpia la pantalla de la consola.
         opcion = menu_principal() # Muestra el menú principal y obtiene la opción seleccionada por el usuario.
-        os.system('cls')  # Limpia pantalla al entrar a la opción # Limpia la pantalla de nuevo después de seleccionar una opción.
+        limpiar_pantalla()  # Limpia pantalla al entrar a la opción # Limpia la pantalla de nuevo después de seleccionar una opción.
 
         if opcion == "1": # Si la opción seleccionada es "1".
-            nombre = input("\nIngrese nombre del cliente (o escriba 'salir' para volver): ") # Solicita al usuario el nombre del cliente.
+            nombre = input("\nIngrese nombre del cliente, con * al final para buscar por comienzo (o escriba 'salir' para volver): ") # Solicita al usuario el nombre del cliente.
             if nombre.lower() == 'salir': # Si el usuario escribe 'salir' (insensible a mayúsculas/minúsculas).
                 continue # Salta a la siguiente iteración del bucle (vuelve al menú principal).
-            os.system('cls') # Limpia la pantalla.
-            consultar_clientes_por_nombre(nombre) # Llama a la función para consultar clientes por nombre.
+            limpiar_pantalla() # Limpia la pantalla.
+            if nombre.endswith("*"): # Si se pide buscar por el comienzo del nombre.
+                mostrar_por_paginas(partial(consultar_clientes_por_nombre, prefijo=True), nombre.rstrip("*")) # Consulta clientes cuyo nombre empieza con el texto, página por página.
+            else: # Si se busca el nombre completo.
+                mostrar_por_paginas(consultar_clientes_por_nombre, nombre) # Consulta clientes por nombre, página por página.
 
         elif opcion == "2": # Si la opción seleccionada es "2".
             ciudad = input("\nIngrese ciudad a consultar (o escriba 'salir' para volver): ") # Solicita al usuario la ciudad a consultar.
             if ciudad.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
-            os.system('cls') # Limpia la pantalla.
-            consultar_clientes_por_ciudad(ciudad) # Llama a la función para consultar clientes por ciudad.
+            limpiar_pantalla() # Limpia la pantalla.
+            mostrar_por_paginas(consultar_clientes_por_ciudad, ciudad) # Consulta clientes por ciudad, página por página.
 
         elif opcion == "3": # Si la opción seleccionada es "3".
             codigo = input("\nIngrese código de producto (o escriba 'salir' para volver): ") # Solicita al usuario el código del producto.
             if codigo.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
-            os.system('cls') # Limpia la pantalla.
+            limpiar_pantalla() # Limpia la pantalla.
             consultar_producto_por_codigo(codigo) # Llama a la función para consultar un producto por su código.
 
         elif opcion == "4": # Si la opción seleccionada es "4".
             cliente_id = input("\nIngrese código de cliente (o escriba 'salir' para volver): ") # Solicita al usuario el código del cliente.
             if cliente_id.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
-            os.system('cls') # Limpia la pantalla.
-            consultar_pedidos_por_cliente(cliente_id) # Llama a la función para consultar pedidos por cliente.
+            incluir_archivo = input("¿Incluir pedidos archivados? (s/n): ").lower() == "s" # Pregunta si se busca también en el archivo.
+            limpiar_pantalla() # Limpia la pantalla.
+            mostrar_por_paginas(partial(consultar_pedidos_por_cliente, incluir_archivo=incluir_archivo), cliente_id) # Consulta pedidos por cliente, página por página.
 
         elif opcion == "5": # Si la opción seleccionada es "5".
             print("Ingrese los datos del cliente (o escriba 'salir' en cualquier campo para volver):") # Pide al usuario que ingrese los datos del cliente.
@@ -101,7 +157,7 @@ def ejecutar_consultas(): # Define la función ejecutar_consultas.
             pais = input("País: ") # Solicita el país de la dirección.
             if pais.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
-            os.system('cls') # Limpia la pantalla.
+            limpiar_pantalla() # Limpia la pantalla.
             direccion = {"calle": calle, "numero": numero, "ciudad": ciudad, "pais": pais} # Crea un diccionario con la información de la dirección.
             insertar_cliente(codigo, nombre, apellidos, email, telefono, direccion) # Llama a la función para insertar un nuevo cliente.
 
@@ -121,7 +177,7 @@ def ejecutar_consultas(): # Define la función ejecutar_consultas.
             if stock_input.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
             stock = int(stock_input) # Convierte el stock a entero.
-            os.system('cls') # Limpia la pantalla.
+            limpiar_pantalla() # Limpia la pantalla.
             insertar_producto(codigo, nombre, precio, stock) # Llama a la función para insertar un nuevo producto.
 
         elif opcion == "7": # Si la opción seleccionada es "7".
@@ -132,15 +188,27 @@ def ejecutar_consultas(): # Define la función ejecutar_consultas.
             cliente_id = input("Código del cliente: ") # Solicita el código del cliente.
             if cliente_id.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
-            producto_id = input("Código del producto: ") # Solicita el código del producto.
-            if producto_id.lower() == 'salir': # Si el usuario escribe 'salir'.
-                continue # Salta a la siguiente iteración del bucle.
-            cantidad_input = input("Cantidad: ") # Solicita la cantidad del producto.
-            if cantidad_input.lower() == 'salir': # Si el usuario escribe 'salir'.
+            lineas = [] # Lista con las líneas (producto, cantidad) del pedido.
+            cancelado = False # Indica si el usuario escribió 'salir' durante la carga de líneas.
+            while True: # Pide líneas hasta que el usuario deje el código de producto vacío.
+                producto_id = input("Código del producto (Enter vacío para terminar): ") # Solicita el código del producto.
+                if producto_id.lower() == 'salir': # Si el usuario escribe 'salir'.
+                    cancelado = True # Marca el pedido como cancelado.
+                    break # Sale del bucle de líneas.
+                if not producto_id: # Si el usuario deja el código vacío.
+                    break # Termina la carga de líneas.
+                cantidad_input = input("Cantidad: ") # Solicita la cantidad del producto.
+                if cantidad_input.lower() == 'salir': # Si el usuario escribe 'salir'.
+                    cancelado = True # Marca el pedido como cancelado.
+                    break # Sale del bucle de líneas.
+                lineas.append((producto_id, int(cantidad_input))) # Agrega la línea convirtiendo la cantidad a entero.
+            if cancelado or not lineas: # Si se canceló o no se ingresó ninguna línea.
                 continue # Salta a la siguiente iteración del bucle.
-            cantidad = int(cantidad_input) # Convierte la cantidad a entero.
-            os.system('cls') # Limpia la pantalla.
-            insertar_pedido(codigo_pedido, cliente_id, producto_id, cantidad) # Llama a la función para insertar un nuevo pedido.
+            limpiar_pantalla() # Limpia la pantalla.
+            if len(lineas) == 1: # Si el pedido tiene un solo producto.
+                insertar_pedido(codigo_pedido, cliente_id, *lineas[0]) # Llama a la función para insertar un pedido de un producto.
+            else: # Si el pedido tiene varios productos.
+                insertar_pedido_multiple(codigo_pedido, cliente_id, lineas) # Llama a la función para insertar un pedido con varios productos.
 
         elif opcion == "8": # Si la opción seleccionada es "8".
             codigo = input("Código del producto (o escriba 'salir' para volver): ") # Solicita el código del producto a actualizar.
@@ -150,31 +218,68 @@ def ejecutar_consultas(): # Define la función ejecutar_consultas.
             if nuevo_precio_input.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
             nuevo_precio = float(nuevo_precio_input.replace(",", ".")) # Convierte el nuevo precio a float.
-            os.system('cls') # Limpia la pantalla.
+            limpiar_pantalla() # Limpia la pantalla.
             actualizar_precio_producto(codigo, nuevo_precio) # Llama a la función para actualizar el precio del producto.
 
         elif opcion == "9": # Si la opción seleccionada es "9".
             codigo_producto = input("Código del producto a eliminar (o escriba 'salir' para volver): ") # Solicita el código del producto a eliminar.
             if codigo_producto.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
-            os.system('cls') # Limpia la pantalla.
+            limpiar_pantalla() # Limpia la pantalla.
             eliminar_producto(codigo_producto) # Llama a la función para eliminar un producto.
 
         elif opcion == "10": # Si la opción seleccionada es "10".
             codigo_pedido = input("Código del pedido a eliminar (o escriba 'salir' para volver): ") # Solicita el código del pedido a eliminar.
             if codigo_pedido.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
-            os.system('cls') # Limpia la pantalla.
+            limpiar_pantalla() # Limpia la pantalla.
             eliminar_pedido(codigo_pedido) # Llama a la función para eliminar un pedido.
 
         elif opcion == "11": # Si la opción seleccionada es "11".
             codigo_cliente = input("Código del cliente a eliminar (o escriba 'salir' para volver): ") # Solicita el código del cliente a eliminar.
             if codigo_cliente.lower() == 'salir': # Si el usuario escribe 'salir'.
                 continue # Salta a la siguiente iteración del bucle.
-            os.system('cls') # Limpia la pantalla.
+            limpiar_pantalla() # Limpia la pantalla.
             eliminar_cliente(codigo_cliente) # Llama a la función para eliminar un cliente.
 
         elif opcion == "12": # Si la opción seleccionada es "12".
+            print("Ingrese el rango de fechas (AAAA-MM-DD, 'hasta' no se incluye; Enter vacío para no limitar) o escriba 'salir' para volver:") # Explica el formato.
+            desde = input("Desde: ") # Solicita el inicio del rango.
+            if desde.lower() == 'salir': # Si el usuario escribe 'salir'.
+                continue # Salta a la siguiente iteración del bucle.
+            hasta = input("Hasta: ") # Solicita el fin del rango.
+            if hasta.lower() == 'salir': # Si el usuario escribe 'salir'.
+                continue # Salta a la siguiente iteración del bucle.
+            codigo_cliente = input("Código de cliente (Enter vacío para todos): ") # Solicita el cliente (opcional).
+            codigo_producto = input("Código de producto (Enter vacío para todos): ") # Solicita el producto (opcional).
+            incluir_archivo = input("¿Incluir pedidos archivados? (s/n): ").lower() == "s" # Pregunta si se busca también en el archivo.
+            limpiar_pantalla() # Limpia la pantalla.
+            consulta = partial(consultar_pedidos_por_rango, hasta=leer_fecha(hasta), codigo_cliente=codigo_cliente or None, codigo_producto=codigo_producto or None, incluir_archivo=incluir_archivo) # Fija el resto del filtro.
+            mostrar_por_paginas(consulta, leer_fecha(desde)) # Consulta los pedidos del rango, página por página.
+
+        elif opcion == "13": # Si la opción seleccionada es "13".
+            print("Ingrese el rango de fechas (AAAA-MM-DD, 'hasta' no se incluye; Enter vacío para no limitar) o escriba 'salir' para volver:") # Explica el formato.
+            desde = input("Desde: ") # Solicita el inicio del rango.
+            if desde.lower() == 'salir': # Si el usuario escribe 'salir'.
+                continue # Salta a la siguiente iteración del bucle.
+            hasta = input("Hasta: ") # Solicita el fin del rango.
+            if hasta.lower() == 'salir': # Si el usuario escribe 'salir'.
+                continue # Salta a la siguiente iteración del bucle.
+            limpiar_pantalla() # Limpia la pantalla.
+            mostrar_por_paginas(partial(consultar_clientes_por_rango, hasta=leer_fecha(hasta)), leer_fecha(desde)) # Consulta los clientes del rango, página por página.
+
+        elif opcion == "14": # Si la opción seleccionada es "14".
+            porcentaje_input = input("Porcentaje del cambio, por ejemplo 5 o -10 (o escriba 'salir' para volver): ") # Solicita el porcentaje.
+            if porcentaje_input.lower() == 'salir': # Si el usuario escribe 'salir'.
+                continue # Salta a la siguiente iteración del bucle.
+            estado = input("Estado de los productos (Enter vacío para todos): ") # Solicita el estado (opcional).
+            porcentaje = float(porcentaje_input.replace(",", ".").rstrip("%")) # Convierte el porcentaje a float.
+            limpiar_pantalla() # Limpia la pantalla.
+            simulacion = actualizar_precios_por_porcentaje(porcentaje, estado or None, simular=True) # Muestra el impacto sin cambiar nada.
+            if simulacion["cambiados"] and input("\n¿Aplicar el cambio? (s/n): ").lower() == "s": # Si hay cambios y el usuario confirma.
+                actualizar_precios_por_porcentaje(porcentaje, estado or None) # Aplica el cambio.
+
+        elif opcion == "15": # Si la opción seleccionada es "15".
             print("\n¡Gracias por usar el sistema!") # Imprime un mensaje de despedida.
             break # Sale del bucle principal, terminando el programa.
 
@@ -182,7 +287,146 @@ def ejecutar_consultas(): # Define la función ejecutar_consultas.
             print("❌ Opción inválida. Intente nuevamente.") # Imprime un mensaje de opción inválida.
 
         input("\nPresione Enter para continuar...") # Espera a que el usuario presione Enter para continuar.
-        os.system('cls')  # Limpia pantalla después de cada pausa # Limpia la pantalla después de la pausa.
+        limpiar_pantalla()  # Limpia pantalla después de cada pausa # Limpia la pantalla después de la pausa.
+
+def _registros(resultados): # Define la función que convierte registros en diccionarios.
+    """Convierte los registros de una consulta (o pares (cliente, códigos de pedido)) en diccionarios."""
+    return [ # Devuelve la lista de diccionarios.
+        dict(asdict(registro[0]), codigos_pedidos=registro[1]) if isinstance(registro, tuple) else asdict(registro) # Cliente con sus pedidos, o registro simple.
+        for registro in resultados # Itera sobre cada resultado a medida que llega del servidor.
+    ]
+
+def _mensajes(operacion, *argumentos): # Define la función que ejecuta una operación capturando sus mensajes.
+    """
+    Ejecuta una operación de operaciones.py sin mostrar sus mensajes por consola.
+
+    Retorna:
+    dict: 'ok' (lo que devuelve la operación: True si se realizó) y la lista de 'mensajes'
+    """
+    salida = io.StringIO() # Buffer para los mensajes de la operación.
+    with contextlib.redirect_stdout(salida): # Captura lo que imprime la operación.
+        realizada = operacion(*argumentos) # Ejecuta la operación (devuelve si se realizó).
+    mensajes = [linea.strip() for linea in salida.getvalue().splitlines() if linea.strip()] # Mensajes sin líneas vacías.
+    return {"ok": bool(realizada), "mensajes": mensajes} # Devuelve el resultado.
+
+def _incluye_archivo(archivo): # Define la función que interpreta el argumento "archivo" del modo por lotes.
+    """Indica si una consulta por lotes pide incluir los pedidos archivados ("archivo", "true" o "1")."""
+    return str(archivo).lower() in ("archivo", "true", "1") # Cualquier otro valor busca solo en 'pedidos'.
+
+def _lote_clientes_por_nombre(nombre): # Opción 1 en el modo por lotes.
+    prefijo = nombre.endswith("*") # Un * al final pide buscar por el comienzo del nombre.
+    resultados, _ = buscar_clientes_por_nombre(nombre.rstrip("*"), prefijo=prefijo) # Busca todos los clientes con el nombre.
+    return {"ok": True, "resultados": _registros(resultados)} # Devuelve los clientes encontrados.
+
+def _lote_pedido(codigo_pedido, codigo_cliente, *lineas): # Opción 7 en el modo por lotes.
+    pares = [(lineas[i], int(lineas[i + 1])) for i in range(0, len(lineas) - 1, 2)] # Agrupa los argumentos en (producto, cantidad).
+    if not pares or len(lineas) % 2: # Si no hay líneas o falta una cantidad.
+        raise ValueError("se esperan pares de código de producto y cantidad") # Informa el error.
+    if len(pares) == 1: # Si el pedido tiene un solo producto.
+        return _mensajes(insertar_pedido, codigo_pedido, codigo_cliente, *pares[0]) # Inserta un pedido de un producto.
+    return _mensajes(insertar_pedido_multiple, codigo_pedido, codigo_cliente, pares) # Inserta un pedido con varios productos.
+
+# Operaciones del modo por lotes, por número de opción del menú: (nombre, función que recibe los argumentos como texto)
+OPERACIONES_LOTE = { # Diccionario con las operaciones disponibles.
+    "1": ("clientes_por_nombre", _lote_clientes_por_nombre), # nombre (con * al final para buscar por comienzo).
+    "2": ("clientes_por_ciudad", lambda ciudad: {"ok": True, "resultados": _registros(buscar_clientes_por_ciudad(ciudad)[0])}), # ciudad.
+    "3": ("producto_por_codigo", lambda codigo: {"ok": True, "resultados": _registros(filter(None, [buscar_producto(codigo)]))}), # código.
+    "4": ("pedidos_por_cliente", lambda codigo, archivo="": {"ok": True, "resultados": _registros( # código de cliente, "archivo" para incluir los pedidos archivados.
+        buscar_pedidos_por_cliente(codigo, incluir_archivo=_incluye_archivo(archivo))[0])}), # Todos los pedidos del cliente.
+    "5": ("insertar_cliente", lambda codigo, nombre, apellidos, email, telefono, calle, numero, ciudad, pais: _mensajes( # código, nombre, apellidos, email, teléfono, calle, número, ciudad, país.
+        insertar_cliente, codigo, nombre, apellidos, email, telefono, {"calle": calle, "numero": numero, "ciudad": ciudad, "pais": pais})), # Arma la dirección.
+    "6": ("insertar_producto", lambda codigo, nombre, precio, stock: _mensajes(insertar_producto, codigo, nombre, float(str(precio).replace(",", ".")), int(stock))), # código, nombre, precio, stock.
+    "7": ("insertar_pedido", _lote_pedido), # código de pedido, código de cliente, y pares producto cantidad.
+    "8": ("actualizar_precio_producto", lambda codigo, precio: _mensajes(actualizar_precio_producto, codigo, float(str(precio).replace(",", ".")))), # código, nuevo precio.
+    "9": ("eliminar_producto", lambda codigo: _mensajes(eliminar_producto, codigo)), # código de producto.
+    "10": ("eliminar_pedido", lambda codigo: _mensajes(eliminar_pedido, codigo)), # código de pedido.
+    "11": ("eliminar_cliente", lambda codigo: _mensajes(eliminar_cliente, codigo)), # código de cliente.
+    "12": ("pedidos_por_rango", lambda desde="", hasta="", codigo_cliente="", codigo_producto="", archivo="": {"ok": True, "resultados": _registros( # desde, hasta (excluido), cliente y producto (vacíos = sin filtro), "archivo" para incluir los archivados.
+        buscar_pedidos_por_rango(leer_fecha(desde), leer_fecha(hasta), codigo_cliente or None, codigo_producto or None, incluir_archivo=_incluye_archivo(archivo))[0])}), # Todos los pedidos del rango, en orden de fecha.
+    "13": ("clientes_por_rango", lambda desde="", hasta="": {"ok": True, "resultados": _registros(buscar_clientes_por_rango(leer_fecha(desde), leer_fecha(hasta))[0])}), # desde, hasta (excluido).
+    "14": ("actualizar_precios_por_porcentaje", lambda porcentaje, estado="", simular="": {"ok": True, "resultados": [ # porcentaje, estado (vacío = todos), "simular" para solo calcular el impacto.
+        aplicar_porcentaje(float(str(porcentaje).replace(",", ".").rstrip("%")), {"estado": estado} if estado else None, str(simular).lower() in ("simular", "true", "1"))]}), # Contadores del cambio.
+}
+NOMBRES_LOTE = {nombre: opcion for opcion, (nombre, _) in OPERACIONES_LOTE.items()} # Número de opción por nombre de operación.
+
+def leer_operacion(linea): # Define la función que interpreta una línea del modo por lotes.
+    """
+    Interpreta una línea del archivo de operaciones. Acepta dos formatos:
+    - Texto: número (o nombre) de la opción seguido de sus argumentos, separados por espacios
+      (con comillas para los que tienen espacios). Ej.: 8 PROD-001 19.990
+    - JSON: {"opcion": "8", "argumentos": ["PROD-001", 19.99]}
+
+    Parámetros:
+    linea (str): Línea sin el salto de línea
+
+    Retorna:
+    tuple: (número de opción, lista de argumentos), o None si la línea está vacía o es un comentario
+    """
+    linea = linea.strip() # Quita los espacios de los extremos.
+    if not linea or linea.startswith("#"): # Si la línea está vacía o es un comentario.
+        return None # No hay operación.
+    if linea.startswith("{"): # Si la línea es JSON.
+        datos = json.loads(linea) # Lee el objeto.
+        opcion, argumentos = str(datos["opcion"]), list(datos.get("argumentos", [])) # Opción y argumentos.
+    else: # Si la línea es texto.
+        opcion, *argumentos = shlex.split(linea) # Separa la opción de los argumentos.
+    return NOMBRES_LOTE.get(opcion, opcion), argumentos # Acepta el nombre de la operación en lugar del número.
+
+def ejecutar_lote(entrada, salida): # Define la función del modo por lotes.
+    """
+    Ejecuta las operaciones de la entrada, una por línea, y escribe un resultado JSON por línea.
+    Un error en una operación se informa en su resultado y no detiene las siguientes.
+    Todas las operaciones usan la misma conexión (el cliente compartido de conexion_db).
+
+    Parámetros:
+    entrada (iterable): Líneas con las operaciones (archivo abierto o sys.stdin)
+    salida (file): Archivo donde se escriben los resultados
+
+    Retorna:
+    tuple: (cantidad de operaciones ejecutadas, cantidad con error)
+    """
+    asegurar_indices() # Crea los índices que faltan (no hace nada si ya existen).
+    total = errores = 0 # Contadores de operaciones.
+    for numero, linea in enumerate(entrada, start=1): # Itera sobre cada línea de la entrada.
+        resultado = {"linea": numero} # Resultado de la línea.
+        try: # Intenta ejecutar la operación.
+            operacion = leer_operacion(linea) # Interpreta la línea.
+            if operacion is None: # Si la línea está vacía o es un comentario.
+                continue # Pasa a la siguiente línea.
+            opcion, argumentos = operacion # Opción y argumentos.
+            if opcion not in OPERACIONES_LOTE: # Si la opción no existe.
+                raise ValueError(f"opción inválida: {opcion}") # Informa el error.
+            nombre, funcion = OPERACIONES_LOTE[opcion] # Operación a ejecutar.
+            resultado["operacion"] = nombre # Guarda el nombre de la operación.
+            resultado.update(funcion(*argumentos)) # Ejecuta la operación y guarda su resultado.
+        except Exception as error: # Si la línea es inválida o la operación falla (cualquier error, para no detener las líneas siguientes).
+            resultado.update(ok=False, error=str(error)) # Guarda el error.
+        total += 1 # Cuenta la operación.
+        errores += not resultado["ok"] # Cuenta el error (si lo hubo).
+        salida.write(json.dumps(resultado, ensure_ascii=False, default=str) + "\n") # Escribe el resultado (fechas como texto).
+    return total, errores # Devuelve los contadores.
 
 if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente (no si se importa como módulo).
-    ejecutar_consultas() # Llama a la función principal para ejecutar las consultas interactivas.
+    parser = argparse.ArgumentParser(description="Consultas de ComercioTech (menú interactivo o por lotes)") # Crea el lector de argumentos.
+    parser.add_argument("--lote", help="Archivo con una operación por línea (texto o JSON); '-' para la entrada estándar") # Archivo de operaciones.
+    parser.add_argument("--salida", help="Archivo de resultados JSON (uno por línea); por defecto, la salida estándar") # Archivo de resultados.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+    archivo_metricas = os.environ.get("METRICAS_ARCHIVO") # Archivo de métricas (si se pidió la instrumentación).
+    if archivo_metricas: # Si se pidió la instrumentación.
+        instrumentacion.activar(float(os.environ.get("METRICAS_MUESTREO", "0.01"))) # La activa antes del primer uso de la conexión.
+    try: # Asegura que las métricas se guarden aunque el programa termine con error.
+        if argumentos.lote: # Si se pidió el modo por lotes.
+            with contextlib.ExitStack() as archivos: # Cierra los archivos al terminar.
+                entrada = sys.stdin if argumentos.lote == "-" else archivos.enter_context(open(argumentos.lote, encoding="utf-8")) # Abre la entrada.
+                salida = archivos.enter_context(open(argumentos.salida, "w", encoding="utf-8")) if argumentos.salida else sys.stdout # Abre la salida.
+                total, errores = ejecutar_lote(entrada, salida) # Ejecuta las operaciones.
+            print(f"✅ {total} operaciones ejecutadas, {errores} con error", file=sys.stderr) # Informa el resumen (fuera de la salida JSON).
+        else: # Si no, el menú interactivo.
+            ejecutar_consultas() # Llama a la función principal para ejecutar las consultas interactivas.
+    finally: # Al salir.
+        if archivo_metricas: # Si la instrumentación está activa.
+            instrumentacion.metricas.revisar_planes(obtener_cliente()) # Revisa los planes de la muestra de consultas.
+            with contextlib.redirect_stdout(sys.stderr): # No mezcla el resumen con los resultados JSON.
+                instrumentacion.metricas.mostrar() # Muestra el resumen por función.
+            instrumentacion.metricas.guardar(archivo_metricas) # Guarda las métricas.
+            print(f"✅ Métricas guardadas en {archivo_metricas}", file=sys.stderr) # Indica dónde se guardaron.
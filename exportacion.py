@@ -0,0 +1,249 @@
+"""
+Módulo de exportación masiva para ComercioTech
+Exporta 'pedidos' (una fila por línea de pedido), 'pedidos_archivo' (los pedidos
+archivados, con las mismas columnas) y 'clientes' a CSV, JSONL o Parquet.
+Cada colección se divide en rangos de _id (particiones) que leen en paralelo varios
+procesos, cada uno con su propia conexión. Cada partición se escribe en su propio
+archivo a medida que llegan los documentos, así la memoria no depende del tamaño
+de la colección. Un archivo de partición solo toma su nombre final cuando está completo:
+si la exportación se interrumpe, al repetirla se saltan las particiones ya terminadas.
+Parquet requiere pyarrow (dependencia opcional)
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+import csv # Importa el módulo csv para escribir archivos CSV.
+import json # Importa el módulo json para escribir archivos JSONL y el manifiesto.
+import os # Importa el módulo os para manejar rutas y renombrar archivos.
+import time # Importa el módulo time para medir la duración de la exportación.
+from concurrent.futures import ProcessPoolExecutor, as_completed # Importa el pool de procesos.
+from itertools import islice # Importa islice para tomar cada n-ésimo _id del índice.
+from bson import json_util # Importa json_util para guardar los límites (ObjectId) en el manifiesto.
+from conexion_db import clientes, pedidos, pedidos_archivo # Importa las colecciones desde el módulo 'conexion_db'.
+from consultas import en_bloques # Importa el recorrido por bloques (grupos de filas de Parquet).
+from modelos import Cliente, Pedido # Importa los registros de datos.
+
+TAMANO_LOTE = 1000 # Documentos que trae el cursor en cada viaje al servidor (y filas por grupo en Parquet).
+LOTE_LIMITES = 10000 # _id que trae el cursor en cada viaje al calcular las particiones (solo viajan los _id).
+EXTENSIONES = {"csv": "csv", "jsonl": "jsonl", "parquet": "parquet"} # Extensión del archivo por formato.
+
+# Columnas exportadas por colección: (nombre, tipo para Parquet)
+COLUMNAS = { # Diccionario con las columnas de cada exportación.
+    "clientes": [ # Una fila por cliente.
+        ("codigo", "texto"), ("nombre", "texto"), ("apellidos", "texto"), ("email", "texto"), ("telefono", "texto"), # Datos del cliente.
+        ("calle", "texto"), ("numero", "texto"), ("ciudad", "texto"), ("pais", "texto"), # Dirección.
+        ("fecha_registro", "fecha"), # Fecha de registro.
+    ],
+    "pedidos": [ # Una fila por línea de pedido (los pedidos sin líneas dan una fila con la línea vacía).
+        ("codigo_pedido", "texto"), ("codigo_cliente", "texto"), ("fecha_pedido", "fecha"), ("metodo_pago", "texto"), ("total_compra", "decimal"), # Cabecera del pedido.
+        ("linea", "entero"), ("codigo_producto", "texto"), ("nombre_producto", "texto"), ("cantidad", "entero"), ("precio_unitario", "decimal"), ("total_comprado", "decimal"), # Línea del pedido.
+    ],
+}
+COLUMNAS["pedidos_archivo"] = COLUMNAS["pedidos"] # Los pedidos archivados se exportan igual que los pedidos.
+# Campos que se leen de cada colección (el resto del documento no viaja por la red)
+CAMPOS = { # Proyección por colección.
+    "clientes": {"codigo": 1, "datos": 1, "direccion": 1, "fecha_registro": 1}, # Datos, dirección y fecha del cliente.
+    "pedidos": {"codigo_pedido": 1, "codigo_cliente": 1, "fecha_pedido": 1, "metodo_pago": 1, "total_compra": 1, "productos": 1}, # Cabecera y líneas del pedido.
+}
+CAMPOS["pedidos_archivo"] = CAMPOS["pedidos"] # Mismos campos que en 'pedidos'.
+
+def _colecciones(): # Define la función que entrega las colecciones exportables.
+    """Devuelve las colecciones exportables por nombre."""
+    return {"clientes": clientes, "pedidos": pedidos, "pedidos_archivo": pedidos_archivo} # Colecciones exportables.
+
+def filas_cliente(documento): # Define la función que convierte un cliente en filas.
+    """Entrega la fila de un cliente (dirección en columnas)."""
+    cliente = Cliente.desde_documento(documento) # Convierte el documento en registro.
+    direccion = cliente.direccion or {} # Dirección (vacía si no existe).
+    yield { # Entrega la fila.
+        "codigo": cliente.codigo, "nombre": cliente.nombre, "apellidos": cliente.apellidos, # Identificación.
+        "email": cliente.email, "telefono": cliente.telefono, # Contacto.
+        "calle": direccion.get("calle"), "numero": direccion.get("numero"), "ciudad": direccion.get("ciudad"), "pais": direccion.get("pais"), # Dirección.
+        "fecha_registro": cliente.fecha_registro # Fecha de registro.
+    }
+
+def filas_pedido(documento): # Define la función que convierte un pedido en filas.
+    """Entrega una fila por cada línea del pedido, con los datos del pedido repetidos."""
+    pedido = Pedido.desde_documento(documento) # Convierte el documento en registro.
+    cabecera = { # Datos del pedido que se repiten en cada línea.
+        "codigo_pedido": pedido.codigo_pedido, "codigo_cliente": pedido.codigo_cliente, "fecha_pedido": pedido.fecha_pedido, # Identificación y fecha.
+        "metodo_pago": pedido.metodo_pago, "total_compra": pedido.total_compra # Pago y total.
+    }
+    for numero, linea in enumerate(pedido.lineas or [None], start=1): # Itera sobre cada línea (o una vacía si no hay).
+        yield dict(cabecera, # Entrega la fila de la línea.
+            linea=numero if linea else None, # Número de línea dentro del pedido.
+            codigo_producto=linea and linea.codigo_producto, nombre_producto=linea and linea.nombre, # Producto.
+            cantidad=linea and linea.cantidad, precio_unitario=linea and linea.precio_unitario, total_comprado=linea and linea.total_comprado # Cantidad y precios.
+        )
+
+FILAS = {"clientes": filas_cliente, "pedidos": filas_pedido, "pedidos_archivo": filas_pedido} # Conversión de documento a filas por colección.
+
+def calcular_particiones(coleccion, cantidad): # Define la función que divide una colección en rangos de _id.
+    """
+    Divide la colección en rangos [desde, hasta) de _id con una cantidad parecida de documentos.
+    Todos los límites se toman en una sola pasada por el índice de _id (consulta cubierta,
+    sin leer los documentos), guardando uno de cada 'tamano' _id; buscar cada límite con
+    skip recorrería el índice desde el principio una vez por partición.
+
+    Parámetros:
+    coleccion (Collection): Colección a dividir
+    cantidad (int): Cantidad de particiones deseada
+
+    Retorna:
+    list: Pares (desde, hasta) de _id; None indica sin límite
+    """
+    total = coleccion.estimated_document_count() # Cantidad aproximada de documentos (lee los metadatos).
+    tamano = max(1, -(-total // max(1, cantidad))) # Documentos por partición (redondeado hacia arriba).
+    cursor = coleccion.find({}, {"_id": 1}, sort=[("_id", 1)], batch_size=LOTE_LIMITES) # Recorre los _id en orden (consulta cubierta por el índice de _id).
+    try: # Asegura que el cursor se cierre aunque se corte antes del final.
+        limites = [documento["_id"] for documento in islice(cursor, tamano, total, tamano)] # _id donde empieza cada partición (salvo la primera).
+    finally: # Al terminar.
+        cursor.close() # Libera el cursor en el servidor (puede quedar sin recorrer hasta el final).
+    return list(zip([None] + limites, limites + [None])) # Arma los rangos consecutivos.
+
+def filtro_particion(desde, hasta): # Define el filtro de una partición.
+    """Filtro de los documentos con _id en [desde, hasta); None indica sin límite."""
+    rango = {} # Condiciones sobre el _id.
+    if desde is not None: # Si hay límite inferior.
+        rango["$gte"] = desde # Desde ese _id (incluido).
+    if hasta is not None: # Si hay límite superior.
+        rango["$lt"] = hasta # Hasta ese _id (excluido).
+    return {"_id": rango} if rango else {} # Devuelve el filtro.
+
+def _valor_texto(valor): # Define la conversión de valores para CSV y JSONL.
+    """Convierte las fechas a texto ISO; deja el resto igual."""
+    return valor.isoformat() if hasattr(valor, "isoformat") else valor # Fecha en formato ISO.
+
+def _escribir_csv(ruta, filas, columnas, tamano_lote): # Define el escritor CSV.
+    """Escribe las filas en un archivo CSV con cabecera. Retorna la cantidad de filas."""
+    cantidad = 0 # Filas escritas.
+    with open(ruta, "w", newline="", encoding="utf-8") as archivo: # Abre el archivo.
+        escritor = csv.DictWriter(archivo, fieldnames=[nombre for nombre, _ in columnas]) # Escritor con las columnas fijas.
+        escritor.writeheader() # Escribe la cabecera.
+        for fila in filas: # Itera sobre cada fila a medida que llega.
+            escritor.writerow({clave: _valor_texto(valor) for clave, valor in fila.items()}) # Escribe la fila.
+            cantidad += 1 # Cuenta la fila.
+    return cantidad # Devuelve la cantidad de filas.
+
+def _escribir_jsonl(ruta, filas, columnas, tamano_lote): # Define el escritor JSONL.
+    """Escribe una fila JSON por línea. Retorna la cantidad de filas."""
+    cantidad = 0 # Filas escritas.
+    with open(ruta, "w", encoding="utf-8") as archivo: # Abre el archivo.
+        for fila in filas: # Itera sobre cada fila a medida que llega.
+            archivo.write(json.dumps(fila, ensure_ascii=False, default=_valor_texto) + "\n") # Escribe la fila.
+            cantidad += 1 # Cuenta la fila.
+    return cantidad # Devuelve la cantidad de filas.
+
+def _escribir_parquet(ruta, filas, columnas, tamano_lote): # Define el escritor Parquet.
+    """Escribe las filas en un archivo Parquet, un grupo de filas por lote. Retorna la cantidad de filas."""
+    import pyarrow as pa # Importa pyarrow solo para este formato (dependencia opcional).
+    import pyarrow.parquet as pq # Importa el escritor de Parquet.
+    tipos = {"texto": pa.string(), "fecha": pa.timestamp("ms"), "decimal": pa.float64(), "entero": pa.int64()} # Tipo de Arrow por tipo de columna.
+    esquema = pa.schema([(nombre, tipos[tipo]) for nombre, tipo in columnas]) # Esquema fijo (no depende de los datos).
+    cantidad = 0 # Filas escritas.
+    with pq.ParquetWriter(ruta, esquema) as escritor: # Abre el archivo.
+        for bloque in en_bloques(filas, tamano_lote): # Agrupa las filas en bloques.
+            escritor.write_table(pa.Table.from_pylist(bloque, schema=esquema)) # Escribe el bloque como un grupo de filas.
+            cantidad += len(bloque) # Cuenta las filas.
+    return cantidad # Devuelve la cantidad de filas.
+
+ESCRITORES = {"csv": _escribir_csv, "jsonl": _escribir_jsonl, "parquet": _escribir_parquet} # Escritor por formato.
+
+def ruta_particion(directorio, tipo, formato, indice): # Define la ruta del archivo de una partición.
+    """Devuelve la ruta final del archivo de la partición (por ejemplo pedidos-0003.csv)."""
+    return os.path.join(directorio, f"{tipo}-{indice:04d}.{EXTENSIONES[formato]}") # Arma la ruta.
+
+def exportar_particion(tipo, formato, directorio, indice, desde, hasta, tamano_lote=TAMANO_LOTE): # Define la función que exporta una partición.
+    """
+    Exporta los documentos de una partición a su archivo. Se ejecuta en un proceso del pool,
+    que crea su propia conexión en el primer uso (conexion_db la reinicia en cada proceso).
+    Escribe en un archivo temporal y lo renombra al terminar (una partición a medias no cuenta).
+
+    Parámetros:
+    tipo (str): 'clientes', 'pedidos' o 'pedidos_archivo'
+    formato (str): 'csv', 'jsonl' o 'parquet'
+    directorio (str): Carpeta de salida
+    indice (int): Número de la partición
+    desde, hasta: Rango [desde, hasta) de _id (None indica sin límite)
+    tamano_lote (int): Documentos por viaje al servidor
+
+    Retorna:
+    tuple: (número de la partición, filas escritas)
+    """
+    ruta = ruta_particion(directorio, tipo, formato, indice) # Ruta final del archivo.
+    temporal = ruta + ".tmp" # Archivo temporal mientras se escribe.
+    with _colecciones()[tipo].find(filtro_particion(desde, hasta), CAMPOS[tipo], sort=[("_id", 1)], batch_size=tamano_lote) as cursor: # Recorre la partición en orden de _id (cierra el cursor al terminar).
+        filas = (fila for documento in cursor for fila in FILAS[tipo](documento)) # Convierte los documentos en filas a medida que llegan.
+        cantidad = ESCRITORES[formato](temporal, filas, COLUMNAS[tipo], tamano_lote) # Escribe las filas.
+    os.replace(temporal, ruta) # Publica el archivo completo (operación atómica).
+    return indice, cantidad # Devuelve el número de la partición y las filas escritas.
+
+def _cargar_manifiesto(ruta, tipo, formato, particiones, reiniciar): # Define la función que lee o crea el manifiesto.
+    """
+    Devuelve los rangos de la exportación. Al reanudar se usan los rangos guardados,
+    así los archivos ya terminados siguen correspondiendo a sus particiones.
+    """
+    if not reiniciar and os.path.exists(ruta): # Si hay una exportación anterior para reanudar.
+        with open(ruta, encoding="utf-8") as archivo: # Abre el manifiesto.
+            manifiesto = json_util.loads(archivo.read()) # Lee el manifiesto (con los ObjectId).
+        if manifiesto["tipo"] == tipo and manifiesto["formato"] == formato: # Si es la misma exportación.
+            return manifiesto["rangos"] # Reutiliza los rangos.
+    rangos = calcular_particiones(_colecciones()[tipo], particiones) # Calcula los rangos nuevos.
+    with open(ruta, "w", encoding="utf-8") as archivo: # Guarda el manifiesto.
+        archivo.write(json_util.dumps({"tipo": tipo, "formato": formato, "rangos": rangos})) # Escribe los rangos.
+    return rangos # Devuelve los rangos.
+
+def exportar(tipo, directorio, formato="csv", particiones=8, procesos=None, tamano_lote=TAMANO_LOTE, reiniciar=False, al_terminar_particion=None): # Define la función principal de exportación.
+    """
+    Exporta una colección completa, por particiones de _id leídas en paralelo.
+
+    Parámetros:
+    tipo (str): 'clientes', 'pedidos' o 'pedidos_archivo'
+    directorio (str): Carpeta de salida (se crea si no existe)
+    formato (str): 'csv', 'jsonl' o 'parquet'
+    particiones (int): Cantidad de rangos de _id
+    procesos (int): Procesos del pool (por defecto, uno por CPU)
+    tamano_lote (int): Documentos por viaje al servidor
+    reiniciar (bool): Si es True, recalcula los rangos y vuelve a exportar todas las particiones
+    al_terminar_particion (callable): Función que recibe (indice, filas) cuando termina cada partición (opcional, para informar el avance)
+
+    Retorna:
+    dict: Estadísticas (particiones, exportadas, omitidas, filas, segundos)
+    """
+    os.makedirs(directorio, exist_ok=True) # Crea la carpeta de salida.
+    inicio = time.perf_counter() # Guarda el instante de inicio.
+    rangos = _cargar_manifiesto(os.path.join(directorio, f"{tipo}.manifiesto.json"), tipo, formato, particiones, reiniciar) # Rangos de la exportación.
+    pendientes = [ # Particiones que faltan (las terminadas ya tienen su archivo final).
+        (indice, desde, hasta) for indice, (desde, hasta) in enumerate(rangos) # Itera sobre cada rango.
+        if reiniciar or not os.path.exists(ruta_particion(directorio, tipo, formato, indice)) # Solo si no está terminada.
+    ]
+    estadisticas = {"particiones": len(rangos), "exportadas": 0, "omitidas": len(rangos) - len(pendientes), "filas": 0} # Contadores de la exportación.
+    with ProcessPoolExecutor(max_workers=procesos) as pool: # Crea el pool de procesos.
+        tareas = [pool.submit(exportar_particion, tipo, formato, directorio, indice, desde, hasta, tamano_lote) for indice, desde, hasta in pendientes] # Lanza una tarea por partición.
+        for tarea in as_completed(tareas): # Itera sobre las particiones a medida que terminan.
+            indice, cantidad = tarea.result() # Obtiene el resultado (relanza el error si la partición falló).
+            estadisticas["exportadas"] += 1 # Cuenta la partición.
+            estadisticas["filas"] += cantidad # Suma las filas.
+            if al_terminar_particion: # Si se pidió informar el avance.
+                al_terminar_particion(indice, cantidad) # Avisa que la partición terminó.
+    estadisticas["segundos"] = time.perf_counter() - inicio # Calcula la duración total.
+    return estadisticas # Devuelve las estadísticas.
+
+# Ejecución directa: python exportacion.py <clientes|pedidos|pedidos_archivo> <carpeta> [--formato csv|jsonl|parquet] [--particiones N] [--procesos N] [--reiniciar]
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    parser = argparse.ArgumentParser(description="Exportación masiva de ComercioTech") # Crea el lector de argumentos.
+    parser.add_argument("tipo", choices=list(COLUMNAS)) # Colección a exportar.
+    parser.add_argument("carpeta", help="Carpeta de salida (un archivo por partición)") # Carpeta de salida.
+    parser.add_argument("--formato", choices=list(ESCRITORES), default="csv", help="Formato de los archivos") # Formato.
+    parser.add_argument("--particiones", type=int, default=8, help="Cantidad de rangos de _id") # Particiones.
+    parser.add_argument("--procesos", type=int, help="Procesos en paralelo (por defecto, uno por CPU)") # Procesos.
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Documentos por viaje al servidor") # Tamaño del lote.
+    parser.add_argument("--reiniciar", action="store_true", help="Vuelve a exportar todo, ignorando las particiones terminadas") # Reinicio.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    resumen = exportar( # Ejecuta la exportación.
+        argumentos.tipo, argumentos.carpeta, argumentos.formato, argumentos.particiones, argumentos.procesos, argumentos.lote, argumentos.reiniciar, # Opciones de la línea de comandos.
+        lambda indice, cantidad: print(f"🔄 {argumentos.tipo}: partición {indice} terminada ({cantidad} filas)") # Informa el avance.
+    )
+    print(f"✅ Exportación de {argumentos.tipo} terminada en {resumen['segundos']:.1f} s") # Imprime la duración.
+    print(f"  Particiones: {resumen['particiones']} ({resumen['exportadas']} exportadas, {resumen['omitidas']} ya terminadas)") # Imprime las particiones.
+    print(f"  Filas: {resumen['filas']}") # Imprime las filas exportadas.
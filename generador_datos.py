@@ -0,0 +1,155 @@
+"""
+Módulo generador de datos de prueba para ComercioTech
+Crea clientes, productos y pedidos con varias líneas, con las mismas estructuras
+que operaciones.py (y, si se pide, clientes con la estructura antigua).
+Con la misma semilla siempre genera los mismos datos, así las mediciones de
+benchmark.py se pueden comparar entre versiones
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+import random # Importa random para generar datos con una semilla fija.
+from datetime import datetime, timedelta # Importa datetime y timedelta para generar fechas.
+from conexion_db import db, clientes, productos, pedidos # Importa la base de datos y las colecciones desde el módulo 'conexion_db'.
+from operaciones import construir_cliente, construir_producto, construir_linea, construir_pedido # Importa las funciones que arman los documentos.
+from resumenes import RESUMEN_PRODUCTO, RESUMEN_CLIENTE, actualizar_resumenes # Importa los resúmenes diarios de ventas.
+from precios import HISTORIAL_PRECIOS # Importa el nombre de la colección del historial de precios.
+
+SEMILLA = 42 # Semilla por defecto.
+TAMANO_LOTE = 1000 # Documentos por insert_many.
+FECHA_BASE = datetime(2024, 1, 1) # Primera fecha de registro y de pedido generada.
+DIAS = 365 # Cantidad de días sobre los que se reparten las fechas.
+
+NOMBRES = ["José", "María", "Carlos", "Lucía", "Andrés", "Sofía", "Martín", "Valentina", "Tomás", "Camila", "Ramón", "Inés"] # Nombres (con y sin acentos).
+APELLIDOS = ["Martínez", "González", "Pérez", "Núñez", "Rodríguez", "López", "Fernández", "Muñoz", "Díaz", "Ruiz"] # Apellidos (con y sin acentos).
+CIUDADES = ["Madrid", "Barcelona", "Valencia", "Sevilla", "Bilbao", "Málaga", "Zaragoza", "Córdoba"] # Ciudades.
+PRODUCTOS_BASE = ["Lápiz", "Cuaderno", "Mochila", "Calculadora", "Tijeras", "Regla", "Carpeta", "Marcador"] # Tipos de producto.
+COLORES = ["rojo", "azul", "verde", "negro", "blanco"] # Variantes de producto.
+
+def codigo_cliente(numero): # Define la función que arma el código de un cliente generado.
+    """Devuelve el código del cliente número 'numero' (CLI-000001, ...)."""
+    return f"CLI-{numero:06d}" # Código con ceros a la izquierda.
+
+def codigo_producto(numero): # Define la función que arma el código de un producto generado.
+    """Devuelve el código del producto número 'numero' (PROD-00001, ...)."""
+    return f"PROD-{numero:05d}" # Código con ceros a la izquierda.
+
+def generar_clientes(cantidad, aleatorio, proporcion_antiguos=0.0): # Define el generador de clientes.
+    """
+    Genera clientes con la estructura unificada o, en la proporción indicada, con la antigua.
+
+    Parámetros:
+    cantidad (int): Cantidad de clientes
+    aleatorio (random.Random): Generador con semilla
+    proporcion_antiguos (float): Fracción de clientes con la estructura antigua (0 a 1)
+
+    Retorna:
+    generator: Documentos de cliente
+    """
+    for numero in range(1, cantidad + 1): # Itera sobre cada cliente a generar.
+        nombre = aleatorio.choice(NOMBRES) # Elige el nombre.
+        apellidos = f"{aleatorio.choice(APELLIDOS)} {aleatorio.choice(APELLIDOS)}" # Elige dos apellidos.
+        email = f"cliente{numero}@correo.com" # Arma un email único.
+        telefono = f"6{aleatorio.randrange(10**8):08d}" # Genera un teléfono.
+        direccion = {"calle": f"Calle {aleatorio.randint(1, 200)}", "numero": str(aleatorio.randint(1, 300)), "ciudad": aleatorio.choice(CIUDADES), "pais": "España"} # Genera la dirección.
+        fecha_registro = FECHA_BASE + timedelta(seconds=aleatorio.randrange(DIAS * 86400)) # Fecha de registro dentro del año.
+        if aleatorio.random() < proporcion_antiguos: # Si este cliente debe tener la estructura antigua.
+            yield { # Entrega el cliente plano, con 'identificador'.
+                "identificador": codigo_cliente(numero), "nombre": nombre, "apellidos": apellidos, # Código y nombre.
+                "email": email, "telefono": telefono, "direccion": direccion, "fecha_registro": fecha_registro # Contacto, dirección y fecha.
+            }
+        else: # Si tiene la estructura unificada.
+            yield construir_cliente(codigo_cliente(numero), nombre, apellidos, email, telefono, direccion, fecha_registro) # Entrega el cliente unificado.
+
+def generar_productos(cantidad, aleatorio): # Define el generador de productos.
+    """
+    Genera productos con precio y stock aleatorios.
+
+    Retorna:
+    generator: Documentos de producto
+    """
+    for numero in range(1, cantidad + 1): # Itera sobre cada producto a generar.
+        nombre = f"{aleatorio.choice(PRODUCTOS_BASE)} {aleatorio.choice(COLORES)} {numero}" # Arma un nombre único.
+        precio = round(aleatorio.uniform(0.5, 200), 2) # Precio entre 0,50 y 200.
+        yield construir_producto(codigo_producto(numero), nombre, precio, stock=aleatorio.randint(100, 10000)) # Entrega el producto.
+
+def generar_pedidos(cantidad, aleatorio, cantidad_clientes, catalogo, max_lineas=5): # Define el generador de pedidos.
+    """
+    Genera pedidos de 1 a max_lineas líneas, con los precios del catálogo.
+
+    Parámetros:
+    cantidad (int): Cantidad de pedidos
+    aleatorio (random.Random): Generador con semilla
+    cantidad_clientes (int): Los pedidos se reparten entre los clientes generados
+    catalogo (list): Documentos de producto generados (código, nombre y precio)
+    max_lineas (int): Máximo de líneas por pedido
+
+    Retorna:
+    generator: Documentos de pedido
+    """
+    for numero in range(1, cantidad + 1): # Itera sobre cada pedido a generar.
+        elegidos = aleatorio.sample(catalogo, min(len(catalogo), aleatorio.randint(1, max_lineas))) # Elige productos distintos para las líneas.
+        lineas = [construir_linea(producto["codigo_producto"], producto["nombre"], aleatorio.randint(1, 5), producto["precio"]) for producto in elegidos] # Arma las líneas.
+        fecha_pedido = FECHA_BASE + timedelta(seconds=aleatorio.randrange(DIAS * 86400)) # Fecha del pedido dentro del año.
+        metodo_pago = aleatorio.choice(["tarjeta", "transferencia", "efectivo"]) # Elige el método de pago.
+        yield construir_pedido(f"PED-{numero:07d}", codigo_cliente(aleatorio.randint(1, cantidad_clientes)), lineas, fecha_pedido, metodo_pago) # Entrega el pedido.
+
+def _insertar_en_lotes(coleccion, documentos, tamano_lote, al_insertar=None): # Define la función que inserta un generador en lotes.
+    """Inserta los documentos en lotes; devuelve la cantidad insertada."""
+    insertados = 0 # Contador de documentos insertados.
+    lote = [] # Lote en construcción.
+    for documento in documentos: # Itera sobre cada documento generado.
+        lote.append(documento) # Agrega el documento al lote.
+        if len(lote) >= tamano_lote: # Si el lote está completo.
+            insertados += len(coleccion.insert_many(lote, ordered=False).inserted_ids) # Inserta el lote.
+            if al_insertar: # Si hay que hacer algo con los documentos insertados.
+                al_insertar(lote) # Lo hace.
+            lote = [] # Empieza un lote nuevo.
+    if lote: # Si quedó un lote incompleto.
+        insertados += len(coleccion.insert_many(lote, ordered=False).inserted_ids) # Inserta el último lote.
+        if al_insertar: # Si hay que hacer algo con los documentos insertados.
+            al_insertar(lote) # Lo hace.
+    return insertados # Devuelve la cantidad insertada.
+
+def poblar(cantidad_clientes, cantidad_productos, cantidad_pedidos, semilla=SEMILLA, proporcion_antiguos=0.0, max_lineas=5, limpiar=False, tamano_lote=TAMANO_LOTE): # Define la función que llena la base de datos.
+    """
+    Genera e inserta los datos de prueba. Con la misma semilla y cantidades, los datos son idénticos.
+
+    Parámetros:
+    cantidad_clientes (int): Clientes a generar
+    cantidad_productos (int): Productos a generar
+    cantidad_pedidos (int): Pedidos a generar
+    semilla (int): Semilla del generador
+    proporcion_antiguos (float): Fracción de clientes con la estructura antigua
+    max_lineas (int): Máximo de líneas por pedido
+    limpiar (bool): Si es True, vacía antes clientes, productos, pedidos, resúmenes e historial de precios
+    tamano_lote (int): Documentos por insert_many
+
+    Retorna:
+    dict: Cantidad insertada por colección
+    """
+    aleatorio = random.Random(semilla) # Generador con semilla (no afecta al módulo random global).
+    if limpiar: # Si se pidió empezar desde cero.
+        for coleccion in (clientes, productos, pedidos, db[RESUMEN_PRODUCTO], db[RESUMEN_CLIENTE], db[HISTORIAL_PRECIOS]): # Itera sobre cada colección.
+            coleccion.delete_many({}) # Vacía la colección (conserva los índices).
+    catalogo = list(generar_productos(cantidad_productos, aleatorio)) # Genera el catálogo (se reutiliza para las líneas de los pedidos).
+    return { # Inserta y devuelve las cantidades.
+        "clientes": _insertar_en_lotes(clientes, generar_clientes(cantidad_clientes, aleatorio, proporcion_antiguos), tamano_lote), # Inserta los clientes.
+        "productos": _insertar_en_lotes(productos, (dict(producto) for producto in catalogo), tamano_lote), # Inserta los productos (copias: insert_many agrega _id).
+        "pedidos": _insertar_en_lotes(pedidos, generar_pedidos(cantidad_pedidos, aleatorio, cantidad_clientes, catalogo, max_lineas), tamano_lote, actualizar_resumenes), # Inserta los pedidos y los suma a los resúmenes.
+    }
+
+# Ejecución directa: python generador_datos.py --clientes N --productos N --pedidos N [--semilla N] [--antiguos 0.2] [--limpiar]
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    parser = argparse.ArgumentParser(description="Generador de datos de prueba de ComercioTech") # Crea el lector de argumentos.
+    parser.add_argument("--clientes", type=int, default=1000, help="Cantidad de clientes") # Cantidad de clientes.
+    parser.add_argument("--productos", type=int, default=200, help="Cantidad de productos") # Cantidad de productos.
+    parser.add_argument("--pedidos", type=int, default=5000, help="Cantidad de pedidos") # Cantidad de pedidos.
+    parser.add_argument("--semilla", type=int, default=SEMILLA, help="Semilla del generador") # Semilla.
+    parser.add_argument("--antiguos", type=float, default=0.0, help="Fracción de clientes con la estructura antigua (0 a 1)") # Proporción de clientes antiguos.
+    parser.add_argument("--max-lineas", type=int, default=5, help="Máximo de líneas por pedido") # Líneas por pedido.
+    parser.add_argument("--limpiar", action="store_true", help="Vacía clientes, productos, pedidos, resúmenes e historial de precios antes de generar") # Vaciar antes.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    insertados = poblar(argumentos.clientes, argumentos.productos, argumentos.pedidos, argumentos.semilla, argumentos.antiguos, argumentos.max_lineas, argumentos.limpiar) # Genera e inserta los datos.
+    for nombre, cantidad in insertados.items(): # Itera sobre cada colección.
+        print(f"✅ {nombre}: {cantidad} documentos generados") # Imprime la cantidad generada.
@@ -0,0 +1,98 @@
+"""
+Módulo para gestionar los índices de MongoDB
+Declara los índices que necesitan las consultas de operaciones.py,
+los crea de forma idempotente y reporta cuáles faltan o no se usan
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel # Importa las constantes de orden y la clase IndexModel para declarar índices.
+from conexion_db import db # Importa la referencia a la base de datos desde el módulo 'conexion_db'.
+
+# Índices declarados por colección: (nombre, claves, opciones)
+INDICES = { # Diccionario con los índices que deben existir en cada colección.
+    "clientes": [ # Índices de la colección de clientes.
+        ("codigo_1", [("codigo", ASCENDING)], {"unique": True, "partialFilterExpression": {"codigo": {"$type": "string"}}}), # Código único (los clientes aún sin migrar no tienen 'codigo').
+        ("direccion.ciudad_1__id_1", [("direccion.ciudad", ASCENDING), ("_id", ASCENDING)], {}), # Búsqueda de clientes por ciudad, paginada por _id.
+        ("fecha_registro_1__id_1", [("fecha_registro", ASCENDING), ("_id", ASCENDING)], {}), # Búsqueda de clientes por fecha de registro, paginada por fecha y _id.
+        ("nombre_busqueda_1__id_1", [("nombre_busqueda", ASCENDING), ("_id", ASCENDING)], {}), # Búsqueda exacta o por prefijo del nombre normalizado, paginada.
+    ],
+    "productos": [ # Índices de la colección de productos.
+        ("codigo_producto_1", [("codigo_producto", ASCENDING)], {"unique": True}), # Código de producto único.
+        ("nombre_busqueda_1__id_1", [("nombre_busqueda", ASCENDING), ("_id", ASCENDING)], {}), # Búsqueda exacta o por prefijo del nombre normalizado, paginada.
+    ],
+    "pedidos": [ # Índices de la colección de pedidos.
+        ("codigo_pedido_1", [("codigo_pedido", ASCENDING)], {"unique": True}), # Código de pedido único.
+        ("codigo_cliente_1_codigo_pedido_1", [("codigo_cliente", ASCENDING), ("codigo_pedido", ASCENDING)], {}), # Cubre el listado de códigos de pedido por cliente (sin leer los documentos).
+        ("codigo_cliente_1_fecha_pedido_1__id_1", [("codigo_cliente", ASCENDING), ("fecha_pedido", ASCENDING), ("_id", ASCENDING)], {}), # Pedidos de un cliente ordenados por fecha y paginados (también sirve para buscar solo por cliente).
+        ("fecha_pedido_1__id_1", [("fecha_pedido", ASCENDING), ("_id", ASCENDING)], {}), # Pedidos por rango de fechas, paginados (y los rangos de los reportes de analitica.py).
+        ("productos.codigo_producto_1_fecha_pedido_1__id_1", [("productos.codigo_producto", ASCENDING), ("fecha_pedido", ASCENDING), ("_id", ASCENDING)], {}), # Pedidos de un producto por rango de fechas, paginados.
+    ],
+    "pedidos_archivo": [ # Índices de los pedidos archivados (archivado.py): los de 'pedidos' que usan las consultas con el archivo.
+        ("codigo_pedido_1", [("codigo_pedido", ASCENDING)], {"unique": True}), # Código de pedido único (también entre pedidos archivados).
+        ("codigo_cliente_1_fecha_pedido_1__id_1", [("codigo_cliente", ASCENDING), ("fecha_pedido", ASCENDING), ("_id", ASCENDING)], {}), # Pedidos archivados de un cliente, por fecha y paginados.
+        ("fecha_pedido_1__id_1", [("fecha_pedido", ASCENDING), ("_id", ASCENDING)], {}), # Pedidos archivados por rango de fechas, paginados.
+        ("productos.codigo_producto_1_fecha_pedido_1__id_1", [("productos.codigo_producto", ASCENDING), ("fecha_pedido", ASCENDING), ("_id", ASCENDING)], {}), # Pedidos archivados de un producto por rango de fechas.
+    ],
+    "historial_precios": [ # Índices del historial de precios (precios.py).
+        ("codigo_producto_1_fecha_-1", [("codigo_producto", ASCENDING), ("fecha", DESCENDING)], {}), # Cambios de un producto, del más nuevo al más antiguo.
+    ],
+    "ventas_diarias_producto": [ # Índices del resumen diario por producto (resumenes.py).
+        ("dia_1_codigo_producto_1", [("dia", ASCENDING), ("codigo_producto", ASCENDING)], {"unique": True}), # Una fila por día y producto (la usan los upsert y los rangos de días).
+    ],
+    "ventas_diarias_cliente": [ # Índices del resumen diario por cliente (resumenes.py).
+        ("dia_1_codigo_cliente_1", [("dia", ASCENDING), ("codigo_cliente", ASCENDING)], {"unique": True}), # Una fila por día y cliente (la usan los upsert y los rangos de días).
+    ],
+}
+
+def asegurar_indices(): # Define la función para crear los índices declarados.
+    """
+    Crea todos los índices declarados en INDICES si aún no existen.
+    Es seguro llamarla varias veces: MongoDB no recrea un índice idéntico.
+
+    Retorna:
+    dict: Nombres de los índices asegurados por colección
+    """
+    asegurados = {} # Diccionario para guardar los índices asegurados por colección.
+    for nombre_coleccion, declarados in INDICES.items(): # Itera sobre cada colección y sus índices declarados.
+        modelos = [IndexModel(claves, name=nombre, **opciones) for nombre, claves, opciones in declarados] # Construye un IndexModel por cada índice declarado.
+        asegurados[nombre_coleccion] = db[nombre_coleccion].create_indexes(modelos) # Crea los índices en una sola llamada al servidor.
+    return asegurados # Devuelve los índices asegurados.
+
+def reportar_indices(): # Define la función para revisar el estado de los índices.
+    """
+    Revisa los índices de cada colección y reporta los que faltan y los que no se usan.
+    El uso se obtiene de $indexStats (contador de accesos desde el último reinicio del servidor).
+
+    Retorna:
+    dict: Por colección, listas 'faltantes' y 'sin_uso' con nombres de índices
+    """
+    reporte = {} # Diccionario para guardar el reporte por colección.
+    for nombre_coleccion, declarados in INDICES.items(): # Itera sobre cada colección y sus índices declarados.
+        coleccion = db[nombre_coleccion] # Obtiene la referencia a la colección.
+        existentes = coleccion.index_information() # Obtiene los índices que existen actualmente en la colección.
+        faltantes = [nombre for nombre, _, _ in declarados if nombre not in existentes] # Índices declarados que no existen.
+        estadisticas = coleccion.aggregate([{"$indexStats": {}}]) # Obtiene las estadísticas de uso de cada índice.
+        sin_uso = sorted( # Ordena los nombres de los índices sin uso.
+            est["name"] for est in estadisticas # Recorre las estadísticas de cada índice.
+            if est["name"] != "_id_" and est["accesses"]["ops"] == 0 # Excluye el índice _id y se queda con los que no tienen accesos.
+        )
+        reporte[nombre_coleccion] = {"faltantes": faltantes, "sin_uso": sin_uso} # Guarda el reporte de la colección.
+    return reporte # Devuelve el reporte completo.
+
+def mostrar_reporte_indices(): # Define la función para imprimir el reporte de índices.
+    """
+    Imprime por consola el reporte de índices faltantes y sin uso.
+    """
+    for nombre_coleccion, estado in reportar_indices().items(): # Itera sobre el reporte de cada colección.
+        print(f"\n🗂️ Colección {nombre_coleccion}:") # Imprime el nombre de la colección.
+        if estado["faltantes"]: # Si hay índices faltantes.
+            print(f"  ❌ Faltantes: {', '.join(estado['faltantes'])}") # Imprime los índices faltantes.
+        else: # Si no falta ningún índice.
+            print("  ✅ Todos los índices declarados existen") # Imprime que no falta ninguno.
+        if estado["sin_uso"]: # Si hay índices sin uso.
+            print(f"  ⚠️ Sin uso: {', '.join(estado['sin_uso'])}") # Imprime los índices sin uso.
+
+# Ejecución directa: crea los índices y muestra el reporte
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    for nombre_coleccion, nombres in asegurar_indices().items(): # Crea los índices e itera sobre el resultado.
+        print(f"✅ Índices asegurados en {nombre_coleccion}: {', '.join(nombres)}") # Imprime los índices asegurados.
+    mostrar_reporte_indices() # Muestra el reporte de índices.
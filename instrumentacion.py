@@ -0,0 +1,213 @@
+"""
+Módulo de instrumentación de consultas para ComercioTech
+Registra, con el monitoreo de comandos de pymongo, cada comando enviado al servidor:
+latencia (histograma), viajes al servidor y bytes devueltos, agrupados por la función
+de operaciones.py (u operaciones_async.py) que lo originó y por tipo de comando.
+Además guarda una muestra de las consultas y les hace explain() para marcar las que
+recorren la colección completa (COLLSCAN).
+Es opcional: no hace nada hasta que se llama a activar(), que debe ser antes del
+primer uso de la conexión. Las métricas se guardan como JSON o en el formato de
+texto de Prometheus, sin necesidad de un servicio de métricas
+"""
+
+import json # Importa json para guardar las métricas.
+import random # Importa random para elegir la muestra de consultas a revisar.
+import sys # Importa sys para recorrer la pila de llamadas.
+import threading # Importa threading para proteger los contadores entre hilos.
+from collections import deque # Importa deque para guardar una muestra acotada de consultas.
+from contextvars import ContextVar # Importa ContextVar para no medir los explain propios.
+import bson # Importa bson para medir el tamaño de las respuestas.
+from bson import json_util # Importa json_util para guardar las consultas con tipos de MongoDB como JSON.
+from pymongo import monitoring # Importa el monitoreo de comandos de pymongo.
+from pymongo.errors import PyMongoError # Importa la excepción base de pymongo.
+
+LIMITES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500) # Límites superiores de los tramos del histograma (milisegundos).
+MODULOS_ETIQUETA = ("operaciones", "operaciones_async") # Módulos cuyas funciones etiquetan los comandos.
+SIN_ETIQUETA = "sin_operacion" # Etiqueta de los comandos que no vienen de operaciones.py.
+COMANDOS_EXPLICABLES = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"} # Comandos a los que se les puede hacer explain().
+CAMPOS_SESION = {"lsid", "txnNumber", "autocommit", "startTransaction"} # Campos de sesión que no acepta explain().
+MAXIMO_MUESTRAS = 200 # Cantidad máxima de consultas guardadas para revisar su plan.
+
+_explicando = ContextVar("explicando", default=False) # Indica que el comando lo envía revisar_planes (no se mide).
+
+def _etiqueta(): # Define la función que identifica la función que originó el comando.
+    """
+    Recorre la pila de llamadas y devuelve el nombre de la función más externa de
+    operaciones.py u operaciones_async.py (la que llamó el usuario, no sus auxiliares).
+    """
+    etiqueta = SIN_ETIQUETA # Etiqueta por defecto.
+    marco = sys._getframe(2) # Empieza fuera del oyente.
+    while marco is not None: # Recorre la pila hacia afuera.
+        if marco.f_globals.get("__name__") in MODULOS_ETIQUETA: # Si el marco pertenece a operaciones.
+            etiqueta = marco.f_code.co_name # Guarda la función (sigue buscando una más externa).
+        marco = marco.f_back # Pasa al marco que hizo la llamada.
+    return etiqueta # Devuelve la etiqueta.
+
+def _tiene_collscan(plan): # Define la función que busca un recorrido completo en un plan.
+    """Indica si algún nivel del resultado de explain() tiene la etapa COLLSCAN."""
+    if isinstance(plan, dict): # Si es un documento.
+        return plan.get("stage") == "COLLSCAN" or any(_tiene_collscan(valor) for valor in plan.values()) # Revisa la etapa y los sub-documentos.
+    if isinstance(plan, list): # Si es un arreglo.
+        return any(_tiene_collscan(valor) for valor in plan) # Revisa cada elemento.
+    return False # Otros valores no son planes.
+
+class Metricas(monitoring.CommandListener): # Define el oyente que acumula las métricas.
+    """
+    Oyente de comandos de pymongo. Por cada (función, comando) lleva un histograma de
+    latencia, la cantidad de viajes, los errores y los bytes devueltos.
+    """
+
+    def __init__(self, muestreo=0.01): # Define el constructor.
+        self.muestreo = muestreo # Fracción de consultas que se guardan para revisar su plan.
+        self._candado = threading.Lock() # Candado para usar el oyente desde varios hilos.
+        self._en_curso = {} # Comandos enviados y sin respuesta: (conexión, id) -> (función, comando).
+        self._series = {} # Métricas por (función, comando).
+        self._muestras = deque(maxlen=MAXIMO_MUESTRAS) # Consultas pendientes de revisar con explain().
+        self.collscan = [] # Consultas revisadas que recorren la colección completa.
+
+    def started(self, evento): # Se llama cuando se envía un comando.
+        if _explicando.get(): # Si es un explain propio.
+            return # No se mide.
+        funcion = _etiqueta() # Función de operaciones que originó el comando.
+        with self._candado: # Protege los contadores.
+            self._en_curso[(evento.connection_id, evento.request_id)] = (funcion, evento.command_name) # Recuerda el comando hasta su respuesta.
+            if evento.command_name in COMANDOS_EXPLICABLES and random.random() < self.muestreo: # Si la consulta entra en la muestra.
+                comando = {clave: valor for clave, valor in evento.command.items() if not clave.startswith("$") and clave not in CAMPOS_SESION} # Copia el comando sin los campos de sesión.
+                self._muestras.append((funcion, evento.database_name, comando)) # Guarda la consulta para revisarla después.
+
+    def succeeded(self, evento): # Se llama cuando un comando termina bien.
+        self._registrar(evento, len(bson.encode(evento.reply)), False) # Registra la duración y el tamaño de la respuesta.
+
+    def failed(self, evento): # Se llama cuando un comando falla.
+        self._registrar(evento, 0, True) # Registra la duración y el error.
+
+    def _registrar(self, evento, bytes_respuesta, error): # Define la función que acumula un comando terminado.
+        with self._candado: # Protege los contadores.
+            clave = self._en_curso.pop((evento.connection_id, evento.request_id), None) # Recupera la función y el comando.
+            if clave is None: # Si es un explain propio (o se activó a mitad de un comando).
+                return # No se mide.
+            serie = self._series.get(clave) # Busca la serie de la función y el comando.
+            if serie is None: # Si es la primera vez.
+                serie = self._series[clave] = {"tramos": [0] * (len(LIMITES_MS) + 1), "viajes": 0, "errores": 0, "bytes": 0, "suma_ms": 0.0} # Crea la serie vacía.
+            milisegundos = evento.duration_micros / 1000 # Duración en milisegundos.
+            tramo = next((i for i, limite in enumerate(LIMITES_MS) if milisegundos <= limite), len(LIMITES_MS)) # Tramo del histograma (el último es +Inf).
+            serie["tramos"][tramo] += 1 # Cuenta el comando en su tramo.
+            serie["viajes"] += 1 # Cuenta el viaje al servidor.
+            serie["errores"] += error # Cuenta el error (si lo hubo).
+            serie["bytes"] += bytes_respuesta # Suma los bytes devueltos.
+            serie["suma_ms"] += milisegundos # Suma la duración.
+
+    def revisar_planes(self, cliente): # Define la función que revisa los planes de la muestra.
+        """
+        Hace explain() (solo planificación, sin ejecutar) a las consultas guardadas en la
+        muestra y agrega a 'collscan' las que recorren la colección completa.
+
+        Parámetros:
+        cliente (MongoClient): Cliente síncrono con el que se envían los explain()
+
+        Retorna:
+        list: Consultas con COLLSCAN encontradas en esta revisión
+        """
+        with self._candado: # Protege la muestra.
+            muestras = list(self._muestras) # Toma las consultas pendientes.
+            self._muestras.clear() # Vacía la muestra.
+        encontradas = [] # Consultas con COLLSCAN.
+        marca = _explicando.set(True) # Los explain no se miden.
+        try: # Asegura que se quite la marca al terminar.
+            for funcion, base, comando in muestras: # Itera sobre cada consulta guardada.
+                try: # Intenta obtener el plan.
+                    plan = cliente[base].command({"explain": comando, "verbosity": "queryPlanner"}) # Pide el plan sin ejecutar la consulta.
+                except PyMongoError as error: # Si el servidor no puede explicar el comando.
+                    print(f"⚠️ No se pudo revisar el plan de {funcion} ({next(iter(comando))}): {error}") # Informa el error y sigue.
+                    continue # Pasa a la siguiente consulta.
+                if _tiene_collscan(plan): # Si el plan recorre la colección completa.
+                    encontradas.append({"funcion": funcion, "comando": next(iter(comando)), "coleccion": comando[next(iter(comando))], "consulta": json.loads(json_util.dumps(comando))}) # Guarda la consulta en formato JSON.
+        finally: # Siempre.
+            _explicando.reset(marca) # Quita la marca.
+        with self._candado: # Protege la lista.
+            self.collscan.extend(encontradas) # Agrega las consultas encontradas.
+        return encontradas # Devuelve las consultas encontradas.
+
+    def a_diccionario(self): # Define la función que exporta las métricas como diccionario.
+        """
+        Retorna:
+        dict: Límites del histograma, métricas por función y comando, y consultas con COLLSCAN
+        """
+        with self._candado: # Protege los contadores.
+            series = [ # Métricas de cada serie.
+                {"funcion": funcion, "comando": comando, **serie, "tramos": list(serie["tramos"])} # Copia la serie.
+                for (funcion, comando), serie in sorted(self._series.items()) # Ordena por función y comando.
+            ]
+            return {"limites_ms": list(LIMITES_MS), "series": series, "collscan": list(self.collscan)} # Devuelve las métricas.
+
+    def a_prometheus(self): # Define la función que exporta las métricas en formato Prometheus.
+        """
+        Retorna:
+        str: Métricas en el formato de texto de Prometheus (histograma y contadores)
+        """
+        datos = self.a_diccionario() # Toma una copia de las métricas.
+        lineas = [ # Encabezados del histograma.
+            "# HELP comerciotech_comando_duracion_ms Duración de los comandos enviados a MongoDB.", # Descripción.
+            "# TYPE comerciotech_comando_duracion_ms histogram" # Tipo.
+        ]
+        for serie in datos["series"]: # Itera sobre cada serie.
+            etiquetas = f'funcion="{serie["funcion"]}",comando="{serie["comando"]}"' # Etiquetas de la serie.
+            acumulado = 0 # Conteo acumulado (Prometheus usa tramos acumulados).
+            for limite, cantidad in zip([*LIMITES_MS, "+Inf"], serie["tramos"]): # Itera sobre cada tramo.
+                acumulado += cantidad # Acumula el conteo.
+                lineas.append(f'comerciotech_comando_duracion_ms_bucket{{{etiquetas},le="{limite}"}} {acumulado}') # Línea del tramo.
+            lineas.append(f"comerciotech_comando_duracion_ms_sum{{{etiquetas}}} {serie['suma_ms']}") # Suma de duraciones.
+            lineas.append(f"comerciotech_comando_duracion_ms_count{{{etiquetas}}} {serie['viajes']}") # Cantidad de comandos.
+        for nombre, campo, descripcion in ( # Contadores por serie.
+            ("comerciotech_comando_errores_total", "errores", "Comandos que terminaron con error."), # Errores.
+            ("comerciotech_comando_bytes_total", "bytes", "Bytes devueltos por el servidor."), # Bytes devueltos.
+        ):
+            lineas += [f"# HELP {nombre} {descripcion}", f"# TYPE {nombre} counter"] # Encabezados del contador.
+            lineas += [f'{nombre}{{funcion="{s["funcion"]}",comando="{s["comando"]}"}} {s[campo]}' for s in datos["series"]] # Una línea por serie.
+        conteo = {} # Consultas con COLLSCAN por función y comando.
+        for consulta in datos["collscan"]: # Itera sobre cada consulta con COLLSCAN.
+            clave = (consulta["funcion"], consulta["comando"]) # Función y comando.
+            conteo[clave] = conteo.get(clave, 0) + 1 # Cuenta la consulta.
+        lineas += ["# HELP comerciotech_collscan_total Consultas de la muestra que recorren la colección completa.", "# TYPE comerciotech_collscan_total counter"] # Encabezados del contador.
+        lineas += [f'comerciotech_collscan_total{{funcion="{funcion}",comando="{comando}"}} {cantidad}' for (funcion, comando), cantidad in sorted(conteo.items())] # Una línea por función y comando.
+        return "\n".join(lineas) + "\n" # Devuelve el texto.
+
+    def guardar(self, ruta): # Define la función que guarda las métricas en un archivo.
+        """
+        Guarda las métricas en formato Prometheus si la ruta termina en .prom, o en JSON si no.
+
+        Parámetros:
+        ruta (str): Ruta del archivo
+        """
+        with open(ruta, "w", encoding="utf-8") as archivo: # Abre el archivo.
+            if ruta.endswith(".prom"): # Si se pide el formato de Prometheus.
+                archivo.write(self.a_prometheus()) # Escribe el texto.
+            else: # Si no.
+                json.dump(self.a_diccionario(), archivo, indent=2, ensure_ascii=False) # Escribe el JSON.
+
+    def mostrar(self): # Define la función que imprime un resumen de las métricas.
+        """Imprime por consola, por función, los viajes, el tiempo total y las consultas con COLLSCAN."""
+        datos = self.a_diccionario() # Toma una copia de las métricas.
+        for serie in sorted(datos["series"], key=lambda s: s["suma_ms"], reverse=True): # De la serie más lenta a la más rápida.
+            print(f"⏱️ {serie['funcion']} / {serie['comando']}: {serie['viajes']} viajes, {serie['suma_ms']:.1f} ms, {serie['bytes']} bytes") # Imprime la serie.
+        for consulta in datos["collscan"]: # Itera sobre cada consulta con COLLSCAN.
+            print(f"⚠️ COLLSCAN en {consulta['funcion']} ({consulta['comando']} sobre {consulta['coleccion']})") # Imprime la consulta.
+
+metricas = None # Oyente activo (None mientras la instrumentación esté desactivada).
+
+def activar(muestreo=0.01): # Define la función que activa la instrumentación.
+    """
+    Registra el oyente de métricas para todos los clientes que se creen después.
+    Debe llamarse antes del primer uso de la conexión (conexion_db crea el cliente en el primer uso).
+
+    Parámetros:
+    muestreo (float): Fracción de consultas que se revisan con explain() (0 a 1)
+
+    Retorna:
+    Metricas: Oyente registrado
+    """
+    global metricas # Indica que se usará la variable global del módulo.
+    if metricas is None: # Si aún no está activa.
+        metricas = Metricas(muestreo) # Crea el oyente.
+        monitoring.register(metricas) # Lo registra para los clientes que se creen después.
+    return metricas # Devuelve el oyente.
@@ -0,0 +1,166 @@
+"""
+Módulo de migración de clientes para ComercioTech
+Reescribe los clientes con la estructura antigua (plana, con 'identificador')
+a la estructura unificada (con 'codigo' y sub-diccionario 'datos'), en lotes con
+bulk_write, y completa la clave de búsqueda 'nombre_busqueda' de clientes y productos
+creados antes de que existiera. Al final agrega el resumen de pedidos (resumenes.py) a los
+clientes que todavía no lo tienen. El avance se guarda en la colección 'migraciones'
+(último _id procesado), así que si se interrumpe, la siguiente ejecución continúa donde quedó.
+Las consultas de consultas.py solo buscan la estructura unificada: esta migración
+debe ejecutarse antes de usar esta versión sobre una base de datos antigua
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+import time # Importa el módulo time para limitar la velocidad de la migración.
+from datetime import datetime # Importa la clase datetime para registrar la fecha del avance.
+from pymongo import UpdateOne # Importa UpdateOne para escrituras en lote.
+from pymongo.errors import BulkWriteError, OperationFailure # Importa las excepciones de escrituras en lote y de comandos.
+from conexion_db import clientes, productos, db # Importa las colecciones de clientes y productos y la base de datos.
+from consultas import clave_busqueda # Importa la normalización de las claves de búsqueda.
+from resumenes import completar_resumenes # Importa el cálculo de los resúmenes de pedidos que faltan.
+
+MIGRACION = "clientes_estructura_unificada" # Identificador del avance de los clientes en la colección 'migraciones'.
+MIGRACION_PRODUCTOS = "productos_nombre_busqueda" # Identificador del avance de los productos.
+TAMANO_LOTE = 500 # Clientes por lote.
+CAMPOS_PLANOS = ("nombre", "apellidos", "email", "telefono") # Campos de la estructura antigua que pasan a 'datos'.
+INDICES_ANTIGUOS = ("identificador_1", "nombre_1", "datos.nombre_1") # Índices que ya no usa ninguna consulta.
+
+# Un cliente está por migrar si le falta 'codigo', el sub-diccionario 'datos' o la clave de búsqueda
+FILTRO_ANTIGUOS = {"$or": [{"codigo": {"$exists": False}}, {"datos": {"$exists": False}}, {"nombre_busqueda": {"$exists": False}}]} # Filtro de clientes por migrar.
+FILTRO_PRODUCTOS = {"nombre_busqueda": {"$exists": False}} # Filtro de productos sin clave de búsqueda.
+
+def convertir(documento): # Define la función que arma la actualización de un cliente.
+    """
+    Arma la actualización que lleva un cliente a la estructura unificada.
+    Si ya tiene algunos campos en 'datos', se conservan (tienen prioridad sobre los planos).
+
+    Parámetros:
+    documento (dict): Cliente con la estructura antigua
+
+    Retorna:
+    dict: Actualización con $set y $unset, o None si el cliente no tiene código
+    """
+    codigo = documento.get("codigo", documento.get("identificador")) # Prioriza 'codigo', luego 'identificador'.
+    if not codigo: # Si no hay forma de identificar al cliente.
+        return None # No se puede migrar.
+    datos = {campo: documento[campo] for campo in CAMPOS_PLANOS if campo in documento} # Toma los campos planos.
+    datos.update(documento.get("datos") or {}) # Los campos de 'datos' tienen prioridad.
+    return { # Devuelve la actualización.
+        "$set": {"codigo": codigo, "datos": datos, "nombre_busqueda": clave_busqueda(datos.get("nombre"))}, # Escribe el código, el sub-diccionario y la clave de búsqueda.
+        "$unset": {campo: "" for campo in ("identificador",) + CAMPOS_PLANOS} # Quita los campos antiguos.
+    }
+
+def convertir_producto(documento): # Define la función que arma la actualización de un producto.
+    """Arma la actualización que agrega la clave de búsqueda a un producto."""
+    return {"$set": {"nombre_busqueda": clave_busqueda(documento.get("nombre"))}} # Escribe el nombre normalizado.
+
+def _leer_avance(migracion): # Define la función que lee el último _id procesado.
+    """Devuelve el documento de avance de la migración (o un avance vacío)."""
+    return db.migraciones.find_one({"_id": migracion}) or {"ultimo_id": None, "migrados": 0, "conflictos": 0, "sin_codigo": 0} # Lee el avance guardado.
+
+def _guardar_avance(migracion, avance): # Define la función que guarda el avance.
+    """Guarda el último _id procesado y los contadores."""
+    db.migraciones.update_one( # Actualiza (o crea) el documento de avance.
+        {"_id": migracion}, # Filtra por el identificador de la migración.
+        {"$set": dict(avance, actualizado=datetime.now())}, # Guarda el avance con la fecha.
+        upsert=True # Lo crea si no existe.
+    )
+
+def _migrar_coleccion(coleccion, migracion, filtro_pendientes, convertir_documento, tamano_lote, max_por_segundo, reiniciar): # Define el recorrido común de las migraciones.
+    """
+    Recorre los documentos pendientes en lotes ordenados por _id, escribe cada lote con
+    un bulk_write desordenado y luego guarda el avance. Es idempotente: un documento
+    ya migrado no vuelve a cumplir el filtro de pendientes.
+    Al terminar, el avance vuelve al principio para que una nueva ejecución revise todo.
+
+    Retorna:
+    dict: Avance final (migrados, conflictos, sin_codigo, pendientes)
+    """
+    avance = {"ultimo_id": None, "migrados": 0, "conflictos": 0, "sin_codigo": 0} if reiniciar else _leer_avance(migracion) # Retoma el avance guardado.
+    avance.pop("_id", None) # Quita el _id del documento de avance (no se vuelve a escribir).
+    avance.pop("actualizado", None) # Quita la fecha anterior.
+    while True: # Procesa lotes hasta terminar.
+        inicio = time.monotonic() # Instante de inicio del lote.
+        filtro = filtro_pendientes if avance["ultimo_id"] is None else {"$and": [filtro_pendientes, {"_id": {"$gt": avance["ultimo_id"]}}]} # Continúa después del último _id.
+        lote = list(coleccion.find(filtro, sort=[("_id", 1)], limit=tamano_lote)) # Trae el siguiente lote.
+        if not lote: # Si no quedan documentos por migrar.
+            break # Termina.
+        operaciones = [] # Actualizaciones del lote.
+        for documento in lote: # Itera sobre cada documento del lote.
+            actualizacion = convertir_documento(documento) # Arma la actualización.
+            if actualizacion is None: # Si el documento no tiene código.
+                avance["sin_codigo"] += 1 # Lo cuenta (queda sin migrar).
+            else: # Si se puede migrar.
+                operaciones.append(UpdateOne({"$and": [{"_id": documento["_id"]}, filtro_pendientes]}, actualizacion)) # Solo si sigue pendiente.
+        if operaciones: # Si hay algo que escribir.
+            try: # Intenta escribir el lote.
+                avance["migrados"] += coleccion.bulk_write(operaciones, ordered=False).modified_count # Escribe el lote y cuenta los migrados.
+            except BulkWriteError as error: # Si algunos fallaron (por ejemplo, un código que ya usa otro cliente).
+                avance["migrados"] += error.details.get("nModified", 0) # Cuenta los que sí se migraron.
+                avance["conflictos"] += len(error.details.get("writeErrors", [])) # Cuenta los que fallaron (quedan sin migrar).
+        avance["ultimo_id"] = lote[-1]["_id"] # Avanza hasta el último cliente del lote.
+        _guardar_avance(migracion, avance) # Guarda el avance (punto de reanudación).
+        print(f"🔄 {coleccion.name}: {avance['migrados']} migrados (último _id {avance['ultimo_id']})") # Informa el avance.
+        if max_por_segundo: # Si se limitó la velocidad.
+            espera = len(lote) / max_por_segundo - (time.monotonic() - inicio) # Tiempo que falta para no superar el límite.
+            if espera > 0: # Si el lote fue más rápido que el límite.
+                time.sleep(espera) # Espera antes del siguiente lote.
+    _guardar_avance(migracion, dict(avance, ultimo_id=None)) # Terminó: la próxima ejecución empieza desde el principio.
+    avance["pendientes"] = coleccion.count_documents(filtro_pendientes) # Cuenta los documentos que siguen pendientes.
+    return avance # Devuelve el avance final.
+
+def migrar(tamano_lote=TAMANO_LOTE, max_por_segundo=None, reiniciar=False): # Define la función principal de la migración de clientes.
+    """
+    Migra los clientes con la estructura antigua o sin clave de búsqueda.
+
+    Parámetros:
+    tamano_lote (int): Clientes por lote
+    max_por_segundo (float): Límite de clientes por segundo (por defecto, sin límite)
+    reiniciar (bool): Si es True, ignora el avance guardado y empieza desde el principio
+
+    Retorna:
+    dict: Avance final (migrados, conflictos, sin_codigo, pendientes)
+    """
+    return _migrar_coleccion(clientes, MIGRACION, FILTRO_ANTIGUOS, convertir, tamano_lote, max_por_segundo, reiniciar) # Migra los clientes.
+
+def migrar_productos(tamano_lote=TAMANO_LOTE, max_por_segundo=None, reiniciar=False): # Define la función que completa la clave de búsqueda de los productos.
+    """
+    Agrega 'nombre_busqueda' a los productos que no la tienen (mismos parámetros que migrar).
+
+    Retorna:
+    dict: Avance final (migrados, conflictos, sin_codigo, pendientes)
+    """
+    return _migrar_coleccion(productos, MIGRACION_PRODUCTOS, FILTRO_PRODUCTOS, convertir_producto, tamano_lote, max_por_segundo, reiniciar) # Migra los productos.
+
+def eliminar_indices_antiguos(): # Define la función que elimina los índices de la estructura antigua.
+    """
+    Elimina los índices de clientes que ya no usa ninguna consulta.
+    Llamarla solo cuando no quedan clientes pendientes.
+    """
+    for nombre in INDICES_ANTIGUOS: # Itera sobre cada índice antiguo.
+        try: # Intenta eliminar el índice.
+            clientes.drop_index(nombre) # Elimina el índice.
+            print(f"🗑️ Índice {nombre} eliminado") # Informa la eliminación.
+        except OperationFailure: # Si el índice no existe.
+            pass # No hay nada que eliminar.
+
+# Ejecución directa: python migracion_clientes.py [--lote N] [--max-por-segundo N] [--reiniciar]
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    parser = argparse.ArgumentParser(description="Migración de clientes a la estructura unificada") # Crea el lector de argumentos.
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Clientes por lote") # Tamaño del lote.
+    parser.add_argument("--max-por-segundo", type=float, help="Límite de clientes por segundo") # Límite de velocidad.
+    parser.add_argument("--reiniciar", action="store_true", help="Ignora el avance guardado") # Empieza desde el principio.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    resultado_productos = migrar_productos(argumentos.lote, argumentos.max_por_segundo, argumentos.reiniciar) # Completa la clave de búsqueda de los productos.
+    print(f"✅ Productos con clave de búsqueda: {resultado_productos['migrados']} actualizados") # Imprime los productos actualizados.
+    resultado = migrar(argumentos.lote, argumentos.max_por_segundo, argumentos.reiniciar) # Ejecuta la migración de clientes.
+    print(f"✅ Migración terminada: {resultado['migrados']} migrados") # Imprime los clientes migrados.
+    print(f"  Conflictos de código: {resultado['conflictos']}") # Imprime los conflictos.
+    print(f"  Sin código: {resultado['sin_codigo']}") # Imprime los clientes sin código.
+    if resultado["pendientes"]: # Si quedan clientes sin migrar.
+        print(f"⚠️ Quedan {resultado['pendientes']} clientes con la estructura antigua (revisar conflictos y clientes sin código)") # Advierte que hay pendientes.
+    else: # Si todos quedaron migrados.
+        eliminar_indices_antiguos() # Elimina los índices que ya no se usan.
+    completados = completar_resumenes(tamano_lote=argumentos.lote) # Agrega el resumen de pedidos a los clientes que no lo tienen.
+    print(f"✅ Resúmenes de pedidos completados: {completados} clientes") # Imprime los clientes completados.
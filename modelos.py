@@ -0,0 +1,103 @@
+"""
+Módulo de modelos de datos para ComercioTech
+Define registros compactos (clases con __slots__) para clientes, productos,
+pedidos y líneas de pedido
+"""
+
+from dataclasses import dataclass # Importa el decorador dataclass para definir registros con poco código.
+from datetime import datetime # Importa la clase datetime para las anotaciones de fechas.
+
+@dataclass(slots=True) # Registro con __slots__: sin diccionario por instancia, ocupa menos memoria.
+class Cliente: # Define el registro de un cliente.
+    """
+    Cliente con la estructura unificada. Los campos que no se pidieron en la
+    proyección de la consulta quedan en None.
+    """
+    codigo: str | None = None # Código del cliente.
+    nombre: str | None = None # Nombre del cliente.
+    apellidos: str | None = None # Apellidos del cliente.
+    email: str | None = None # Correo electrónico del cliente.
+    telefono: str | None = None # Teléfono del cliente.
+    direccion: dict | None = None # Diccionario con {calle, numero, ciudad, pais}.
+    fecha_registro: datetime | None = None # Fecha de registro del cliente.
+    resumen_pedidos: dict | None = None # Resumen de sus pedidos {cantidad, total, ultimo_pedido, recientes} (resumenes.py).
+
+    @classmethod # Método que se llama sobre la clase.
+    def desde_documento(cls, documento): # Define la función que convierte un documento en registro.
+        """
+        Convierte un documento de 'clientes' (con 'codigo' y sub-diccionario 'datos') en registro.
+        Los clientes con la estructura antigua se convierten antes con migracion_clientes.py.
+        """
+        datos = documento.get("datos") or {} # Obtiene el sub-diccionario 'datos'.
+        return cls( # Crea el registro.
+            codigo=documento.get("codigo"), # Código del cliente.
+            nombre=datos.get("nombre"), # Nombre del cliente.
+            apellidos=datos.get("apellidos"), # Apellidos del cliente.
+            email=datos.get("email"), # Email del cliente.
+            telefono=datos.get("telefono"), # Teléfono del cliente.
+            direccion=documento.get("direccion"), # Dirección del cliente.
+            fecha_registro=documento.get("fecha_registro"), # Fecha de registro.
+            resumen_pedidos=documento.get("resumen_pedidos") # Resumen de sus pedidos.
+        )
+
+@dataclass(slots=True) # Registro con __slots__.
+class Producto: # Define el registro de un producto.
+    """Producto del catálogo."""
+    codigo_producto: str | None = None # Código del producto.
+    nombre: str | None = None # Nombre del producto.
+    precio: float | None = None # Precio actual del producto.
+    stock: int | None = None # Unidades en stock.
+    estado: str | None = None # Estado del producto (por ejemplo, "activo").
+
+    @classmethod # Método que se llama sobre la clase.
+    def desde_documento(cls, documento): # Define la función que convierte un documento en registro.
+        """Convierte un documento de 'productos' en registro."""
+        return cls( # Crea el registro.
+            codigo_producto=documento.get("codigo_producto"), # Código del producto.
+            nombre=documento.get("nombre"), # Nombre del producto.
+            precio=documento.get("precio"), # Precio del producto.
+            stock=documento.get("stock"), # Stock del producto.
+            estado=documento.get("estado") # Estado del producto.
+        )
+
+@dataclass(slots=True) # Registro con __slots__.
+class Linea: # Define el registro de una línea de pedido.
+    """Línea de un pedido, con el precio que tenía el producto al comprarlo."""
+    codigo_producto: str | None = None # Código del producto.
+    nombre: str | None = None # Nombre del producto al momento de la compra.
+    cantidad: int = 0 # Unidades compradas.
+    precio_unitario: float = 0 # Precio unitario al momento de la compra.
+    total_comprado: float | None = None # Total de la línea.
+
+    @classmethod # Método que se llama sobre la clase.
+    def desde_documento(cls, documento): # Define la función que convierte un documento en registro.
+        """Convierte un elemento del arreglo 'productos' de un pedido en registro."""
+        return cls( # Crea el registro.
+            codigo_producto=documento.get("codigo_producto"), # Código del producto.
+            nombre=documento.get("nombre"), # Nombre del producto.
+            cantidad=documento.get("cantidad", 0), # Cantidad (0 si falta).
+            precio_unitario=documento.get("precio_unitario", 0), # Precio unitario (0 si falta).
+            total_comprado=documento.get("total_comprado") # Total de la línea.
+        )
+
+@dataclass(slots=True) # Registro con __slots__.
+class Pedido: # Define el registro de un pedido.
+    """Pedido con sus líneas."""
+    codigo_pedido: str | None = None # Código del pedido.
+    codigo_cliente: str | None = None # Código del cliente.
+    fecha_pedido: datetime | None = None # Fecha del pedido.
+    lineas: tuple = () # Líneas del pedido (registros Linea).
+    total_compra: float = 0 # Total del pedido.
+    metodo_pago: str | None = None # Método de pago.
+
+    @classmethod # Método que se llama sobre la clase.
+    def desde_documento(cls, documento): # Define la función que convierte un documento en registro.
+        """Convierte un documento de 'pedidos' en registro, incluyendo sus líneas."""
+        return cls( # Crea el registro.
+            codigo_pedido=documento.get("codigo_pedido"), # Código del pedido.
+            codigo_cliente=documento.get("codigo_cliente"), # Código del cliente.
+            fecha_pedido=documento.get("fecha_pedido"), # Fecha del pedido.
+            lineas=tuple(Linea.desde_documento(linea) for linea in documento.get("productos", [])), # Convierte cada línea en registro.
+            total_compra=documento.get("total_compra", 0), # Total del pedido (0 si falta).
+            metodo_pago=documento.get("metodo_pago") # Método de pago.
+        )
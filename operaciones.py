@@ -5,21 +5,28 @@ Contiene funciones para:
 - Consultar información
 - Actualizar registros
 - Eliminar elementos
+Las funciones consultar_* muestran por consola los registros que devuelve consultas.py
 """
 
-from conexion_db import clientes, productos, pedidos # Importa las colecciones 'clientes', 'productos' y 'pedidos' desde el módulo 'conexion_db'.
+from conexion_db import clientes, productos, pedidos, pedidos_archivo # Importa las colecciones 'clientes', 'productos', 'pedidos' y 'pedidos_archivo' desde el módulo 'conexion_db'.
+from conexion_db import soporta_transacciones, ejecutar_en_transaccion # Importa las funciones para trabajar con transacciones.
+from consultas import CAMPOS_NOMBRE_CLIENTE, CAMPOS_RESUMEN_CLIENTE, TAMANO_LOTE, en_bloques # Importa las proyecciones del nombre y del resumen, y el recorrido por bloques.
+from consultas import filtro_cliente, buscar_cliente, buscar_clientes_por_ciudad, buscar_clientes_por_fecha, buscar_clientes_por_rango, buscar_clientes_por_nombre # Importa las consultas de clientes.
+from consultas import CAMPOS_PRODUCTO, buscar_producto, buscar_productos, buscar_productos_por_nombre, buscar_pedidos_por_cliente, buscar_pedidos_por_rango # Importa las consultas de productos y pedidos.
+from consultas import clave_busqueda # Importa la normalización de las claves de búsqueda.
+from cache_productos import cache as cache_productos # Importa la caché de productos (para invalidarla al escribir).
+from precios import actualizar_precios, aplicar_porcentaje, mostrar_cambio_masivo # Importa los cambios de precio con historial.
+from resumenes import CAMPOS_RESUMEN, actualizar_resumenes, rellenar_recientes, resumen_vacio # Importa la actualización de los resúmenes de ventas y de clientes.
+from modelos import Producto # Importa el registro de producto.
+from collections import Counter # Importa Counter para acumular cantidades por producto.
 from datetime import datetime # Importa la clase datetime del módulo datetime para trabajar con fechas y horas.
-from pymongo import MongoClient # Importa la clase MongoClient del módulo pymongo para la conexión a MongoDB.
-import re  # Importamos el módulo re para usar expresiones regulares # Importa el módulo re para trabajar con expresiones regulares.
+from pymongo import UpdateOne # Importa UpdateOne para escrituras en lote.
+from pymongo.errors import PyMongoError # Importa la excepción base de pymongo para detectar fallos de escritura.
 
-# Cadena de conexión a la base de datos local
-client = MongoClient("mongodb://localhost:27017/") # Crea una instancia de MongoClient para conectarse a la base de datos MongoDB local.
-db = client["comerciotech"]  # Cambia por el nombre real de tu base de datos # Accede a la base de datos "comerciotech".
-
-def insertar_cliente(codigo, nombre, apellidos, email, telefono, direccion): # Define la función para insertar un nuevo cliente.
+def construir_cliente(codigo, nombre, apellidos, email, telefono, direccion, fecha_registro=None): # Define la función que arma el documento de un cliente.
     """
-    Inserta un nuevo cliente en la base de datos con la estructura unificada.
-    
+    Construye el documento de un cliente con la estructura unificada.
+
     Parámetros:
     codigo (str): Código único del cliente
     nombre (str): Nombre del cliente
@@ -27,9 +34,14 @@ def insertar_cliente(codigo, nombre, apellidos, email, telefono, direccion): # D
     email (str): Correo electrónico del cliente
     telefono (str): Teléfono del cliente
     direccion (dict): Diccionario con {calle, numero, ciudad}
+    fecha_registro (datetime): Fecha de registro (por defecto, la fecha y hora actual)
+
+    Retorna:
+    dict: Documento listo para insertar en 'clientes'
     """
-    nuevo_cliente = { # Crea un diccionario con los datos del nuevo cliente.
+    return { # Devuelve un diccionario con los datos del cliente.
         "codigo": codigo, # Asigna el código del cliente.
+        "nombre_busqueda": clave_busqueda(nombre), # Asigna el nombre normalizado (sin acentos ni mayúsculas) para las búsquedas.
         "datos": { # Crea un sub-diccionario para los datos personales.
             "nombre": nombre, # Asigna el nombre.
             "apellidos": apellidos, # Asigna los apellidos.
@@ -37,68 +49,251 @@ def insertar_cliente(codigo, nombre, apellidos, email, telefono, direccion): # D
             "telefono": telefono # Asigna el teléfono.
         },
         "direccion": direccion, # Asigna el diccionario de dirección.
-        "fecha_registro": datetime.now()  # Fecha y hora actual # Asigna la fecha y hora actual de registro.
+        "fecha_registro": fecha_registro or datetime.now(), # Asigna la fecha de registro (o la fecha y hora actual).
+        "resumen_pedidos": resumen_vacio() # Resumen de sus pedidos (se actualiza al insertar y eliminar pedidos).
+    }
+
+def construir_producto(codigo, nombre, precio, stock=0, estado="activo"): # Define la función que arma el documento de un producto.
+    """
+    Construye el documento de un producto.
+
+    Retorna:
+    dict: Documento listo para insertar en 'productos'
+    """
+    return { # Devuelve un diccionario con los datos del producto.
+        "codigo_producto": codigo, # Asigna el código del producto.
+        "nombre": nombre, # Asigna el nombre.
+        "nombre_busqueda": clave_busqueda(nombre), # Asigna el nombre normalizado (sin acentos ni mayúsculas) para las búsquedas.
+        "precio": precio, # Asigna el precio.
+        "stock": stock, # Asigna el stock.
+        "estado": estado # Asigna el estado.
+    }
+
+def construir_linea(codigo_producto, nombre, cantidad, precio_unitario): # Define la función que arma una línea de pedido.
+    """
+    Construye una línea de pedido con su total calculado.
+
+    Retorna:
+    dict: Línea para el arreglo 'productos' de un pedido
+    """
+    return { # Devuelve un diccionario con los datos de la línea.
+        "codigo_producto": codigo_producto, # Asigna el código del producto.
+        "nombre": nombre, # Asigna el nombre del producto.
+        "cantidad": cantidad, # Asigna la cantidad.
+        "precio_unitario": precio_unitario, # Asigna el precio unitario.
+        "total_comprado": precio_unitario * cantidad # Asigna el total comprado para este producto.
     }
+
+def construir_pedido(codigo_pedido, codigo_cliente, lineas, fecha_pedido=None, metodo_pago="desconocido"): # Define la función que arma el documento de un pedido.
+    """
+    Construye el documento de un pedido a partir de sus líneas.
+
+    Parámetros:
+    codigo_pedido (str): Código único del pedido
+    codigo_cliente (str): Código del cliente que realiza el pedido
+    lineas (list): Líneas construidas con construir_linea
+    fecha_pedido (datetime): Fecha del pedido (por defecto, la fecha y hora actual)
+    metodo_pago (str): Método de pago (por defecto "desconocido")
+
+    Retorna:
+    dict: Documento listo para insertar en 'pedidos'
+    """
+    return { # Devuelve un diccionario con los datos del pedido.
+        "codigo_pedido": codigo_pedido, # Asigna el código del pedido.
+        "codigo_cliente": codigo_cliente, # Asigna el código del cliente.
+        "fecha_pedido": fecha_pedido or datetime.now(), # Asigna la fecha del pedido (o la fecha y hora actual).
+        "productos": lineas, # Asigna las líneas del pedido.
+        "total_compra": sum(linea["total_comprado"] for linea in lineas), # Calcula el total sumando todas las líneas.
+        "metodo_pago": metodo_pago # Asigna el método de pago.
+    }
+
+def nombre_completo(cliente): # Define la función que arma el nombre completo de un cliente.
+    """Devuelve 'nombre apellidos' del cliente, con valores por defecto si faltan."""
+    return f"{cliente.nombre or '[Sin nombre]'} {cliente.apellidos or '[Sin apellidos]'}" # Construye el nombre completo del cliente.
+
+def mostrar_producto(producto): # Define la función que imprime un producto.
+    """Imprime los datos de un producto."""
+    print("\n📦 Producto encontrado:") # Imprime un encabezado.
+    print(f"Código: {producto.codigo_producto}") # Imprime el código del producto.
+    print(f"Nombre: {producto.nombre}") # Imprime el nombre del producto.
+    print(f"Precio: ${producto.precio}") # Imprime el precio del producto.
+    print(f"Stock: {producto.stock} unidades") # Imprime el stock del producto.
+    print(f"Estado: {producto.estado}") # Imprime el estado del producto.
+
+def mostrar_pedido(pedido): # Define la función que imprime un pedido.
+    """Imprime un pedido con sus líneas."""
+    print(f"\nPedido: {pedido.codigo_pedido or '[Sin código]'}") # Imprime el código del pedido.
+    if pedido.codigo_cliente: # Si la consulta trajo el cliente (listados de varios clientes).
+        print(f"Cliente: {pedido.codigo_cliente}") # Imprime el código del cliente.
+    fecha = pedido.fecha_pedido.strftime("%Y-%m-%d %H:%M") if pedido.fecha_pedido else "[Sin fecha]" # Formatea la fecha (o asigna un valor por defecto).
+    print(f"Fecha: {fecha}") # Imprime la fecha del pedido.
+    print(f"Total: ${pedido.total_compra:.2f}") # Imprime el total de la compra formateado a dos decimales.
+    print("Productos:") # Imprime un encabezado para los productos.
+    for linea in pedido.lineas: # Itera sobre cada línea del pedido.
+        print(f" - {linea.nombre or '[Sin nombre]'} ({linea.cantidad} x ${linea.precio_unitario:.2f})") # Imprime los detalles de cada producto en el pedido.
+
+def texto_rango(desde=None, hasta=None): # Define la función que describe un rango de fechas.
+    """Describe un rango [desde, hasta) para los encabezados (por ejemplo 'desde 2024-01-01 hasta 2024-02-01 (excluido)')."""
+    partes = [] # Partes del texto.
+    if desde: # Si hay inicio.
+        partes.append(f"desde {desde:%Y-%m-%d %H:%M}") # Agrega el inicio.
+    if hasta: # Si hay fin.
+        partes.append(f"hasta {hasta:%Y-%m-%d %H:%M} (excluido)") # Agrega el fin.
+    return " ".join(partes) or "sin límite de fechas" # Devuelve el texto.
+
+def texto_resumen(resumen): # Define la función que describe el resumen de pedidos de un cliente.
+    """Devuelve la cantidad de pedidos, el total gastado y la fecha del último pedido como texto."""
+    ultimo = resumen.get("ultimo_pedido") # Fecha del último pedido.
+    texto = f"{resumen.get('cantidad', 0)} pedidos, ${resumen.get('total', 0):,.2f} en total" # Cantidad y total.
+    return f"{texto}, último el {ultimo.strftime('%d/%m/%Y')}" if ultimo else texto # Agrega la fecha del último pedido.
+
+def mostrar_cliente(cliente, codigos_pedidos): # Define la función que imprime el detalle de un cliente.
+    """Imprime el detalle de un cliente y los códigos de sus pedidos (los más recientes, si tiene resumen)."""
+    direccion = cliente.direccion or {} # Obtiene la dirección (vacía si no existe).
+
+    print(f"- Código: {cliente.codigo or '[Sin código]'}") # Imprime el código del cliente.
+    print(f"  Nombre: {nombre_completo(cliente)}") # Imprime el nombre completo.
+    print(f"  Email: {cliente.email or '[Sin email]'}") # Imprime el email.
+    print(f"  Teléfono: {cliente.telefono or '[Sin teléfono]'}") # Imprime el teléfono.
+    print(f"  Dirección: {direccion.get('calle', '[Sin calle]')} {direccion.get('numero', '[Sin número]')}, {direccion.get('ciudad', '[Sin ciudad]')}") # Imprime la dirección.
+
+    if cliente.resumen_pedidos and cliente.resumen_pedidos.get("cantidad"): # Si el cliente tiene resumen con pedidos.
+        print(f"  Pedidos: {texto_resumen(cliente.resumen_pedidos)}") # Imprime la cantidad, el total y la fecha del último.
+        print(f"  Recientes: {', '.join(codigos_pedidos)}") # Imprime los códigos de los pedidos más recientes.
+    elif codigos_pedidos: # Si el cliente tiene pedidos (sin resumen).
+        print(f"  Pedidos: {', '.join(codigos_pedidos)}") # Imprime los códigos de los pedidos separados por comas.
+    else: # Si el cliente no tiene pedidos.
+        print("  Pedidos: [Sin pedidos]") # Imprime que no tiene pedidos.
+    print() # Imprime una línea en blanco para separar clientes.
+
+def insertar_cliente(codigo, nombre, apellidos, email, telefono, direccion): # Define la función para insertar un nuevo cliente.
+    """
+    Inserta un nuevo cliente en la base de datos con la estructura unificada.
+    
+    Parámetros:
+    codigo (str): Código único del cliente
+    nombre (str): Nombre del cliente
+    apellidos (str): Apellidos del cliente
+    email (str): Correo electrónico del cliente
+    telefono (str): Teléfono del cliente
+    direccion (dict): Diccionario con {calle, numero, ciudad}
+
+    Retorna:
+    bool: True si el cliente se insertó, False si no
+    """
+    nuevo_cliente = construir_cliente(codigo, nombre, apellidos, email, telefono, direccion) # Crea el documento del nuevo cliente (fecha de registro actual).
     resultado = clientes.insert_one(nuevo_cliente) # Inserta el nuevo cliente en la colección 'clientes'.
     print(f"✅ Cliente insertado. ID: {resultado.inserted_id}") # Imprime un mensaje de éxito con el ID del cliente insertado.
+    return True # Devuelve que el cliente se insertó.
 
-def consultar_clientes_por_ciudad(ciudad): # Define la función para consultar clientes por ciudad.
+def consultar_clientes_por_ciudad(ciudad, tamano_pagina=None, token=None): # Define la función para consultar clientes por ciudad.
     """
     Consulta clientes por ciudad
 
     Parámetros:
     ciudad (str): Ciudad a buscar
+    tamano_pagina (int): Cantidad de clientes por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
 
     Retorna:
-    list: Clientes encontrados en la ciudad especificada
+    str: Token para pedir la página siguiente, o None si no hay más resultados
     """
-    resultados = clientes.find({"direccion.ciudad": ciudad}) # Busca clientes donde el campo 'ciudad' dentro de 'direccion' coincida con la ciudad dada.
-    clientes_encontrados = list(resultados) # Convierte el cursor de resultados en una lista.
+    resultados, siguiente = buscar_clientes_por_ciudad(ciudad, tamano_pagina, token) # Busca los clientes de la ciudad.
+
+    encontrados = 0 # Contador de clientes mostrados.
+    for cliente in resultados: # Itera sobre cada cliente a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer cliente de la primera página.
+            print(f"\n🔍 Clientes en {ciudad}:") # Imprime un encabezado para los clientes encontrados.
+        encontrados += 1 # Cuenta el cliente.
+        print(f"- {nombre_completo(cliente)}") # Imprime el nombre y apellidos del cliente.
 
-    if not clientes_encontrados: # Si no se encontraron clientes.
+    if encontrados == 0 and not token: # Si no se encontraron clientes.
         print(f"❌ No se encontraron clientes en {ciudad}") # Imprime un mensaje indicando que no se encontraron clientes.
-    else: # Si se encontraron clientes.
-        print(f"\n🔍 Clientes en {ciudad}:") # Imprime un encabezado para los clientes encontrados.
-        for cliente in clientes_encontrados: # Itera sobre cada cliente encontrado.
-            # Compatibilidad con ambas estructuras
-            datos = cliente.get('datos', {}) # Intenta obtener el sub-diccionario 'datos', si no existe, usa un diccionario vacío.
-            nombre = datos.get('nombre', cliente.get('nombre', '[Sin nombre]')) # Obtiene el nombre del cliente (priorizando 'datos.nombre', luego 'nombre' directo).
-            apellidos = datos.get('apellidos', cliente.get('apellidos', '[Sin apellidos]')) # Obtiene los apellidos del cliente.
-            print(f"- {nombre} {apellidos}") # Imprime el nombre y apellidos del cliente.
 
-    return clientes_encontrados # Devuelve la lista de clientes encontrados.
+    return siguiente # Devuelve el token de la página siguiente.
 
-def consultar_clientes_por_fecha(fecha): # Define la función para consultar clientes por fecha de registro.
+def consultar_clientes_por_fecha(fecha, tamano_pagina=None, token=None): # Define la función para consultar clientes por fecha de registro.
     """
     Consulta clientes registrados en una fecha específica
     
     Parámetros:
     fecha (datetime): Fecha a consultar (solo día, sin hora)
+    tamano_pagina (int): Cantidad de clientes por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
     
     Retorna:
-    list: Clientes registrados en la fecha especificada
+    str: Token para pedir la página siguiente, o None si no hay más resultados
     """
-    # Crear rango de fechas para cubrir todo el día
-    inicio_dia = datetime(fecha.year, fecha.month, fecha.day, 0, 0, 0) # Crea un objeto datetime para el inicio del día (00:00:00).
-    fin_dia = datetime(fecha.year, fecha.month, fecha.day, 23, 59, 59) # Crea un objeto datetime para el final del día (23:59:59).
+    resultados, siguiente = buscar_clientes_por_fecha(fecha, tamano_pagina, token) # Busca los clientes registrados ese día.
     
-    # Buscar clientes con fecha de registro en el rango
-    resultados = clientes.find({ # Busca clientes.
-        "fecha_registro": { # En el campo 'fecha_registro'.
-            "$gte": inicio_dia, # Que sea mayor o igual al inicio del día.
-            "$lte": fin_dia # Y menor o igual al final del día.
-        }
-    })
-    clientes_encontrados = list(resultados) # Convierte el cursor de resultados en una lista.
-    
-    if not clientes_encontrados: # Si no se encontraron clientes.
+    encontrados = 0 # Contador de clientes mostrados.
+    for cliente in resultados: # Itera sobre cada cliente a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer cliente de la primera página.
+            print(f"\n📅 Clientes registrados el {fecha.strftime('%Y-%m-%d')}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el cliente.
+        print(f"- {nombre_completo(cliente)}") # Imprime el nombre y apellidos del cliente.
+
+    if encontrados == 0 and not token: # Si no se encontraron clientes.
         print(f"❌ No se encontraron clientes registrados el {fecha.strftime('%Y-%m-%d')}") # Imprime un mensaje de no encontrados.
-    else: # Si se encontraron clientes.
-        print(f"\n📅 Clientes registrados el {fecha.strftime('%Y-%m-%d')}:") # Imprime un encabezado.
-        for cliente in clientes_encontrados: # Itera sobre cada cliente.
-            print(f"- {cliente['nombre']} {cliente['apellidos']}") # Imprime el nombre y apellidos del cliente.
     
-    return clientes_encontrados # Devuelve la lista de clientes encontrados.
+    return siguiente # Devuelve el token de la página siguiente.
+
+def consultar_clientes_por_rango(desde=None, hasta=None, tamano_pagina=None, token=None): # Define la función para consultar clientes por rango de fechas de registro.
+    """
+    Consulta clientes registrados en [desde, hasta), ordenados por fecha de registro
+
+    Parámetros:
+    desde (datetime): Inicio del rango, incluido (opcional)
+    hasta (datetime): Fin del rango, excluido (opcional)
+    tamano_pagina (int): Cantidad de clientes por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = buscar_clientes_por_rango(desde, hasta, tamano_pagina, token) # Busca los clientes registrados en el rango.
+
+    encontrados = 0 # Contador de clientes mostrados.
+    for cliente in resultados: # Itera sobre cada cliente a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer cliente de la primera página.
+            print(f"\n📅 Clientes registrados {texto_rango(desde, hasta)}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el cliente.
+        print(f"- {cliente.fecha_registro:%Y-%m-%d %H:%M} {cliente.codigo or '[Sin código]'}: {nombre_completo(cliente)}") # Imprime la fecha, el código y el nombre del cliente.
+
+    if encontrados == 0 and not token: # Si no se encontraron clientes.
+        print(f"❌ No se encontraron clientes registrados {texto_rango(desde, hasta)}") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+def consultar_pedidos_por_rango(desde=None, hasta=None, codigo_cliente=None, codigo_producto=None, tamano_pagina=None, token=None, incluir_archivo=False): # Define la función para consultar pedidos por rango de fechas.
+    """
+    Consulta pedidos con fecha en [desde, hasta), opcionalmente de un cliente o con un producto
+
+    Parámetros:
+    desde (datetime): Inicio del rango, incluido (opcional)
+    hasta (datetime): Fin del rango, excluido (opcional)
+    codigo_cliente (str): Código del cliente (opcional)
+    codigo_producto (str): Código de un producto que debe estar en el pedido (opcional)
+    tamano_pagina (int): Cantidad de pedidos por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+    incluir_archivo (bool): Si es True, incluye los pedidos archivados
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = buscar_pedidos_por_rango(desde, hasta, codigo_cliente, codigo_producto, tamano_pagina, token, incluir_archivo) # Busca los pedidos del rango.
+
+    encontrados = 0 # Contador de pedidos mostrados.
+    for pedido in resultados: # Itera sobre cada pedido a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer pedido de la primera página.
+            print(f"\n📦 Pedidos {texto_rango(desde, hasta)}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el pedido.
+        mostrar_pedido(pedido) # Imprime el pedido con sus líneas.
+
+    if encontrados == 0 and not token: # Si no se encontraron pedidos.
+        print(f"❌ No se encontraron pedidos {texto_rango(desde, hasta)}") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
 
 def consultar_producto_por_codigo(codigo): # Define la función para consultar un producto por su código.
     """
@@ -108,157 +303,213 @@ def consultar_producto_por_codigo(codigo): # Define la función para consultar u
     codigo (str): Código del producto a buscar
     
     Retorna:
-    dict: Datos del producto o None si no se encuentra
+    Producto: Registro del producto o None si no se encuentra
     """
-    producto = productos.find_one({"codigo_producto": codigo}) # Busca un único producto que coincida con el código dado.
+    producto = buscar_producto(codigo) # Busca el producto por su código.
     
     if producto: # Si se encontró el producto.
-        print("\n📦 Producto encontrado:") # Imprime un encabezado.
-        print(f"Código: {producto['codigo_producto']}") # Imprime el código del producto.
-        print(f"Nombre: {producto['nombre']}") # Imprime el nombre del producto.
-        print(f"Precio: ${producto['precio']}") # Imprime el precio del producto.
-        print(f"Stock: {producto['stock']} unidades") # Imprime el stock del producto.
-        print(f"Estado: {producto['estado']}") # Imprime el estado del producto.
+        mostrar_producto(producto) # Imprime los datos del producto.
     else: # Si no se encontró el producto.
         print(f"❌ Producto con código {codigo} no encontrado") # Imprime un mensaje de no encontrado.
     
-    return producto # Devuelve el diccionario del producto o None.
+    return producto # Devuelve el registro del producto o None.
 
-def consultar_pedidos_por_cliente(codigo_cliente): # Define la función para consultar pedidos de un cliente.
+def consultar_productos_por_nombre(nombre, tamano_pagina=None, token=None, prefijo=False): # Define la función para consultar productos por nombre.
+    """
+    Consulta productos por nombre (sin distinguir mayúsculas/minúsculas ni acentos)
+
+    Parámetros:
+    nombre (str): Nombre a buscar
+    tamano_pagina (int): Cantidad de productos por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+    prefijo (bool): Si es True, busca los nombres que empiezan con el texto
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = buscar_productos_por_nombre(nombre, tamano_pagina, token, prefijo) # Busca los productos por nombre.
+
+    encontrados = 0 # Contador de productos mostrados.
+    for producto in resultados: # Itera sobre cada producto a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer producto de la primera página.
+            print(f"\n📦 Productos con nombre {nombre}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el producto.
+        print(f"- {producto.codigo_producto}: {producto.nombre} (${producto.precio}, {producto.stock} unidades)") # Imprime el código, nombre, precio y stock.
+
+    if encontrados == 0 and not token: # Si no se encontraron productos.
+        print(f"❌ No se encontraron productos con el nombre {nombre}") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+def consultar_pedidos_por_cliente(codigo_cliente, tamano_pagina=None, token=None, incluir_archivo=False): # Define la función para consultar pedidos de un cliente.
     """
     Consulta y muestra los pedidos de un cliente, mostrando también su nombre.
+
+    Parámetros:
+    codigo_cliente (str): Código del cliente
+    tamano_pagina (int): Cantidad de pedidos por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+    incluir_archivo (bool): Si es True, incluye los pedidos archivados (por defecto, solo los recientes)
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
     """
-    # Buscar el cliente por código
-    cliente = clientes.find_one({"$or": [ # Busca un cliente que coincida con el código en el campo 'codigo' o 'identificador'.
-        {"codigo": codigo_cliente}, # Busca por el campo 'codigo'.
-        {"identificador": codigo_cliente} # Busca por el campo 'identificador'.
-    ]})
-
-    if not cliente: # Si no se encontró el cliente.
-        print(f"❌ No se encontró cliente con código {codigo_cliente}") # Imprime un mensaje de no encontrado.
-        return # Sale de la función.
-
-    # Obtener nombre completo
-    datos = cliente.get('datos', {}) # Intenta obtener el sub-diccionario 'datos'.
-    nombre_completo = f"{datos.get('nombre', '[Sin nombre]')} {datos.get('apellidos', '[Sin apellidos]')}" # Construye el nombre completo del cliente.
-
-    # Buscar pedidos
-    resultados = pedidos.find({"codigo_cliente": codigo_cliente}) # Busca todos los pedidos asociados al código del cliente.
-    pedidos_encontrados = list(resultados) # Convierte el cursor de resultados en una lista.
-
-    if not pedidos_encontrados: # Si no se encontraron pedidos para el cliente.
-        print(f"❌ No se encontraron pedidos para el cliente {codigo_cliente} ({nombre_completo})") # Imprime un mensaje de no encontrados.
-    else: # Si se encontraron pedidos.
-        print(f"\n📦 Pedidos del cliente {codigo_cliente} - {nombre_completo}:") # Imprime un encabezado.
-        for pedido in pedidos_encontrados: # Itera sobre cada pedido encontrado.
-            print(f"\nPedido: {pedido.get('codigo_pedido', '[Sin código]')}") # Imprime el código del pedido.
-            fecha = pedido.get('fecha_pedido') # Obtiene la fecha del pedido.
-            if fecha: # Si la fecha existe.
-                fecha = fecha.strftime("%Y-%m-%d %H:%M") # Formatea la fecha a un string.
-            else: # Si la fecha no existe.
-                fecha = "[Sin fecha]" # Asigna un valor por defecto.
-            print(f"Fecha: {fecha}") # Imprime la fecha del pedido.
-            print(f"Total: ${pedido.get('total_compra', 0):.2f}") # Imprime el total de la compra formateado a dos decimales.
-            print("Productos:") # Imprime un encabezado para los productos.
-            for prod in pedido.get('productos', []): # Itera sobre cada producto dentro del pedido.
-                nombre_prod = prod.get('nombre', '[Sin nombre]') # Obtiene el nombre del producto.
-                cantidad = prod.get('cantidad', 0) # Obtiene la cantidad del producto.
-                precio = prod.get('precio_unitario', 0) # Obtiene el precio unitario del producto.
-                print(f" - {nombre_prod} ({cantidad} x ${precio:.2f})") # Imprime los detalles de cada producto en el pedido.
+    nombre = None # El nombre solo se busca en la primera página (para el encabezado).
+    if not token: # Si es la primera página.
+        cliente = buscar_cliente(codigo_cliente, CAMPOS_RESUMEN_CLIENTE) # Busca el cliente por código (nombre, apellidos y resumen de pedidos).
+        if not cliente: # Si no se encontró el cliente.
+            print(f"❌ No se encontró cliente con código {codigo_cliente}") # Imprime un mensaje de no encontrado.
+            return None # Sale de la función.
+        nombre = nombre_completo(cliente) # Construye el nombre completo del cliente.
+        if cliente.resumen_pedidos and cliente.resumen_pedidos.get("cantidad"): # Si el cliente tiene resumen con pedidos.
+            nombre = f"{nombre} ({texto_resumen(cliente.resumen_pedidos)})" # Agrega el resumen al encabezado.
+
+    resultados, siguiente = buscar_pedidos_por_cliente(codigo_cliente, tamano_pagina, token, incluir_archivo) # Busca los pedidos del cliente ordenados por fecha.
+
+    encontrados = 0 # Contador de pedidos mostrados.
+    for pedido in resultados: # Itera sobre cada pedido a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer pedido de la primera página.
+            print(f"\n📦 Pedidos del cliente {codigo_cliente} - {nombre}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el pedido.
+        mostrar_pedido(pedido) # Imprime el pedido con sus líneas.
+
+    if encontrados == 0 and not token: # Si no se encontraron pedidos para el cliente.
+        print(f"❌ No se encontraron pedidos para el cliente {codigo_cliente} ({nombre})") # Imprime un mensaje de no encontrados.
     
-    return pedidos_encontrados # Devuelve la lista de pedidos encontrados.
+    return siguiente # Devuelve el token de la página siguiente.
 
 def actualizar_precio_producto(codigo, nuevo_precio): # Define la función para actualizar el precio de un producto.
     """
-    Actualiza el precio de un producto
+    Actualiza el precio de un producto y guarda el precio anterior en el historial de precios
     
     Parámetros:
     codigo (str): Código del producto
     nuevo_precio (float): Nuevo precio
+
+    Retorna:
+    bool: True si el producto quedó con el precio pedido, False si no
     """
-    resultado = productos.update_one( # Actualiza un único documento en la colección 'productos'.
-        {"codigo_producto": codigo}, # Filtra por el código del producto.
-        {"$set": {"precio": nuevo_precio}} # Establece el nuevo precio para el campo 'precio'.
-    )
+    resultado = actualizar_precios([(codigo, nuevo_precio)], origen="manual") # Cambia el precio (y guarda el historial) en una transacción.
     
-    if resultado.modified_count > 0: # Si se modificó al menos un documento.
+    if resultado["cambiados"] > 0: # Si se modificó el precio.
         print(f"✅ Precio actualizado para producto {codigo}") # Imprime un mensaje de éxito.
-    else: # Si no se modificó ningún documento.
+        return True # Devuelve que el producto quedó con el precio pedido.
+    elif resultado["rechazados"]: # Si el precio nuevo no es válido.
+        print(f"❌ Precio inválido para producto {codigo}: debe ser un número finito mayor que cero") # Imprime un mensaje de precio inválido.
+        return False # Devuelve que la operación no se realizó.
+    elif resultado["no_encontrados"]: # Si el producto no existe.
         print(f"❌ No se encontró producto con código {codigo}") # Imprime un mensaje de no encontrado.
+        return False # Devuelve que la operación no se realizó.
+    else: # Si el producto ya tenía ese precio.
+        print(f"✅ El producto {codigo} ya tenía ese precio") # Imprime que no hubo cambios.
+        return True # Devuelve que el producto quedó con el precio pedido.
+
+def actualizar_precios_por_porcentaje(porcentaje, estado=None, simular=False): # Define la función para cambiar precios con una regla porcentual.
+    """
+    Sube (o baja) en un porcentaje el precio de todos los productos, o solo de los que tienen un estado,
+    guardando cada cambio en el historial de precios.
+
+    Parámetros:
+    porcentaje (float): Porcentaje del cambio (5 sube un 5%, -10 baja un 10%)
+    estado (str): Estado de los productos a cambiar (opcional, por ejemplo "activo")
+    simular (bool): Si es True, solo muestra el impacto sin cambiar nada
+
+    Retorna:
+    dict: Contadores del cambio (ver precios.aplicar_porcentaje)
+    """
+    resultado = aplicar_porcentaje(porcentaje, {"estado": estado} if estado else None, simular) # Aplica (o simula) la regla por bloques.
+    mostrar_cambio_masivo(resultado) # Imprime el resultado.
+    return resultado # Devuelve los contadores.
+
+def sumar_cantidades(pedidos_iterables): # Define la función para acumular las cantidades por producto.
+    """
+    Suma las cantidades de todas las líneas de varios pedidos, agrupadas por producto.
+
+    Parámetros:
+    pedidos_iterables (iterable): Pedidos (o cursor) con el campo 'productos'
+
+    Retorna:
+    dict: Cantidad total por código de producto
+    """
+    cantidades = {} # Diccionario con la cantidad total por producto.
+    for pedido in pedidos_iterables: # Itera sobre cada pedido (sin cargarlos todos en memoria si es un cursor).
+        for prod in pedido.get("productos", []): # Itera sobre cada línea del pedido.
+            cantidades[prod["codigo_producto"]] = cantidades.get(prod["codigo_producto"], 0) + prod["cantidad"] # Suma la cantidad de la línea a su producto.
+    return cantidades # Devuelve las cantidades por producto.
+
+def _restaurar_stock(cantidades, sesion=None): # Define la función para devolver stock a varios productos de una vez.
+    """
+    Devuelve stock a varios productos en un solo lote desordenado.
+
+    Parámetros:
+    cantidades (dict): Cantidad a devolver por código de producto
+    sesion (ClientSession): Sesión de la transacción en curso (opcional)
+    """
+    if cantidades: # Solo si hay algo que devolver (bulk_write no acepta listas vacías).
+        productos.bulk_write( # Envía todas las actualizaciones en una sola llamada al servidor.
+            [UpdateOne({"codigo_producto": codigo}, {"$inc": {"stock": cantidad}}) for codigo, cantidad in cantidades.items()], # Una operación por producto con la cantidad total.
+            ordered=False, # Lote desordenado: el servidor puede aplicarlas en paralelo.
+            session=sesion # Usa la sesión de la transacción si existe.
+        )
+        cache_productos.invalidar(*cantidades) # Descarta el stock guardado en la caché de esos productos.
 
 def eliminar_pedido(codigo_pedido): # Define la función para eliminar un pedido.
     """
-    Elimina un pedido por su código y restaura el stock de productos.
+    Elimina un pedido por su código (buscándolo también entre los archivados) y restaura el stock de productos.
+
+    Retorna:
+    bool: True si el pedido se eliminó, False si no
     """
-    pedido = pedidos.find_one({"codigo_pedido": codigo_pedido}) # Busca un único pedido por su código.
-    if pedido: # Si se encontró el pedido.
-        # Restaurar stock de productos
-        for prod in pedido.get("productos", []): # Itera sobre los productos en el pedido.
-            productos.update_one( # Actualiza el stock del producto.
-                {"codigo_producto": prod["codigo_producto"]}, # Filtra por el código del producto.
-                {"$inc": {"stock": prod["cantidad"]}} # Incrementa el stock del producto por la cantidad del pedido.
+    def eliminar(sesion): # Define la función que elimina el pedido y restaura el stock dentro de la transacción.
+        for coleccion in (pedidos, pedidos_archivo): # Busca primero en los pedidos recientes y luego en el archivo.
+            pedido = coleccion.find_one_and_delete( # Busca y elimina el pedido en una sola operación.
+                {"codigo_pedido": codigo_pedido}, # Filtra por el código del pedido.
+                projection=CAMPOS_RESUMEN, # Solo trae lo necesario para restaurar el stock y los resúmenes.
+                session=sesion # Usa la sesión de la transacción si existe.
             )
-        # Eliminar el pedido
-        resultado = pedidos.delete_one({"codigo_pedido": codigo_pedido}) # Elimina el pedido de la colección 'pedidos'.
-        if resultado.deleted_count > 0: # Si se eliminó al menos un documento.
-            print(f"✅ Pedido {codigo_pedido} eliminado y stock restaurado.") # Imprime un mensaje de éxito.
-        else: # Si no se eliminó ningún documento.
-            print(f"❌ Pedido {codigo_pedido} no encontrado.") # Imprime un mensaje de no encontrado.
-    else: # Si el pedido no se encontró inicialmente.
+            if pedido: # Si se encontró en esta colección.
+                break # No busca en la siguiente.
+        if pedido: # Si se encontró y eliminó el pedido.
+            if coleccion is pedidos: # Si estaba entre los recientes, el archivado pudo haberlo copiado ya.
+                pedidos_archivo.delete_one({"_id": pedido["_id"]}, session=sesion) # Borra esa copia (el pedido no debe reaparecer en el archivo).
+            _restaurar_stock(sumar_cantidades([pedido]), sesion) # Restaura el stock de sus productos en un solo lote.
+            actualizar_resumenes([pedido], -1, sesion) # Descuenta el pedido de los resúmenes diarios y del cliente.
+            rellenar_recientes(pedido.get("codigo_cliente"), sesion) # Completa los pedidos recientes del cliente.
+        return pedido # Devuelve el pedido eliminado o None.
+
+    if ejecutar_en_transaccion(eliminar): # Ejecuta la eliminación (en una transacción si el servidor lo admite).
+        print(f"✅ Pedido {codigo_pedido} eliminado y stock restaurado.") # Imprime un mensaje de éxito.
+        return True # Devuelve que el pedido se eliminó.
+    else: # Si el pedido no se encontró.
         print(f"❌ Pedido {codigo_pedido} no encontrado.") # Imprime un mensaje de no encontrado.
+        return False # Devuelve que la operación no se realizó.
 
-def consultar_clientes_por_nombre(nombre): # Define la función para consultar clientes por nombre.
+def consultar_clientes_por_nombre(nombre, tamano_pagina=None, token=None, prefijo=False): # Define la función para consultar clientes por nombre.
     """
     Consulta clientes por nombre, muestra información detallada y los códigos de sus pedidos.
+
+    Parámetros:
+    nombre (str): Nombre a buscar (sin distinguir mayúsculas/minúsculas ni acentos)
+    tamano_pagina (int): Cantidad de clientes por página (por defecto, todos)
+    token (str): Token devuelto por la página anterior (opcional)
+    prefijo (bool): Si es True, busca los nombres que empiezan con el texto
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
     """
-    # Búsqueda insensible a mayúsculas/minúsculas en ambas estructuras
-    regex = re.compile(f"^{re.escape(nombre)}$", re.IGNORECASE) # Crea una expresión regular para buscar el nombre de forma insensible a mayúsculas/minúsculas.
-    resultados = clientes.find({ # Busca clientes.
-        "$or": [ # Utiliza un operador OR para buscar en dos posibles campos.
-            {"datos.nombre": regex}, # Busca el nombre en el sub-campo 'datos.nombre'.
-            {"nombre": regex} # Busca el nombre en el campo 'nombre' directo.
-        ]
-    })
-    clientes_encontrados = list(resultados) # Convierte el cursor de resultados en una lista.
-
-    if not clientes_encontrados: # Si no se encontraron clientes.
+    resultados, siguiente = buscar_clientes_por_nombre(nombre, tamano_pagina, token, prefijo) # Busca los clientes con sus códigos de pedido.
+
+    encontrados = 0 # Contador de clientes mostrados.
+    for cliente, codigos_pedidos in resultados: # Itera sobre cada cliente y sus pedidos.
+        if encontrados == 0 and not token: # Antes del primer cliente de la primera página.
+            print(f"\n🔍 Clientes con nombre {nombre}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el cliente.
+        mostrar_cliente(cliente, codigos_pedidos) # Imprime el detalle del cliente y sus pedidos.
+
+    if encontrados == 0 and not token: # Si no se encontraron clientes.
         print(f"❌ No se encontraron clientes con el nombre {nombre}") # Imprime un mensaje de no encontrados.
-    else: # Si se encontraron clientes.
-        print(f"\n🔍 Clientes con nombre {nombre}:") # Imprime un encabezado.
-        for cliente in clientes_encontrados: # Itera sobre cada cliente encontrado.
-            # Compatibilidad con ambas estructuras
-            codigo = cliente.get('codigo', cliente.get('identificador', '[Sin código]')) # Obtiene el código del cliente (priorizando 'codigo', luego 'identificador').
-            datos = cliente.get('datos', {}) # Intenta obtener el sub-diccionario 'datos'.
-            
-            # Obtener nombre y apellidos
-            nombre_cliente = datos.get('nombre', cliente.get('nombre', '[Sin nombre]')) # Obtiene el nombre del cliente.
-            apellidos = datos.get('apellidos', cliente.get('apellidos', '[Sin apellidos]')) # Obtiene los apellidos del cliente.
-            
-            # Obtener contacto
-            email = datos.get('email', cliente.get('email', '[Sin email]')) # Obtiene el email del cliente.
-            telefono = datos.get('telefono', cliente.get('telefono', '[Sin teléfono]')) # Obtiene el teléfono del cliente.
-            
-            # Obtener dirección
-            direccion = cliente.get('direccion', {}) # Intenta obtener el sub-diccionario 'direccion'.
-            calle = direccion.get('calle', '[Sin calle]') # Obtiene la calle.
-            numero = direccion.get('numero', '[Sin número]') # Obtiene el número.
-            ciudad = direccion.get('ciudad', '[Sin ciudad]') # Obtiene la ciudad.
-            
-            print(f"- Código: {codigo}") # Imprime el código del cliente.
-            print(f"  Nombre: {nombre_cliente} {apellidos}") # Imprime el nombre completo.
-            print(f"  Email: {email}") # Imprime el email.
-            print(f"  Teléfono: {telefono}") # Imprime el teléfono.
-            print(f"  Dirección: {calle} {numero}, {ciudad}") # Imprime la dirección.
-
-            # Buscar pedidos usando el código correcto (identificador o codigo)
-            pedidos_cliente = pedidos.find({"codigo_cliente": codigo}) # Busca los pedidos asociados a este cliente.
-            codigos_pedidos = [pedido.get('codigo_pedido', '[Sin código]') for pedido in pedidos_cliente] # Crea una lista de los códigos de los pedidos.
-            
-            if codigos_pedidos: # Si el cliente tiene pedidos.
-                print(f"  Pedidos: {', '.join(codigos_pedidos)}") # Imprime los códigos de los pedidos separados por comas.
-            else: # Si el cliente no tiene pedidos.
-                print("  Pedidos: [Sin pedidos]") # Imprime que no tiene pedidos.
-            print() # Imprime una línea en blanco para separar clientes.
+
+    return siguiente # Devuelve el token de la página siguiente.
 
 def insertar_producto(codigo, nombre, precio, stock=0, estado="activo"): # Define la función para insertar un nuevo producto.
     """
@@ -270,52 +521,203 @@ def insertar_producto(codigo, nombre, precio, stock=0, estado="activo"): # Defin
     precio (float): Precio del producto
     stock (int): Cantidad en stock (por defecto 0)
     estado (str): Estado del producto (por defecto "activo")
+
+    Retorna:
+    bool: True si el producto se insertó, False si no
     """
-    producto = { # Crea un diccionario con los datos del nuevo producto.
-        "codigo_producto": codigo, # Asigna el código del producto.
-        "nombre": nombre, # Asigna el nombre.
-        "precio": precio, # Asigna el precio.
-        "stock": stock, # Asigna el stock.
-        "estado": estado # Asigna el estado.
-    }
+    producto = construir_producto(codigo, nombre, precio, stock, estado) # Crea el documento del nuevo producto.
     productos.insert_one(producto) # Inserta el nuevo producto en la colección 'productos'.
+    cache_productos.invalidar(codigo) # Descarta cualquier entrada anterior con el mismo código.
     print(f"✅ Producto {nombre} insertado con stock {stock}.") # Imprime un mensaje de éxito.
+    return True # Devuelve que el producto se insertó.
+
+def cantidad_valida(cantidad): # Define la función que valida la cantidad de una línea de pedido.
+    """
+    Indica si una cantidad pedida es un entero mayor que cero. Con una cantidad cero
+    o negativa el filtro {"stock": {"$gte": cantidad}} siempre coincide y el $inc
+    no descuenta (o suma) stock, así que se rechaza antes de reservar.
+    """
+    return isinstance(cantidad, int) and not isinstance(cantidad, bool) and cantidad > 0 # Entero positivo (True/False no cuentan).
+
+def codigo_archivado(codigo_pedido): # Define la función que comprueba si un código de pedido ya está archivado.
+    """
+    Indica si el código de pedido ya lo usa un pedido archivado. El índice único de
+    'codigo_pedido' solo vale dentro de cada colección, así que un pedido nuevo con ese
+    código no podría archivarse nunca: se rechaza antes de reservar stock.
+    """
+    return pedidos_archivo.find_one({"codigo_pedido": codigo_pedido}, {"_id": 0, "codigo_pedido": 1}) is not None # Consulta cubierta por el índice único.
 
 def insertar_pedido(codigo_pedido, codigo_cliente, codigo_producto, cantidad): # Define la función para insertar un nuevo pedido.
     """
-    Inserta un nuevo pedido en la base de datos.
+    Inserta un nuevo pedido en la base de datos. La reserva del stock, el pedido y los
+    resúmenes se escriben en una sola transacción (si el servidor la admite; si no, el
+    stock reservado se devuelve a mano cuando la inserción falla).
     
     Parámetros:
     codigo_pedido (str): Código único del pedido
     codigo_cliente (str): Código del cliente que realiza el pedido
     codigo_producto (str): Código del producto solicitado
     cantidad (int): Cantidad del producto solicitada
+
+    Retorna:
+    bool: True si el pedido se insertó, False si no
     """
-    producto = productos.find_one({"codigo_producto": codigo_producto}) # Busca el producto por su código.
-    if not producto: # Si el producto no se encuentra.
-        print("❌ Producto no encontrado.") # Imprime un mensaje de error.
-        return # Sale de la función.
-    if producto["stock"] < cantidad: # Si el stock del producto es insuficiente.
-        print("❌ Stock insuficiente.") # Imprime un mensaje de error.
-        return # Sale de la función.
-    total = producto["precio"] * cantidad # Calcula el total del pedido.
-    pedido = { # Crea un diccionario con los datos del nuevo pedido.
-        "codigo_pedido": codigo_pedido, # Asigna el código del pedido.
-        "codigo_cliente": codigo_cliente, # Asigna el código del cliente.
-        "fecha_pedido": datetime.now(), # Asigna la fecha y hora actual del pedido.
-        "productos": [{ # Crea una lista de productos en el pedido.
-            "codigo_producto": codigo_producto, # Asigna el código del producto.
-            "nombre": producto["nombre"], # Asigna el nombre del producto.
-            "cantidad": cantidad, # Asigna la cantidad.
-            "precio_unitario": producto["precio"], # Asigna el precio unitario.
-            "total_comprado": total # Asigna el total comprado para este producto.
-        }],
-        "total_compra": total, # Asigna el total general de la compra.
-        "metodo_pago": "desconocido" # Asigna un método de pago por defecto.
-    }
-    pedidos.insert_one(pedido) # Inserta el nuevo pedido en la colección 'pedidos'.
-    productos.update_one({"codigo_producto": codigo_producto}, {"$inc": {"stock": -cantidad}}) # Decrementa el stock del producto.
+    if not cantidad_valida(cantidad): # Si la cantidad no es un entero positivo.
+        print(f"❌ Cantidad inválida: {cantidad!r} (debe ser un entero mayor que cero).") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    if codigo_archivado(codigo_pedido): # Si el código ya lo usa un pedido archivado.
+        print(f"❌ El código de pedido {codigo_pedido} ya existe en el archivo de pedidos.") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    def registrar(sesion): # Define la función que reserva el stock, inserta el pedido y lo suma a los resúmenes dentro de la transacción.
+        # Reservar stock: comprueba y descuenta en una sola operación atómica
+        producto = productos.find_one_and_update( # Busca y actualiza el producto en una sola llamada al servidor.
+            {"codigo_producto": codigo_producto, "stock": {"$gte": cantidad}}, # Filtra por código y solo si hay stock suficiente.
+            {"$inc": {"stock": -cantidad}}, # Decrementa el stock del producto.
+            projection=CAMPOS_PRODUCTO, # Devuelve los campos del producto antes de descontar (foto del precio al reservar).
+            session=sesion # Usa la sesión de la transacción si existe.
+        )
+        if not producto: # Si no se pudo reservar el stock.
+            raise StockInsuficiente(codigo_producto) # Cancela el pedido (no hay nada que deshacer).
+        linea = construir_linea(codigo_producto, producto["nombre"], cantidad, producto["precio"]) # Crea la línea del pedido con el precio reservado.
+        pedido = construir_pedido(codigo_pedido, codigo_cliente, [linea]) # Crea el documento del nuevo pedido.
+        try: # Intenta insertar el pedido.
+            pedidos.insert_one(pedido, session=sesion) # Inserta el nuevo pedido en la colección 'pedidos'.
+        except PyMongoError: # Si la inserción falla (por ejemplo, código de pedido duplicado).
+            if sesion is None: # Sin transacción, la reserva ya quedó aplicada.
+                productos.update_one({"codigo_producto": codigo_producto}, {"$inc": {"stock": cantidad}}) # Devuelve el stock reservado.
+            raise # Vuelve a lanzar el error (con transacción, abortarla devuelve el stock).
+        actualizar_resumenes([pedido], sesion=sesion) # Suma el pedido a los resúmenes diarios y del cliente (en la misma transacción).
+        return producto, pedido # Devuelve el producto al reservarlo y el pedido insertado.
+
+    try: # Intenta registrar el pedido.
+        producto, pedido = ejecutar_en_transaccion(registrar) # Reserva, inserta y resume (en una transacción si el servidor lo admite).
+    except StockInsuficiente: # Si no se pudo reservar el stock.
+        if productos.find_one({"codigo_producto": codigo_producto}, {"_id": 0, "codigo_producto": 1}) is None: # Comprueba si el producto existe (consulta cubierta por el índice, solo en el caso de error).
+            print("❌ Producto no encontrado.") # Imprime un mensaje de error.
+        else: # Si el producto existe, el problema es el stock.
+            print("❌ Stock insuficiente.") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    except PyMongoError as error: # Si la inserción falla (por ejemplo, código de pedido duplicado).
+        cache_productos.invalidar(codigo_producto) # Descarta el stock guardado en la caché.
+        print(f"❌ No se pudo insertar el pedido {codigo_pedido}: {error}") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    cache_productos.guardar(codigo_producto, Producto.desde_documento(dict(producto, stock=producto["stock"] - cantidad))) # Refresca la caché con el producto recién leído (ya con el stock descontado).
     print(f"✅ Pedido {codigo_pedido} insertado.") # Imprime un mensaje de éxito.
+    return True # Devuelve que el pedido se insertó.
+
+class StockInsuficiente(Exception): # Define la excepción usada para cancelar una reserva de stock.
+    """Se lanza cuando alguna línea de un pedido no tiene stock suficiente."""
+
+def _reservar_lineas_una_a_una(cantidades): # Define la función de reserva para servidores sin transacciones.
+    """
+    Reserva el stock de cada producto con una operación atómica por producto.
+    Si alguno no tiene stock, devuelve el stock ya reservado y lanza StockInsuficiente.
+    Se usa solo cuando el servidor no admite transacciones.
+
+    Parámetros:
+    cantidades (dict): Cantidad total a reservar por código de producto
+
+    Retorna:
+    dict: Documento de cada producto leído al reservarlo (nombre y precio de ese momento)
+    """
+    reservados = {} # Productos ya reservados (para poder deshacer y para armar las líneas).
+    for codigo_producto, cantidad in cantidades.items(): # Itera sobre cada producto a reservar.
+        producto = productos.find_one_and_update( # Reserva el stock del producto y lo lee en la misma operación.
+            {"codigo_producto": codigo_producto, "stock": {"$gte": cantidad}}, # Solo si hay stock suficiente.
+            {"$inc": {"stock": -cantidad}}, # Decrementa el stock.
+            projection=CAMPOS_PRODUCTO # Devuelve el producto (precio al reservar).
+        )
+        if not producto: # Si no se pudo reservar.
+            _restaurar_stock({codigo: cantidades[codigo] for codigo in reservados}) # Devuelve todo el stock reservado en un solo lote.
+            raise StockInsuficiente(codigo_producto) # Cancela la reserva indicando el producto sin stock.
+        reservados[codigo_producto] = producto # Registra el producto reservado.
+    return reservados # Devuelve los productos reservados.
+
+def lineas_pedido(cantidades, documentos): # Define la función que arma las líneas de un pedido con varios productos.
+    """
+    Arma una línea por producto con el nombre y el precio leídos al reservar el stock
+    (no los de la caché, que pueden tener hasta TTL segundos de antigüedad).
+
+    Parámetros:
+    cantidades (dict): Cantidad total por código de producto
+    documentos (dict): Documento de cada producto leído al reservarlo
+
+    Retorna:
+    list: Líneas del pedido
+    """
+    return [ # Devuelve la lista de líneas.
+        construir_linea(codigo, documentos[codigo]["nombre"], cantidad, documentos[codigo]["precio"]) # Crea la línea con el nombre y precio reservados.
+        for codigo, cantidad in cantidades.items() # Una línea por producto.
+    ]
+
+def insertar_pedido_multiple(codigo_pedido, codigo_cliente, lineas): # Define la función para insertar un pedido con varios productos.
+    """
+    Inserta un pedido con varias líneas de productos.
+    El stock se reserva en un solo lote y el precio de cada línea es el del producto al reservarlo.
+    Un producto repetido en varias líneas queda en una sola línea con la cantidad total.
+    Si alguna línea no tiene stock, el pedido no se inserta y el stock queda como estaba.
+
+    Parámetros:
+    codigo_pedido (str): Código único del pedido
+    codigo_cliente (str): Código del cliente que realiza el pedido
+    lineas (list): Lista de tuplas (codigo_producto, cantidad)
+
+    Retorna:
+    bool: True si el pedido se insertó, False si no
+    """
+    invalidas = [f"{codigo_producto} x {cantidad!r}" for codigo_producto, cantidad in lineas if not cantidad_valida(cantidad)] # Líneas con cantidad no válida.
+    if invalidas or not lineas: # Si alguna cantidad no es válida o el pedido no tiene líneas.
+        print(f"❌ Cantidad inválida (debe ser un entero mayor que cero): {', '.join(invalidas) or 'pedido sin líneas'}") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    if codigo_archivado(codigo_pedido): # Si el código ya lo usa un pedido archivado.
+        print(f"❌ El código de pedido {codigo_pedido} ya existe en el archivo de pedidos.") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    cantidades = {} # Diccionario con la cantidad total pedida por producto.
+    for codigo_producto, cantidad in lineas: # Itera sobre cada línea del pedido.
+        cantidades[codigo_producto] = cantidades.get(codigo_producto, 0) + cantidad # Suma la cantidad (un producto puede repetirse en varias líneas).
+
+    encontrados = buscar_productos(list(cantidades)) # Comprueba que existan todos los productos (caché y una sola consulta para el resto).
+    faltantes = [codigo for codigo in cantidades if codigo not in encontrados] # Códigos de producto que no existen.
+    if faltantes: # Si falta algún producto.
+        print(f"❌ Productos no encontrados: {', '.join(faltantes)}") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+
+    reservas = [ # Lista de operaciones para reservar el stock de todas las líneas.
+        UpdateOne({"codigo_producto": codigo, "stock": {"$gte": cantidad}}, {"$inc": {"stock": -cantidad}}) # Decrementa el stock solo si alcanza.
+        for codigo, cantidad in cantidades.items() # Una operación por producto.
+    ]
+
+    def registrar(sesion): # Define la función que reserva el stock e inserta el pedido dentro de la transacción.
+        resultado = productos.bulk_write(reservas, ordered=False, session=sesion) # Reserva el stock de todas las líneas en un solo lote.
+        if resultado.modified_count < len(reservas): # Si algún producto no tenía stock suficiente.
+            raise StockInsuficiente(codigo_pedido) # Aborta la transacción (el stock vuelve a como estaba).
+        documentos = {documento["codigo_producto"]: documento for documento in productos.find({"codigo_producto": {"$in": list(cantidades)}}, CAMPOS_PRODUCTO, session=sesion)} # Lee los productos reservados dentro de la transacción (precio vigente).
+        pedido = construir_pedido(codigo_pedido, codigo_cliente, lineas_pedido(cantidades, documentos)) # Crea el documento del nuevo pedido.
+        pedidos.insert_one(pedido, session=sesion) # Inserta el pedido en la colección 'pedidos'.
+        actualizar_resumenes([pedido], sesion=sesion) # Suma el pedido a los resúmenes diarios (en la misma transacción).
+        return pedido # Devuelve el pedido insertado.
+
+    try: # Intenta registrar el pedido.
+        if soporta_transacciones(): # Si el servidor admite transacciones.
+            pedido = ejecutar_en_transaccion(registrar) # Reserva e inserta en una sola transacción.
+        else: # Si el servidor no admite transacciones.
+            documentos = _reservar_lineas_una_a_una(cantidades) # Reserva el stock producto a producto (deshaciendo si falla).
+            pedido = construir_pedido(codigo_pedido, codigo_cliente, lineas_pedido(cantidades, documentos)) # Crea el documento del nuevo pedido.
+            try: # Intenta insertar el pedido.
+                pedidos.insert_one(pedido) # Inserta el pedido en la colección 'pedidos'.
+            except PyMongoError: # Si la inserción falla.
+                _restaurar_stock(cantidades) # Devuelve el stock reservado en un solo lote.
+                raise # Vuelve a lanzar el error para informarlo abajo.
+            actualizar_resumenes([pedido]) # Suma el pedido a los resúmenes diarios.
+        cache_productos.invalidar(*cantidades) # Descarta el stock guardado en la caché de los productos reservados.
+    except StockInsuficiente: # Si alguna línea no tenía stock.
+        print("❌ Stock insuficiente.") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    except PyMongoError as error: # Si la inserción falla (por ejemplo, código de pedido duplicado).
+        print(f"❌ No se pudo insertar el pedido {codigo_pedido}: {error}") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    print(f"✅ Pedido {codigo_pedido} insertado con {len(pedido['productos'])} productos. Total: ${pedido['total_compra']:.2f}") # Imprime un mensaje de éxito.
+    return True # Devuelve que el pedido se insertó.
 
 def eliminar_producto(codigo_producto): # Define la función para eliminar un producto.
     """
@@ -323,56 +725,67 @@ def eliminar_producto(codigo_producto): # Define la función para eliminar un pr
     
     Parámetros:
     codigo_producto (str): Código del producto a eliminar
+
+    Retorna:
+    bool: True si el producto se eliminó, False si no
     """
     resultado = productos.delete_one({"codigo_producto": codigo_producto}) # Elimina un único producto que coincida con el código.
+    cache_productos.invalidar(codigo_producto) # Descarta el producto de la caché.
     if resultado.deleted_count > 0: # Si se eliminó al menos un documento.
         print(f"✅ Producto {codigo_producto} eliminado.") # Imprime un mensaje de éxito.
+        return True # Devuelve que el producto se eliminó.
     else: # Si no se eliminó ningún documento.
         print(f"❌ Producto {codigo_producto} no encontrado.") # Imprime un mensaje de no encontrado.
+        return False # Devuelve que la operación no se realizó.
 
 def eliminar_cliente(codigo_cliente): # Define la función para eliminar un cliente.
     """
     Elimina un cliente y todos sus pedidos asociados, restaurando el stock de productos.
     Muestra el código y el nombre del cliente eliminado.
+
+    Retorna:
+    bool: True si el cliente se eliminó, False si no
     """
     # Buscar el cliente antes de eliminarlo
-    cliente = clientes.find_one({ # Busca un cliente por su código o identificador.
-        "$or": [ # Utiliza un operador OR.
-            {"codigo": codigo_cliente}, # Busca por el campo 'codigo'.
-            {"identificador": codigo_cliente} # Busca por el campo 'identificador'.
-        ]
-    })
+    cliente = buscar_cliente(codigo_cliente, CAMPOS_NOMBRE_CLIENTE) # Busca el cliente por su código (solo nombre y apellidos).
 
     if not cliente: # Si el cliente no se encuentra.
         print(f"❌ Cliente {codigo_cliente} no encontrado.") # Imprime un mensaje de no encontrado.
-        return # Sale de la función.
-
-    datos = cliente.get('datos', {}) # Intenta obtener el sub-diccionario 'datos'.
-    nombre_completo = f"{datos.get('nombre', '[Sin nombre]')} {datos.get('apellidos', '[Sin apellidos]')}" # Construye el nombre completo del cliente.
-
-    # Restaurar stock de productos de todos los pedidos del cliente
-    pedidos_cliente = list(pedidos.find({"codigo_cliente": codigo_cliente})) # Busca todos los pedidos del cliente.
-    for pedido in pedidos_cliente: # Itera sobre cada pedido del cliente.
-        for prod in pedido.get("productos", []): # Itera sobre cada producto dentro del pedido.
-            productos.update_one( # Actualiza el stock del producto.
-                {"codigo_producto": prod["codigo_producto"]}, # Filtra por el código del producto.
-                {"$inc": {"stock": prod["cantidad"]}} # Incrementa el stock del producto por la cantidad del pedido.
+        return False # Sale de la función (la operación no se realizó).
+
+    nombre = nombre_completo(cliente) # Construye el nombre completo del cliente.
+
+    def eliminar(sesion): # Define la función que elimina pedidos y cliente dentro de la transacción.
+        # Restaurar stock de productos de todos los pedidos del cliente (recientes y archivados)
+        cantidades = Counter() # Cantidad total por producto.
+        vistos = set() # _id de los pedidos ya contados (un pedido a medio archivar está en las dos colecciones).
+        for coleccion in (pedidos, pedidos_archivo): # Recorre los pedidos recientes y los archivados.
+            cursor = coleccion.find( # Busca todos los pedidos del cliente.
+                {"codigo_cliente": codigo_cliente}, # Filtra por el código del cliente.
+                CAMPOS_RESUMEN, # Solo trae lo necesario para restaurar el stock y los resúmenes.
+                session=sesion # Usa la sesión de la transacción si existe.
             )
-    # Eliminar los pedidos
-    resultado_pedidos = pedidos.delete_many({"codigo_cliente": codigo_cliente}) # Elimina todos los pedidos asociados al cliente.
-    # Eliminar el cliente
-    resultado_cliente = clientes.delete_one({ # Elimina el cliente de la colección 'clientes'.
-        "$or": [ # Utiliza un operador OR.
-            {"codigo": codigo_cliente}, # Busca por el campo 'codigo'.
-            {"identificador": codigo_cliente} # Busca por el campo 'identificador'.
-        ]
-    })
+            for bloque in en_bloques(cursor, TAMANO_LOTE): # Recorre los pedidos por bloques (sin cargarlos todos en memoria).
+                bloque = [pedido for pedido in bloque if pedido["_id"] not in vistos] # Descarta las copias de pedidos ya contados.
+                vistos.update(pedido["_id"] for pedido in bloque) # Registra los pedidos del bloque.
+                cantidades.update(sumar_cantidades(bloque)) # Suma las cantidades del bloque a las acumuladas.
+                actualizar_resumenes(bloque, -1, sesion) # Descuenta los pedidos del bloque de los resúmenes diarios.
+            # Eliminar los pedidos
+            coleccion.delete_many({"codigo_cliente": codigo_cliente}, session=sesion) # Elimina todos los pedidos asociados al cliente.
+        _restaurar_stock(cantidades, sesion) # Devuelve el stock en un solo lote.
+        # Eliminar el cliente
+        resultado_cliente = clientes.delete_one(filtro_cliente(codigo_cliente), session=sesion) # Elimina el cliente de la colección 'clientes'.
+        return len(vistos), resultado_cliente # Devuelve los pedidos eliminados y el resultado de la eliminación del cliente.
+
+    eliminados, resultado_cliente = ejecutar_en_transaccion(eliminar) # Ejecuta la eliminación (en una transacción si el servidor lo admite).
 
     if resultado_cliente.deleted_count > 0: # Si se eliminó al menos un cliente.
-        print(f"✅ Cliente eliminado: {codigo_cliente} - {nombre_completo}") # Imprime un mensaje de éxito con el código y nombre del cliente.
-        print(f"🗑️ Pedidos eliminados: {resultado_pedidos.deleted_count}") # Imprime la cantidad de pedidos eliminados.
+        print(f"✅ Cliente eliminado: {codigo_cliente} - {nombre}") # Imprime un mensaje de éxito con el código y nombre del cliente.
+        print(f"🗑️ Pedidos eliminados: {eliminados}") # Imprime la cantidad de pedidos eliminados.
+        return True # Devuelve que el cliente se eliminó.
     else: # Si no se eliminó ningún cliente (aunque ya se verificó antes).
         print(f"❌ Cliente {codigo_cliente} no encontrado.") # Imprime un mensaje de no encontrado.
+        return False # Devuelve que la operación no se realizó.
 
 # Ejemplo de uso de las funciones
 if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
@@ -0,0 +1,504 @@
+"""
+Módulo de operaciones CRUD asíncronas para ComercioTech
+Versión asyncio de operaciones.py: las mismas funciones públicas, con la misma
+salida por consola y los mismos valores de retorno, pero usando el cliente
+asíncrono de MongoDB. Un solo bucle de eventos puede atender muchas operaciones
+a la vez; las lecturas independientes se lanzan juntas con asyncio.gather
+
+Ejemplo:
+    asyncio.run(consultar_pedidos_por_cliente("CLI-001"))
+"""
+
+import asyncio # Importa asyncio para ejecutar consultas en paralelo.
+from collections import Counter # Importa Counter para acumular cantidades por producto.
+from conexion_db import obtener_coleccion_async, soporta_transacciones_async, ejecutar_en_transaccion_async # Importa el cliente asíncrono y las transacciones.
+from consultas import CAMPOS_NOMBRE_CLIENTE, CAMPOS_RESUMEN_CLIENTE, CAMPOS_PRODUCTO, TAMANO_LOTE, filtro_cliente # Importa las proyecciones, el tamaño de lote y el filtro de cliente.
+from consultas_async import buscar_cliente, buscar_clientes_por_ciudad, buscar_clientes_por_fecha, buscar_clientes_por_rango, buscar_clientes_por_nombre # Importa las consultas asíncronas de clientes.
+from consultas_async import buscar_producto, buscar_productos, buscar_productos_por_nombre, buscar_pedidos_por_cliente, buscar_pedidos_por_rango, en_bloques # Importa las consultas asíncronas de productos y pedidos.
+from operaciones import construir_cliente, construir_producto, construir_linea, construir_pedido # Importa los constructores de documentos.
+from operaciones import nombre_completo, texto_rango, texto_resumen, mostrar_producto, mostrar_pedido, mostrar_cliente, sumar_cantidades, cantidad_valida, lineas_pedido, StockInsuficiente # Importa la salida por consola y los auxiliares compartidos.
+from cache_productos import cache as cache_productos # Importa la caché de productos (para invalidarla al escribir).
+from precios import HISTORIAL_PRECIOS, CAMPOS_PRECIO, cambio_precio # Importa el historial de precios y la validación de los cambios de precio.
+from resumenes import RECIENTES, CAMPOS_RESUMEN, operaciones_resumen, filtro_con_resumen, consulta_recientes, actualizacion_recientes, unir_recientes # Importa las actualizaciones de los resúmenes de ventas y de clientes.
+from modelos import Producto # Importa el registro de producto.
+from bson import ObjectId # Importa ObjectId para identificar el cambio de precio en el historial.
+from pymongo import UpdateOne # Importa UpdateOne para escrituras en lote.
+from pymongo.errors import PyMongoError # Importa la excepción base de pymongo para detectar fallos de escritura.
+
+def _coleccion(nombre): # Define el acceso corto a una colección del cliente asíncrono.
+    """Devuelve la colección indicada del cliente asíncrono."""
+    return obtener_coleccion_async(nombre) # Entrega la colección (se crea en el primer uso).
+
+async def insertar_cliente(codigo, nombre, apellidos, email, telefono, direccion): # Define la función para insertar un nuevo cliente.
+    """
+    Inserta un nuevo cliente en la base de datos con la estructura unificada.
+    """
+    nuevo_cliente = construir_cliente(codigo, nombre, apellidos, email, telefono, direccion) # Crea el documento del nuevo cliente (fecha de registro actual).
+    resultado = await _coleccion("clientes").insert_one(nuevo_cliente) # Inserta el nuevo cliente en la colección 'clientes'.
+    print(f"✅ Cliente insertado. ID: {resultado.inserted_id}") # Imprime un mensaje de éxito con el ID del cliente insertado.
+    return True # Devuelve que el cliente se insertó.
+
+async def consultar_clientes_por_ciudad(ciudad, tamano_pagina=None, token=None): # Define la función para consultar clientes por ciudad.
+    """
+    Consulta clientes por ciudad
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = await buscar_clientes_por_ciudad(ciudad, tamano_pagina, token) # Busca los clientes de la ciudad.
+
+    encontrados = 0 # Contador de clientes mostrados.
+    async for cliente in resultados: # Itera sobre cada cliente a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer cliente de la primera página.
+            print(f"\n🔍 Clientes en {ciudad}:") # Imprime un encabezado para los clientes encontrados.
+        encontrados += 1 # Cuenta el cliente.
+        print(f"- {nombre_completo(cliente)}") # Imprime el nombre y apellidos del cliente.
+
+    if encontrados == 0 and not token: # Si no se encontraron clientes.
+        print(f"❌ No se encontraron clientes en {ciudad}") # Imprime un mensaje indicando que no se encontraron clientes.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+async def consultar_clientes_por_fecha(fecha, tamano_pagina=None, token=None): # Define la función para consultar clientes por fecha de registro.
+    """
+    Consulta clientes registrados en una fecha específica
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = await buscar_clientes_por_fecha(fecha, tamano_pagina, token) # Busca los clientes registrados ese día.
+
+    encontrados = 0 # Contador de clientes mostrados.
+    async for cliente in resultados: # Itera sobre cada cliente a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer cliente de la primera página.
+            print(f"\n📅 Clientes registrados el {fecha.strftime('%Y-%m-%d')}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el cliente.
+        print(f"- {nombre_completo(cliente)}") # Imprime el nombre y apellidos del cliente.
+
+    if encontrados == 0 and not token: # Si no se encontraron clientes.
+        print(f"❌ No se encontraron clientes registrados el {fecha.strftime('%Y-%m-%d')}") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+async def consultar_clientes_por_rango(desde=None, hasta=None, tamano_pagina=None, token=None): # Define la función para consultar clientes por rango de fechas de registro.
+    """
+    Consulta clientes registrados en [desde, hasta), ordenados por fecha de registro
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = await buscar_clientes_por_rango(desde, hasta, tamano_pagina, token) # Busca los clientes registrados en el rango.
+
+    encontrados = 0 # Contador de clientes mostrados.
+    async for cliente in resultados: # Itera sobre cada cliente a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer cliente de la primera página.
+            print(f"\n📅 Clientes registrados {texto_rango(desde, hasta)}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el cliente.
+        print(f"- {cliente.fecha_registro:%Y-%m-%d %H:%M} {cliente.codigo or '[Sin código]'}: {nombre_completo(cliente)}") # Imprime la fecha, el código y el nombre del cliente.
+
+    if encontrados == 0 and not token: # Si no se encontraron clientes.
+        print(f"❌ No se encontraron clientes registrados {texto_rango(desde, hasta)}") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+async def consultar_pedidos_por_rango(desde=None, hasta=None, codigo_cliente=None, codigo_producto=None, tamano_pagina=None, token=None, incluir_archivo=False): # Define la función para consultar pedidos por rango de fechas.
+    """
+    Consulta pedidos con fecha en [desde, hasta), opcionalmente de un cliente o con un producto
+    (con incluir_archivo, también los archivados)
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = await buscar_pedidos_por_rango(desde, hasta, codigo_cliente, codigo_producto, tamano_pagina, token, incluir_archivo) # Busca los pedidos del rango.
+
+    encontrados = 0 # Contador de pedidos mostrados.
+    async for pedido in resultados: # Itera sobre cada pedido a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer pedido de la primera página.
+            print(f"\n📦 Pedidos {texto_rango(desde, hasta)}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el pedido.
+        mostrar_pedido(pedido) # Imprime el pedido con sus líneas.
+
+    if encontrados == 0 and not token: # Si no se encontraron pedidos.
+        print(f"❌ No se encontraron pedidos {texto_rango(desde, hasta)}") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+async def consultar_producto_por_codigo(codigo): # Define la función para consultar un producto por su código.
+    """
+    Consulta un producto por su código
+
+    Retorna:
+    Producto: Registro del producto o None si no se encuentra
+    """
+    producto = await buscar_producto(codigo) # Busca el producto por su código.
+
+    if producto: # Si se encontró el producto.
+        mostrar_producto(producto) # Imprime los datos del producto.
+    else: # Si no se encontró el producto.
+        print(f"❌ Producto con código {codigo} no encontrado") # Imprime un mensaje de no encontrado.
+
+    return producto # Devuelve el registro del producto o None.
+
+async def consultar_productos_por_nombre(nombre, tamano_pagina=None, token=None, prefijo=False): # Define la función para consultar productos por nombre.
+    """
+    Consulta productos por nombre (sin distinguir mayúsculas/minúsculas ni acentos)
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = await buscar_productos_por_nombre(nombre, tamano_pagina, token, prefijo) # Busca los productos por nombre.
+
+    encontrados = 0 # Contador de productos mostrados.
+    async for producto in resultados: # Itera sobre cada producto a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer producto de la primera página.
+            print(f"\n📦 Productos con nombre {nombre}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el producto.
+        print(f"- {producto.codigo_producto}: {producto.nombre} (${producto.precio}, {producto.stock} unidades)") # Imprime el código, nombre, precio y stock.
+
+    if encontrados == 0 and not token: # Si no se encontraron productos.
+        print(f"❌ No se encontraron productos con el nombre {nombre}") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+async def consultar_pedidos_por_cliente(codigo_cliente, tamano_pagina=None, token=None, incluir_archivo=False): # Define la función para consultar pedidos de un cliente.
+    """
+    Consulta y muestra los pedidos de un cliente, mostrando también su nombre.
+    En la primera página, el cliente y sus pedidos se buscan al mismo tiempo.
+    Con incluir_archivo también se muestran los pedidos archivados.
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    nombre = None # El nombre solo se busca en la primera página (para el encabezado).
+    if token: # Si es una página posterior a la primera.
+        resultados, siguiente = await buscar_pedidos_por_cliente(codigo_cliente, tamano_pagina, token, incluir_archivo) # Busca solo los pedidos.
+    else: # Si es la primera página.
+        cliente, (resultados, siguiente) = await asyncio.gather( # Lanza las dos consultas a la vez y espera ambas.
+            buscar_cliente(codigo_cliente, CAMPOS_RESUMEN_CLIENTE), # Busca el cliente por código (nombre, apellidos y resumen de pedidos).
+            buscar_pedidos_por_cliente(codigo_cliente, tamano_pagina, token, incluir_archivo) # Busca los pedidos del cliente ordenados por fecha.
+        )
+        if not cliente: # Si no se encontró el cliente.
+            await resultados.aclose() # Cierra el cursor de pedidos que se abrió a la vez.
+            print(f"❌ No se encontró cliente con código {codigo_cliente}") # Imprime un mensaje de no encontrado.
+            return None # Sale de la función.
+        nombre = nombre_completo(cliente) # Construye el nombre completo del cliente.
+        if cliente.resumen_pedidos and cliente.resumen_pedidos.get("cantidad"): # Si el cliente tiene resumen con pedidos.
+            nombre = f"{nombre} ({texto_resumen(cliente.resumen_pedidos)})" # Agrega el resumen al encabezado.
+
+    encontrados = 0 # Contador de pedidos mostrados.
+    async for pedido in resultados: # Itera sobre cada pedido a medida que llega del servidor.
+        if encontrados == 0 and not token: # Antes del primer pedido de la primera página.
+            print(f"\n📦 Pedidos del cliente {codigo_cliente} - {nombre}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el pedido.
+        mostrar_pedido(pedido) # Imprime el pedido con sus líneas.
+
+    if encontrados == 0 and not token: # Si no se encontraron pedidos para el cliente.
+        print(f"❌ No se encontraron pedidos para el cliente {codigo_cliente} ({nombre})") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+async def actualizar_precio_producto(codigo, nuevo_precio): # Define la función para actualizar el precio de un producto.
+    """
+    Actualiza el precio de un producto y guarda el precio anterior en el historial de precios,
+    con las mismas reglas que los cambios de precio síncronos (precios.cambio_precio).
+    """
+    async def cambiar(sesion): # Define la función que cambia el precio y guarda el historial dentro de la transacción.
+        producto = await _coleccion("productos").find_one({"codigo_producto": codigo}, CAMPOS_PRECIO, session=sesion) # Lee el precio actual.
+        if producto is None: # Si el producto no existe.
+            return None, None # No hay nada que cambiar.
+        cambio = cambio_precio(codigo, producto.get("precio"), nuevo_precio, ObjectId(), "manual") # Valida el precio nuevo (finito y positivo) y arma el historial.
+        if cambio and cambio["precio_nuevo"] != cambio["precio_anterior"]: # Si el precio es válido y cambia.
+            await _coleccion("productos").update_one({"codigo_producto": codigo}, {"$set": {"precio": cambio["precio_nuevo"]}}, session=sesion) # Establece el nuevo precio.
+            await _coleccion(HISTORIAL_PRECIOS).insert_one(cambio, session=sesion) # Guarda el cambio en el historial.
+        return producto, cambio # Devuelve el producto antes del cambio y el cambio (None si se rechazó).
+
+    producto, cambio = await ejecutar_en_transaccion_async(cambiar) # Ejecuta el cambio (en una transacción si el servidor lo admite).
+
+    if producto is None: # Si el producto no existe.
+        print(f"❌ No se encontró producto con código {codigo}") # Imprime un mensaje de no encontrado.
+        return False # Devuelve que la operación no se realizó.
+    elif cambio is None: # Si el precio nuevo no es válido.
+        print(f"❌ Precio inválido para producto {codigo}: debe ser un número finito mayor que cero") # Imprime un mensaje de precio inválido.
+        return False # Devuelve que la operación no se realizó.
+    elif cambio["precio_nuevo"] == cambio["precio_anterior"]: # Si el producto ya tenía ese precio.
+        print(f"✅ El producto {codigo} ya tenía ese precio") # Imprime que no hubo cambios.
+        return True # Devuelve que el producto quedó con el precio pedido.
+    else: # Si se modificó el precio.
+        cache_productos.invalidar(codigo) # Descarta el precio anterior guardado en la caché.
+        print(f"✅ Precio actualizado para producto {codigo}") # Imprime un mensaje de éxito.
+        return True # Devuelve que el producto quedó con el precio pedido.
+
+async def _restaurar_stock(cantidades, sesion=None): # Define la función para devolver stock a varios productos de una vez.
+    """
+    Devuelve stock a varios productos en un solo lote desordenado.
+    """
+    if cantidades: # Solo si hay algo que devolver (bulk_write no acepta listas vacías).
+        await _coleccion("productos").bulk_write( # Envía todas las actualizaciones en una sola llamada al servidor.
+            [UpdateOne({"codigo_producto": codigo}, {"$inc": {"stock": cantidad}}) for codigo, cantidad in cantidades.items()], # Una operación por producto con la cantidad total.
+            ordered=False, # Lote desordenado: el servidor puede aplicarlas en paralelo.
+            session=sesion # Usa la sesión de la transacción si existe.
+        )
+        cache_productos.invalidar(*cantidades) # Descarta el stock guardado en la caché de esos productos.
+
+async def _actualizar_resumenes(pedidos_iterables, signo=1, sesion=None): # Define la versión asíncrona de actualizar_resumenes.
+    """
+    Suma (signo 1) o resta (signo -1) los pedidos en los resúmenes diarios y en el de cada cliente.
+    """
+    for nombre, operaciones in operaciones_resumen(pedidos_iterables, signo).items(): # Itera sobre cada colección de resumen.
+        if operaciones: # Solo si hay algo que actualizar (bulk_write no acepta listas vacías).
+            await _coleccion(nombre).bulk_write(operaciones, ordered=signo < 0, session=sesion) # Aplica todas las actualizaciones en una sola llamada (en orden al restar).
+
+async def _rellenar_recientes(codigo_cliente, sesion=None): # Define la versión asíncrona de rellenar_recientes.
+    """
+    Vuelve a leer los pedidos recientes de un cliente y los guarda en su resumen.
+    """
+    recientes = await _coleccion("pedidos").find(session=sesion, **consulta_recientes(codigo_cliente)).to_list(None) # Lee los pedidos recientes.
+    if len(recientes) < RECIENTES: # Si faltan pedidos para completar la lista (los demás pueden estar archivados).
+        recientes = unir_recientes(recientes, await _coleccion("pedidos_archivo").find(session=sesion, **consulta_recientes(codigo_cliente)).to_list(None)) # Completa con los archivados.
+    await _coleccion("clientes").update_one(filtro_con_resumen(codigo_cliente), actualizacion_recientes(recientes), session=sesion) # Los guarda en el resumen del cliente (si lo tiene).
+
+async def eliminar_pedido(codigo_pedido): # Define la función para eliminar un pedido.
+    """
+    Elimina un pedido por su código (buscándolo también entre los archivados) y restaura el stock de productos.
+    """
+    async def eliminar(sesion): # Define la función que elimina el pedido y restaura el stock dentro de la transacción.
+        for nombre in ("pedidos", "pedidos_archivo"): # Busca primero en los pedidos recientes y luego en el archivo.
+            pedido = await _coleccion(nombre).find_one_and_delete( # Busca y elimina el pedido en una sola operación.
+                {"codigo_pedido": codigo_pedido}, # Filtra por el código del pedido.
+                projection=CAMPOS_RESUMEN, # Solo trae lo necesario para restaurar el stock y los resúmenes.
+                session=sesion # Usa la sesión de la transacción si existe.
+            )
+            if pedido: # Si se encontró en esta colección.
+                break # No busca en la siguiente.
+        if pedido: # Si se encontró y eliminó el pedido.
+            if nombre == "pedidos": # Si estaba entre los recientes, el archivado pudo haberlo copiado ya.
+                await _coleccion("pedidos_archivo").delete_one({"_id": pedido["_id"]}, session=sesion) # Borra esa copia (el pedido no debe reaparecer en el archivo).
+            await _restaurar_stock(sumar_cantidades([pedido]), sesion) # Restaura el stock de sus productos en un solo lote.
+            await _actualizar_resumenes([pedido], -1, sesion) # Descuenta el pedido de los resúmenes diarios y del cliente.
+            await _rellenar_recientes(pedido.get("codigo_cliente"), sesion) # Completa los pedidos recientes del cliente.
+        return pedido # Devuelve el pedido eliminado o None.
+
+    if await ejecutar_en_transaccion_async(eliminar): # Ejecuta la eliminación (en una transacción si el servidor lo admite).
+        print(f"✅ Pedido {codigo_pedido} eliminado y stock restaurado.") # Imprime un mensaje de éxito.
+        return True # Devuelve que el pedido se eliminó.
+    else: # Si el pedido no se encontró.
+        print(f"❌ Pedido {codigo_pedido} no encontrado.") # Imprime un mensaje de no encontrado.
+        return False # Devuelve que la operación no se realizó.
+
+async def consultar_clientes_por_nombre(nombre, tamano_pagina=None, token=None, prefijo=False): # Define la función para consultar clientes por nombre.
+    """
+    Consulta clientes por nombre, muestra información detallada y los códigos de sus pedidos.
+
+    Retorna:
+    str: Token para pedir la página siguiente, o None si no hay más resultados
+    """
+    resultados, siguiente = await buscar_clientes_por_nombre(nombre, tamano_pagina, token, prefijo) # Busca los clientes con sus códigos de pedido.
+
+    encontrados = 0 # Contador de clientes mostrados.
+    async for cliente, codigos_pedidos in resultados: # Itera sobre cada cliente y sus pedidos.
+        if encontrados == 0 and not token: # Antes del primer cliente de la primera página.
+            print(f"\n🔍 Clientes con nombre {nombre}:") # Imprime un encabezado.
+        encontrados += 1 # Cuenta el cliente.
+        mostrar_cliente(cliente, codigos_pedidos) # Imprime el detalle del cliente y sus pedidos.
+
+    if encontrados == 0 and not token: # Si no se encontraron clientes.
+        print(f"❌ No se encontraron clientes con el nombre {nombre}") # Imprime un mensaje de no encontrados.
+
+    return siguiente # Devuelve el token de la página siguiente.
+
+async def insertar_producto(codigo, nombre, precio, stock=0, estado="activo"): # Define la función para insertar un nuevo producto.
+    """
+    Inserta un nuevo producto en la base de datos.
+    """
+    producto = construir_producto(codigo, nombre, precio, stock, estado) # Crea el documento del nuevo producto.
+    await _coleccion("productos").insert_one(producto) # Inserta el nuevo producto en la colección 'productos'.
+    cache_productos.invalidar(codigo) # Descarta cualquier entrada anterior con el mismo código.
+    print(f"✅ Producto {nombre} insertado con stock {stock}.") # Imprime un mensaje de éxito.
+    return True # Devuelve que el producto se insertó.
+
+async def _codigo_archivado(codigo_pedido): # Define la función que comprueba si un código de pedido ya está archivado.
+    """Indica si el código de pedido ya lo usa un pedido archivado (ver operaciones.codigo_archivado)."""
+    return await _coleccion("pedidos_archivo").find_one({"codigo_pedido": codigo_pedido}, {"_id": 0, "codigo_pedido": 1}) is not None # Consulta cubierta por el índice único.
+
+async def insertar_pedido(codigo_pedido, codigo_cliente, codigo_producto, cantidad): # Define la función para insertar un nuevo pedido.
+    """
+    Inserta un nuevo pedido en la base de datos, reservando el stock con una operación atómica.
+    La reserva, el pedido y los resúmenes van en una sola transacción (si el servidor la admite).
+    """
+    if not cantidad_valida(cantidad): # Si la cantidad no es un entero positivo.
+        print(f"❌ Cantidad inválida: {cantidad!r} (debe ser un entero mayor que cero).") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    if await _codigo_archivado(codigo_pedido): # Si el código ya lo usa un pedido archivado.
+        print(f"❌ El código de pedido {codigo_pedido} ya existe en el archivo de pedidos.") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    productos = _coleccion("productos") # Colección de productos.
+
+    async def registrar(sesion): # Define la función que reserva el stock, inserta el pedido y lo suma a los resúmenes dentro de la transacción.
+        # Reservar stock: comprueba y descuenta en una sola operación atómica
+        producto = await productos.find_one_and_update( # Busca y actualiza el producto en una sola llamada al servidor.
+            {"codigo_producto": codigo_producto, "stock": {"$gte": cantidad}}, # Filtra por código y solo si hay stock suficiente.
+            {"$inc": {"stock": -cantidad}}, # Decrementa el stock del producto.
+            projection=CAMPOS_PRODUCTO, # Devuelve los campos del producto antes de descontar (foto del precio al reservar).
+            session=sesion # Usa la sesión de la transacción si existe.
+        )
+        if not producto: # Si no se pudo reservar el stock.
+            raise StockInsuficiente(codigo_producto) # Cancela el pedido (no hay nada que deshacer).
+        linea = construir_linea(codigo_producto, producto["nombre"], cantidad, producto["precio"]) # Crea la línea del pedido con el precio reservado.
+        pedido = construir_pedido(codigo_pedido, codigo_cliente, [linea]) # Crea el documento del nuevo pedido.
+        try: # Intenta insertar el pedido.
+            await _coleccion("pedidos").insert_one(pedido, session=sesion) # Inserta el nuevo pedido en la colección 'pedidos'.
+        except PyMongoError: # Si la inserción falla (por ejemplo, código de pedido duplicado).
+            if sesion is None: # Sin transacción, la reserva ya quedó aplicada.
+                await productos.update_one({"codigo_producto": codigo_producto}, {"$inc": {"stock": cantidad}}) # Devuelve el stock reservado.
+            raise # Vuelve a lanzar el error (con transacción, abortarla devuelve el stock).
+        await _actualizar_resumenes([pedido], sesion=sesion) # Suma el pedido a los resúmenes diarios y del cliente (en la misma transacción).
+        return producto, pedido # Devuelve el producto al reservarlo y el pedido insertado.
+
+    try: # Intenta registrar el pedido.
+        producto, pedido = await ejecutar_en_transaccion_async(registrar) # Reserva, inserta y resume (en una transacción si el servidor lo admite).
+    except StockInsuficiente: # Si no se pudo reservar el stock.
+        if await productos.find_one({"codigo_producto": codigo_producto}, {"_id": 0, "codigo_producto": 1}) is None: # Comprueba si el producto existe (solo en el caso de error).
+            print("❌ Producto no encontrado.") # Imprime un mensaje de error.
+        else: # Si el producto existe, el problema es el stock.
+            print("❌ Stock insuficiente.") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    except PyMongoError as error: # Si la inserción falla (por ejemplo, código de pedido duplicado).
+        cache_productos.invalidar(codigo_producto) # Descarta el stock guardado en la caché.
+        print(f"❌ No se pudo insertar el pedido {codigo_pedido}: {error}") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    cache_productos.guardar(codigo_producto, Producto.desde_documento(dict(producto, stock=producto["stock"] - cantidad))) # Refresca la caché con el producto recién leído (ya con el stock descontado).
+    print(f"✅ Pedido {codigo_pedido} insertado.") # Imprime un mensaje de éxito.
+    return True # Devuelve que el pedido se insertó.
+
+async def _reservar_lineas_una_a_una(cantidades): # Define la función de reserva para servidores sin transacciones.
+    """
+    Reserva el stock de cada producto con una operación atómica por producto.
+    Si alguno no tiene stock, devuelve el stock ya reservado y lanza StockInsuficiente.
+    Devuelve el documento de cada producto leído al reservarlo.
+    """
+    reservados = {} # Productos ya reservados (para poder deshacer y para armar las líneas).
+    for codigo_producto, cantidad in cantidades.items(): # Itera sobre cada producto a reservar.
+        producto = await _coleccion("productos").find_one_and_update( # Reserva el stock del producto y lo lee en la misma operación.
+            {"codigo_producto": codigo_producto, "stock": {"$gte": cantidad}}, # Solo si hay stock suficiente.
+            {"$inc": {"stock": -cantidad}}, # Decrementa el stock.
+            projection=CAMPOS_PRODUCTO # Devuelve el producto (precio al reservar).
+        )
+        if not producto: # Si no se pudo reservar.
+            await _restaurar_stock({codigo: cantidades[codigo] for codigo in reservados}) # Devuelve todo el stock reservado en un solo lote.
+            raise StockInsuficiente(codigo_producto) # Cancela la reserva indicando el producto sin stock.
+        reservados[codigo_producto] = producto # Registra el producto reservado.
+    return reservados # Devuelve los productos reservados.
+
+async def insertar_pedido_multiple(codigo_pedido, codigo_cliente, lineas): # Define la función para insertar un pedido con varios productos.
+    """
+    Inserta un pedido con varias líneas de productos, con el precio de cada producto al reservarlo.
+    Si alguna línea no tiene stock, el pedido no se inserta y el stock queda como estaba.
+
+    Parámetros:
+    lineas (list): Lista de tuplas (codigo_producto, cantidad)
+    """
+    invalidas = [f"{codigo_producto} x {cantidad!r}" for codigo_producto, cantidad in lineas if not cantidad_valida(cantidad)] # Líneas con cantidad no válida.
+    if invalidas or not lineas: # Si alguna cantidad no es válida o el pedido no tiene líneas.
+        print(f"❌ Cantidad inválida (debe ser un entero mayor que cero): {', '.join(invalidas) or 'pedido sin líneas'}") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    if await _codigo_archivado(codigo_pedido): # Si el código ya lo usa un pedido archivado.
+        print(f"❌ El código de pedido {codigo_pedido} ya existe en el archivo de pedidos.") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    cantidades = {} # Diccionario con la cantidad total pedida por producto.
+    for codigo_producto, cantidad in lineas: # Itera sobre cada línea del pedido.
+        cantidades[codigo_producto] = cantidades.get(codigo_producto, 0) + cantidad # Suma la cantidad (un producto puede repetirse en varias líneas).
+
+    encontrados = await buscar_productos(list(cantidades)) # Comprueba que existan todos los productos (caché y una sola consulta para el resto).
+    faltantes = [codigo for codigo in cantidades if codigo not in encontrados] # Códigos de producto que no existen.
+    if faltantes: # Si falta algún producto.
+        print(f"❌ Productos no encontrados: {', '.join(faltantes)}") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+
+    reservas = [ # Lista de operaciones para reservar el stock de todas las líneas.
+        UpdateOne({"codigo_producto": codigo, "stock": {"$gte": cantidad}}, {"$inc": {"stock": -cantidad}}) # Decrementa el stock solo si alcanza.
+        for codigo, cantidad in cantidades.items() # Una operación por producto.
+    ]
+
+    async def registrar(sesion): # Define la función que reserva el stock e inserta el pedido dentro de la transacción.
+        resultado = await _coleccion("productos").bulk_write(reservas, ordered=False, session=sesion) # Reserva el stock de todas las líneas en un solo lote.
+        if resultado.modified_count < len(reservas): # Si algún producto no tenía stock suficiente.
+            raise StockInsuficiente(codigo_pedido) # Aborta la transacción (el stock vuelve a como estaba).
+        cursor = _coleccion("productos").find({"codigo_producto": {"$in": list(cantidades)}}, CAMPOS_PRODUCTO, session=sesion) # Lee los productos reservados dentro de la transacción (precio vigente).
+        documentos = {documento["codigo_producto"]: documento async for documento in cursor} # Producto por código.
+        pedido = construir_pedido(codigo_pedido, codigo_cliente, lineas_pedido(cantidades, documentos)) # Crea el documento del nuevo pedido.
+        await _coleccion("pedidos").insert_one(pedido, session=sesion) # Inserta el pedido en la colección 'pedidos'.
+        await _actualizar_resumenes([pedido], sesion=sesion) # Suma el pedido a los resúmenes diarios (en la misma transacción).
+        return pedido # Devuelve el pedido insertado.
+
+    try: # Intenta registrar el pedido.
+        if await soporta_transacciones_async(): # Si el servidor admite transacciones.
+            pedido = await ejecutar_en_transaccion_async(registrar) # Reserva e inserta en una sola transacción.
+        else: # Si el servidor no admite transacciones.
+            documentos = await _reservar_lineas_una_a_una(cantidades) # Reserva el stock producto a producto (deshaciendo si falla).
+            pedido = construir_pedido(codigo_pedido, codigo_cliente, lineas_pedido(cantidades, documentos)) # Crea el documento del nuevo pedido.
+            try: # Intenta insertar el pedido.
+                await _coleccion("pedidos").insert_one(pedido) # Inserta el pedido en la colección 'pedidos'.
+            except PyMongoError: # Si la inserción falla.
+                await _restaurar_stock(cantidades) # Devuelve el stock reservado en un solo lote.
+                raise # Vuelve a lanzar el error para informarlo abajo.
+            await _actualizar_resumenes([pedido]) # Suma el pedido a los resúmenes diarios.
+        cache_productos.invalidar(*cantidades) # Descarta el stock guardado en la caché de los productos reservados.
+    except StockInsuficiente: # Si alguna línea no tenía stock.
+        print("❌ Stock insuficiente.") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    except PyMongoError as error: # Si la inserción falla (por ejemplo, código de pedido duplicado).
+        print(f"❌ No se pudo insertar el pedido {codigo_pedido}: {error}") # Imprime un mensaje de error.
+        return False # Sale de la función (la operación no se realizó).
+    print(f"✅ Pedido {codigo_pedido} insertado con {len(pedido['productos'])} productos. Total: ${pedido['total_compra']:.2f}") # Imprime un mensaje de éxito.
+    return True # Devuelve que el pedido se insertó.
+
+async def eliminar_producto(codigo_producto): # Define la función para eliminar un producto.
+    """
+    Elimina un producto de la base de datos.
+    """
+    resultado = await _coleccion("productos").delete_one({"codigo_producto": codigo_producto}) # Elimina un único producto que coincida con el código.
+    cache_productos.invalidar(codigo_producto) # Descarta el producto de la caché.
+    if resultado.deleted_count > 0: # Si se eliminó al menos un documento.
+        print(f"✅ Producto {codigo_producto} eliminado.") # Imprime un mensaje de éxito.
+        return True # Devuelve que el producto se eliminó.
+    else: # Si no se eliminó ningún documento.
+        print(f"❌ Producto {codigo_producto} no encontrado.") # Imprime un mensaje de no encontrado.
+        return False # Devuelve que la operación no se realizó.
+
+async def eliminar_cliente(codigo_cliente): # Define la función para eliminar un cliente.
+    """
+    Elimina un cliente y todos sus pedidos asociados, restaurando el stock de productos.
+    Muestra el código y el nombre del cliente eliminado.
+    """
+    cliente = await buscar_cliente(codigo_cliente, CAMPOS_NOMBRE_CLIENTE) # Busca el cliente por su código (solo nombre y apellidos).
+
+    if not cliente: # Si el cliente no se encuentra.
+        print(f"❌ Cliente {codigo_cliente} no encontrado.") # Imprime un mensaje de no encontrado.
+        return False # Sale de la función (la operación no se realizó).
+
+    nombre = nombre_completo(cliente) # Construye el nombre completo del cliente.
+
+    async def eliminar(sesion): # Define la función que elimina pedidos y cliente dentro de la transacción.
+        # Restaurar stock de productos de todos los pedidos del cliente (recientes y archivados)
+        cantidades = Counter() # Cantidad total por producto.
+        vistos = set() # _id de los pedidos ya contados (un pedido a medio archivar está en las dos colecciones).
+        for coleccion in (_coleccion("pedidos"), _coleccion("pedidos_archivo")): # Recorre los pedidos recientes y los archivados.
+            async for bloque in en_bloques(coleccion.find({"codigo_cliente": codigo_cliente}, CAMPOS_RESUMEN, session=sesion), TAMANO_LOTE): # Recorre los pedidos del cliente por bloques.
+                bloque = [pedido for pedido in bloque if pedido["_id"] not in vistos] # Descarta las copias de pedidos ya contados.
+                vistos.update(pedido["_id"] for pedido in bloque) # Registra los pedidos del bloque.
+                cantidades.update(sumar_cantidades(bloque)) # Suma las cantidades del bloque a las acumuladas.
+                await _actualizar_resumenes(bloque, -1, sesion) # Descuenta los pedidos del bloque de los resúmenes diarios.
+            await coleccion.delete_many({"codigo_cliente": codigo_cliente}, session=sesion) # Elimina todos los pedidos asociados al cliente.
+        await _restaurar_stock(cantidades, sesion) # Devuelve el stock en un solo lote.
+        resultado_cliente = await _coleccion("clientes").delete_one(filtro_cliente(codigo_cliente), session=sesion) # Elimina el cliente.
+        return len(vistos), resultado_cliente # Devuelve los pedidos eliminados y el resultado de la eliminación del cliente.
+
+    eliminados, resultado_cliente = await ejecutar_en_transaccion_async(eliminar) # Ejecuta la eliminación (en una transacción si el servidor lo admite).
+
+    if resultado_cliente.deleted_count > 0: # Si se eliminó al menos un cliente.
+        print(f"✅ Cliente eliminado: {codigo_cliente} - {nombre}") # Imprime un mensaje de éxito con el código y nombre del cliente.
+        print(f"🗑️ Pedidos eliminados: {eliminados}") # Imprime la cantidad de pedidos eliminados.
+        return True # Devuelve que el cliente se eliminó.
+    else: # Si no se eliminó ningún cliente (aunque ya se verificó antes).
+        print(f"❌ Cliente {codigo_cliente} no encontrado.") # Imprime un mensaje de no encontrado.
+        return False # Devuelve que la operación no se realizó.
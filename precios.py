@@ -0,0 +1,232 @@
+"""
+Módulo de cambios de precio masivos para ComercioTech
+Cambia el precio de muchos productos de una vez, a partir de una lista de
+(codigo_producto, precio) o de una regla porcentual (por ejemplo, +5% a los
+productos activos). Los cambios se aplican por bloques: cada bloque lee los
+precios actuales, los actualiza con un solo bulk_write y guarda el precio
+anterior y el nuevo en 'historial_precios', todo en la misma transacción.
+Con simular=True solo calcula y reporta el impacto, sin escribir nada
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+import math # Importa math para rechazar los precios infinitos o NaN.
+from datetime import datetime # Importa la clase datetime para fechar los cambios.
+from bson import ObjectId # Importa ObjectId para identificar cada ejecución en el historial.
+from pymongo import UpdateOne # Importa UpdateOne para escrituras en lote.
+from conexion_db import db, productos, ejecutar_en_transaccion # Importa la base de datos, la colección de productos y las transacciones.
+from consultas import en_bloques # Importa el recorrido por bloques.
+from cache_productos import cache as cache_productos # Importa la caché de productos (para invalidarla al escribir).
+
+HISTORIAL_PRECIOS = "historial_precios" # Colección con los cambios de precio: {codigo_producto, precio_anterior, precio_nuevo, fecha, lote, origen}.
+TAMANO_LOTE = 500 # Productos por bloque (una transacción por bloque).
+EJEMPLOS = 10 # Cambios de muestra que se incluyen en el reporte.
+CAMPOS_PRECIO = {"_id": 0, "codigo_producto": 1, "precio": 1, "stock": 1} # Campos que se leen de cada producto.
+
+def documento_historial(codigo_producto, precio_anterior, precio_nuevo, lote, origen, fecha=None): # Define la función que arma una entrada del historial.
+    """
+    Construye el documento de un cambio de precio. Lo comparten los cambios masivos
+    y los de un solo producto (síncronos y asíncronos).
+
+    Parámetros:
+    codigo_producto (str): Código del producto
+    precio_anterior (float): Precio antes del cambio
+    precio_nuevo (float): Precio después del cambio
+    lote (ObjectId): Identificador de la ejecución que hizo el cambio
+    origen (str): Descripción del cambio (por ejemplo, "+5% estado=activo")
+    fecha (datetime): Fecha del cambio (por defecto, la fecha y hora actual)
+
+    Retorna:
+    dict: Documento listo para insertar en 'historial_precios'
+    """
+    return { # Devuelve el documento.
+        "codigo_producto": codigo_producto, # Producto modificado.
+        "precio_anterior": precio_anterior, # Precio antes del cambio.
+        "precio_nuevo": precio_nuevo, # Precio después del cambio.
+        "fecha": fecha or datetime.now(), # Fecha del cambio.
+        "lote": lote, # Ejecución que hizo el cambio.
+        "origen": origen # Descripción del cambio.
+    }
+
+def cambio_precio(codigo_producto, precio_anterior, precio_nuevo, lote, origen, fecha=None): # Define la función que valida un cambio de precio.
+    """
+    Valida el precio nuevo de un producto existente y arma la entrada del historial.
+    Es la regla común de los cambios masivos y de los de un solo producto (síncronos y
+    asíncronos): el precio nuevo se redondea al centavo y debe ser un número finito
+    y positivo (NaN e infinito se rechazan: un total infinito no se puede exportar a JSON).
+
+    Parámetros:
+    codigo_producto (str): Código del producto
+    precio_anterior (float): Precio actual del producto
+    precio_nuevo: Precio nuevo (número o texto)
+    lote (ObjectId): Identificador de la ejecución que hace el cambio
+    origen (str): Descripción del cambio
+    fecha (datetime): Fecha del cambio (por defecto, la fecha y hora actual)
+
+    Retorna:
+    dict: Documento del historial (con 'precio_nuevo' ya redondeado), o None si el precio nuevo se rechaza
+    """
+    nuevo = _a_precio(precio_nuevo) # Precio nuevo redondeado al centavo (None si no es un número).
+    if nuevo is None or not math.isfinite(nuevo) or nuevo <= 0: # Si no es un número finito y positivo (NaN <= 0 es False).
+        return None # Se rechaza.
+    return documento_historial(codigo_producto, precio_anterior, nuevo, lote, origen, fecha) # Devuelve la entrada del historial.
+
+def texto_regla(porcentaje, filtro=None): # Define la función que describe una regla porcentual.
+    """Describe una regla porcentual, por ejemplo "+5% estado=activo"."""
+    condiciones = " ".join(f"{campo}={valor}" for campo, valor in (filtro or {}).items()) # Condiciones del filtro.
+    return f"{porcentaje:+g}% {condiciones}".strip() # Devuelve el texto.
+
+def _aplicar_bloque(codigos, nuevo_precio, filtro, simular, lote, origen, estadisticas): # Define la función que cambia los precios de un bloque.
+    """
+    Lee los precios actuales de un bloque de productos, calcula los nuevos y, si no se
+    está simulando, los guarda junto con el historial en una sola transacción (si el
+    servidor lo admite). Las lecturas van dentro de la transacción: si otro proceso cambia
+    un precio a la vez, el servidor aborta el bloque y with_transaction lo repite.
+    """
+    def cambiar(sesion): # Define la función que se ejecuta dentro de la transacción.
+        actuales = list(productos.find(dict(filtro, codigo_producto={"$in": codigos}), CAMPOS_PRECIO, session=sesion)) # Lee los precios actuales del bloque.
+        cambios = [] # Cambios del bloque: (producto, entrada del historial).
+        rechazados = [] # Productos con un precio nuevo inválido.
+        fecha = datetime.now() # Misma fecha para todo el bloque.
+        for producto in actuales: # Itera sobre cada producto del bloque.
+            anterior = producto.get("precio") # Precio actual.
+            cambio = cambio_precio(producto["codigo_producto"], anterior, nuevo_precio(producto["codigo_producto"], anterior), lote, origen, fecha) # Calcula y valida el precio nuevo.
+            if cambio is None: # Si no se pudo calcular o no es positivo.
+                rechazados.append(producto["codigo_producto"]) # Lo rechaza.
+            elif cambio["precio_nuevo"] != anterior: # Si el precio cambia.
+                cambios.append((producto, cambio)) # Guarda el cambio.
+        if cambios and not simular: # Si hay cambios que guardar.
+            productos.bulk_write( # Actualiza los precios del bloque en una sola llamada.
+                [UpdateOne({"codigo_producto": producto["codigo_producto"]}, {"$set": {"precio": cambio["precio_nuevo"]}}) for producto, cambio in cambios], # Una operación por producto.
+                ordered=False, # Lote desordenado: el servidor puede aplicarlas en paralelo.
+                session=sesion # Usa la sesión de la transacción si existe.
+            )
+            db[HISTORIAL_PRECIOS].insert_many( # Guarda el historial del bloque en una sola llamada.
+                [cambio for _, cambio in cambios], # Un documento por cambio.
+                ordered=False, # Inserción desordenada.
+                session=sesion # Usa la sesión de la transacción si existe.
+            )
+        return actuales, cambios, rechazados # Devuelve lo leído y lo calculado.
+
+    actuales, cambios, rechazados = cambiar(None) if simular else ejecutar_en_transaccion(cambiar) # Simula sin sesión o aplica el bloque.
+    if cambios and not simular: # Si se guardaron cambios.
+        cache_productos.invalidar(*(producto["codigo_producto"] for producto, _ in cambios)) # Descarta los precios anteriores guardados en la caché.
+
+    estadisticas["revisados"] += len(actuales) # Cuenta los productos revisados.
+    estadisticas["cambiados"] += len(cambios) # Cuenta los productos con precio nuevo.
+    estadisticas["sin_cambio"] += len(actuales) - len(cambios) - len(rechazados) # Cuenta los que quedan igual.
+    estadisticas["rechazados"].extend(rechazados) # Guarda los rechazados.
+    for producto, cambio in cambios: # Itera sobre cada cambio.
+        anterior, nuevo = cambio["precio_anterior"], cambio["precio_nuevo"] # Precios antes y después.
+        estadisticas["variacion_inventario"] = round(estadisticas["variacion_inventario"] + (nuevo - (anterior or 0)) * (producto.get("stock") or 0), 2) # Cambio en el valor del stock (al centavo).
+        if len(estadisticas["ejemplos"]) < EJEMPLOS: # Si aún faltan ejemplos.
+            estadisticas["ejemplos"].append({"codigo_producto": producto["codigo_producto"], "precio_anterior": anterior, "precio_nuevo": nuevo}) # Guarda el ejemplo.
+    return {producto["codigo_producto"] for producto in actuales} # Devuelve los códigos encontrados.
+
+def _estadisticas(lote, origen, simular): # Define la función que arma los contadores de un cambio masivo.
+    """Devuelve los contadores vacíos de un cambio masivo."""
+    return { # Devuelve los contadores.
+        "lote": lote, "origen": origen, "simulado": simular, # Identificación de la ejecución.
+        "revisados": 0, "cambiados": 0, "sin_cambio": 0, # Productos revisados, cambiados y sin cambio.
+        "no_encontrados": [], "rechazados": [], # Códigos que no existen y precios nuevos inválidos.
+        "variacion_inventario": 0.0, # Cambio en el valor del stock (precio nuevo menos anterior, por unidades).
+        "ejemplos": [] # Algunos cambios de muestra.
+    }
+
+def _a_precio(valor): # Define la función que interpreta un precio.
+    """Convierte un precio (número o texto) en float redondeado al centavo, o None si no es un número (True/False no cuentan)."""
+    if isinstance(valor, bool): # float(True) sería 1.0.
+        return None # Se rechazará.
+    try: # Intenta la conversión.
+        return round(float(valor), 2) # Redondea al centavo.
+    except (TypeError, ValueError, OverflowError): # Si no es un número (o es un entero demasiado grande).
+        return None # Se rechazará.
+
+def actualizar_precios(precios_nuevos, simular=False, tamano_lote=TAMANO_LOTE, origen="lista"): # Define la función que aplica una lista de precios.
+    """
+    Cambia el precio de una lista de productos.
+
+    Parámetros:
+    precios_nuevos (iterable): Pares (codigo_producto, precio nuevo); si un código se repite, vale el último
+    simular (bool): Si es True, solo calcula el impacto sin escribir nada
+    tamano_lote (int): Productos por bloque (una transacción por bloque)
+    origen (str): Descripción del cambio que se guarda en el historial
+
+    Retorna:
+    dict: Contadores del cambio (revisados, cambiados, sin_cambio, no_encontrados, rechazados, variacion_inventario, ejemplos)
+    """
+    lote = ObjectId() # Identificador de esta ejecución.
+    estadisticas = _estadisticas(lote, origen, simular) # Contadores del cambio.
+    nuevos = dict(precios_nuevos) # Precio nuevo por código, una vez cada uno aunque se repita en bloques distintos (cambio_precio lo valida y redondea).
+    for bloque in en_bloques(nuevos, tamano_lote): # Procesa los códigos por bloques.
+        encontrados = _aplicar_bloque(bloque, lambda codigo, _: nuevos[codigo], {}, simular, lote, origen, estadisticas) # Cambia los precios del bloque.
+        estadisticas["no_encontrados"].extend(codigo for codigo in bloque if codigo not in encontrados) # Guarda los códigos que no existen.
+    return estadisticas # Devuelve los contadores.
+
+def aplicar_porcentaje(porcentaje, filtro=None, simular=False, tamano_lote=TAMANO_LOTE): # Define la función que aplica una regla porcentual.
+    """
+    Sube (o baja, con un porcentaje negativo) el precio de los productos que cumplen el filtro.
+    El precio nuevo se redondea al centavo.
+
+    Parámetros:
+    porcentaje (float): Porcentaje del cambio (5 sube un 5%, -10 baja un 10%)
+    filtro (dict): Filtro de productos (por ejemplo {"estado": "activo"}; por defecto, todos)
+    simular (bool): Si es True, solo calcula el impacto sin escribir nada
+    tamano_lote (int): Productos por bloque (una transacción por bloque)
+
+    Retorna:
+    dict: Contadores del cambio, como actualizar_precios
+    """
+    filtro = filtro or {} # Sin filtro, todos los productos.
+    factor = 1 + porcentaje / 100 # Factor que se aplica al precio.
+    lote = ObjectId() # Identificador de esta ejecución.
+    estadisticas = _estadisticas(lote, texto_regla(porcentaje, filtro), simular) # Contadores del cambio.
+    cursor = productos.find(filtro, {"_id": 0, "codigo_producto": 1}, sort=[("_id", 1)], batch_size=tamano_lote) # Códigos de los productos que cumplen el filtro.
+    for bloque in en_bloques(cursor, tamano_lote): # Procesa los productos por bloques.
+        _aplicar_bloque( # Cambia los precios del bloque (vuelve a comprobar el filtro dentro de la transacción).
+            [producto["codigo_producto"] for producto in bloque], # Códigos del bloque.
+            lambda _, precio: precio * factor if isinstance(precio, (int, float)) else None, # Precio nuevo (cambio_precio lo redondea; los productos sin precio se rechazan).
+            filtro, simular, lote, estadisticas["origen"], estadisticas # Filtro, modo y contadores.
+        )
+    return estadisticas # Devuelve los contadores.
+
+def historial_producto(codigo_producto, limite=20): # Define la consulta del historial de un producto.
+    """
+    Devuelve los últimos cambios de precio de un producto, del más nuevo al más antiguo.
+    El índice codigo_producto/fecha de 'historial_precios' sirve el filtro y el orden.
+    """
+    return list(db[HISTORIAL_PRECIOS].find({"codigo_producto": codigo_producto}, {"_id": 0}, sort=[("fecha", -1)], limit=limite)) # Lee los cambios.
+
+def mostrar_cambio_masivo(estadisticas): # Define la función que imprime el resultado de un cambio masivo.
+    """Imprime el resultado (o la simulación) de un cambio masivo de precios."""
+    titulo = "🔍 Simulación de cambio de precios" if estadisticas["simulado"] else "✅ Cambio de precios aplicado" # Título según el modo.
+    print(f"\n{titulo} ({estadisticas['origen']}):") # Imprime el título.
+    print(f"  Revisados: {estadisticas['revisados']}") # Imprime los productos revisados.
+    print(f"  {'Cambiarían' if estadisticas['simulado'] else 'Cambiados'}: {estadisticas['cambiados']}") # Imprime los productos con precio nuevo.
+    print(f"  Sin cambio: {estadisticas['sin_cambio']}") # Imprime los productos que quedan igual.
+    print(f"  Variación del valor del stock: ${estadisticas['variacion_inventario']:,.2f}") # Imprime el impacto en el inventario.
+    for ejemplo in estadisticas["ejemplos"]: # Itera sobre los cambios de muestra.
+        print(f"   - {ejemplo['codigo_producto']}: ${ejemplo['precio_anterior'] or 0:.2f} → ${ejemplo['precio_nuevo']:.2f}") # Imprime el cambio.
+    if estadisticas["no_encontrados"]: # Si hay códigos que no existen.
+        print(f"  ❌ No encontrados: {', '.join(estadisticas['no_encontrados'])}") # Imprime los códigos.
+    if estadisticas["rechazados"]: # Si hay precios nuevos inválidos.
+        print(f"  ⚠️ Rechazados (precio no positivo o sin precio): {', '.join(estadisticas['rechazados'])}") # Imprime los códigos.
+
+# Ejecución directa: python precios.py (--archivo precios.csv | --porcentaje 5 [--estado activo]) [--simular]
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    from carga_masiva import leer_filas # Importa la lectura de archivos CSV/JSONL (aquí para no crear una importación circular).
+    parser = argparse.ArgumentParser(description="Cambia precios de productos en lote, guardando el historial") # Crea el lector de argumentos.
+    origen = parser.add_mutually_exclusive_group(required=True) # Lista de precios o regla porcentual.
+    origen.add_argument("--archivo", help="Archivo CSV o JSONL con columnas codigo_producto y precio") # Lista de precios.
+    origen.add_argument("--porcentaje", type=float, help="Porcentaje del cambio (por ejemplo 5 o -10)") # Regla porcentual.
+    parser.add_argument("--estado", help="Con --porcentaje, solo los productos con este estado") # Filtro de la regla.
+    parser.add_argument("--simular", action="store_true", help="Solo muestra el impacto, sin escribir nada") # Modo de simulación.
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Productos por bloque") # Tamaño del bloque.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    if argumentos.archivo: # Si se indicó una lista de precios.
+        filas = ((fila.get("codigo_producto"), str(fila.get("precio")).replace(",", ".")) for fila in leer_filas(argumentos.archivo)) # Pares (código, precio) del archivo.
+        resultado = actualizar_precios(filas, argumentos.simular, argumentos.lote, origen=f"lista {argumentos.archivo}") # Aplica la lista.
+    else: # Si se indicó una regla porcentual.
+        filtro = {"estado": argumentos.estado} if argumentos.estado else {} # Filtro de la regla.
+        resultado = aplicar_porcentaje(argumentos.porcentaje, filtro, argumentos.simular, argumentos.lote) # Aplica la regla.
+    mostrar_cambio_masivo(resultado) # Imprime el resultado.
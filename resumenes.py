@@ -0,0 +1,341 @@
+"""
+Módulo de resúmenes de ventas para ComercioTech
+Mantiene dos colecciones materializadas con los totales de cada día:
+- ventas_diarias_producto: {dia, codigo_producto, lineas, unidades, ingresos}
+- ventas_diarias_cliente: {dia, codigo_cliente, pedidos, ingresos}
+y, en cada documento de 'clientes', el resumen de sus pedidos:
+- resumen_pedidos: {cantidad, total, ultimo_pedido, recientes: [{codigo_pedido, fecha_pedido}]}
+  (ultimo_pedido no existe mientras el cliente no tenga pedidos)
+  Las escrituras solo actualizan los clientes que ya tienen resumen: uno parcial se
+  tomaría por completo. Los clientes sin resumen (creados antes de que existiera)
+  lo reciben con completar_resumenes() y, mientras tanto, se consultan en 'pedidos'.
+Se actualizan con $inc (upsert) al insertar y eliminar pedidos, así los tableros
+leen unas pocas filas por día en lugar de recorrer todos los pedidos, y la ficha
+de un cliente se lee con una sola consulta por su código. Las filas diarias que
+quedan sin pedidos al eliminar se borran (los reportes no muestran filas en cero).
+Si quedan desalineados (por ejemplo, tras cambios hechos fuera de este código),
+reconstruir() vuelve a calcular los diarios desde 'pedidos' y verificar_clientes()
+revisa (y repara) los resúmenes de los clientes. Ambos cuentan también los pedidos
+archivados en 'pedidos_archivo' (archivado.py): archivar no cambia ningún resumen
+"""
+
+import argparse # Importa el módulo argparse para leer los argumentos de la línea de comandos.
+from datetime import datetime # Importa la clase datetime para truncar las fechas al día.
+from itertools import islice # Importa islice para recorrer los clientes por bloques.
+from pymongo import DeleteOne, UpdateOne # Importa DeleteOne y UpdateOne para escrituras en lote.
+from conexion_db import db, clientes, pedidos, pedidos_archivo # Importa la base de datos y las colecciones de clientes y pedidos.
+
+RESUMEN_PRODUCTO = "ventas_diarias_producto" # Colección con los totales por día y producto.
+RESUMEN_CLIENTE = "ventas_diarias_cliente" # Colección con los totales por día y cliente.
+RECIENTES = 5 # Cantidad de pedidos recientes que guarda el resumen de cada cliente.
+TAMANO_LOTE = 500 # Clientes por bloque al verificar los resúmenes de clientes.
+
+# Campos de un pedido que necesitan los resúmenes y la restauración de stock
+CAMPOS_RESUMEN = { # Proyección para leer un pedido antes de eliminarlo (resúmenes y stock).
+    "_id": 1, "codigo_pedido": 1, "codigo_cliente": 1, "fecha_pedido": 1, "total_compra": 1, # Cabecera del pedido.
+    "productos.codigo_producto": 1, "productos.cantidad": 1, "productos.total_comprado": 1 # Líneas del pedido.
+}
+
+def _dia(fecha): # Define la función que trunca una fecha al día.
+    """Devuelve la fecha a las 00:00:00 del mismo día."""
+    return datetime(fecha.year, fecha.month, fecha.day) # Quita la hora.
+
+def resumen_vacio(): # Define la función que arma el resumen de un cliente sin pedidos.
+    """Devuelve el resumen de pedidos de un cliente nuevo (sin 'ultimo_pedido' hasta su primer pedido)."""
+    return {"cantidad": 0, "total": 0.0, "recientes": []} # Sin pedidos.
+
+def filtro_con_resumen(codigo_cliente): # Define el filtro de los clientes cuyo resumen se mantiene al escribir.
+    """
+    Filtro de un cliente que ya tiene resumen de pedidos. Las actualizaciones incrementales
+    ($inc, $push) solo deben aplicarse a esos clientes: sobre uno sin resumen armarían un
+    resumen parcial (solo con los pedidos nuevos) que las consultas tomarían por completo.
+    """
+    return {"codigo": codigo_cliente, "resumen_pedidos": {"$exists": True}} # Cliente con resumen.
+
+def consulta_recientes(codigo_cliente): # Define la consulta de los pedidos más recientes de un cliente.
+    """
+    Argumentos de find() para los RECIENTES pedidos más nuevos de un cliente.
+    El índice codigo_cliente/fecha_pedido/_id la sirve recorrido al revés (sin ordenar en memoria).
+    La comparten las operaciones síncronas y las asíncronas.
+    """
+    return { # Devuelve los argumentos de la consulta.
+        "filter": {"codigo_cliente": codigo_cliente}, # Pedidos del cliente.
+        "projection": {"_id": 0, "codigo_pedido": 1, "fecha_pedido": 1}, # Solo el código y la fecha.
+        "sort": [("fecha_pedido", -1), ("_id", -1)], # Del más nuevo al más antiguo.
+        "limit": RECIENTES # Solo los más recientes.
+    }
+
+def actualizacion_recientes(recientes): # Define la actualización que reemplaza los pedidos recientes de un cliente.
+    """Actualización que guarda los pedidos recientes (del más nuevo al más antiguo) y la fecha del último."""
+    if not recientes: # Si el cliente se quedó sin pedidos.
+        return {"$set": {"resumen_pedidos.recientes": []}, "$unset": {"resumen_pedidos.ultimo_pedido": ""}} # Vacía los recientes y quita la fecha.
+    return {"$set": { # Reemplaza los campos.
+        "resumen_pedidos.recientes": recientes, # Pedidos recientes.
+        "resumen_pedidos.ultimo_pedido": recientes[0]["fecha_pedido"] # Fecha del último pedido.
+    }}
+
+def unir_recientes(recientes, archivados): # Define la función que completa los pedidos recientes con los archivados.
+    """Junta los pedidos recientes y los archivados y se queda con los RECIENTES más nuevos."""
+    unidos = sorted(recientes + archivados, key=lambda pedido: (pedido.get("fecha_pedido") is not None, pedido.get("fecha_pedido")), reverse=True) # Del más nuevo al más antiguo.
+    return unidos[:RECIENTES] # Solo los más recientes.
+
+def rellenar_recientes(codigo_cliente, sesion=None): # Define la función que recalcula los pedidos recientes de un cliente.
+    """
+    Vuelve a leer los pedidos recientes de un cliente (una consulta de RECIENTES documentos)
+    y los guarda en su resumen. Se usa al eliminar un pedido, porque quitarlo de la lista
+    puede dejarla incompleta y cambiar la fecha del último pedido. Solo si 'pedidos' no
+    alcanza a completar la lista se consulta también 'pedidos_archivo'.
+
+    Parámetros:
+    codigo_cliente (str): Código del cliente
+    sesion (ClientSession): Sesión de la transacción en curso (opcional)
+    """
+    recientes = list(pedidos.find(session=sesion, **consulta_recientes(codigo_cliente))) # Lee los pedidos recientes.
+    if len(recientes) < RECIENTES: # Si faltan pedidos para completar la lista (los demás pueden estar archivados).
+        recientes = unir_recientes(recientes, list(pedidos_archivo.find(session=sesion, **consulta_recientes(codigo_cliente)))) # Completa con los archivados.
+    clientes.update_one(filtro_con_resumen(codigo_cliente), actualizacion_recientes(recientes), session=sesion) # Los guarda en el resumen del cliente (si lo tiene).
+
+def operaciones_resumen(pedidos_iterables, signo=1): # Define la función que arma las actualizaciones de los resúmenes.
+    """
+    Acumula los totales de varios pedidos y arma una actualización por fila de resumen.
+    Al eliminar (signo -1), después de las actualizaciones agrega un borrado por fila
+    diaria que solo se aplica si quedó sin pedidos: hay que ejecutarlas en orden.
+    La comparten las operaciones síncronas y las asíncronas.
+
+    Parámetros:
+    pedidos_iterables (iterable): Documentos de pedido con los campos de CAMPOS_RESUMEN
+    signo (int): 1 al insertar los pedidos, -1 al eliminarlos
+
+    Retorna:
+    dict: Lista de UpdateOne por nombre de colección de resumen (y 'clientes')
+    """
+    por_producto = {} # Totales por (día, producto): [líneas, unidades, ingresos].
+    por_cliente = {} # Totales por (día, cliente): [pedidos, ingresos].
+    por_ficha = {} # Resumen de cada cliente: [pedidos, total, pedidos (código y fecha)].
+    for pedido in pedidos_iterables: # Itera sobre cada pedido.
+        ficha = por_ficha.setdefault(pedido.get("codigo_cliente"), [0, 0, []]) # Resumen del cliente.
+        ficha[0] += 1 # Cuenta el pedido.
+        ficha[1] += pedido.get("total_compra", 0) # Suma el total del pedido.
+        ficha[2].append({"codigo_pedido": pedido.get("codigo_pedido"), "fecha_pedido": pedido.get("fecha_pedido")}) # Guarda el código y la fecha.
+        if not pedido.get("fecha_pedido"): # Si el pedido no tiene fecha no se puede asignar a un día.
+            continue # Lo omite.
+        dia = _dia(pedido["fecha_pedido"]) # Día del pedido.
+        totales = por_cliente.setdefault((dia, pedido.get("codigo_cliente")), [0, 0]) # Totales del cliente en ese día.
+        totales[0] += 1 # Cuenta el pedido.
+        totales[1] += pedido.get("total_compra", 0) # Suma el total del pedido.
+        for linea in pedido.get("productos", []): # Itera sobre cada línea del pedido.
+            totales = por_producto.setdefault((dia, linea.get("codigo_producto")), [0, 0, 0]) # Totales del producto en ese día.
+            totales[0] += 1 # Cuenta la línea.
+            totales[1] += linea.get("cantidad", 0) # Suma las unidades.
+            totales[2] += linea.get("total_comprado", 0) # Suma el total de la línea.
+    vacias = signo < 0 # Al eliminar, borra las filas que quedan sin pedidos.
+    return { # Devuelve una actualización con upsert por cada fila de resumen.
+        RESUMEN_PRODUCTO: [ # Actualizaciones por día y producto.
+            UpdateOne({"dia": dia, "codigo_producto": codigo}, {"$inc": {"lineas": signo * lineas, "unidades": signo * unidades, "ingresos": signo * ingresos}}, upsert=True) # Suma (o resta) los totales.
+            for (dia, codigo), (lineas, unidades, ingresos) in por_producto.items() # Una por fila.
+        ] + [ # Borrados de las filas que quedan sin líneas.
+            DeleteOne({"dia": dia, "codigo_producto": codigo, "lineas": {"$lte": 0}}) # Solo si ya no tiene líneas.
+            for dia, codigo in por_producto if vacias # Una por fila (solo al eliminar).
+        ],
+        RESUMEN_CLIENTE: [ # Actualizaciones por día y cliente.
+            UpdateOne({"dia": dia, "codigo_cliente": codigo}, {"$inc": {"pedidos": signo * cantidad, "ingresos": signo * ingresos}}, upsert=True) # Suma (o resta) los totales.
+            for (dia, codigo), (cantidad, ingresos) in por_cliente.items() # Una por fila.
+        ] + [ # Borrados de las filas que quedan sin pedidos.
+            DeleteOne({"dia": dia, "codigo_cliente": codigo, "pedidos": {"$lte": 0}}) # Solo si ya no tiene pedidos.
+            for dia, codigo in por_cliente if vacias # Una por fila (solo al eliminar).
+        ],
+        "clientes": [ # Actualizaciones del resumen de cada cliente (sin upsert: solo clientes existentes con resumen).
+            UpdateOne(filtro_con_resumen(codigo), _actualizacion_ficha(signo, cantidad, total, lista)) # Suma (o resta) los pedidos del cliente.
+            for codigo, (cantidad, total, lista) in por_ficha.items() if codigo # Una por cliente.
+        ]
+    }
+
+def _actualizacion_ficha(signo, cantidad, total, lista): # Define la actualización del resumen de un cliente.
+    """
+    Al insertar: suma cantidad y total, guarda la fecha más nueva y agrega los pedidos a
+    los recientes (ordenados por fecha y recortados a RECIENTES). Al eliminar: resta y quita
+    los pedidos de los recientes (rellenar_recientes completa la lista después).
+    """
+    contadores = {"$inc": {"resumen_pedidos.cantidad": signo * cantidad, "resumen_pedidos.total": signo * total}} # Cantidad y total.
+    if signo < 0: # Si se eliminan pedidos.
+        return dict(contadores, **{"$pull": {"resumen_pedidos.recientes": {"codigo_pedido": {"$in": [pedido["codigo_pedido"] for pedido in lista]}}}}) # Los quita de los recientes.
+    fechas = [pedido["fecha_pedido"] for pedido in lista if pedido["fecha_pedido"]] # Fechas de los pedidos.
+    actualizacion = dict(contadores, **{"$push": {"resumen_pedidos.recientes": { # Agrega los pedidos a los recientes.
+        "$each": lista, "$sort": {"fecha_pedido": -1}, "$slice": RECIENTES # Ordenados del más nuevo al más antiguo, solo los más recientes.
+    }}})
+    if fechas: # Si los pedidos tienen fecha.
+        actualizacion["$max"] = {"resumen_pedidos.ultimo_pedido": max(fechas)} # Guarda la fecha más nueva.
+    return actualizacion # Devuelve la actualización.
+
+def actualizar_resumenes(pedidos_iterables, signo=1, sesion=None): # Define la función que aplica los pedidos a los resúmenes.
+    """
+    Suma (signo 1) o resta (signo -1) los pedidos en los resúmenes diarios y en el
+    resumen de cada cliente, con un lote por colección (desordenado al sumar; en orden
+    al restar, para que los borrados de filas vacías vayan después de los $inc).
+
+    Parámetros:
+    pedidos_iterables (iterable): Documentos de pedido con los campos de CAMPOS_RESUMEN
+    signo (int): 1 al insertar los pedidos, -1 al eliminarlos
+    sesion (ClientSession): Sesión de la transacción en curso (opcional)
+    """
+    for nombre, operaciones in operaciones_resumen(pedidos_iterables, signo).items(): # Itera sobre cada colección de resumen.
+        if operaciones: # Solo si hay algo que actualizar (bulk_write no acepta listas vacías).
+            db[nombre].bulk_write(operaciones, ordered=signo < 0, session=sesion) # Aplica todas las actualizaciones en una sola llamada (en orden al restar).
+
+def leer_resumen(nombre, desde=None, hasta=None, **filtros): # Define la función que lee filas de un resumen.
+    """
+    Lee las filas de un resumen diario en el rango [desde, hasta), ordenadas por día.
+
+    Parámetros:
+    nombre (str): RESUMEN_PRODUCTO o RESUMEN_CLIENTE
+    desde (datetime): Primer día (opcional, incluido)
+    hasta (datetime): Último día (opcional, excluido)
+    filtros: Filtros adicionales, por ejemplo codigo_producto="PROD-100"
+
+    Retorna:
+    Cursor: Filas del resumen (sin _id)
+    """
+    rango = {} # Condiciones sobre el día.
+    if desde: # Si se indicó el inicio del rango.
+        rango["$gte"] = _dia(desde) # Desde ese día (incluido).
+    if hasta: # Si se indicó el fin del rango.
+        rango["$lt"] = hasta # Hasta esa fecha (excluida).
+    filtro = dict(filtros, dia=rango) if rango else dict(filtros) # Arma el filtro (el índice dia/código lo sirve).
+    return db[nombre].find(filtro, {"_id": 0}, sort=[("dia", 1)]) # Devuelve las filas ordenadas por día.
+
+def reconstruir(): # Define la función que recalcula los resúmenes desde cero.
+    """
+    Recalcula ambos resúmenes desde 'pedidos' y 'pedidos_archivo' con pipelines de agregación que terminan en $out.
+    La colección se reemplaza al final (los tableros nunca ven un resumen a medias) y
+    conserva sus índices. Los pedidos insertados o eliminados mientras corre pueden quedar
+    fuera: conviene ejecutarlo sin escrituras en curso.
+
+    Retorna:
+    dict: Cantidad de filas de cada resumen
+    """
+    dia = {"$dateTrunc": {"date": "$fecha_pedido", "unit": "day"}} # Expresión que trunca la fecha del pedido al día.
+    filtro = {"$match": {"fecha_pedido": {"$type": "date"}}} # Solo pedidos con fecha.
+    archivo = {"$unionWith": {"coll": "pedidos_archivo", "pipeline": [filtro]}} # Agrega los pedidos archivados con fecha.
+    pedidos.aggregate([ # Recalcula el resumen por día y producto.
+        filtro, archivo, # Filtra los pedidos con fecha (recientes y archivados).
+        {"$unwind": "$productos"}, # Una entrada por línea de pedido.
+        {"$group": { # Agrupa por día y producto.
+            "_id": {"dia": dia, "codigo_producto": "$productos.codigo_producto"}, # Clave del resumen.
+            "lineas": {"$sum": 1}, # Cuenta las líneas.
+            "unidades": {"$sum": "$productos.cantidad"}, # Suma las unidades.
+            "ingresos": {"$sum": "$productos.total_comprado"} # Suma el total de las líneas.
+        }},
+        {"$project": {"_id": 0, "dia": "$_id.dia", "codigo_producto": "$_id.codigo_producto", "lineas": 1, "unidades": 1, "ingresos": 1}}, # Aplana la clave.
+        {"$out": RESUMEN_PRODUCTO} # Reemplaza la colección de resumen.
+    ], allowDiskUse=True)
+    pedidos.aggregate([ # Recalcula el resumen por día y cliente.
+        filtro, archivo, # Filtra los pedidos con fecha (recientes y archivados).
+        {"$group": { # Agrupa por día y cliente.
+            "_id": {"dia": dia, "codigo_cliente": "$codigo_cliente"}, # Clave del resumen.
+            "pedidos": {"$sum": 1}, # Cuenta los pedidos.
+            "ingresos": {"$sum": "$total_compra"} # Suma el total de los pedidos.
+        }},
+        {"$project": {"_id": 0, "dia": "$_id.dia", "codigo_cliente": "$_id.codigo_cliente", "pedidos": 1, "ingresos": 1}}, # Aplana la clave.
+        {"$out": RESUMEN_CLIENTE} # Reemplaza la colección de resumen.
+    ], allowDiskUse=True)
+    return {nombre: db[nombre].estimated_document_count() for nombre in (RESUMEN_PRODUCTO, RESUMEN_CLIENTE)} # Devuelve la cantidad de filas de cada resumen.
+
+def _resumenes_esperados(codigos_clientes): # Define la función que calcula los resúmenes de varios clientes.
+    """Calcula desde 'pedidos' y 'pedidos_archivo' el resumen de cada cliente indicado, en una sola agregación."""
+    esperados = {codigo: resumen_vacio() for codigo in codigos_clientes} # Los clientes sin pedidos quedan vacíos.
+    filtro = {"$match": {"codigo_cliente": {"$in": list(codigos_clientes)}}} # Pedidos de los clientes (lo sirve el índice por cliente).
+    for grupo in pedidos.aggregate([ # Agrupa los pedidos de los clientes del bloque.
+        filtro, {"$unionWith": {"coll": "pedidos_archivo", "pipeline": [filtro]}}, # Pedidos recientes y archivados de los clientes.
+        {"$sort": {"fecha_pedido": -1, "_id": -1}}, # Del más nuevo al más antiguo.
+        {"$group": { # Agrupa por cliente.
+            "_id": "$codigo_cliente", # Clave del resumen.
+            "cantidad": {"$sum": 1}, # Cuenta los pedidos.
+            "total": {"$sum": "$total_compra"}, # Suma el total de los pedidos.
+            "ultimo_pedido": {"$max": "$fecha_pedido"}, # Fecha más nueva.
+            "recientes": {"$push": {"codigo_pedido": "$codigo_pedido", "fecha_pedido": "$fecha_pedido"}} # Pedidos en orden.
+        }},
+        {"$project": {"cantidad": 1, "total": 1, "ultimo_pedido": 1, "recientes": {"$slice": ["$recientes", RECIENTES]}}} # Solo los más recientes.
+    ], allowDiskUse=True):
+        esperados[grupo.pop("_id")] = grupo # Guarda el resumen del cliente.
+    return esperados # Devuelve los resúmenes.
+
+def _coincide(guardado, esperado): # Define la comparación de dos resúmenes de cliente.
+    """Indica si el resumen guardado coincide con el calculado (el total, con tolerancia de redondeo)."""
+    return (
+        bool(guardado) # El cliente tiene resumen.
+        and guardado.get("cantidad") == esperado["cantidad"] # Misma cantidad de pedidos.
+        and abs((guardado.get("total") or 0) - esperado["total"]) < 0.005 # Mismo total (al centavo).
+        and guardado.get("ultimo_pedido") == esperado.get("ultimo_pedido") # Misma fecha del último pedido.
+        and {p.get("codigo_pedido") for p in guardado.get("recientes") or []} == {p["codigo_pedido"] for p in esperado["recientes"]} # Mismos pedidos recientes (los de igual fecha pueden ir en otro orden).
+    )
+
+def completar_resumenes(codigos_clientes=None, tamano_lote=TAMANO_LOTE): # Define la función que agrega el resumen a los clientes que no lo tienen.
+    """
+    Calcula y guarda el resumen de pedidos de los clientes que no lo tienen, por bloques
+    (una agregación por bloque, como verificar_clientes). Desde ese momento las
+    escrituras de pedidos lo mantienen. Un pedido insertado entre el cálculo y la
+    escritura de su cliente quedaría fuera: conviene ejecutarlo sin escrituras de
+    pedidos en curso (verificar_clientes lo detecta y lo repara).
+
+    Parámetros:
+    codigos_clientes (iterable): Códigos de los clientes a completar (por defecto, todos los que no tienen resumen)
+    tamano_lote (int): Clientes por bloque
+
+    Retorna:
+    int: Clientes completados
+    """
+    filtro = {"codigo": {"$type": "string"}, "resumen_pedidos": {"$exists": False}} # Clientes con código y sin resumen.
+    if codigos_clientes is not None: # Si se indicaron los clientes.
+        filtro["codigo"] = {"$in": list(codigos_clientes)} # Solo esos (lo sirve el índice por código).
+    completados = 0 # Clientes completados.
+    cursor = clientes.find(filtro, {"codigo": 1}, sort=[("_id", 1)], batch_size=tamano_lote) # Clientes sin resumen.
+    while bloque := list(islice(cursor, tamano_lote)): # Toma el siguiente bloque mientras queden clientes.
+        esperados = _resumenes_esperados([cliente["codigo"] for cliente in bloque]) # Calcula los resúmenes del bloque.
+        completados += clientes.bulk_write([ # Guarda los resúmenes del bloque en una sola llamada.
+            UpdateOne({"_id": cliente["_id"], "resumen_pedidos": {"$exists": False}}, {"$set": {"resumen_pedidos": esperados[cliente["codigo"]]}}) # Solo si sigue sin resumen.
+            for cliente in bloque # Uno por cliente.
+        ], ordered=False).modified_count # Cuenta los completados.
+    return completados # Devuelve la cantidad de clientes completados.
+
+def verificar_clientes(reparar=False, tamano_lote=TAMANO_LOTE): # Define la función que revisa los resúmenes de los clientes.
+    """
+    Recorre los clientes por bloques (en orden de _id), calcula el resumen de cada bloque
+    con una agregación sobre los pedidos (recientes y archivados) y lo compara con el
+    guardado. La memoria usada depende del tamaño del bloque. Los pedidos insertados o
+    eliminados mientras corre pueden dar diferencias falsas: conviene ejecutarlo sin
+    escrituras en curso.
+
+    Parámetros:
+    reparar (bool): Si es True, reemplaza los resúmenes que no coinciden
+    tamano_lote (int): Clientes por bloque
+
+    Retorna:
+    dict: Clientes revisados, con diferencias y reparados
+    """
+    estadisticas = {"revisados": 0, "diferencias": 0, "reparados": 0} # Contadores de la verificación.
+    cursor = clientes.find({"codigo": {"$type": "string"}}, {"codigo": 1, "resumen_pedidos": 1}, sort=[("_id", 1)], batch_size=tamano_lote) # Clientes con código.
+    while bloque := list(islice(cursor, tamano_lote)): # Toma el siguiente bloque mientras queden clientes.
+        esperados = _resumenes_esperados([cliente["codigo"] for cliente in bloque]) # Calcula los resúmenes del bloque.
+        reparaciones = [ # Actualizaciones de los resúmenes que no coinciden.
+            UpdateOne({"_id": cliente["_id"]}, {"$set": {"resumen_pedidos": esperados[cliente["codigo"]]}}) # Reemplaza el resumen.
+            for cliente in bloque if not _coincide(cliente.get("resumen_pedidos"), esperados[cliente["codigo"]]) # Solo los que no coinciden.
+        ]
+        estadisticas["revisados"] += len(bloque) # Cuenta los clientes revisados.
+        estadisticas["diferencias"] += len(reparaciones) # Cuenta las diferencias.
+        if reparar and reparaciones: # Si se pide reparar y hay diferencias.
+            estadisticas["reparados"] += clientes.bulk_write(reparaciones, ordered=False).modified_count # Repara el bloque en una sola llamada.
+    return estadisticas # Devuelve los contadores.
+
+# Ejecución directa: python resumenes.py [--verificar]
+if __name__ == "__main__": # Bloque que se ejecuta solo si el script se corre directamente.
+    parser = argparse.ArgumentParser(description="Reconstruye los resúmenes de ventas y repara los resúmenes de los clientes") # Crea el lector de argumentos.
+    parser.add_argument("--verificar", action="store_true", help="Solo revisa los resúmenes de los clientes, sin escribir nada") # Modo de solo lectura.
+    argumentos = parser.parse_args() # Lee los argumentos de la línea de comandos.
+
+    if not argumentos.verificar: # Si se pide reconstruir.
+        from indices import asegurar_indices # Importa la función que crea los índices.
+        for nombre, filas in reconstruir().items(): # Reconstruye los resúmenes e itera sobre el resultado.
+            print(f"✅ Resumen {nombre} reconstruido: {filas} filas") # Imprime la cantidad de filas.
+        asegurar_indices() # Crea los índices de los resúmenes si es la primera vez.
+    resultado = verificar_clientes(reparar=not argumentos.verificar) # Revisa (y repara) los resúmenes de los clientes.
+    print(f"{'⚠️' if resultado['diferencias'] else '✅'} Resúmenes de clientes: {resultado['revisados']} revisados, {resultado['diferencias']} con diferencias, {resultado['reparados']} reparados") # Imprime el resultado.
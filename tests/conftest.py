@@ -0,0 +1,38 @@
+"""
+Configuración de las pruebas de ComercioTech
+Cada prueba usa una base de datos nueva en memoria (mongomock) en lugar de un servidor
+MongoDB. El servidor simulado no admite transacciones, así que se prueban los caminos
+que reservan y deshacen el stock operación por operación.
+Ejecutar desde la carpeta del proyecto con: python -m pytest
+"""
+
+import os # Importa el módulo os para armar la ruta del proyecto.
+import sys # Importa el módulo sys para poder importar los módulos del proyecto.
+import pytest # Importa pytest para definir los fixtures.
+
+mongomock = pytest.importorskip("mongomock") # Importa mongomock (si no está instalado, las pruebas se omiten).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Agrega la carpeta del proyecto a la ruta de importación.
+
+import conexion_db # Importa el módulo de conexión para reemplazar el cliente.
+import indices # Importa el módulo de índices para crearlos en la base de prueba.
+from cache_productos import cache as cache_productos # Importa la caché de productos para vaciarla entre pruebas.
+
+@pytest.fixture(autouse=True) # Se aplica a todas las pruebas.
+def base_en_memoria(monkeypatch): # Define el fixture que entrega una base de datos vacía.
+    """Reemplaza el cliente de MongoDB por uno en memoria, con los índices del proyecto."""
+    monkeypatch.setattr(conexion_db, "MongoClient", mongomock.MongoClient) # El cliente compartido será de mongomock.
+    monkeypatch.setattr(conexion_db, "_cliente", None) # Obliga a crear un cliente nuevo (base vacía).
+    monkeypatch.setattr(conexion_db, "_colecciones", {}) # Olvida las colecciones del cliente anterior.
+    monkeypatch.setattr(conexion_db, "_soporta_transacciones", False) # El servidor simulado no admite transacciones.
+    cache_productos.limpiar() # Vacía la caché de productos.
+    indices.asegurar_indices() # Crea los índices (entre ellos los únicos de los códigos).
+    yield conexion_db.obtener_db() # Entrega la base de datos a la prueba.
+    cache_productos.limpiar() # Vacía la caché al terminar.
+
+@pytest.fixture # Se usa solo en las pruebas que lo piden.
+def cliente_y_producto(): # Define el fixture con un cliente y un producto de prueba.
+    """Inserta el cliente C1 y el producto P1 (precio 10, stock 10)."""
+    from conexion_db import clientes, productos # Importa las colecciones.
+    from operaciones import construir_cliente, construir_producto # Importa los constructores de documentos.
+    clientes.insert_one(construir_cliente("C1", "Ana", "Pérez", "ana@correo.cl", "123", {"calle": "Uno", "numero": 1, "ciudad": "Santiago"})) # Cliente de prueba.
+    productos.insert_one(construir_producto("P1", "Teclado", 10.0, 10)) # Producto de prueba.
@@ -0,0 +1,48 @@
+"""
+Pruebas de los reportes de analitica.py que el servidor simulado puede ejecutar:
+etapas del filtro por fecha, productos más vendidos y tamaño medio de la canasta
+(mongomock no implementa $dateTrunc, $unionWith ni $lookup con pipeline)
+"""
+
+from datetime import datetime # Importa datetime para armar fechas de prueba.
+import pytest # Importa pytest para definir los fixtures.
+import analitica # Importa el módulo de analítica a probar.
+from conexion_db import pedidos # Importa la colección de pedidos.
+
+def linea(codigo_producto, nombre, cantidad, precio): # Define la función que arma una línea de pedido.
+    """Arma una línea con el total de la línea ya calculado."""
+    return {"codigo_producto": codigo_producto, "nombre": nombre, "cantidad": cantidad, "precio_unitario": precio, "total_comprado": cantidad * precio} # Línea del pedido.
+
+@pytest.fixture # Se usa solo en las pruebas que lo piden.
+def ventas(): # Define el fixture con tres pedidos de días distintos.
+    """Inserta tres pedidos; el producto P1 cambia de nombre entre el primero y el último."""
+    pedidos.insert_many([ # Pedidos de prueba (el último se inserta primero, para no depender del orden de inserción).
+        {"codigo_pedido": "PD3", "fecha_pedido": datetime(2024, 1, 3), "total_compra": 40.0, "productos": [linea("P1", "Teclado mecánico", 4, 10.0)]}, # Nombre nuevo.
+        {"codigo_pedido": "PD1", "fecha_pedido": datetime(2024, 1, 1), "total_compra": 30.0, "productos": [linea("P1", "Teclado", 1, 10.0), linea("P2", "Mouse", 4, 5.0)]}, # Nombre anterior.
+        {"codigo_pedido": "PD2", "fecha_pedido": datetime(2024, 1, 2), "total_compra": 50.0, "productos": [linea("P3", "Monitor", 1, 50.0)]}, # Otro producto.
+    ])
+
+def test_filtro_fechas(): # Prueba las etapas iniciales de los pipelines.
+    desde, hasta = datetime(2024, 1, 1), datetime(2024, 2, 1) # Rango de enero.
+    etapas = [{"$match": {"fecha_pedido": {"$gte": desde, "$lt": hasta}}}] # Filtro semiabierto.
+    assert analitica._filtro_fechas(desde, hasta) == etapas # Solo el $match.
+    assert analitica._filtro_fechas() == [] # Sin rango, sin etapas.
+    assert analitica._filtro_fechas(desde, hasta, incluir_archivo=True) == etapas + [{"$unionWith": {"coll": "pedidos_archivo", "pipeline": etapas}}] # El archivo, con el mismo rango.
+
+@pytest.mark.usefixtures("ventas") # Parte con los pedidos de prueba.
+def test_productos_mas_vendidos(): # Prueba el orden y el nombre informado.
+    assert list(analitica.productos_mas_vendidos()) == [ # De mayor a menor ingreso.
+        {"codigo_producto": "P1", "nombre": "Teclado mecánico", "unidades": 5, "ingresos": 50.0}, # Nombre del pedido más reciente (empata con P3: desempata el código).
+        {"codigo_producto": "P3", "nombre": "Monitor", "unidades": 1, "ingresos": 50.0}, # Mismos ingresos que P1.
+        {"codigo_producto": "P2", "nombre": "Mouse", "unidades": 4, "ingresos": 20.0}, # Menos ingresos.
+    ]
+
+@pytest.mark.usefixtures("ventas") # Parte con los pedidos de prueba.
+def test_productos_mas_vendidos_con_limite_y_rango(): # Prueba el límite y el rango de fechas.
+    assert [producto["codigo_producto"] for producto in analitica.productos_mas_vendidos(n=1)] == ["P1"] # Solo el primero (P1 va antes que P3 por código).
+    en_rango = list(analitica.productos_mas_vendidos(desde=datetime(2024, 1, 1), hasta=datetime(2024, 1, 3))) # Sin el pedido del día 3 (excluido).
+    assert [(producto["codigo_producto"], producto["nombre"]) for producto in en_rango] == [("P3", "Monitor"), ("P2", "Mouse"), ("P1", "Teclado")] # Nombre del pedido más reciente del rango.
+
+@pytest.mark.usefixtures("ventas") # Parte con los pedidos de prueba.
+def test_tamano_medio_canasta(): # Prueba los promedios por pedido.
+    assert analitica.tamano_medio_canasta() == {"pedidos": 3, "lineas_promedio": 4 / 3, "unidades_promedio": 10 / 3, "importe_promedio": 40.0} # Promedios de los tres pedidos.
@@ -0,0 +1,73 @@
+"""
+Pruebas del archivado de pedidos de archivado.py: mover por lotes sin perder ni
+duplicar pedidos, códigos ya archivados y pedidos eliminados durante el archivado
+"""
+
+from datetime import datetime, timedelta # Importa datetime y timedelta para armar fechas de prueba.
+import pytest # Importa pytest para usar los fixtures.
+import archivado # Importa el módulo de archivado a probar.
+import operaciones # Importa las operaciones para insertar y eliminar pedidos.
+from conexion_db import productos, pedidos, pedidos_archivo # Importa las colecciones.
+
+pytestmark = pytest.mark.usefixtures("cliente_y_producto") # Todas las pruebas parten con el cliente C1 y el producto P1.
+
+ANTIGUO = datetime.now() - timedelta(days=archivado.EDAD_DIAS + 30) # Fecha de un pedido que ya se debe archivar.
+
+def insertar_antiguos(*codigos): # Define la función que inserta pedidos antiguos.
+    """Inserta un pedido de una unidad por código y le pone una fecha anterior al corte."""
+    for posicion, codigo in enumerate(codigos): # Itera sobre cada código.
+        operaciones.insertar_pedido(codigo, "C1", "P1", 1) # Inserta el pedido.
+        pedidos.update_one({"codigo_pedido": codigo}, {"$set": {"fecha_pedido": ANTIGUO + timedelta(minutes=posicion)}}) # Lo deja antes del corte.
+
+def codigos(coleccion): # Define la función que lista los códigos de una colección.
+    """Devuelve los códigos de pedido de la colección, ordenados."""
+    return sorted(pedido["codigo_pedido"] for pedido in coleccion.find({}, {"codigo_pedido": 1})) # Códigos ordenados.
+
+def test_mover_lote_copia_y_borra_los_mas_antiguos(): # Prueba un lote.
+    insertar_antiguos("PD1", "PD2", "PD3") # Tres pedidos antiguos.
+    operaciones.insertar_pedido("PD4", "C1", "P1", 1) # Un pedido reciente.
+    resultado = archivado._mover_lote(archivado.fecha_corte(), 2) # Mueve un lote de dos.
+    assert resultado["movidos"] == 2 and resultado["token"] # Mueve dos y quedan más.
+    assert codigos(pedidos_archivo) == ["PD1", "PD2"] and codigos(pedidos) == ["PD3", "PD4"] # Los dos más antiguos.
+    assert archivado._mover_lote(archivado.fecha_corte(), 2, resultado["token"])["token"] is None # El siguiente lote es el último.
+    assert codigos(pedidos) == ["PD4"] # Solo queda el reciente.
+
+def test_repetir_un_lote_cortado_no_duplica(): # Prueba la ejecución repetida tras un corte.
+    insertar_antiguos("PD1", "PD2") # Dos pedidos antiguos.
+    pedidos_archivo.insert_one(pedidos.find_one({"codigo_pedido": "PD1"})) # Un corte dejó PD1 copiado pero sin borrar.
+    resultado = archivado.archivar() # Vuelve a ejecutar el archivado.
+    assert resultado["movidos"] == 2 and resultado["conflictos"] == 0 # Mueve los dos.
+    assert codigos(pedidos_archivo) == ["PD1", "PD2"] and pedidos.count_documents({}) == 0 # Sin duplicados.
+
+def test_codigo_ya_archivado_no_bloquea_el_archivado(): # Prueba un código repetido entre las colecciones.
+    insertar_antiguos("PD1", "PD2", "PD3", "PD4") # Cuatro pedidos antiguos.
+    pedidos_archivo.insert_one({"codigo_pedido": "PD1", "codigo_cliente": "C9", "fecha_pedido": ANTIGUO, "productos": []}) # Otro pedido archivado con el código PD1.
+    resultado = archivado.archivar(tamano_lote=1) # Archiva de a uno (el conflicto es el primero).
+    assert resultado["movidos"] == 3 and resultado["conflictos"] == 1 # Mueve los demás.
+    assert codigos(pedidos) == ["PD1"] # El pedido en conflicto queda en 'pedidos'.
+
+def test_pedido_eliminado_durante_el_archivado_no_revive(monkeypatch): # Prueba la carrera con eliminar_pedido (sin transacciones).
+    insertar_antiguos("PD1", "PD2") # Dos pedidos antiguos.
+    copiar = archivado._copiar # Copia original.
+    def copiar_y_eliminar(lote, sesion): # Simula un eliminar_pedido entre la lectura y la copia.
+        operaciones.eliminar_pedido("PD1") # Otro proceso elimina PD1 (y devuelve su stock).
+        return copiar(lote, sesion) # La copia escribe el documento ya leído.
+    monkeypatch.setattr(archivado, "_copiar", copiar_y_eliminar) # Usa la copia con la carrera.
+    resultado = archivado.archivar() # Archiva.
+    assert resultado["movidos"] == 1 and codigos(pedidos_archivo) == ["PD2"] # PD1 no reaparece en el archivo.
+    assert productos.find_one({"codigo_producto": "P1"})["stock"] == 9 # Solo PD2 sigue descontando stock.
+
+def test_eliminar_pedido_borra_la_copia_archivada(): # Prueba eliminar un pedido a medio archivar.
+    insertar_antiguos("PD1") # Un pedido antiguo.
+    pedidos_archivo.insert_one(pedidos.find_one({"codigo_pedido": "PD1"})) # El archivado ya lo copió.
+    operaciones.eliminar_pedido("PD1") # Se elimina antes de que el archivado lo borre.
+    assert pedidos.count_documents({}) == 0 and pedidos_archivo.count_documents({}) == 0 # No queda en ninguna colección.
+    assert archivado.archivar()["movidos"] == 0 # El archivado no tiene nada que mover.
+
+def test_no_se_inserta_un_pedido_con_codigo_archivado(capsys): # Prueba el rechazo de códigos archivados.
+    insertar_antiguos("PD1") # Un pedido antiguo.
+    archivado.archivar() # Lo archiva.
+    operaciones.insertar_pedido("PD1", "C1", "P1", 2) # Intenta reutilizar el código.
+    operaciones.insertar_pedido_multiple("PD1", "C1", [("P1", 2)]) # También con varias líneas.
+    assert capsys.readouterr().out.count("ya existe en el archivo") == 2 # Informa el problema las dos veces.
+    assert pedidos.count_documents({}) == 0 and productos.find_one({"codigo_producto": "P1"})["stock"] == 9 # No reserva ni inserta.
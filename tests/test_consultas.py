@@ -0,0 +1,138 @@
+"""
+Pruebas de consultas.py: paginación por clave (keyset), con tokens de página y
+recorridos por páginas sin repetir ni saltar documentos, búsqueda por nombre
+normalizado (exacta y por prefijo) y rangos de fechas semiabiertos [desde, hasta)
+"""
+
+from datetime import datetime, timedelta # Importa datetime y timedelta para armar fechas de prueba.
+from bson import ObjectId # Importa ObjectId para armar _id de prueba.
+import pytest # Importa pytest para parametrizar las pruebas.
+import consultas # Importa el módulo de consultas a probar.
+from conexion_db import clientes, productos # Importa las colecciones de clientes y productos.
+from operaciones import construir_cliente, construir_producto # Importa los constructores de documentos (calculan la clave de búsqueda).
+
+INICIO = datetime(2024, 1, 1) # Fecha base de los datos de prueba.
+
+def recorrer_paginas(coleccion, campo_orden, tamano_pagina): # Define la función que recorre todas las páginas.
+    """Pide página tras página con el token de la anterior y devuelve los _id en orden."""
+    vistos, token, paginas = [], None, 0 # Documentos entregados, token y páginas pedidas.
+    while True: # Hasta que no haya token.
+        pagina, token = consultas._recorrer(coleccion, {}, None, campo_orden, tamano_pagina, token) # Pide la página siguiente.
+        vistos += [documento["_id"] for documento in pagina] # Guarda los _id entregados.
+        paginas += 1 # Cuenta la página.
+        if token is None: # Si no hay más páginas.
+            return vistos, paginas # Devuelve los documentos y las páginas.
+
+def test_condicion_por_id(): # Prueba el token de un recorrido por _id.
+    ultimo = {"_id": ObjectId()} # Último documento entregado.
+    assert consultas._condicion_desde_token("_id", consultas.token_pagina(ultimo)) == {"_id": {"$gt": ultimo["_id"]}} # Continúa después del _id.
+
+def test_condicion_por_campo_desempata_por_id(): # Prueba el token de un recorrido por otro campo.
+    ultimo = {"_id": ObjectId(), "fecha_registro": INICIO} # Último documento entregado.
+    condicion = consultas._condicion_desde_token("fecha_registro", consultas.token_pagina(ultimo, "fecha_registro")) # Condición de continuación.
+    assert condicion == {"$or": [ # Valor mayor, o el mismo valor y un _id mayor.
+        {"fecha_registro": {"$gt": INICIO}}, # Fecha posterior.
+        {"fecha_registro": INICIO, "_id": {"$gt": ultimo["_id"]}} # Misma fecha, _id posterior.
+    ]}
+
+def test_preparar_recorrido_incluye_el_campo_de_orden(): # Prueba la proyección y el orden del recorrido.
+    filtro, proyeccion, orden = consultas.preparar_recorrido({"codigo": "C1"}, {"codigo": 1}, "fecha_registro") # Primera página.
+    assert filtro == {"codigo": "C1"} # Sin token, el filtro no cambia.
+    assert proyeccion == {"codigo": 1, "fecha_registro": 1} # El campo de orden viaja siempre (lo necesita el token).
+    assert orden == [("fecha_registro", 1), ("_id", 1)] # Orden estable.
+
+def test_paginas_con_fechas_repetidas(): # Prueba que los empates de fecha no repitan ni salten documentos.
+    clientes.insert_many([{"codigo": f"C{i}", "fecha_registro": INICIO + timedelta(days=i // 3)} for i in range(10)]) # Tres clientes por día.
+    esperados = [cliente["_id"] for cliente in clientes.find({}, sort=[("fecha_registro", 1), ("_id", 1)])] # Orden completo.
+    vistos, paginas = recorrer_paginas(clientes, "fecha_registro", 4) # Recorre de a 4.
+    assert vistos == esperados and paginas == 3 # Todos, una sola vez y en orden.
+
+def test_ultima_pagina_completa_no_deja_token(): # Prueba que una última página llena no pida otra vacía.
+    clientes.insert_many([{"codigo": f"C{i}"} for i in range(6)]) # Seis clientes.
+    vistos, paginas = recorrer_paginas(clientes, "_id", 3) # Recorre de a 3.
+    assert len(vistos) == 6 and paginas == 2 # Dos páginas, sin una tercera vacía.
+
+def test_paginas_sobre_pedidos_y_archivo(): # Prueba el recorrido de varias colecciones con un solo token.
+    from conexion_db import pedidos, pedidos_archivo # Importa las colecciones de pedidos.
+    for dia in range(7): # Siete pedidos, repartidos entre las dos colecciones.
+        coleccion = pedidos_archivo if dia % 2 else pedidos # Alterna la colección.
+        coleccion.insert_one({"codigo_pedido": f"PD{dia}", "fecha_pedido": INICIO + timedelta(days=dia // 2)}) # Dos pedidos por día.
+    vistos, token = [], None # Pedidos entregados y token.
+    while True: # Hasta que no haya token.
+        pagina, token = consultas._recorrer_varias((pedidos, pedidos_archivo), {}, None, "fecha_pedido", 3, token) # Pide la página siguiente.
+        vistos += [pedido["codigo_pedido"] for pedido in pagina] # Guarda los códigos entregados.
+        if token is None: # Si no hay más páginas.
+            break # Termina.
+    fechas = {f"PD{dia}": INICIO + timedelta(days=dia // 2) for dia in range(7)} # Fecha de cada pedido.
+    assert sorted(vistos) == sorted(fechas) and len(vistos) == 7 # Todos, una sola vez.
+    assert [fechas[codigo] for codigo in vistos] == sorted(fechas.values()) # En orden de fecha.
+
+@pytest.mark.parametrize("texto, clave", [ # Textos y clave normalizada esperada.
+    ("  Martínez  Ruiz ", "martinez ruiz"), # Acentos, mayúsculas y espacios repetidos.
+    ("JOSÉ ÑUÑOA", "jose nunoa"), # Mayúsculas con acento y eñe.
+    ("Straße", "strasse"), # casefold (no solo lower).
+    ("", ""), # Texto vacío.
+    (None, ""), # Sin texto.
+])
+def test_clave_busqueda(texto, clave): # Prueba la normalización de los nombres.
+    assert consultas.clave_busqueda(texto) == clave # Clave normalizada.
+
+def test_filtro_nombre_por_prefijo_escapa_el_texto(): # Prueba que el texto buscado no se interprete como expresión regular.
+    filtro = consultas.filtro_nombre("Cable (USB", prefijo=True) # Texto con caracteres especiales.
+    assert filtro["nombre_busqueda"].pattern == r"^cable\ \(usb" # Expresión anclada, con el texto normalizado y escapado.
+    assert consultas.filtro_nombre("Cable (USB") == {"nombre_busqueda": "cable (usb"} # La búsqueda exacta compara la clave.
+
+def test_buscar_clientes_por_nombre_exacto_y_por_prefijo(): # Prueba la búsqueda de clientes por nombre.
+    direccion = {"calle": "Uno", "numero": 1, "ciudad": "Santiago"} # Dirección de prueba.
+    for codigo, nombre in [("C1", "José"), ("C2", "jose"), ("C3", "Josefina"), ("C4", "Ana José")]: # Nombres parecidos.
+        clientes.insert_one(construir_cliente(codigo, nombre, "Pérez", f"{codigo}@correo.cl", "123", direccion)) # Inserta el cliente.
+    exactos, _ = consultas.buscar_clientes_por_nombre("JOSE") # Busca el nombre exacto (sin acento y en mayúsculas).
+    assert sorted(cliente.codigo for cliente, _ in exactos) == ["C1", "C2"] # Solo los que se llaman José.
+    por_prefijo, _ = consultas.buscar_clientes_por_nombre("jos", prefijo=True) # Busca por el comienzo del nombre.
+    assert sorted(cliente.codigo for cliente, _ in por_prefijo) == ["C1", "C2", "C3"] # Sin los que solo lo contienen.
+
+def test_buscar_productos_por_prefijo_paginado(): # Prueba la búsqueda de productos por prefijo, por páginas.
+    for numero, nombre in enumerate(["Cable (USB) A", "cable (usb) B", "Cable USB C", "Cárcasa", "Cable (USB) D", "Mouse"]): # Productos de prueba.
+        productos.insert_one(construir_producto(f"P{numero}", nombre, 10.0, 1)) # Inserta el producto.
+    vistos, token = [], None # Productos entregados y token.
+    while True: # Hasta que no haya token.
+        pagina, token = consultas.buscar_productos_por_nombre("CABLE (usb)", tamano_pagina=2, token=token, prefijo=True) # Pide la página siguiente.
+        vistos += [producto.nombre for producto in pagina] # Guarda los nombres entregados.
+        if token is None: # Si no hay más páginas.
+            break # Termina.
+    assert vistos == ["Cable (USB) A", "cable (usb) B", "Cable (USB) D"] # Solo los que empiezan con el texto, una vez y en orden de nombre.
+
+@pytest.mark.parametrize("desde, hasta, filtro", [ # Extremos y filtro esperado.
+    (INICIO, INICIO + timedelta(days=1), {"fecha_pedido": {"$gte": INICIO, "$lt": INICIO + timedelta(days=1)}}), # Los dos extremos.
+    (INICIO, None, {"fecha_pedido": {"$gte": INICIO}}), # Solo el inicio.
+    (None, INICIO, {"fecha_pedido": {"$lt": INICIO}}), # Solo el fin.
+    (None, None, {}), # Sin rango.
+])
+def test_filtro_rango(desde, hasta, filtro): # Prueba el filtro de un rango semiabierto.
+    assert consultas.filtro_rango("fecha_pedido", desde, hasta) == filtro # Inicio incluido y fin excluido.
+
+def test_rangos_seguidos_no_se_solapan_ni_dejan_huecos(): # Prueba los clientes registrados justo en los límites.
+    medianoche = INICIO + timedelta(days=1) # Límite entre los dos días.
+    fechas = {"C1": INICIO, "C2": medianoche - timedelta(milliseconds=1), "C3": medianoche, "C4": medianoche + timedelta(days=1)} # Fechas en los límites.
+    clientes.insert_many([{"codigo": codigo, "fecha_registro": fecha} for codigo, fecha in fechas.items()]) # Inserta los clientes.
+    def codigos(desde, hasta): # Códigos de los clientes registrados en [desde, hasta).
+        return [cliente.codigo for cliente in consultas.buscar_clientes_por_rango(desde, hasta)[0]] # Busca el rango.
+    assert codigos(INICIO, medianoche) == ["C1", "C2"] # El inicio se incluye y el fin no.
+    assert codigos(medianoche, medianoche + timedelta(days=1)) == ["C3"] # El límite cae solo en el día siguiente.
+    assert codigos(None, None) == ["C1", "C2", "C3", "C4"] # Sin extremos, todos y en orden de fecha.
+    assert clientes.count_documents(consultas.filtro_clientes_por_fecha(INICIO + timedelta(hours=15))) == 2 # El día de una fecha con hora.
+
+def test_pedidos_por_rango_con_archivo_y_cliente(): # Prueba el rango de pedidos sobre las dos colecciones.
+    from conexion_db import pedidos, pedidos_archivo # Importa las colecciones de pedidos.
+    hasta = INICIO + timedelta(days=2) # Fin del rango.
+    pedidos.insert_many([ # Pedidos recientes.
+        {"codigo_pedido": "PD1", "codigo_cliente": "C1", "fecha_pedido": hasta - timedelta(milliseconds=1), "productos": [{"codigo_producto": "P1"}]}, # Justo antes del fin.
+        {"codigo_pedido": "PD2", "codigo_cliente": "C1", "fecha_pedido": hasta, "productos": [{"codigo_producto": "P1"}]}, # En el fin (excluido).
+        {"codigo_pedido": "PD3", "codigo_cliente": "C2", "fecha_pedido": INICIO, "productos": [{"codigo_producto": "P2"}]}, # Otro cliente.
+    ])
+    pedidos_archivo.insert_one({"codigo_pedido": "PD0", "codigo_cliente": "C1", "fecha_pedido": INICIO, "productos": [{"codigo_producto": "P2"}]}) # Pedido archivado en el inicio.
+    def codigos(**filtros): # Códigos de los pedidos del rango [INICIO, hasta).
+        return [pedido.codigo_pedido for pedido in consultas.buscar_pedidos_por_rango(INICIO, hasta, **filtros)[0]] # Busca el rango.
+    assert codigos() == ["PD3", "PD1"] # Solo los pedidos recientes, en orden de fecha.
+    assert codigos(codigo_cliente="C1", incluir_archivo=True) == ["PD0", "PD1"] # Con el archivo, solo los del cliente.
+    assert codigos(codigo_producto="P2", incluir_archivo=True) == ["PD3", "PD0"] # Con el archivo, solo los que tienen el producto (misma fecha: desempata el _id).
@@ -0,0 +1,60 @@
+"""
+Pruebas del modo por lotes de consultas_interactivas.py: lectura de las líneas de
+operaciones (texto y JSON) y ejecución de un lote con errores en algunas líneas
+"""
+
+import io # Importa io para armar la entrada y la salida del lote en memoria.
+import json # Importa json para leer los resultados del lote.
+import pytest # Importa pytest para parametrizar las pruebas.
+import consultas_interactivas # Importa el módulo a probar.
+from conexion_db import productos # Importa la colección de productos.
+
+pytestmark = pytest.mark.usefixtures("cliente_y_producto") # Todas las pruebas parten con el cliente C1 y el producto P1.
+
+def ejecutar(*lineas): # Define la función que ejecuta un lote de líneas.
+    """Ejecuta las líneas como un lote y devuelve los contadores y los resultados de cada línea."""
+    salida = io.StringIO() # Archivo de resultados en memoria.
+    contadores = consultas_interactivas.ejecutar_lote(io.StringIO("".join(linea + "\n" for linea in lineas)), salida) # Ejecuta el lote.
+    return contadores, [json.loads(linea) for linea in salida.getvalue().splitlines()] # Devuelve los contadores y los resultados.
+
+@pytest.mark.parametrize("linea, esperada", [ # Líneas y operación esperada.
+    ('8 P1 "19,99"', ("8", ["P1", "19,99"])), # Texto con comillas.
+    ("actualizar_precio_producto P1 19.99", ("8", ["P1", "19.99"])), # Nombre de la operación en lugar del número.
+    ('{"opcion": 8, "argumentos": ["P1", 19.99]}', ("8", ["P1", 19.99])), # JSON con la opción como número.
+    ('{"opcion": "eliminar_pedido", "argumentos": ["PD1"]}', ("10", ["PD1"])), # JSON con el nombre de la operación.
+    ("", None), # Línea vacía.
+    ("   # comentario", None), # Comentario.
+])
+def test_leer_operacion(linea, esperada): # Prueba la interpretación de una línea.
+    assert consultas_interactivas.leer_operacion(linea) == esperada # Opción y argumentos.
+
+def test_ok_segun_el_resultado_de_la_operacion(): # Prueba que 'ok' venga de lo que devuelve la operación.
+    (total, errores), resultados = ejecutar( # Ejecuta un lote con operaciones que se realizan y que no.
+        "6 P2 Mouse 5,5 3", # Inserta un producto.
+        "8 P1 10", # El producto ya tenía ese precio.
+        "9 P9", # Elimina un producto que no existe.
+        "7 PD1 C1 P1 11", # Pide más stock del que hay.
+    )
+    assert [resultado["ok"] for resultado in resultados] == [True, True, False, False] # Resultado de cada operación.
+    assert (total, errores) == (4, 2) # Cuenta las operaciones que no se realizaron.
+    assert resultados[2]["mensajes"] == ["❌ Producto P9 no encontrado."] # Guarda los mensajes de la operación.
+    assert productos.find_one({"codigo_producto": "P2"})["precio"] == 5.5 # El precio admite coma decimal.
+
+def test_un_error_no_detiene_el_lote(monkeypatch): # Prueba que una línea con error no detenga las siguientes.
+    def fallar(codigo): # Operación que falla con un error cualquiera.
+        raise RuntimeError(f"fallo inesperado con {codigo}") # Error que no es de pymongo ni de los argumentos.
+    monkeypatch.setitem(consultas_interactivas.OPERACIONES_LOTE, "9", ("eliminar_producto", fallar)) # Reemplaza la opción 9.
+    (total, errores), resultados = ejecutar( # Ejecuta un lote con varias líneas con error.
+        "# comentario", # Se omite.
+        "9 P1", # Falla con RuntimeError.
+        "99 X", # Opción inválida.
+        "8 P1", # Falta el precio.
+        "{sin cerrar", # JSON inválido.
+        "5 C1 Ana Pérez ana@correo.cl 123 Uno 1 Santiago Chile", # Código de cliente duplicado.
+        "7 PD1 C1 P1 2", # Pedido válido.
+    )
+    assert (total, errores) == (6, 5) # Se ejecutan todas las líneas (salvo el comentario).
+    assert [resultado["linea"] for resultado in resultados] == [2, 3, 4, 5, 6, 7] # Un resultado por línea, con su número.
+    assert resultados[0] == {"linea": 2, "operacion": "eliminar_producto", "ok": False, "error": "fallo inesperado con P1"} # Informa el error.
+    assert "opción inválida" in resultados[1]["error"] # Informa la opción inválida.
+    assert resultados[-1]["ok"] and productos.find_one({"codigo_producto": "P1"})["stock"] == 8 # La última línea se ejecuta.
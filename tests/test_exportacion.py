@@ -0,0 +1,23 @@
+"""
+Pruebas de la exportación masiva de exportacion.py: particiones de _id y conversión
+de pedidos en filas
+"""
+
+import pytest # Importa pytest para parametrizar las pruebas.
+import exportacion # Importa el módulo de exportación a probar.
+from conexion_db import clientes # Importa la colección de clientes.
+
+@pytest.mark.parametrize("total, cantidad", [(0, 4), (1, 4), (10, 3), (16, 4), (17, 4), (5, 8)]) # Tamaños de colección y particiones.
+def test_particiones_cubren_la_coleccion_una_vez(total, cantidad): # Prueba los rangos de _id.
+    if total: # Si la colección tiene documentos.
+        clientes.insert_many([{"codigo": f"C{numero}"} for numero in range(total)]) # Inserta los clientes.
+    rangos = exportacion.calcular_particiones(clientes, cantidad) # Calcula los rangos.
+    tamanos = [clientes.count_documents(exportacion.filtro_particion(desde, hasta)) for desde, hasta in rangos] # Documentos por rango.
+    assert sum(tamanos) == total # Cada documento está en un solo rango.
+    assert len(rangos) <= max(1, cantidad) # No hay más rangos que los pedidos.
+    assert rangos[0][0] is None and rangos[-1][1] is None # El primero y el último no tienen límite.
+    assert max(tamanos) - min(tamanos) <= -(-total // max(1, cantidad)) # Rangos de tamaño parecido.
+
+def test_pedido_sin_lineas_da_una_fila(): # Prueba la conversión de un pedido sin líneas.
+    filas = list(exportacion.filas_pedido({"codigo_pedido": "PD1", "codigo_cliente": "C1", "total_compra": 0, "productos": []})) # Convierte el pedido.
+    assert len(filas) == 1 and filas[0]["codigo_pedido"] == "PD1" and filas[0]["linea"] is None # Una fila con la línea vacía.
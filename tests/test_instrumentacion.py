@@ -0,0 +1,78 @@
+"""
+Pruebas del oyente de métricas de instrumentacion.py con eventos armados a mano
+(mongomock no emite los eventos del monitoreo de comandos): etiqueta de la función
+que originó el comando, histograma, formato de Prometheus y revisión de planes
+"""
+
+from types import SimpleNamespace # Importa SimpleNamespace para armar los eventos de prueba.
+import pytest # Importa pytest para parametrizar las pruebas.
+from pymongo.errors import OperationFailure # Importa la excepción que devuelve el servidor simulado.
+import instrumentacion # Importa el módulo de instrumentación a probar.
+
+# Funciones con el nombre de módulo de operaciones.py: la externa llama a una auxiliar que envía el comando
+OPERACIONES = {"__name__": "operaciones"} # Variables globales del módulo simulado.
+exec( # Define las funciones en el módulo simulado.
+    "def insertar_pedido(metricas, evento):\n" # Función que llama el usuario.
+    "    _reservar(metricas, evento)\n" # Llama a la auxiliar.
+    "def _reservar(metricas, evento):\n" # Función auxiliar.
+    "    metricas.started(evento)\n", # Envía el comando.
+    OPERACIONES
+)
+
+def evento(request_id, comando="find", duracion_ms=3, **campos): # Define la función que arma un evento de comando.
+    """Arma un evento con los atributos que lee el oyente."""
+    return SimpleNamespace( # Devuelve el evento.
+        connection_id=("localhost", 27017), request_id=request_id, command_name=comando, database_name="comerciotech", # Identificación del comando.
+        command={comando: "pedidos", "filter": {"codigo_cliente": "C1"}, "lsid": {"id": 1}, "$db": "comerciotech"}, # Comando con campos de sesión.
+        duration_micros=duracion_ms * 1000, reply={"ok": 1}, **campos # Duración y respuesta.
+    )
+
+def test_etiqueta_es_la_funcion_mas_externa_de_operaciones(): # Prueba la etiqueta de los comandos.
+    metricas = instrumentacion.Metricas(muestreo=0) # Oyente sin muestra.
+    OPERACIONES["insertar_pedido"](metricas, evento(1)) # Comando enviado desde la auxiliar.
+    metricas.succeeded(evento(1)) # Respuesta del comando.
+    metricas.started(evento(2)) # Comando enviado desde fuera de operaciones.
+    metricas.failed(evento(2, duracion_ms=700)) # Falla.
+    series = {(serie["funcion"], serie["comando"]): serie for serie in metricas.a_diccionario()["series"]} # Series por función y comando.
+    assert set(series) == {("insertar_pedido", "find"), (instrumentacion.SIN_ETIQUETA, "find")} # La auxiliar no etiqueta el comando.
+    assert series[("insertar_pedido", "find")]["tramos"][instrumentacion.LIMITES_MS.index(5)] == 1 # 3 ms cae en el tramo de 5 ms.
+    assert series[(instrumentacion.SIN_ETIQUETA, "find")]["errores"] == 1 and series[(instrumentacion.SIN_ETIQUETA, "find")]["bytes"] == 0 # Cuenta el error.
+
+def test_prometheus_usa_tramos_acumulados(): # Prueba el formato de Prometheus.
+    metricas = instrumentacion.Metricas(muestreo=0) # Oyente sin muestra.
+    for numero, duracion in enumerate((1, 3, 3000)): # Tres comandos de distinta duración.
+        metricas.started(evento(numero)) # Envía el comando.
+        metricas.succeeded(evento(numero, duracion_ms=duracion)) # Respuesta.
+    texto = metricas.a_prometheus() # Métricas en formato de texto.
+    etiquetas = f'funcion="{instrumentacion.SIN_ETIQUETA}",comando="find"' # Etiquetas de la serie.
+    assert f'comerciotech_comando_duracion_ms_bucket{{{etiquetas},le="1"}} 1' in texto # Un comando hasta 1 ms.
+    assert f'comerciotech_comando_duracion_ms_bucket{{{etiquetas},le="5"}} 2' in texto # Dos hasta 5 ms (acumulado).
+    assert f'comerciotech_comando_duracion_ms_bucket{{{etiquetas},le="+Inf"}} 3' in texto # Todos en +Inf.
+    assert f"comerciotech_comando_duracion_ms_count{{{etiquetas}}} 3" in texto # Cantidad de comandos.
+
+def test_revisar_planes_marca_collscan_sin_medir_los_explain(): # Prueba la revisión de la muestra.
+    metricas = instrumentacion.Metricas(muestreo=1) # Guarda todas las consultas.
+    OPERACIONES["insertar_pedido"](metricas, evento(1)) # Consulta que recorre la colección.
+    metricas.started(evento(2, comando="insert")) # Comando que no se puede explicar (no entra en la muestra).
+    metricas.started(evento(3, comando="aggregate")) # Consulta que el servidor no puede explicar.
+    enviados = [] # Comandos explain enviados.
+
+    def command(comando): # Simula el comando explain del servidor.
+        enviados.append(comando) # Guarda el comando.
+        metricas.started(evento(99)) # El explain también pasa por el oyente.
+        if "aggregate" in comando["explain"]: # Si es el aggregate.
+            raise OperationFailure("no se puede explicar") # Falla.
+        return {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "COLLSCAN"}}}} # Plan con COLLSCAN.
+
+    encontradas = metricas.revisar_planes({"comerciotech": SimpleNamespace(command=command)}) # Revisa la muestra.
+    assert encontradas == [{"funcion": "insertar_pedido", "comando": "find", "coleccion": "pedidos", "consulta": {"find": "pedidos", "filter": {"codigo_cliente": "C1"}}}] # Sin campos de sesión.
+    assert [comando["verbosity"] for comando in enviados] == ["queryPlanner", "queryPlanner"] # Solo planificación.
+    assert metricas.a_diccionario()["series"] == [] and metricas.revisar_planes({}) == [] # Los explain no se miden y la muestra queda vacía.
+
+@pytest.mark.parametrize("plan, esperado", [ # Planes y resultado esperado.
+    ({"stage": "IXSCAN"}, False), # Índice.
+    ({"stages": [{"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}}]}, True), # COLLSCAN dentro de un aggregate.
+    ({"shards": [{"winningPlan": {"stage": "IXSCAN"}}]}, False), # Sin COLLSCAN en ningún nivel.
+])
+def test_tiene_collscan(plan, esperado): # Prueba la búsqueda de COLLSCAN en un plan.
+    assert instrumentacion._tiene_collscan(plan) is esperado # Resultado esperado.
@@ -0,0 +1,62 @@
+"""
+Pruebas de la migración de clientes de migracion_clientes.py: conversión de un cliente
+con la estructura antigua y reanudación desde el avance guardado
+"""
+
+import pytest # Importa pytest para comprobar la interrupción de la migración.
+import migracion_clientes # Importa el módulo de migración a probar.
+from conexion_db import clientes, db # Importa la colección de clientes y la base de datos.
+
+@pytest.fixture(autouse=True) # Se aplica a todas las pruebas del módulo.
+def sin_indice_de_codigo(): # Define el fixture que quita el índice único de los códigos.
+    """mongomock no aplica el partialFilterExpression del índice: trataría a todos los clientes sin 'codigo' como duplicados."""
+    clientes.drop_index("codigo_1") # Quita el índice único de los códigos de cliente.
+
+def antiguo(numero): # Define la función que arma un cliente con la estructura antigua.
+    """Devuelve un cliente plano, con 'identificador' en lugar de 'codigo'."""
+    return {"identificador": f"C{numero}", "nombre": f"José {numero}", "apellidos": "Núñez", "email": f"c{numero}@correo.cl", "telefono": "123"} # Cliente antiguo.
+
+def test_convertir_cliente_plano(): # Prueba la conversión de un cliente con la estructura antigua.
+    actualizacion = migracion_clientes.convertir(dict(antiguo(1), nombre="  José  María ")) # Arma la actualización.
+    assert actualizacion["$set"] == { # Código, sub-diccionario y clave de búsqueda.
+        "codigo": "C1", # El código sale de 'identificador'.
+        "datos": {"nombre": "  José  María ", "apellidos": "Núñez", "email": "c1@correo.cl", "telefono": "123"}, # Los campos planos pasan a 'datos'.
+        "nombre_busqueda": "jose maria" # Nombre normalizado.
+    }
+    assert set(actualizacion["$unset"]) == {"identificador", "nombre", "apellidos", "email", "telefono"} # Quita los campos antiguos.
+
+def test_convertir_prioriza_codigo_y_datos(): # Prueba un cliente a medio migrar.
+    documento = {"codigo": "C2", "identificador": "X", "nombre": "Viejo", "email": "viejo@correo.cl", "datos": {"nombre": "Nuevo"}} # Tiene campos de las dos estructuras.
+    actualizacion = migracion_clientes.convertir(documento) # Arma la actualización.
+    assert actualizacion["$set"]["codigo"] == "C2" # 'codigo' tiene prioridad sobre 'identificador'.
+    assert actualizacion["$set"]["datos"] == {"nombre": "Nuevo", "email": "viejo@correo.cl"} # 'datos' tiene prioridad sobre los campos planos.
+    assert actualizacion["$set"]["nombre_busqueda"] == "nuevo" # La clave sale del nombre que queda.
+
+def test_convertir_sin_codigo(): # Prueba un cliente que no se puede identificar.
+    assert migracion_clientes.convertir({"nombre": "Ana"}) is None # No se migra.
+
+def test_migrar_todos(): # Prueba una migración completa en varios lotes.
+    clientes.insert_many([antiguo(numero) for numero in range(5)] + [{"nombre": "Sin código"}]) # Cinco clientes antiguos y uno sin código.
+    avance = migracion_clientes.migrar(tamano_lote=2) # Migra de a dos clientes.
+    assert (avance["migrados"], avance["sin_codigo"], avance["pendientes"]) == (5, 1, 1) # Solo queda el cliente sin código.
+    assert clientes.count_documents({"identificador": {"$exists": True}}) == 0 # No quedan campos antiguos.
+    assert clientes.find_one({"codigo": "C3"})["datos"]["nombre"] == "José 3" # Los datos pasan a 'datos'.
+    assert db.migraciones.find_one({"_id": migracion_clientes.MIGRACION})["ultimo_id"] is None # La próxima ejecución revisa todo.
+
+def test_migracion_interrumpida_continua_desde_el_avance(monkeypatch): # Prueba la reanudación.
+    clientes.insert_many([antiguo(numero) for numero in range(5)]) # Cinco clientes antiguos.
+    guardar_avance = migracion_clientes._guardar_avance # Guarda la función original.
+    def guardar_e_interrumpir(migracion, avance): # Guarda el avance del primer lote y simula una interrupción.
+        guardar_avance(migracion, avance) # Guarda el avance.
+        raise KeyboardInterrupt # Interrumpe la migración.
+    monkeypatch.setattr(migracion_clientes, "_guardar_avance", guardar_e_interrumpir) # Interrumpe después del primer lote.
+    with pytest.raises(KeyboardInterrupt): # La migración se interrumpe.
+        migracion_clientes.migrar(tamano_lote=2) # Migra el primer lote.
+    monkeypatch.setattr(migracion_clientes, "_guardar_avance", guardar_avance) # Restaura la función original.
+    guardado = db.migraciones.find_one({"_id": migracion_clientes.MIGRACION}) # Avance guardado.
+    assert guardado["migrados"] == 2 and guardado["ultimo_id"] == clientes.find_one({"codigo": "C1"})["_id"] # Se guardó el primer lote.
+
+    clientes.update_one({"codigo": "C0"}, {"$unset": {"nombre_busqueda": ""}}) # Un cliente anterior al avance vuelve a quedar pendiente.
+    avance = migracion_clientes.migrar(tamano_lote=2) # Continúa la migración.
+    assert (avance["migrados"], avance["pendientes"]) == (5, 1) # Migra los que siguen al avance, pero no revisa los anteriores.
+    assert migracion_clientes.migrar(tamano_lote=2)["pendientes"] == 0 # Una nueva ejecución empieza desde el principio.
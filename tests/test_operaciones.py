@@ -0,0 +1,84 @@
+"""
+Pruebas de la inserción de pedidos de operaciones.py: reserva del stock y devolución
+del stock reservado cuando el pedido no se puede insertar
+"""
+
+import pytest # Importa pytest para parametrizar las pruebas.
+import operaciones # Importa el módulo de operaciones a probar.
+from conexion_db import productos, pedidos # Importa las colecciones.
+
+pytestmark = pytest.mark.usefixtures("cliente_y_producto") # Todas las pruebas parten con el cliente C1 y el producto P1.
+
+def stock(codigo_producto="P1"): # Define la función que lee el stock de un producto.
+    """Devuelve el stock actual del producto en la base de datos."""
+    return productos.find_one({"codigo_producto": codigo_producto})["stock"] # Stock guardado.
+
+def test_insertar_pedido_reserva_stock_y_guarda_precio(): # Prueba el caso exitoso.
+    operaciones.insertar_pedido("PD1", "C1", "P1", 3) # Inserta un pedido de 3 unidades.
+    pedido = pedidos.find_one({"codigo_pedido": "PD1"}) # Lee el pedido insertado.
+    assert stock() == 7 # Se descontaron las 3 unidades.
+    assert pedido["productos"][0]["precio_unitario"] == 10.0 # El precio es el del producto al reservar.
+    assert pedido["total_compra"] == 30.0 # El total corresponde a la cantidad por el precio.
+
+def test_insertar_pedido_sin_stock_no_descuenta(capsys): # Prueba la falta de stock.
+    operaciones.insertar_pedido("PD1", "C1", "P1", 11) # Pide más de lo que hay.
+    assert "Stock insuficiente" in capsys.readouterr().out # Informa el problema.
+    assert stock() == 10 and pedidos.count_documents({}) == 0 # No cambia nada.
+
+def test_insertar_pedido_producto_inexistente(capsys): # Prueba un producto que no existe.
+    operaciones.insertar_pedido("PD1", "C1", "P9", 1) # Pide un producto inexistente.
+    assert "Producto no encontrado" in capsys.readouterr().out # Informa el problema.
+    assert pedidos.count_documents({}) == 0 # No inserta el pedido.
+
+@pytest.mark.parametrize("cantidad", [0, -2, 1.5, "3", True]) # Cantidades no válidas.
+def test_insertar_pedido_rechaza_cantidades_invalidas(capsys, cantidad): # Prueba la validación de la cantidad.
+    operaciones.insertar_pedido("PD1", "C1", "P1", cantidad) # Intenta insertar el pedido.
+    assert "Cantidad inválida" in capsys.readouterr().out # Informa el problema.
+    assert stock() == 10 and pedidos.count_documents({}) == 0 # No reserva ni inserta.
+
+def test_insertar_pedido_duplicado_devuelve_stock(capsys): # Prueba la devolución del stock.
+    operaciones.insertar_pedido("PD1", "C1", "P1", 2) # Primer pedido.
+    operaciones.insertar_pedido("PD1", "C1", "P1", 4) # Mismo código: la inserción falla después de reservar.
+    assert "No se pudo insertar el pedido PD1" in capsys.readouterr().out # Informa el problema.
+    assert stock() == 8 # Solo queda descontado el primer pedido.
+    assert pedidos.count_documents({}) == 1 # El segundo pedido no se insertó.
+
+@pytest.fixture # Se usa solo en las pruebas de pedidos con varios productos.
+def segundo_producto(): # Define el fixture con un segundo producto.
+    """Inserta el producto P2 (precio 5, stock 2)."""
+    productos.insert_one(operaciones.construir_producto("P2", "Mouse", 5.0, 2)) # Producto de prueba con poco stock.
+
+@pytest.mark.usefixtures("segundo_producto") # Usa el segundo producto.
+def test_pedido_multiple_une_lineas_repetidas(): # Prueba la unión de líneas del mismo producto.
+    operaciones.insertar_pedido_multiple("PD1", "C1", [("P1", 2), ("P2", 1), ("P1", 3)]) # P1 aparece dos veces.
+    pedido = pedidos.find_one({"codigo_pedido": "PD1"}) # Lee el pedido insertado.
+    assert [(linea["codigo_producto"], linea["cantidad"]) for linea in pedido["productos"]] == [("P1", 5), ("P2", 1)] # Una línea por producto.
+    assert pedido["total_compra"] == 55.0 # 5 x 10 + 1 x 5.
+    assert stock("P1") == 5 and stock("P2") == 1 # Se descontó el total de cada producto.
+
+@pytest.mark.usefixtures("segundo_producto") # Usa el segundo producto.
+def test_pedido_multiple_usa_el_precio_al_reservar(): # Prueba que el precio no venga de la caché.
+    operaciones.buscar_productos(["P1"]) # Deja P1 en la caché con el precio 10.
+    productos.update_one({"codigo_producto": "P1"}, {"$set": {"precio": 12.0}}) # Otro proceso cambia el precio.
+    operaciones.insertar_pedido_multiple("PD1", "C1", [("P1", 1)]) # Inserta el pedido.
+    assert pedidos.find_one({"codigo_pedido": "PD1"})["productos"][0]["precio_unitario"] == 12.0 # Usa el precio vigente.
+
+@pytest.mark.usefixtures("segundo_producto") # Usa el segundo producto.
+def test_pedido_multiple_sin_stock_devuelve_lo_reservado(capsys): # Prueba la devolución del stock.
+    operaciones.insertar_pedido_multiple("PD1", "C1", [("P1", 4), ("P2", 3)]) # P2 no alcanza (después de reservar P1).
+    assert "Stock insuficiente" in capsys.readouterr().out # Informa el problema.
+    assert stock("P1") == 10 and stock("P2") == 2 # El stock queda como estaba.
+    assert pedidos.count_documents({}) == 0 # No inserta el pedido.
+
+@pytest.mark.usefixtures("segundo_producto") # Usa el segundo producto.
+def test_pedido_multiple_duplicado_devuelve_stock(capsys): # Prueba la devolución del stock si falla la inserción.
+    operaciones.insertar_pedido("PD1", "C1", "P1", 1) # Primer pedido.
+    operaciones.insertar_pedido_multiple("PD1", "C1", [("P1", 2), ("P2", 2)]) # Mismo código: la inserción falla después de reservar.
+    assert "No se pudo insertar el pedido PD1" in capsys.readouterr().out # Informa el problema.
+    assert stock("P1") == 9 and stock("P2") == 2 # Solo queda descontado el primer pedido.
+
+@pytest.mark.parametrize("lineas", [[], [("P1", 0)], [("P1", 2), ("P2", -1)]]) # Pedidos no válidos.
+def test_pedido_multiple_rechaza_cantidades_invalidas(capsys, lineas): # Prueba la validación de las líneas.
+    operaciones.insertar_pedido_multiple("PD1", "C1", lineas) # Intenta insertar el pedido.
+    assert "Cantidad inválida" in capsys.readouterr().out # Informa el problema.
+    assert stock() == 10 and pedidos.count_documents({}) == 0 # No reserva ni inserta.
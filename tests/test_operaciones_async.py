@@ -0,0 +1,95 @@
+"""
+Pruebas de operaciones_async.py sobre la base en memoria (mongomock), con un adaptador
+que expone sus colecciones con la interfaz asíncrona de AsyncMongoClient.
+Se omiten si la versión instalada de pymongo no tiene AsyncMongoClient (ver requirements.txt)
+"""
+
+import asyncio # Importa asyncio para ejecutar las operaciones asíncronas.
+import pytest # Importa pytest para los fixtures y la omisión.
+import pymongo # Importa pymongo para comprobar si tiene el cliente asíncrono.
+
+pytestmark = [ # Marcas de todas las pruebas del archivo.
+    pytest.mark.skipif(not hasattr(pymongo, "AsyncMongoClient"), reason="requiere pymongo 4.13 o superior (AsyncMongoClient)"), # Sin cliente asíncrono no se prueban.
+    pytest.mark.usefixtures("cliente_y_producto", "colecciones_async") # Parten con el cliente C1 y el producto P1.
+]
+
+import conexion_db # Importa el módulo de conexión.
+import consultas_async # Importa las consultas asíncronas (para reemplazar sus colecciones).
+import operaciones_async # Importa las operaciones asíncronas a probar.
+from conexion_db import db, clientes, productos, pedidos # Importa las colecciones síncronas (para revisar el resultado).
+
+class _CursorAsync: # Define el cursor asíncrono sobre un cursor de mongomock.
+    """Cursor con la interfaz asíncrona (async for, to_list, close)."""
+
+    def __init__(self, cursor): # Define el constructor.
+        self.cursor = cursor # Cursor de mongomock.
+
+    def __aiter__(self): # Se usa en async for.
+        return self # El cursor es su propio iterador.
+
+    async def __anext__(self): # Entrega el siguiente documento.
+        try: # Intenta leer el siguiente.
+            return next(self.cursor) # Documento siguiente.
+        except StopIteration: # Si no quedan documentos.
+            raise StopAsyncIteration # Termina el recorrido.
+
+    async def to_list(self, cantidad=None): # Devuelve los documentos en una lista.
+        return list(self.cursor)[:cantidad] if cantidad else list(self.cursor) # Lista de documentos.
+
+    async def close(self): # Cierra el cursor.
+        self.cursor.close() # Cierra el cursor de mongomock.
+
+class _ColeccionAsync: # Define la colección asíncrona sobre una colección de mongomock.
+    """Colección con los métodos de escritura y lectura como corrutinas; find y aggregate entregan cursores."""
+
+    def __init__(self, coleccion): # Define el constructor.
+        self.coleccion = coleccion # Colección de mongomock.
+
+    def find(self, *argumentos, session=None, **opciones): # Consulta sin esperar (como en AsyncMongoClient).
+        return _CursorAsync(self.coleccion.find(*argumentos, **opciones)) # Entrega el cursor asíncrono.
+
+    async def aggregate(self, *argumentos, session=None, **opciones): # Agregación (en AsyncMongoClient se espera).
+        return _CursorAsync(self.coleccion.aggregate(*argumentos, **opciones)) # Entrega el cursor asíncrono.
+
+    def __getattr__(self, nombre): # Los demás métodos se vuelven corrutinas.
+        metodo = getattr(self.coleccion, nombre) # Método de mongomock.
+        async def llamar(*argumentos, session=None, **opciones): # Corrutina que lo llama (mongomock no usa sesiones).
+            return metodo(*argumentos, **opciones) # Resultado del método.
+        return llamar # Devuelve la corrutina.
+
+@pytest.fixture # Fixture de este archivo.
+def colecciones_async(monkeypatch): # Define el fixture que conecta los módulos asíncronos con la base en memoria.
+    """Hace que operaciones_async y consultas_async usen las colecciones de mongomock."""
+    obtener = lambda nombre: _ColeccionAsync(conexion_db.obtener_coleccion(nombre)) # Colección asíncrona sobre la de mongomock.
+    monkeypatch.setattr(operaciones_async, "obtener_coleccion_async", obtener) # Para las operaciones.
+    monkeypatch.setattr(consultas_async, "obtener_coleccion_async", obtener) # Para las consultas.
+
+def test_insertar_pedido_reserva_y_resume(): # Prueba la inserción de un pedido.
+    asyncio.run(operaciones_async.insertar_pedido("PD1", "C1", "P1", 3)) # Inserta un pedido de 3 unidades.
+    assert productos.find_one({"codigo_producto": "P1"})["stock"] == 7 # Se descontó el stock.
+    assert pedidos.find_one({"codigo_pedido": "PD1"})["total_compra"] == 30.0 # Con el precio reservado.
+    assert clientes.find_one({"codigo": "C1"})["resumen_pedidos"]["cantidad"] == 1 # Y se sumó al resumen del cliente.
+
+def test_insertar_pedido_duplicado_devuelve_stock(capsys): # Prueba la devolución del stock.
+    async def insertar_dos(): # Inserta dos pedidos con el mismo código.
+        await operaciones_async.insertar_pedido("PD1", "C1", "P1", 2) # Primer pedido.
+        await operaciones_async.insertar_pedido("PD1", "C1", "P1", 4) # Falla después de reservar.
+    asyncio.run(insertar_dos()) # Ejecuta las inserciones.
+    assert "No se pudo insertar el pedido PD1" in capsys.readouterr().out # Informa el problema.
+    assert productos.find_one({"codigo_producto": "P1"})["stock"] == 8 # Solo queda descontado el primero.
+
+def test_pedido_multiple_sin_stock_devuelve_lo_reservado(capsys): # Prueba la reserva de varias líneas.
+    productos.insert_one(operaciones_async.construir_producto("P2", "Mouse", 5.0, 1)) # Producto con poco stock.
+    asyncio.run(operaciones_async.insertar_pedido_multiple("PD1", "C1", [("P1", 4), ("P2", 2)])) # P2 no alcanza.
+    assert "Stock insuficiente" in capsys.readouterr().out # Informa el problema.
+    assert [producto["stock"] for producto in productos.find({}, sort=[("codigo_producto", 1)])] == [10, 1] # El stock queda como estaba.
+
+@pytest.mark.parametrize("nuevo", [float("nan"), float("inf"), True, 0]) # Precios no válidos.
+def test_precio_invalido_se_rechaza(capsys, nuevo): # Prueba la validación compartida con la versión síncrona.
+    asyncio.run(operaciones_async.actualizar_precio_producto("P1", nuevo)) # Intenta cambiar el precio.
+    assert "Precio inválido" in capsys.readouterr().out # Informa el problema.
+    assert productos.find_one({"codigo_producto": "P1"})["precio"] == 10.0 and db["historial_precios"].count_documents({}) == 0 # No escribe nada.
+
+def test_pedidos_de_cliente_inexistente(capsys): # Prueba la consulta de un cliente que no existe.
+    asyncio.run(operaciones_async.consultar_pedidos_por_cliente("C9")) # Consulta sus pedidos.
+    assert "C9" in capsys.readouterr().out # Informa que no existe.
@@ -0,0 +1,72 @@
+"""
+Pruebas de los cambios de precio de precios.py: validación del precio nuevo,
+simulación frente a aplicación e historial de precios
+"""
+
+import pytest # Importa pytest para parametrizar las pruebas.
+import operaciones # Importa las operaciones (cambio de precio de un producto).
+import precios # Importa el módulo de precios a probar.
+from conexion_db import db, productos # Importa la base de datos y la colección de productos.
+from operaciones import construir_producto # Importa el constructor de documentos de productos.
+
+pytestmark = pytest.mark.usefixtures("cliente_y_producto") # Todas las pruebas parten con el producto P1 (precio 10).
+
+def precio(codigo_producto="P1"): # Define la función que lee el precio de un producto.
+    """Devuelve el precio guardado del producto."""
+    return productos.find_one({"codigo_producto": codigo_producto})["precio"] # Precio actual.
+
+@pytest.mark.parametrize("nuevo", [float("nan"), float("inf"), float("-inf"), "nan", True, 0, -5, "abc", None, 10 ** 400]) # Precios no válidos.
+def test_precio_invalido_se_rechaza(capsys, nuevo): # Prueba la validación del precio nuevo.
+    operaciones.actualizar_precio_producto("P1", nuevo) # Intenta cambiar el precio.
+    assert "Precio inválido" in capsys.readouterr().out # Informa el problema.
+    assert precio() == 10.0 and db[precios.HISTORIAL_PRECIOS].count_documents({}) == 0 # No cambia el precio ni escribe historial.
+
+def test_cambio_precio_redondea_al_centavo(): # Prueba el redondeo.
+    cambio = precios.cambio_precio("P1", 10.0, "12.345", None, "manual") # Precio nuevo como texto.
+    assert cambio["precio_nuevo"] == 12.35 and cambio["precio_anterior"] == 10.0 # Redondeado al centavo.
+
+def historial(): # Define la función que lee el historial completo.
+    """Devuelve las entradas del historial de precios, sin _id, por código de producto."""
+    return sorted(db[precios.HISTORIAL_PRECIOS].find({}, {"_id": 0}), key=lambda entrada: entrada["codigo_producto"]) # Entradas del historial.
+
+@pytest.fixture # Se usa solo en las pruebas que lo piden.
+def catalogo(): # Define el fixture con más productos.
+    """Agrega P2 (precio 20, stock 5) y P3 (precio 30, stock 2, descontinuado) al producto P1."""
+    productos.insert_many([construir_producto("P2", "Mouse", 20.0, 5), construir_producto("P3", "Monitor", 30.0, 2, "descontinuado")]) # Productos de prueba.
+
+def test_simular_lista_no_escribe(catalogo): # Prueba la simulación de una lista de precios.
+    lista = [("P1", 12), ("P2", 20), ("P3", "abc"), ("P9", 5), ("P1", 11)] # Un cambio, uno igual, uno inválido, uno inexistente y un código repetido.
+    simulado = precios.actualizar_precios(lista, simular=True, tamano_lote=2) # Simula el cambio en bloques de dos.
+    assert (simulado["revisados"], simulado["cambiados"], simulado["sin_cambio"]) == (3, 1, 1) # Contadores del cambio.
+    assert simulado["rechazados"] == ["P3"] and simulado["no_encontrados"] == ["P9"] # Informa el precio inválido y el código inexistente.
+    assert simulado["ejemplos"] == [{"codigo_producto": "P1", "precio_anterior": 10.0, "precio_nuevo": 11.0}] # Vale el último precio del código repetido.
+    assert simulado["variacion_inventario"] == 10.0 # Un peso más por las 10 unidades de P1.
+    assert precio("P1") == 10.0 and historial() == [] # No cambia precios ni escribe historial.
+
+def test_aplicar_lista_es_igual_a_la_simulacion(catalogo): # Prueba que aplicar dé los mismos contadores que simular.
+    lista = [("P1", 12), ("P2", 20), ("P3", "abc"), ("P9", 5)] # Un cambio, uno igual, uno inválido y uno inexistente.
+    simulado = precios.actualizar_precios(lista, simular=True) # Simula el cambio.
+    aplicado = precios.actualizar_precios(lista) # Aplica el cambio.
+    assert {clave: valor for clave, valor in aplicado.items() if clave not in ("lote", "simulado")} == {clave: valor for clave, valor in simulado.items() if clave not in ("lote", "simulado")} # Mismo resultado.
+    assert [precio(codigo) for codigo in ("P1", "P2", "P3")] == [12.0, 20.0, 30.0] # Solo cambia P1.
+    [entrada] = historial() # Una entrada por producto cambiado.
+    assert {clave: entrada[clave] for clave in ("codigo_producto", "precio_anterior", "precio_nuevo", "lote", "origen")} == {"codigo_producto": "P1", "precio_anterior": 10.0, "precio_nuevo": 12.0, "lote": aplicado["lote"], "origen": "lista"} # Entrada del historial.
+
+def test_porcentaje_con_filtro(catalogo): # Prueba la regla porcentual sobre los productos activos.
+    simulado = precios.aplicar_porcentaje(10, {"estado": "activo"}, simular=True) # Simula una subida del 10%.
+    assert (simulado["cambiados"], simulado["variacion_inventario"]) == (2, 20.0) # P1 (+1 x 10) y P2 (+2 x 5).
+    assert historial() == [] and precio("P1") == 10.0 # La simulación no escribe nada.
+    aplicado = precios.aplicar_porcentaje(10, {"estado": "activo"}) # Aplica la subida.
+    assert [precio(codigo) for codigo in ("P1", "P2", "P3")] == [11.0, 22.0, 30.0] # P3 está descontinuado.
+    assert [(entrada["codigo_producto"], entrada["precio_anterior"], entrada["precio_nuevo"], entrada["origen"]) for entrada in historial()] == [ # Una entrada por producto cambiado.
+        ("P1", 10.0, 11.0, "+10% estado=activo"), ("P2", 20.0, 22.0, "+10% estado=activo") # Con la regla como origen.
+    ]
+    assert {entrada["lote"] for entrada in historial()} == {aplicado["lote"]} # Todas del mismo lote.
+
+def test_historial_de_un_producto(): # Prueba el historial de los cambios manuales.
+    operaciones.actualizar_precio_producto("P1", 12) # Primer cambio.
+    operaciones.actualizar_precio_producto("P1", 12) # Mismo precio: no escribe historial.
+    operaciones.actualizar_precio_producto("P1", "9.5") # Segundo cambio (el precio puede venir como texto).
+    assert sorted((entrada["precio_anterior"], entrada["precio_nuevo"], entrada["origen"]) for entrada in precios.historial_producto("P1")) == [ # Una entrada por cambio.
+        (10.0, 12.0, "manual"), (12.0, 9.5, "manual") # Los dos cambios.
+    ]
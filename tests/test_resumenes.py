@@ -0,0 +1,85 @@
+"""
+Pruebas de resumenes.py: el resumen de pedidos de cada cliente (la actualización que
+se arma por cliente y su efecto al insertar y eliminar pedidos) y los resúmenes diarios
+por producto y por cliente, cuyas filas se borran al quedar sin pedidos
+"""
+
+from datetime import datetime # Importa datetime para armar fechas de prueba.
+import pytest # Importa pytest para usar los fixtures.
+import resumenes # Importa el módulo de resúmenes a probar.
+from conexion_db import db, clientes # Importa la base de datos y la colección de clientes.
+
+def pedido(codigo, dia, total=10.0, codigo_cliente="C1"): # Define la función que arma un pedido de prueba.
+    """Arma un pedido con los campos de CAMPOS_RESUMEN (sin líneas)."""
+    fecha = datetime(2024, 1, dia) if dia else None # Fecha del pedido (o sin fecha).
+    return {"codigo_pedido": codigo, "codigo_cliente": codigo_cliente, "fecha_pedido": fecha, "total_compra": total, "productos": []} # Documento del pedido.
+
+def test_ficha_al_insertar(): # Prueba la actualización al insertar pedidos.
+    lista = [{"codigo_pedido": "A", "fecha_pedido": datetime(2024, 1, 2)}, {"codigo_pedido": "B", "fecha_pedido": datetime(2024, 1, 5)}] # Pedidos nuevos.
+    actualizacion = resumenes._actualizacion_ficha(1, 2, 30.0, lista) # Arma la actualización.
+    assert actualizacion["$inc"] == {"resumen_pedidos.cantidad": 2, "resumen_pedidos.total": 30.0} # Suma cantidad y total.
+    assert actualizacion["$push"]["resumen_pedidos.recientes"] == {"$each": lista, "$sort": {"fecha_pedido": -1}, "$slice": resumenes.RECIENTES} # Agrega a los recientes, ordenados y recortados.
+    assert actualizacion["$max"] == {"resumen_pedidos.ultimo_pedido": datetime(2024, 1, 5)} # Guarda la fecha más nueva.
+
+def test_ficha_al_insertar_sin_fechas(): # Prueba pedidos sin fecha.
+    actualizacion = resumenes._actualizacion_ficha(1, 1, 5.0, [{"codigo_pedido": "A", "fecha_pedido": None}]) # Arma la actualización.
+    assert "$max" not in actualizacion # No toca la fecha del último pedido.
+
+def test_ficha_al_eliminar(): # Prueba la actualización al eliminar pedidos.
+    actualizacion = resumenes._actualizacion_ficha(-1, 2, 30.0, [{"codigo_pedido": "A", "fecha_pedido": None}, {"codigo_pedido": "B", "fecha_pedido": None}]) # Arma la actualización.
+    assert actualizacion == { # Resta y quita los pedidos de los recientes.
+        "$inc": {"resumen_pedidos.cantidad": -2, "resumen_pedidos.total": -30.0}, # Resta cantidad y total.
+        "$pull": {"resumen_pedidos.recientes": {"codigo_pedido": {"$in": ["A", "B"]}}} # Quita los pedidos.
+    }
+
+def test_resumen_se_mantiene_al_insertar_y_eliminar(): # Prueba el efecto sobre la base de datos.
+    clientes.insert_one({"codigo": "C1", "resumen_pedidos": resumenes.resumen_vacio()}) # Cliente con resumen.
+    nuevos = [pedido(f"PD{dia}", dia) for dia in range(1, 8)] # Siete pedidos, uno por día.
+    resumenes.actualizar_resumenes(nuevos[:4]) # Inserta los primeros cuatro.
+    resumenes.actualizar_resumenes(nuevos[4:]) # Y luego los demás.
+    resumen = clientes.find_one({"codigo": "C1"})["resumen_pedidos"] # Lee el resumen.
+    assert resumen["cantidad"] == 7 and resumen["total"] == 70.0 # Cuenta todos los pedidos.
+    assert resumen["ultimo_pedido"] == datetime(2024, 1, 7) # Fecha del más nuevo.
+    assert [reciente["codigo_pedido"] for reciente in resumen["recientes"]] == ["PD7", "PD6", "PD5", "PD4", "PD3"] # Solo los RECIENTES más nuevos.
+    resumenes.actualizar_resumenes([nuevos[6]], -1) # Elimina el más nuevo.
+    resumen = clientes.find_one({"codigo": "C1"})["resumen_pedidos"] # Lee el resumen.
+    assert resumen["cantidad"] == 6 and resumen["total"] == 60.0 # Lo descuenta.
+    assert "PD7" not in [reciente["codigo_pedido"] for reciente in resumen["recientes"]] # Lo quita de los recientes.
+
+def test_cliente_sin_resumen_no_recibe_uno_parcial(): # Prueba que solo se mantengan los resúmenes existentes.
+    clientes.insert_one({"codigo": "C1"}) # Cliente creado antes de que existiera el resumen.
+    resumenes.actualizar_resumenes([pedido("PD1", 1)]) # Inserta un pedido suyo.
+    assert "resumen_pedidos" not in clientes.find_one({"codigo": "C1"}) # Sigue sin resumen (lo completa completar_resumenes).
+
+@pytest.mark.usefixtures("cliente_y_producto") # Usa el cliente C1 (con resumen) y el producto P1.
+def test_insertar_pedido_actualiza_el_resumen_del_cliente(): # Prueba la actualización al insertar un pedido de una línea.
+    import operaciones # Importa las operaciones.
+    operaciones.insertar_pedido("PD1", "C1", "P1", 2) # Inserta un pedido de 2 unidades de 10.
+    resumen = clientes.find_one({"codigo": "C1"})["resumen_pedidos"] # Lee el resumen.
+    assert resumen["cantidad"] == 1 and resumen["total"] == 20.0 # Cuenta el pedido.
+    assert [reciente["codigo_pedido"] for reciente in resumen["recientes"]] == ["PD1"] # Lo agrega a los recientes.
+    assert db[resumenes.RESUMEN_CLIENTE].find_one({"codigo_cliente": "C1"})["pedidos"] == 1 # Y a la fila diaria del cliente.
+
+def test_fila_diaria_se_borra_al_quedar_sin_pedidos(): # Prueba los resúmenes diarios al eliminar pedidos.
+    lineas = [{"codigo_producto": "P1", "cantidad": 2, "total_comprado": 20.0}] # Una línea de 2 unidades.
+    primero, segundo = (dict(pedido(codigo, 3, 20.0), productos=lineas) for codigo in ("PD1", "PD2")) # Dos pedidos del mismo día.
+    resumenes.actualizar_resumenes([primero, segundo]) # Inserta los dos.
+    resumenes.actualizar_resumenes([primero], -1) # Elimina el primero.
+    assert list(resumenes.leer_resumen(resumenes.RESUMEN_PRODUCTO)) == [{"dia": datetime(2024, 1, 3), "codigo_producto": "P1", "lineas": 1, "unidades": 2, "ingresos": 20.0}] # Queda la fila con el segundo.
+    assert list(resumenes.leer_resumen(resumenes.RESUMEN_CLIENTE)) == [{"dia": datetime(2024, 1, 3), "codigo_cliente": "C1", "pedidos": 1, "ingresos": 20.0}] # También la del cliente.
+    resumenes.actualizar_resumenes([segundo], -1) # Elimina el segundo.
+    assert db[resumenes.RESUMEN_PRODUCTO].count_documents({}) == 0 # La fila del producto se borra al quedar en cero.
+    assert db[resumenes.RESUMEN_CLIENTE].count_documents({}) == 0 # Y la del cliente.
+
+def test_leer_resumen_por_rango_de_dias(): # Prueba la lectura de un rango de días.
+    resumenes.actualizar_resumenes([pedido(f"PD{dia}", dia) for dia in (1, 2, 3)] + [pedido("PD0", None)]) # Tres días y un pedido sin fecha.
+    filas = resumenes.leer_resumen(resumenes.RESUMEN_CLIENTE, datetime(2024, 1, 1, 18), datetime(2024, 1, 3), codigo_cliente="C1") # Desde el día 1 (con hora) hasta el 3 (excluido).
+    assert [fila["dia"] for fila in filas] == [datetime(2024, 1, 1), datetime(2024, 1, 2)] # El pedido sin fecha no tiene fila.
+
+@pytest.mark.usefixtures("cliente_y_producto") # Usa el cliente C1 (con resumen) y el producto P1.
+def test_eliminar_pedido_borra_las_filas_diarias(): # Prueba el efecto de eliminar el único pedido del día.
+    import operaciones # Importa las operaciones.
+    operaciones.insertar_pedido("PD1", "C1", "P1", 2) # Inserta un pedido.
+    assert db[resumenes.RESUMEN_PRODUCTO].count_documents({}) == 1 # Crea la fila del producto.
+    operaciones.eliminar_pedido("PD1") # Lo elimina.
+    assert db[resumenes.RESUMEN_PRODUCTO].count_documents({}) == 0 and db[resumenes.RESUMEN_CLIENTE].count_documents({}) == 0 # No quedan filas en cero.